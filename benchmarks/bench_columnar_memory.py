@@ -0,0 +1,63 @@
+"""
+Memory benchmark: 大型行情資料集以 list-of-dict 與 ColumnarDataset 儲存的記憶體用量。
+用法: PYTHONPATH=src python benchmarks/bench_columnar_memory.py
+"""
+import gc
+import json
+import random
+import time
+import tracemalloc
+from taiwan_finance_mcp_mega.utils.columnar import ColumnarDataset
+
+
+def stock_day_all(n: int):
+    return [{
+        "Date": "1150115", "Code": f"{1000 + i}", "Name": f"公司{i}",
+        "TradeVolume": f"{random.randint(1, 10**8):,}", "TradeValue": f"{random.randint(1, 10**11):,}",
+        "OpeningPrice": f"{random.uniform(5, 1000):.2f}", "HighestPrice": f"{random.uniform(5, 1000):.2f}",
+        "LowestPrice": f"{random.uniform(5, 1000):.2f}", "ClosingPrice": f"{random.uniform(5, 1000):.2f}",
+        "Change": f"{random.uniform(-50, 50):.4f}", "Transaction": f"{random.randint(1, 10**6):,}",
+    } for i in range(n)]
+
+
+def mi_margn(n: int):
+    return [{
+        "股票代號": f"{1000 + i}", "股票名稱": f"公司{i}",
+        **{k: f"{random.randint(0, 10**6):,}" for k in ("融資買進", "融資賣出", "融資現金償還", "融資前日餘額", "融資今日餘額", "融資限額",
+                                                        "融券買進", "融券賣出", "融券現券償還", "融券前日餘額", "融券今日餘額", "融券限額")},
+        "資券互抵": f"{random.randint(0, 1000):,}", "註記": random.choice(["", "X", "O"]),
+    } for i in range(n)]
+
+
+def bwibbu_d(n: int):
+    return [{
+        "Date": "1150115", "Code": f"{1000 + i}", "Name": f"公司{i}",
+        "PEratio": random.choice([f"{random.uniform(3, 80):.2f}", ""]), "DividendYield": f"{random.uniform(0, 12):.2f}",
+        "DividendYear": "113", "PBratio": f"{random.uniform(0.3, 15):.2f}", "FiscalYearQuarter": "114/3",
+    } for i in range(n)]
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    obj = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size, elapsed
+
+
+if __name__ == "__main__":
+    random.seed(7)
+    for name, make, n in (("STOCK_DAY_ALL", stock_day_all, 20_000), ("MI_MARGN", mi_margn, 20_000), ("BWIBBU_d", bwibbu_d, 20_000)):
+        text = json.dumps(make(n), ensure_ascii=False)
+        rows, rows_bytes, _ = measure(lambda: json.loads(text))  # 與 httpx response.json() 相同的解析路徑
+        # 由新解析的 payload 建立並丟棄中間的 list-of-dict，只計算留存的記憶體
+        ds, ds_bytes, _ = measure(lambda: ColumnarDataset.from_rows(json.loads(text)))
+        start = time.perf_counter()
+        ColumnarDataset.from_rows(rows)
+        ingest = time.perf_counter() - start  # 不含 tracemalloc 開銷
+        assert ds.to_rows() == rows
+        print(f"{name:<14} rows={n:>6}  list-of-dict={rows_bytes / 2**20:7.2f} MiB  "
+              f"columnar={ds_bytes / 2**20:7.2f} MiB  ({ds_bytes / rows_bytes:5.1%})  ingest={ingest * 1e3:6.1f} ms")
@@ -0,0 +1,69 @@
+"""
+Crypto benchmark：多個 client 同時查詢不同幣種組合時的上游請求數與耗時 (MockTransport 模擬 CoinGecko 延遲，套用實際的主機限流設定)。
+legacy 為每個幣種各發一次 simple/price 請求 (相同幣種仍由 single-flight 合併)；coalesced 為 CryptoLogic 的批次合併路徑。
+用法: PYTHONPATH=src python benchmarks/bench_crypto.py [--clients 20] [--coins 8] [--latency 0.05]
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+import httpx
+from taiwan_finance_mcp_mega.logic.global_macro import CryptoLogic
+from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+
+COINS = ["BTC", "ETH", "SOL", "BNB", "XRP", "DOGE", "ADA", "TRX", "AVAX", "DOT", "LINK", "LTC"]
+
+
+def install(latency: float):
+    requests = []
+
+    async def handler(request):
+        ids = request.url.params["ids"].split(",")
+        requests.append(ids)
+        await asyncio.sleep(latency)
+        return httpx.Response(200, json={i: {"twd": 100.0, "twd_24h_change": 1.0, "usd": 3.0, "usd_24h_change": 1.0} for i in ids})
+
+    AsyncHttpClient._cache.clear()
+    AsyncHttpClient._inflight.clear()
+    AsyncHttpClient._upstreams.reset()
+    CryptoLogic._quotes.clear()
+    AsyncHttpClient._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return requests
+
+
+async def legacy_client(coins):
+    urls = [CryptoLogic.price_url([CryptoLogic.coin_id(c)], CryptoLogic.DEFAULT_VS) for c in coins]
+    return await asyncio.gather(*(AsyncHttpClient.fetch_json(url) for url in urls))
+
+
+async def run(mode: str, workload, latency: float):
+    requests = install(latency)
+    start = time.perf_counter()
+    if mode == "legacy":
+        await asyncio.gather(*(legacy_client(coins) for coins in workload))
+    else:
+        await asyncio.gather(*(CryptoLogic.get_prices(",".join(coins)) for coins in workload))
+    elapsed = time.perf_counter() - start
+    await AsyncHttpClient._client.aclose()
+    return elapsed, len(requests)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="batched crypto quotes benchmark")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--coins", type=int, default=8, help="參與查詢的幣種總數")
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    random.seed(7)
+    universe = COINS[:args.coins]
+    workload = [random.sample(universe, random.randint(1, min(4, len(universe)))) for _ in range(args.clients)]
+
+    for mode in ("legacy", "coalesced"):
+        elapsed, upstream = asyncio.run(run(mode, workload, args.latency))
+        print(f"{mode:<10} clients={args.clients}  coins={len(universe)}  upstream requests={upstream:>3}  elapsed={elapsed * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
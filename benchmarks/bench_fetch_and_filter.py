@@ -0,0 +1,53 @@
+"""
+Micro-benchmark: StockLogic._fetch_and_filter 索引查找 vs. 舊版線性掃描。
+用法: PYTHONPATH=src python benchmarks/bench_fetch_and_filter.py
+"""
+import random
+import time
+from taiwan_finance_mcp_mega.utils.dataset_index import CODE_KEYS, build_code_index, normalize_code, take
+
+
+def make_rows(n: int):
+    return [
+        {"Code": f"{1000 + i}", "Name": f"公司{i}", "TradeVolume": f"{random.randint(1, 10**7):,}", "ClosingPrice": f"{random.uniform(5, 1000):.2f}"}
+        for i in range(n)
+    ]
+
+
+def linear_scan(data, symbol, code_key="Code"):
+    """v3.7.0 的二段式線性掃描 (對照組)。"""
+    symbol_str = str(symbol).strip().upper()
+    fast_keys = [code_key, *CODE_KEYS]
+    filtered = [item for item in data if any(str(item.get(k, "")).strip().upper() == symbol_str for k in fast_keys)]
+    if filtered:
+        return filtered
+    return [item for item in data if any(str(v).strip().upper() == symbol_str for v in item.values())]
+
+
+def bench(n_rows: int, n_queries: int = 200):
+    rows = make_rows(n_rows)
+    symbols = [rows[random.randrange(n_rows)]["Code"] for _ in range(n_queries)]
+
+    start = time.perf_counter()
+    for s in symbols:
+        linear_scan(rows, s)
+    linear = (time.perf_counter() - start) / n_queries
+
+    start = time.perf_counter()
+    index = build_code_index(rows)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for s in symbols:
+        take(rows, index.get(normalize_code(s), []))
+    lookup = (time.perf_counter() - start) / n_queries
+
+    print(f"rows={n_rows:>6}  linear={linear * 1e3:8.3f} ms/query  "
+          f"index build={build * 1e3:8.2f} ms (once)  lookup={lookup * 1e6:7.2f} us/query  "
+          f"speedup={linear / lookup:,.0f}x")
+
+
+if __name__ == "__main__":
+    random.seed(42)
+    for n in (1_000, 5_000, 20_000):
+        bench(n)
@@ -0,0 +1,71 @@
+"""
+Micro-benchmark: 匯率換算 — 舊版每次由即匯站原始 dict 交叉計算 vs. 交叉匯率矩陣查表 (單筆與批次)。
+用法: PYTHONPATH=src python benchmarks/bench_forex.py [--currencies 170] [--conversions 10000]
+"""
+import argparse
+import random
+import string
+import time
+from taiwan_finance_mcp_mega.utils.cross_rates import CrossRateMatrix
+
+
+def payload(n: int):
+    codes = ["TWD", "JPY", "EUR"] + ["".join(random.choices(string.ascii_uppercase, k=3)) for _ in range(n)]
+    data = {"USDUSD": {"Exrate": 1, "UTC": "2026-10-16 08:00:00"}}
+    for code in codes[:n]:
+        data[f"USD{code}"] = {"Exrate": random.uniform(0.1, 20000), "UTC": "2026-10-16 08:00:00"}
+    return data
+
+
+def legacy_pair(data, base: str, target: str):
+    """v4.0.0 get_pair 的計算路徑 (對照組)。"""
+    b = 1.0 if base == "USD" else data.get(f"USD{base}", {}).get("Exrate")
+    t = 1.0 if target == "USD" else data.get(f"USD{target}", {}).get("Exrate")
+    return t / b
+
+
+def legacy_table(data, base: str):
+    """v4.0.0 get_latest_rates 以非 USD 為基準時的逐鍵重建 (對照組)。"""
+    rate = data[f"USD{base}"]["Exrate"]
+    return {k[3:]: v["Exrate"] / rate for k, v in data.items() if k.startswith("USD")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="forex cross-rate benchmark")
+    parser.add_argument("--currencies", type=int, default=170)
+    parser.add_argument("--conversions", type=int, default=10000)
+    args = parser.parse_args()
+    random.seed(7)
+    data = payload(args.currencies)
+
+    start = time.perf_counter()
+    matrix = CrossRateMatrix.from_rter(data)
+    build = time.perf_counter() - start
+    currencies = matrix.currencies
+    items = [(random.uniform(1, 1e6), random.choice(currencies), random.choice(currencies)) for _ in range(args.conversions)]
+
+    start = time.perf_counter()
+    legacy = [amount * legacy_pair(data, b, t) for amount, b, t in items]
+    legacy_time = time.perf_counter() - start
+    start = time.perf_counter()
+    batch = matrix.convert_many(items)
+    batch_time = time.perf_counter() - start
+    assert batch == legacy
+
+    start = time.perf_counter()
+    for base in currencies:
+        legacy_table(data, base)
+    table_legacy = (time.perf_counter() - start) / len(currencies)
+    start = time.perf_counter()
+    for base in currencies:
+        matrix.row(base)
+    table_matrix = (time.perf_counter() - start) / len(currencies)
+
+    print(f"{len(currencies)} currencies: matrix build {build * 1e3:.2f} ms (once per payload)")
+    print(f"{args.conversions} conversions: legacy {legacy_time * 1e3:.2f} ms, batch {batch_time * 1e3:.2f} ms "
+          f"({legacy_time / batch_time:.1f}x)")
+    print(f"rate table per base: legacy {table_legacy * 1e6:.1f} us, matrix row {table_matrix * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
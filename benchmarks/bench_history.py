@@ -0,0 +1,79 @@
+"""
+History benchmark：以合成的 STOCK_DAY_ALL 快照建立本地歷史庫，量測單一個股近 N 個交易日查詢的延遲
+(cold: 新建 HistoryStore、需讀取並解壓分區；warm: header 與欄位已在 LRU 緩存)，以及每日快照的寫入耗時與磁碟用量。
+用法: PYTHONPATH=src python benchmarks/bench_history.py [--days 250] [--rows 1300] [--sessions 60]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+from taiwan_finance_mcp_mega.config import Config
+from taiwan_finance_mcp_mega.utils.history import HistoryStore
+
+
+def snapshot(day: date, n: int):
+    roc = f"{day.year - 1911}{day:%m%d}"
+    return [{
+        "Date": roc, "Code": f"{1000 + i}", "Name": f"公司{i}",
+        "TradeVolume": f"{random.randint(1, 10**8)}", "TradeValue": f"{random.randint(1, 10**11)}",
+        "OpeningPrice": f"{random.uniform(5, 1000):.2f}", "HighestPrice": f"{random.uniform(5, 1000):.2f}",
+        "LowestPrice": f"{random.uniform(5, 1000):.2f}", "ClosingPrice": f"{random.uniform(5, 1000):.2f}",
+        "Change": f"{random.uniform(-50, 50):.4f}", "Transaction": f"{random.randint(1, 10**6)}",
+    } for i in range(n)]
+
+
+def trading_days(count: int):
+    d, out = date(2024, 1, 2), []
+    while len(out) < count:
+        if d.weekday() < 5:
+            out.append(d)
+        d += timedelta(days=1)
+    return out
+
+
+def timed(fn, runs: int):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="history store benchmark")
+    parser.add_argument("--days", type=int, default=250)
+    parser.add_argument("--rows", type=int, default=1300)
+    parser.add_argument("--sessions", type=int, default=60)
+    args = parser.parse_args()
+    random.seed(7)
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = HistoryStore(directory, Config.HISTORY_DATASETS)
+        write = []
+        for day in trading_days(args.days):
+            rows = snapshot(day, args.rows)
+            start = time.perf_counter()
+            store.append("quotes", rows)
+            write.append(time.perf_counter() - start)
+        folder = os.path.join(directory, "quotes")
+        size = sum(os.path.getsize(os.path.join(folder, n)) for n in os.listdir(folder))
+
+        code = f"{1000 + args.rows // 2}"
+        query = lambda s: s.query("quotes", code, sessions=args.sessions, fields=["ClosingPrice", "TradeVolume"])
+        cold = timed(lambda: query(HistoryStore(directory, Config.HISTORY_DATASETS)), 5)
+        warm = timed(lambda: query(store), 50)
+        full = timed(lambda: store.query("quotes", code, sessions=args.sessions), 50)
+        assert len(query(store)) == min(args.sessions, args.days)
+
+    print(f"{args.days} sessions x {args.rows} rows: {size / 1e6:.1f} MB on disk ({size / args.days / 1e3:.0f} KB/session), "
+          f"append median {statistics.median(write) * 1e3:.1f} ms")
+    print(f"{args.sessions}-session query ({code}, 2 fields): cold {cold * 1e3:.2f} ms, warm {warm * 1e3:.3f} ms; "
+          f"all fields warm {full * 1e3:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
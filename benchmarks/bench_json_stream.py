@@ -0,0 +1,71 @@
+"""
+Memory benchmark: 大型 payload 以 response.json() 整份緩衝解析 vs. 串流逐元素解析的峰值記憶體。
+用法: PYTHONPATH=src python benchmarks/bench_json_stream.py
+"""
+import asyncio
+import gc
+import json
+import random
+import time
+import tracemalloc
+import httpx
+from taiwan_finance_mcp_mega.utils.columnar import ColumnarBuilder, ColumnarDataset
+from taiwan_finance_mcp_mega.utils.json_stream import load_json_stream
+
+ROWS = 20_000
+
+
+def payload(n: int) -> bytes:
+    rows = [{
+        "Date": "1150115", "Code": f"{1000 + i}", "Name": f"公司{i}",
+        "TradeVolume": f"{random.randint(1, 10**8):,}", "TradeValue": f"{random.randint(1, 10**11):,}",
+        "OpeningPrice": f"{random.uniform(5, 1000):.2f}", "HighestPrice": f"{random.uniform(5, 1000):.2f}",
+        "LowestPrice": f"{random.uniform(5, 1000):.2f}", "ClosingPrice": f"{random.uniform(5, 1000):.2f}",
+        "Change": f"{random.uniform(-50, 50):.4f}", "Transaction": f"{random.randint(1, 10**6):,}",
+    } for i in range(n)]
+    return ("\ufeff" + json.dumps(rows, ensure_ascii=False)).encode("utf-8")
+
+
+def client_for(body: bytes) -> httpx.AsyncClient:
+    # 以 64 KiB 片段回應，模擬網路串流
+    async def stream():
+        for i in range(0, len(body), 65536):
+            yield body[i:i + 65536]
+
+    def handler(request):
+        return httpx.Response(200, content=stream(), headers={"Content-Type": "application/json; charset=utf-8"})
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+async def buffered(body: bytes):
+    async with client_for(body) as client:
+        response = await client.get("https://example.test/STOCK_DAY_ALL")
+        return ColumnarDataset.from_rows(json.loads(response.content.decode("utf-8-sig")))
+
+
+async def streamed(body: bytes):
+    async with client_for(body) as client:
+        async with client.stream("GET", "https://example.test/STOCK_DAY_ALL") as response:
+            return await load_json_stream(response.aiter_bytes(), encoding=response.charset_encoding, sink=ColumnarBuilder())
+
+
+def measure(run, body: bytes):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = asyncio.run(run(body))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak, elapsed
+
+
+if __name__ == "__main__":
+    random.seed(7)
+    body = payload(ROWS)
+    base, base_peak, base_t = measure(buffered, body)
+    ds, ds_peak, ds_t = measure(streamed, body)
+    assert ds.to_rows() == base.to_rows()
+    print(f"payload={len(body) / 2**20:.2f} MiB rows={ROWS}")
+    print(f"buffered  peak={base_peak / 2**20:7.2f} MiB  time={base_t * 1e3:7.1f} ms (tracemalloc on)")
+    print(f"streamed  peak={ds_peak / 2**20:7.2f} MiB  time={ds_t * 1e3:7.1f} ms (tracemalloc on)  ({ds_peak / base_peak:5.1%})")
@@ -0,0 +1,80 @@
+"""
+MOL datastore benchmark：月資料集新增一期時的刷新傳輸量 (整份重抓 vs. offset/limit 尾端請求)，
+以及已緩存時的查詢耗時 (舊版每次掃描整份 records 過濾 vs. 期間索引的最近 N 期 / 區間查詢)。
+用法: PYTHONPATH=src python benchmarks/bench_mol.py [--rows 600] [--repeat 2000]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+import httpx
+from taiwan_finance_mcp_mega.logic.gov_data import MolDatastore
+from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+
+RESOURCE = "A17030000J-000016-1ci"
+COLUMNS = ["失業率（百分比）", "消費者物價-年增率", "工業生產指數", "外銷訂單", "躉售物價指數", "薪資", "貨幣供給M2", "加權股價指數"]
+
+
+def month_row(i: int):
+    row = {"日期（月別）": f"{1980 + i // 12}M{i % 12 + 1:02d}", "經濟成長率": f"{i % 7 + 0.5:.2f}" if i % 3 == 2 else "…"}
+    row.update({c: f"{(i * 7 + j) % 997 / 10:.1f}" for j, c in enumerate(COLUMNS)})
+    return row
+
+
+def legacy_gdp(records):
+    """v4.5.0 get_macro_gdp_growth_rate_quarterly 的處理路徑 (對照組)：每次呼叫過濾整份 records 後反轉。"""
+    rows = [r for r in records if r.get("經濟成長率") and r.get("經濟成長率") != "…"]
+    return rows[::-1][:4]
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+async def run(rows: int, repeat: int):
+    records = [month_row(i) for i in range(rows)]
+    transferred = []
+
+    def handler(request):
+        params = request.url.params
+        offset, limit = int(params.get("offset", 0)), int(params.get("limit", len(records)))
+        body = json.dumps({"success": True, "result": {"records": records[offset:offset + limit]}}).encode()
+        transferred.append(len(body))
+        return httpx.Response(200, content=body, headers={"Content-Type": "application/json"})
+
+    AsyncHttpClient._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    MolDatastore.clear()
+    dataset, _ = await MolDatastore.load(RESOURCE)
+    full = transferred[-1]
+    records.append(month_row(rows))
+    dataset.check_at = 0
+    await MolDatastore.load(RESOURCE)
+    tail = transferred[-1]
+    await AsyncHttpClient._client.aclose()
+
+    print(f"{rows} monthly rows: refresh after a new period: full download {full / 1024:.1f} KiB, tail request {tail / 1024:.2f} KiB "
+          f"({full / tail:.0f}x less)")
+    gdp = lambda: dataset.query(latest=4, where=lambda r: r.get("經濟成長率") and r.get("經濟成長率") != "…")
+    assert [r["日期（月別）"] for r in gdp()] == [r["日期（月別）"] for r in legacy_gdp(records)]
+    legacy = timed(lambda: legacy_gdp(records), repeat)
+    indexed = timed(gdp, repeat)
+    ranged = timed(lambda: dataset.query("2010-01", "2010-12"), repeat)
+    print(f"latest 4 quarters: legacy scan {legacy * 1e6:.1f} us, indexed {indexed * 1e6:.1f} us ({legacy / indexed:.0f}x)")
+    print(f"one-year range query: {ranged * 1e6:.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MOL datastore benchmark")
+    parser.add_argument("--rows", type=int, default=600)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(run(args.rows, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
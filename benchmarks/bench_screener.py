@@ -0,0 +1,97 @@
+"""
+Screener benchmark：以合成的全市場 STOCK_DAY_ALL / BWIBBU_d / MI_MARGN / t187ap05_L / t187ap14_L (MockTransport，不連線上游)
+量測跨資料集選股「本益比 < 12、殖利率 > 5% 且融資餘額增加，依殖利率排序」的延遲：
+cold 為首次查詢 (含解析、代號索引與合併)，warm 為資料已緩存後的查詢；對照組為逐列合併 dict 後篩選的寫法。
+用法: PYTHONPATH=src python benchmarks/bench_screener.py [--rows 1300,20000] [--runs 50]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import statistics
+import time
+import httpx
+from taiwan_finance_mcp_mega.logic.screener import ScreenerLogic
+from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+
+FILTERS = "PEratio < 12, DividendYield > 5%, 融資今日餘額 > 融資前日餘額"
+SORT = "-DividendYield"
+
+
+def market(n: int):
+    codes = [f"{1000 + i}" for i in range(n)]
+    quotes = [{"Date": "1150115", "Code": c, "Name": f"公司{c}", "TradeVolume": f"{random.randint(1, 10**8)}",
+               "OpeningPrice": f"{random.uniform(5, 1000):.2f}", "ClosingPrice": f"{random.uniform(5, 1000):.2f}",
+               "Change": f"{random.uniform(-50, 50):.4f}"} for c in codes]
+    valuation = [{"Date": "1150115", "Code": c, "Name": f"公司{c}",
+                  "PEratio": random.choice([f"{random.uniform(3, 80):.2f}", f"{random.uniform(3, 80):.2f}", ""]),
+                  "DividendYield": f"{random.uniform(0, 12):.2f}", "PBratio": f"{random.uniform(0.3, 15):.2f}"} for c in codes]
+    margin = [{"股票代號": c, "股票名稱": f"公司{c}", "融資前日餘額": f"{random.randint(0, 10**6):,}",
+               "融資今日餘額": f"{random.randint(0, 10**6):,}"} for c in codes]
+    revenue = [{"公司代號": c, "營業收入-當月營收": f"{random.randint(10**5, 10**9)}", "營業收入-去年同月增減(%)": f"{random.uniform(-50, 80):.2f}"}
+               for c in codes if random.random() < 0.9]
+    eps = [{"公司代號": c, "基本每股盈餘(元)": f"{random.uniform(-3, 30):.2f}"} for c in codes if random.random() < 0.9]
+    return {"STOCK_DAY_ALL": quotes, "BWIBBU_d": valuation, "MI_MARGN": margin, "t187ap05_L": revenue, "t187ap14_L": eps}
+
+
+def rowwise(payloads):
+    """對照組：逐列以 dict 合併各資料集後篩選、排序。"""
+    def num(v):
+        try:
+            return float(str(v).replace(",", "").rstrip("%"))
+        except ValueError:
+            return None
+    by_code = {key: {r.get("Code") or r.get("股票代號") or r.get("公司代號"): r for r in rows} for key, rows in payloads.items()}
+    out = []
+    for q in payloads["STOCK_DAY_ALL"]:
+        row = dict(q)
+        for key in ("BWIBBU_d", "MI_MARGN", "t187ap05_L", "t187ap14_L"):
+            row.update(by_code[key].get(q["Code"], {}))
+        pe, dy = num(row.get("PEratio")), num(row.get("DividendYield"))
+        today, prev = num(row.get("融資今日餘額")), num(row.get("融資前日餘額"))
+        if pe is not None and pe < 12 and dy is not None and dy > 5 and today is not None and prev is not None and today > prev:
+            out.append(row)
+    return sorted(out, key=lambda r: -num(r["DividendYield"]))
+
+
+async def bench(n: int, runs: int):
+    payloads = market(n)
+    encoded = {k: json.dumps(v, ensure_ascii=False).encode() for k, v in payloads.items()}
+    AsyncHttpClient._cache.clear()
+    AsyncHttpClient._client = httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, content=encoded[request.url.path.rsplit("/", 1)[-1]], headers={"content-type": "application/json"})))
+    ScreenerLogic._frame = None
+
+    start = time.perf_counter()
+    matched = await ScreenerLogic.screen(FILTERS, SORT)
+    cold = time.perf_counter() - start
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await ScreenerLogic.screen(FILTERS, SORT)
+        samples.append(time.perf_counter() - start)
+    warm = statistics.median(samples)
+
+    start = time.perf_counter()
+    baseline = rowwise(payloads)
+    rowwise_time = time.perf_counter() - start
+    assert [r["Code"] for r in matched] == [r["Code"] for r in baseline]
+    await AsyncHttpClient._client.aclose()
+    print(f"rows={n:>6}  matched={len(matched):>5}  cold={cold * 1e3:8.1f} ms (fetch+parse+join)  "
+          f"warm={warm * 1e3:7.2f} ms  row-wise={rowwise_time * 1e3:7.1f} ms/query  speedup={rowwise_time / warm:,.0f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="cross-dataset screener benchmark")
+    parser.add_argument("--rows", default="1300,20000")
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    random.seed(7)
+    for n in (int(x) for x in args.rows.split(",")):
+        asyncio.run(bench(n, args.runs))
+
+
+if __name__ == "__main__":
+    main()
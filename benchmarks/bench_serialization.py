@@ -0,0 +1,63 @@
+"""
+Benchmark: 工具輸出序列化 — 每次 indent=2 重新編碼 vs. compact vs. 序列化結果緩存。
+以 MockTransport 提供 20,000 列 STOCK_DAY_ALL，量測經由工具入口 (_call_tool) 每次呼叫的耗時與輸出大小。
+用法: PYTHONPATH=src python benchmarks/bench_serialization.py
+"""
+import asyncio
+import json
+import random
+import time
+import httpx
+from taiwan_finance_mcp_mega import server
+from taiwan_finance_mcp_mega.config import Config
+from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+from taiwan_finance_mcp_mega.utils.response_cache import ResponseEncoder
+
+TOOL = "get_stock_quotes_realtime_all"
+ROWS = 20_000
+
+
+def stock_day_all(n: int):
+    return [{
+        "Date": "1150115", "Code": f"{1000 + i}", "Name": f"公司{i}",
+        "TradeVolume": f"{random.randint(1, 10**8):,}", "TradeValue": f"{random.randint(1, 10**11):,}",
+        "OpeningPrice": f"{random.uniform(5, 1000):.2f}", "HighestPrice": f"{random.uniform(5, 1000):.2f}",
+        "LowestPrice": f"{random.uniform(5, 1000):.2f}", "ClosingPrice": f"{random.uniform(5, 1000):.2f}",
+        "Change": f"{random.uniform(-50, 50):.4f}", "Transaction": f"{random.randint(1, 10**6):,}",
+    } for i in range(n)]
+
+
+async def per_call(args, calls: int):
+    text = await server._call_tool(TOOL, *args)  # 預熱上游緩存、索引與 (若啟用) 序列化緩存
+    start = time.perf_counter()
+    for _ in range(calls):
+        await server._call_tool(TOOL, *args)
+    return (time.perf_counter() - start) / calls, len(text.encode("utf-8"))
+
+
+async def main():
+    body = json.dumps(stock_day_all(ROWS), ensure_ascii=False).encode("utf-8")
+    AsyncHttpClient._client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body)))
+    scenarios = (
+        ("single ticker", (" 2330 ", 10, 0, None, None), 2000),
+        ("market page 500", (None, 500, 0, None, None), 50),
+        ("market page 500 Code,ClosingPrice", (None, 500, 0, None, "Code,ClosingPrice"), 200),
+    )
+    modes = (
+        ("indent, no memo", ResponseEncoder(0)),
+        ("compact, no memo", ResponseEncoder(0, compact=True)),
+        ("indent, memo", ResponseEncoder(Config.RESPONSE_CACHE_MAX_CHARS)),
+        ("compact, memo", ResponseEncoder(Config.RESPONSE_CACHE_MAX_CHARS, compact=True)),
+    )
+    for label, args, calls in scenarios:
+        print(label)
+        for mode, encoder in modes:
+            server.encoder = encoder
+            elapsed, size = await per_call(args, calls)
+            print(f"  {mode:<17} {elapsed * 1e6:9.1f} us/call  {size:>8,} bytes")
+    await AsyncHttpClient.close()
+
+
+if __name__ == "__main__":
+    random.seed(7)
+    asyncio.run(main())
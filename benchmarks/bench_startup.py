@@ -0,0 +1,87 @@
+"""
+Startup benchmark：量測 stdio 模式冷啟動 — 由啟動行程到回應 initialize 與 tools/list 的時間 (每個 MCP client session 都會重新啟動 Server)。
+同時量測僅 import fastmcp 並建立空 FastMCP Server 回應相同請求的時間作為框架下限，
+本專案額外的啟動成本 (overhead = 中位數差值) 超過 --budget-ms 時以 exit code 1 結束，供 CI 偵測啟動時間退化。
+用法: PYTHONPATH=src python benchmarks/bench_startup.py [--runs 10] [--budget-ms 60] [--json out.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+SERVER = [sys.executable, "-m", "taiwan_finance_mcp_mega.server", "--mode", "stdio"]
+# 框架下限：相同的 stdio 交握，但 Server 沒有任何工具
+BASELINE = [sys.executable, "-c", "from fastmcp import FastMCP; FastMCP('baseline').run(show_banner=False)"]
+
+REQUESTS = [
+    {"jsonrpc": "2.0", "id": 1, "method": "initialize",
+     "params": {"protocolVersion": "2025-06-18", "capabilities": {}, "clientInfo": {"name": "bench", "version": "1"}}},
+    {"jsonrpc": "2.0", "method": "notifications/initialized"},
+    {"jsonrpc": "2.0", "id": 2, "method": "tools/list", "params": {}},
+]
+
+
+def session(cmd: List[str]) -> Dict[str, float]:
+    """啟動 Server 並完成 initialize -> tools/list，回傳各階段耗時 (秒) 與工具數。"""
+    env = dict(os.environ, FASTMCP_SHOW_SERVER_BANNER="false", LOG_LEVEL="WARNING")
+    start = time.perf_counter()
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env)
+    try:
+        timings: Dict[str, float] = {}
+        for request in REQUESTS:
+            process.stdin.write((json.dumps(request) + "\n").encode())
+            process.stdin.flush()
+            if "id" not in request:
+                continue
+            while True:
+                line = process.stdout.readline()
+                if not line:
+                    raise RuntimeError(f"server exited: {' '.join(cmd)}")
+                message = json.loads(line)
+                if message.get("id") == request["id"]:
+                    break
+            timings[request["method"]] = time.perf_counter() - start
+        timings["tools"] = len(message["result"]["tools"])
+        return timings
+    finally:
+        process.kill()
+        process.wait()
+
+
+def measure(cmd: List[str], runs: int) -> Dict[str, float]:
+    session(cmd)  # 暖機 (檔案系統快取、.pyc)
+    samples = [session(cmd) for _ in range(runs)]
+    return {"initialize": statistics.median(s["initialize"] for s in samples),
+            "tools/list": statistics.median(s["tools/list"] for s in samples),
+            "min": min(s["tools/list"] for s in samples), "tools": samples[0]["tools"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="stdio cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_BUDGET_MS", "60")),
+                        help="相對於框架下限的額外啟動時間上限 (毫秒)")
+    parser.add_argument("--json", help="將結果寫入 JSON 檔")
+    args = parser.parse_args()
+
+    baseline = measure(BASELINE, args.runs)
+    server = measure(SERVER, args.runs)
+    overhead = server["tools/list"] - baseline["tools/list"]
+    print(f"{'':<10} {'initialize':>11} {'tools/list':>11} {'min':>9} {'tools':>6}")
+    for name, r in (("fastmcp", baseline), ("server", server)):
+        print(f"{name:<10} {r['initialize'] * 1e3:>9.1f}ms {r['tools/list'] * 1e3:>9.1f}ms {r['min'] * 1e3:>7.1f}ms {r['tools']:>6}")
+    print(f"overhead   {overhead * 1e3:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"baseline": baseline, "server": server, "overhead": overhead, "budget": args.budget_ms / 1e3}, f, indent=2)
+    if overhead * 1e3 > args.budget_ms:
+        print("FAIL: startup overhead exceeds budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
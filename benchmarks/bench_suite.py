@@ -0,0 +1,156 @@
+"""
+Micro-benchmark suite (pytest-benchmark 風格，離線)：以 ReplayTransport 回放合成 fixture，
+量測 _fetch_and_filter (冷/熱)、CSV 解析、匯率交叉換算、dispatch 與序列化在 1k / 10k / 100k 列的表現。
+每個案例先校準單次耗時，再重複至少 --min-time 秒 (3 ~ --max-rounds 輪)，輸出 min / median / mean / stddev。
+用法: PYTHONPATH=src python benchmarks/bench_suite.py [--rows 1000,10000,100000] [--latency 0.05] [-k fetch] [--json out.json]
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import logging
+import random
+import statistics
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+from taiwan_finance_mcp_mega.config import Config
+from taiwan_finance_mcp_mega.logic.forex import ForexLogic
+from taiwan_finance_mcp_mega.logic.stock import StockLogic
+from taiwan_finance_mcp_mega.server import dispatch_mega_logic
+from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+from taiwan_finance_mcp_mega.utils.replay import FixtureStore
+from taiwan_finance_mcp_mega.utils.response_cache import ResponseEncoder
+from taiwan_finance_mcp_mega.utils.upstream import HostLimits
+
+QUOTE_URL = f"{Config.TWSE_BASE}/exchangeReport/STOCK_DAY_ALL"
+CSV_URL = "https://www2.moeaea.gov.tw/oil111/csv/bench.csv"
+
+
+class Case(NamedTuple):
+    name: str
+    run: Callable[[], Awaitable[Any]]
+    setup: Optional[Callable[[], None]] = None  # 每輪計時前執行 (例如清空緩存)
+
+
+def make_quotes(n: int) -> List[Dict[str, str]]:
+    return [
+        {"Date": "1150102", "Code": f"{1000 + i}", "Name": f"公司{i}",
+         "TradeVolume": f"{random.randint(1, 10**7)}", "TradeValue": f"{random.randint(1, 10**10)}",
+         "OpeningPrice": f"{random.uniform(5, 1000):.2f}", "HighestPrice": f"{random.uniform(5, 1000):.2f}",
+         "LowestPrice": f"{random.uniform(5, 1000):.2f}", "ClosingPrice": f"{random.uniform(5, 1000):.2f}",
+         "Change": f"{random.uniform(-10, 10):.4f}", "Transaction": f"{random.randint(1, 10**5)}"}
+        for i in range(n)
+    ]
+
+
+def make_csv(n: int) -> str:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["日期", "品項", "價格", "單位"])
+    for i in range(n):
+        writer.writerow([f"2026/{i % 12 + 1:02d}/{i % 28 + 1:02d}", random.choice(["WTI", "Brent", "杜拜"]), f"{random.uniform(40, 120):.2f}", "美元/桶"])
+    return "\ufeff" + out.getvalue()
+
+
+def make_rates(n: int) -> Dict[str, Dict[str, Any]]:
+    rates = {"USDTWD": {"Exrate": 31.5, "UTC": "2026-01-02 08:00:00"}, "USDJPY": {"Exrate": 151.2, "UTC": "2026-01-02 08:00:00"}}
+    for i in range(n - len(rates)):
+        rates[f"USDX{i:05d}"] = {"Exrate": random.uniform(0.1, 20000), "UTC": "2026-01-02 08:00:00"}
+    return rates
+
+
+def reset_cache() -> None:
+    AsyncHttpClient._cache.clear()
+    AsyncHttpClient._inflight.clear()
+    AsyncHttpClient._failures.clear()
+
+
+def cases_for(n: int) -> List[Case]:
+    code = f"{1000 + n // 2}"
+    indent, compact = ResponseEncoder(0), ResponseEncoder(0, compact=True)
+
+    async def serialize(encoder: ResponseEncoder):
+        encoder.dumps(await AsyncHttpClient.fetch_json(QUOTE_URL, headers=StockLogic.NO_CACHE_HEADERS))
+
+    return [
+        Case("fetch_and_filter[cold]", lambda: StockLogic._fetch_and_filter(QUOTE_URL, code, headers=StockLogic.NO_CACHE_HEADERS), reset_cache),
+        Case("fetch_and_filter[warm]", lambda: StockLogic._fetch_and_filter(QUOTE_URL, code, headers=StockLogic.NO_CACHE_HEADERS)),
+        Case("csv_parse[cold]", lambda: AsyncHttpClient.fetch_csv_as_json(CSV_URL), reset_cache),
+        Case("forex_cross_rates", lambda: ForexLogic.get_latest_rates("JPY")),
+        Case("dispatch", lambda: dispatch_mega_logic("get_stock_quotes_realtime_all", code, 10)),
+        Case("serialize[indent]", lambda: serialize(indent)),
+        Case("serialize[compact]", lambda: serialize(compact)),
+    ]
+
+
+async def measure(case: Case, min_time: float, max_rounds: int) -> Dict[str, float]:
+    async def once() -> float:
+        if case.setup:
+            case.setup()
+        start = time.perf_counter()
+        await case.run()
+        return time.perf_counter() - start
+
+    if case.setup is None:
+        await once()  # 熱路徑案例先暖機 (載入緩存)，不列入校準
+    first = await once()
+    rounds = max(3, min(max_rounds, int(min_time / max(first, 1e-9))))
+    samples = [await once() for _ in range(rounds)]
+    return {"rounds": rounds, "min": min(samples), "median": statistics.median(samples),
+            "mean": statistics.fmean(samples), "stddev": statistics.stdev(samples) if rounds > 1 else 0.0}
+
+
+def fmt(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:8.3f} s "
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:8.3f} ms"
+    return f"{seconds * 1e6:8.2f} us"
+
+
+async def run(args) -> List[Dict[str, Any]]:
+    # 量測程式本身：回放時不套用各主機的限流與重試設定
+    AsyncHttpClient._upstreams.rules = []
+    AsyncHttpClient._upstreams.defaults = HostLimits(max_connections=100, retries=0)
+    results = []
+    print(f"{'case':<24} {'rows':>7} {'rounds':>6}  {'min':>11}  {'median':>11}  {'mean':>11}  {'stddev':>11}")
+    for n in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = FixtureStore(tmp)
+            store.put_json(QUOTE_URL, make_quotes(n))
+            store.put(CSV_URL, make_csv(n), content_type="text/csv")
+            store.put_json(Config.FOREX_API, make_rates(n))
+            AsyncHttpClient.configure_replay(replay_dir=tmp, latency=args.latency)
+            reset_cache()
+            for case in cases_for(n):
+                if args.k and args.k not in case.name:
+                    continue
+                stats = await measure(case, args.min_time, args.max_rounds)
+                results.append({"case": case.name, "rows": n, **stats})
+                print(f"{case.name:<24} {n:>7} {stats['rounds']:>6}  {fmt(stats['min'])}  {fmt(stats['median'])}  "
+                      f"{fmt(stats['mean'])}  {fmt(stats['stddev'])}")
+    await AsyncHttpClient.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline micro-benchmark suite")
+    parser.add_argument("--rows", type=lambda s: [int(x) for x in s.split(",")], default=[1000, 10000, 100000])
+    parser.add_argument("--latency", type=float, default=0.0, help="回放時每個上游請求的模擬延遲 (秒)")
+    parser.add_argument("--min-time", type=float, default=0.5, help="每個案例至少量測的秒數")
+    parser.add_argument("--max-rounds", type=int, default=200)
+    parser.add_argument("-k", default="", help="只執行名稱包含此字串的案例")
+    parser.add_argument("--json", help="將結果寫入 JSON 檔 (供 CI 比對)")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    random.seed(0)
+    results = asyncio.run(run(args))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"latency": args.latency, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
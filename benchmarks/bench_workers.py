@@ -0,0 +1,180 @@
+"""
+Load test：以不同 --workers 數啟動 HTTP Server (回放合成 fixture，離線)，量測工具呼叫吞吐量與延遲隨行程數的變化。
+每種設定啟動一個 Server 子行程，--clients 個併發客戶端持續呼叫工具 --duration 秒 (先暖機載入緩存)。
+預設呼叫全市場行情並回傳 --limit 筆 (篩選 + 序列化為 CPU 密集工作)，可觀察多核心下的擴展性；
+客戶端與 Server 同機執行，核心數少於 workers + 1 時數字會偏低。
+用法: PYTHONPATH=src python benchmarks/bench_workers.py [--workers 1,2,4] [--clients 32] [--duration 10] [--rows 20000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+import httpx
+from taiwan_finance_mcp_mega.config import Config
+from taiwan_finance_mcp_mega.utils.replay import FixtureStore
+
+QUOTE_URL = f"{Config.TWSE_BASE}/exchangeReport/STOCK_DAY_ALL"
+ACCEPT = {"Accept": "application/json, text/event-stream"}
+
+
+def make_quotes(n: int) -> List[Dict[str, str]]:
+    return [
+        {"Date": "1150102", "Code": f"{1000 + i}", "Name": f"公司{i}",
+         "TradeVolume": f"{random.randint(1, 10**7)}", "TradeValue": f"{random.randint(1, 10**10)}",
+         "OpeningPrice": f"{random.uniform(5, 1000):.2f}", "HighestPrice": f"{random.uniform(5, 1000):.2f}",
+         "LowestPrice": f"{random.uniform(5, 1000):.2f}", "ClosingPrice": f"{random.uniform(5, 1000):.2f}",
+         "Change": f"{random.uniform(-10, 10):.4f}", "Transaction": f"{random.randint(1, 10**5)}"}
+        for i in range(n)
+    ]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class McpSession:
+    """最小的 streamable-HTTP MCP 客戶端：initialize 後重複 tools/call (多 worker 時為無狀態，無 session id)。"""
+
+    def __init__(self, client: httpx.AsyncClient, url: str):
+        self.client = client
+        self.url = url
+        self.headers = dict(ACCEPT)
+        self.next_id = 0
+
+    async def rpc(self, method: str, params: Dict[str, Any], notify: bool = False) -> httpx.Response:
+        body: Dict[str, Any] = {"jsonrpc": "2.0", "method": method, "params": params}
+        if not notify:
+            self.next_id += 1
+            body["id"] = self.next_id
+        response = await self.client.post(self.url, json=body, headers=self.headers)
+        response.raise_for_status()
+        return response
+
+    async def initialize(self) -> None:
+        response = await self.rpc("initialize", {"protocolVersion": "2025-06-18", "capabilities": {},
+                                                 "clientInfo": {"name": "bench", "version": "1"}})
+        if "mcp-session-id" in response.headers:
+            self.headers["mcp-session-id"] = response.headers["mcp-session-id"]
+        await self.rpc("notifications/initialized", {}, notify=True)
+
+    async def call(self, tool: str, arguments: Dict[str, Any]) -> None:
+        response = await self.rpc("tools/call", {"name": tool, "arguments": arguments})
+        if '"isError":true' in response.text:
+            raise RuntimeError(response.text[:200])
+
+
+async def wait_ready(base: str, process: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"server exited with code {process.returncode}")
+            try:
+                if (await client.get(f"{base}/metrics", timeout=1)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise TimeoutError("server did not start")
+
+
+async def load(url: str, args) -> Dict[str, float]:
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        sessions = [McpSession(client, url) for _ in range(args.clients)]
+        await asyncio.gather(*(s.initialize() for s in sessions))
+        arguments = {"limit": args.limit, "offset": 0}
+        # 暖機：每個 worker 都載入記憶體緩存 (payload 由磁碟緩存共用)
+        await asyncio.gather(*(s.call(args.tool, arguments) for s in sessions for _ in range(2)))
+
+        latencies: List[float] = []
+        errors = 0
+        deadline = time.perf_counter() + args.duration
+
+        async def worker(session: McpSession) -> None:
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    await session.call(args.tool, {"limit": args.limit, "offset": random.randrange(0, args.rows - args.limit)})
+                    latencies.append(time.perf_counter() - start)
+                except Exception:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(s) for s in sessions))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {"requests": len(latencies), "errors": errors, "rps": len(latencies) / elapsed,
+            "p50": statistics.median(latencies) if latencies else 0.0,
+            "p99": latencies[int(len(latencies) * 0.99)] if latencies else 0.0}
+
+
+async def run_one(workers: int, fixtures: str, args) -> Dict[str, Any]:
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, LOG_LEVEL="WARNING", FASTMCP_LOG_LEVEL="WARNING")
+    cmd = [sys.executable, "-m", "taiwan_finance_mcp_mega.server", "--mode", "http", "--port", str(port),
+           "--workers", str(workers), "--replay", fixtures, "--replay-latency", str(args.latency), "--compact"]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        process = subprocess.Popen(cmd + ["--cache-dir", cache_dir], env=env,
+                                   stdout=subprocess.DEVNULL, stderr=None if args.verbose else subprocess.DEVNULL)
+        try:
+            await wait_ready(base, process)
+            return {"workers": workers, **await load(f"{base}/mcp", args)}
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+async def run(args) -> List[Dict[str, Any]]:
+    results = []
+    with tempfile.TemporaryDirectory() as fixtures:
+        FixtureStore(fixtures).put_json(QUOTE_URL, make_quotes(args.rows))
+        print(f"cpus={os.cpu_count()} clients={args.clients} tool={args.tool} limit={args.limit} rows={args.rows}")
+        print(f"{'workers':>7} {'requests':>9} {'errors':>6} {'req/s':>9} {'speedup':>7} {'p50':>10} {'p99':>10}")
+        baseline: Optional[float] = None
+        for n in args.workers:
+            r = await run_one(n, fixtures, args)
+            baseline = baseline or r["rps"]
+            results.append(r)
+            print(f"{n:>7} {r['requests']:>9} {r['errors']:>6} {r['rps']:>9.1f} {r['rps'] / baseline:>6.2f}x "
+                  f"{r['p50'] * 1e3:>8.1f}ms {r['p99'] * 1e3:>8.1f}ms")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-worker HTTP load test")
+    parser.add_argument("--workers", type=lambda s: [int(x) for x in s.split(",")],
+                        default=sorted({1, 2, max(2, min(4, os.cpu_count() or 1))}))
+    parser.add_argument("--clients", type=int, default=32, help="併發客戶端數")
+    parser.add_argument("--duration", type=float, default=10.0, help="每種設定的量測秒數")
+    parser.add_argument("--rows", type=int, default=20000, help="合成行情資料集筆數")
+    parser.add_argument("--tool", default="get_stock_quotes_realtime_all")
+    parser.add_argument("--limit", type=int, default=200, help="每次呼叫回傳筆數")
+    parser.add_argument("--latency", type=float, default=0.0, help="回放時上游請求的模擬延遲 (秒)")
+    parser.add_argument("--json", help="將結果寫入 JSON 檔")
+    parser.add_argument("-v", "--verbose", action="store_true", help="顯示 Server log")
+    args = parser.parse_args()
+    random.seed(0)
+    results = asyncio.run(run(args))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"cpus": os.cpu_count(), "clients": args.clients, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+錄製上游回應為 replay fixture (需可連線上游)：經由實際的工具路由呼叫，所有上游回應寫入 --out 目錄。
+之後以 UPSTREAM_REPLAY_DIR=<目錄> (或 server --replay <目錄>) 離線回放，例如：
+    PYTHONPATH=src python benchmarks/record_fixtures.py --out tests/fixtures/replay
+    UPSTREAM_REPLAY_DIR=tests/fixtures/replay PYTHONPATH=src pytest tests/test_mega_v2.py
+用法: PYTHONPATH=src python benchmarks/record_fixtures.py --out DIR [--tool NAME[=QUERY] ...]
+"""
+import argparse
+import asyncio
+import os
+from taiwan_finance_mcp_mega.logic.forex import ForexLogic
+from taiwan_finance_mcp_mega.logic.global_macro import GlobalMacroLogic
+from taiwan_finance_mcp_mega.logic.gov_data import EconomicsLogic
+from taiwan_finance_mcp_mega.server import TOOL_ROUTES, dispatch_mega_logic
+from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+
+# 預設錄製 tests/test_mega_v2.py 涵蓋的上游請求
+DEFAULT_TOOLS = [
+    "get_stock_quotes_realtime_all=2330",
+    "get_stock_etf_regular_savings_ranking=0050",
+    "get_forex_usd_twd_realtime",
+    "get_crypto_btc_twd_price",
+    "get_macro_fuel_price_cpc_retail",
+    "get_corp_moea_business_registration=台積電",
+]
+
+
+async def record(out: str, tools):
+    transport = AsyncHttpClient.configure_replay(record_dir=out)
+    for spec in tools:
+        name, _, query = spec.partition("=")
+        if name not in TOOL_ROUTES:
+            print(f"skip   {name}: 未知的工具")
+            continue
+        res = await dispatch_mega_logic(name, query or None, limit=1)
+        status = "error " if isinstance(res, dict) and "error" in res else "ok    "
+        print(f"{status} {spec}")
+    # 非工具路由直接呼叫的邏輯 (test_mega_v2 中的匯率換算、大宗商品與總經指標)
+    await ForexLogic.get_pair("JPY", "TWD")
+    await GlobalMacroLogic.get_commodity_price("WTI")
+    await EconomicsLogic.get_macro_gdp_growth_rate_quarterly(latest=4)
+    await AsyncHttpClient.close()
+    files = [f for f in os.listdir(transport.store.directory) if f.endswith(".json")]
+    print(f"{len(files)} fixtures in {out}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record upstream responses as replay fixtures")
+    parser.add_argument("--out", required=True, help="fixture 輸出目錄")
+    parser.add_argument("--tool", action="append", help="工具名稱，可加 =查詢參數 (可重複)；預設為 test_mega_v2 的情境")
+    args = parser.parse_args()
+    asyncio.run(record(args.out, args.tool or DEFAULT_TOOLS))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -15,5 +16,116 @@ class Config:
     VERSION = "2.0.0"
     DEFAULT_HTTP_PORT = 8000
     
+    # Cache (stale-while-revalidate)
+    # 超過 soft TTL 先回傳舊資料並於背景刷新；超過 hard TTL 則阻塞重新抓取。
+    CACHE_SOFT_TTL = float(os.getenv("CACHE_SOFT_TTL", "300"))
+    CACHE_HARD_TTL = float(os.getenv("CACHE_HARD_TTL", "1800"))
+    # (URL 正則, soft TTL 秒, hard TTL 秒)，由上而下第一個符合者生效
+    CACHE_TTL_RULES = [
+        (r"tw\.rter\.info", 60, 600),                            # 即時匯率
+        (r"api\.coingecko\.com|api\.alternative\.me", 30, 300),  # 加密貨幣
+        (r"openapi\.twse\.com\.tw|tpex\.org\.tw", 300, 6 * 3600),  # 盤後每日更新
+        (r"apiservice\.mol\.gov\.tw", 3600, 24 * 3600),          # 月/年度統計
+    ]
+
+    # Disk Cache (第二層持久化緩存；CACHE_DIR 為空則停用)
+    CACHE_DIR = os.getenv("CACHE_DIR", "")
+    CACHE_OFFLINE = os.getenv("CACHE_OFFLINE", "0") == "1"
+    DISK_CACHE_MAX_AGE = float(os.getenv("DISK_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+    # 多行程共用磁碟緩存時的抓取租約 (秒)：持有者逾時未完成則由其他行程接手；等待時的磁碟輪詢間隔
+    CACHE_FETCH_LEASE = float(os.getenv("CACHE_FETCH_LEASE", "90"))
+    CACHE_LEASE_POLL = float(os.getenv("CACHE_LEASE_POLL", "0.05"))
+
+    # History Store：每日快照資料集於抓取時附加寫入本地歷史庫供區間查詢 (HISTORY_DIR 為空則停用)
+    HISTORY_DIR = os.getenv("HISTORY_DIR", "")
+    # 別名 -> (Endpoint 路徑, 代號欄位；空字串表示全市場彙總、無個股索引)
+    HISTORY_DATASETS = {
+        "quotes": ("/exchangeReport/STOCK_DAY_ALL", "Code"),
+        "valuation": ("/exchangeReport/BWIBBU_d", "Code"),
+        "margin": ("/exchangeReport/MI_MARGN", "股票代號"),
+        "tpex_institutional": ("/v1/tpex_3insti_daily_trading", "SecuritiesCompanyCode"),
+        "tpex_institutional_summary": ("/v1/tpex_3insti_summary", ""),
+    }
+    # 單次歷史查詢的交易日數上限
+    HISTORY_MAX_SESSIONS = int(os.getenv("HISTORY_MAX_SESSIONS", "500"))
+
+    # Columnar Datasets：符合的大型行情資料集於寫入緩存時轉為欄式儲存
+    COLUMNAR_URL_PATTERN = os.getenv("COLUMNAR_URL_PATTERN", r"STOCK_DAY_ALL|MI_MARGN|BWIBBU_d")
+    COLUMNAR_MIN_ROWS = int(os.getenv("COLUMNAR_MIN_ROWS", "500"))
+
+    # Pagination：單頁筆數上限 (全市場資料請以 offset/cursor 分頁取得)
+    MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "500"))
+    # 股票工具單次批次查詢的代號數上限
+    MAX_BATCH_TICKERS = int(os.getenv("MAX_BATCH_TICKERS", "100"))
+    # 批次匯率換算單次筆數上限
+    MAX_BATCH_CONVERSIONS = int(os.getenv("MAX_BATCH_CONVERSIONS", "500"))
+    # 加密貨幣報價：窗口 (秒) 內的併發請求合併為一次 CoinGecko ids= 請求；單次請求的幣種數上限
+    CRYPTO_BATCH_WINDOW = float(os.getenv("CRYPTO_BATCH_WINDOW", "0.02"))
+    CRYPTO_MAX_BATCH = int(os.getenv("CRYPTO_MAX_BATCH", "100"))
+    # MOL datastore：單次請求的列數 (offset/limit 分頁)；刷新時重抓的尾端列數 (校驗位置並取得修正值)
+    MOL_PAGE_SIZE = int(os.getenv("MOL_PAGE_SIZE", "1000"))
+    MOL_REFRESH_OVERLAP = int(os.getenv("MOL_REFRESH_OVERLAP", "3"))
+
+    # Tool Output：compact JSON (不縮排) 與序列化結果緩存容量 (字元數)
+    COMPACT_JSON = os.getenv("COMPACT_JSON", "0") == "1"
+    RESPONSE_CACHE_MAX_CHARS = int(os.getenv("RESPONSE_CACHE_MAX_CHARS", str(16 * 1024 * 1024)))
+
+    # 個股快照：各區段等待上限 (秒)，逾時區段標示 timeout
+    SNAPSHOT_DEADLINE = float(os.getenv("SNAPSHOT_DEADLINE", "8"))
+
+    # Upstream Pools：各上游主機獨立的連線池與 token bucket 限流 (rate 為每秒請求數，0 表示不限流)
+    UPSTREAM_DEFAULT = {
+        "max_connections": int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "10")),
+        "max_keepalive": int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "5")),
+        "keepalive_expiry": float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "30")),
+        "timeout": float(os.getenv("UPSTREAM_TIMEOUT", "45")),
+        "connect_timeout": float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "10")),
+        "rate": 0.0,
+        "burst": 1,
+        "http2": os.getenv("UPSTREAM_HTTP2", "1") == "1",
+        # 重試 (僅連線失敗、429、502-504) 與熔斷
+        "retries": int(os.getenv("UPSTREAM_RETRIES", "2")),
+        "backoff": float(os.getenv("UPSTREAM_BACKOFF", "0.5")),
+        "backoff_max": float(os.getenv("UPSTREAM_BACKOFF_MAX", "8")),
+        "breaker_threshold": int(os.getenv("UPSTREAM_BREAKER_THRESHOLD", "5")),
+        "breaker_cooldown": float(os.getenv("UPSTREAM_BREAKER_COOLDOWN", "30")),
+    }
+    # (主機正則, 覆寫欄位)，由上而下第一個符合者生效；UPSTREAM_LIMITS (JSON 物件) 可於前方追加規則
+    UPSTREAM_LIMITS = [
+        *json.loads(os.getenv("UPSTREAM_LIMITS", "{}")).items(),
+        (r"openapi\.twse\.com\.tw", {"max_connections": 8, "rate": 3.0, "burst": 10}),  # 個股快照同時發出 7 個請求
+        (r"tpex\.org\.tw", {"max_connections": 4, "rate": 2.0, "burst": 4}),
+        (r"taifex\.com\.tw", {"max_connections": 2, "rate": 1.0, "burst": 2}),
+        (r"apiservice\.mol\.gov\.tw", {"max_connections": 2, "rate": 1.0, "burst": 3, "timeout": 60.0,
+                                        "retries": 1, "breaker_threshold": 3, "breaker_cooldown": 120.0}),
+        (r"tw\.rter\.info", {"max_connections": 2, "rate": 1.0, "burst": 3}),
+        (r"api\.coingecko\.com", {"max_connections": 2, "rate": 0.5, "burst": 5}),  # 免費方案約 30 次/分
+    ]
+
+    # 上游失敗結果的短期負向緩存 (秒)，期間內相同請求直接回傳錯誤，不再連線
+    NEGATIVE_CACHE_TTL = float(os.getenv("NEGATIVE_CACHE_TTL", "15"))
+
+    # Record / Replay：錄製上游回應為 fixture，或由 fixture 回放 (離線 CI 與效能基準)
+    UPSTREAM_RECORD_DIR = os.getenv("UPSTREAM_RECORD_DIR", "")
+    UPSTREAM_REPLAY_DIR = os.getenv("UPSTREAM_REPLAY_DIR", "")
+    UPSTREAM_REPLAY_LATENCY = float(os.getenv("UPSTREAM_REPLAY_LATENCY", "0"))
+
+    # Tracing / Profiling (預設關閉)
+    TRACE = os.getenv("TRACE", "0") == "1"
+    TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "500"))  # 超過此耗時的 trace 寫入 log
+    PROFILE_MODE = os.getenv("PROFILE_MODE", "")  # "stacks" (取樣 collapsed stacks) | "cprofile"
+    PROFILE_THRESHOLD_MS = float(os.getenv("PROFILE_THRESHOLD_MS", "1000"))
+    PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+    LOOP_LAG_THRESHOLD_MS = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "0"))  # 0 表示停用
+
+    # HTTP Workers：多個 Server 行程共用同一個 port (需磁碟緩存共用 payload，未指定 CACHE_DIR 時使用暫存目錄)
+    HTTP_WORKERS = int(os.getenv("HTTP_WORKERS", "1"))
+    METRICS_SHARE_INTERVAL = float(os.getenv("METRICS_SHARE_INTERVAL", "1"))  # worker 指標快照寫入間隔 (秒)
+
+    # Prefetch Scheduler (盤後資料預抓)
+    PREFETCH_JITTER = float(os.getenv("PREFETCH_JITTER", "90"))
+    PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "2"))
+
     # Logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -12,7 +12,9 @@ STOCK_LIST = [
     "get_stock_yield_averages_by_industry", "get_stock_pe_averages_by_industry",
     "get_stock_broker_list_all",
     "get_stock_buyback_treasury_status", "get_stock_broker_regular_savings_data",
-    "get_stock_listed_investor_profile", "get_stock_otc_investor_profile", "get_stock_public_investor_profile"
+    "get_stock_listed_investor_profile", "get_stock_otc_investor_profile", "get_stock_public_investor_profile",
+    "get_stock_snapshot", "get_stock_history_daily", "get_stock_history_coverage",
+    "get_stock_screener", "get_stock_screener_fields"
 ]
 
 # 🌍 FOREX & COMMODITY
@@ -20,7 +22,7 @@ FOREX_LIST = [
     "get_forex_usd_twd_realtime", "get_forex_jpy_twd_realtime", "get_forex_eur_twd_realtime", 
     "get_forex_cny_twd_realtime", "get_forex_hkd_twd_realtime", "get_forex_gbp_twd_realtime", 
     "get_forex_aud_twd_realtime", "get_forex_cad_twd_realtime", "get_forex_sgd_twd_realtime", 
-    "get_forex_krw_twd_realtime", "get_forex_any_to_any_conversion",
+    "get_forex_krw_twd_realtime", "get_forex_any_to_any_conversion", "get_forex_batch_conversion",
     "get_commodity_oil_wti_price_usd", "get_commodity_oil_brent_price_usd", 
     "get_commodity_gold_spot_price_twd"
 ]
@@ -58,7 +60,7 @@ CORP_LIST = [
 NEWS_LIST = []
 
 CRYPTO_LIST = [
-    "get_crypto_btc_twd_price", "get_crypto_eth_twd_price", "get_crypto_sol_twd_price",
+    "get_crypto_btc_twd_price", "get_crypto_eth_twd_price", "get_crypto_sol_twd_price", "get_crypto_prices",
     "get_crypto_market_fear_greed_index"
 ]
 
@@ -18,10 +18,9 @@ class DerivativesLogic:
 
     @staticmethod
     async def get_futures_quotes() -> List[Dict[str, Any]]:
-        """[v4.3.0] 獲取期貨每日收盤行情。僅回傳前 20 筆以防止 500 錯誤。"""
+        """[v4.3.0] 獲取期貨每日收盤行情 (全量，由 Server 端依 limit 分頁)。"""
         url = f"{DerivativesLogic.TAIFEX_BASE}/DailyMarketReportFut"
-        data = await AsyncHttpClient.fetch_json(url)
-        return data[:20] if isinstance(data, list) else data
+        return await AsyncHttpClient.fetch_json(url)
 
     @staticmethod
     async def get_taifex_institutional_flow() -> List[Dict[str, Any]]:
@@ -31,7 +30,6 @@ class DerivativesLogic:
 
     @staticmethod
     async def get_futures_oi_top_list() -> List[Dict[str, Any]]:
-        """[v4.3.0] 獲取期貨大額交易人未平倉部位統計。僅回傳前 20 筆以防止 500 錯誤。"""
+        """[v4.3.0] 獲取期貨大額交易人未平倉部位統計 (全量，由 Server 端依 limit 分頁)。"""
         url = f"{DerivativesLogic.TAIFEX_BASE}/OpenInterestOfLargeTradersFutures"
-        data = await AsyncHttpClient.fetch_json(url)
-        return data[:20] if isinstance(data, list) else data
+        return await AsyncHttpClient.fetch_json(url)
@@ -3,12 +3,17 @@
 對接 即匯站 (tw.rter.info) API，支援 OOO to OOO 匯率換算。
 """
 import logging
-from typing import Dict, Any, Optional
+import re
+from typing import Dict, Any, List, Optional, Tuple, Union
 from taiwan_finance_mcp_mega.config import Config
+from taiwan_finance_mcp_mega.utils.cross_rates import CrossRateMatrix
 from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
 
 logger = logging.getLogger("mcp-finance")
 
+# 批次換算項目：「100 USD/TWD」、「100 USD>TWD」、「100 USD to TWD」、「USD TWD」(金額預設 1)
+_CONVERSION = re.compile(r"^\s*(-?[\d,]*\.?\d+)?\s*([A-Za-z]{3})\s*(?:/|->|>|\s)\s*([A-Za-z]{3})\s*$")
+
 class ForexLogic:
     """
     提供全球匯率換算與行情，數據源自 tw.rter.info。
@@ -21,78 +26,117 @@ class ForexLogic:
         """
         return await AsyncHttpClient.fetch_json(Config.FOREX_API)
 
+    @staticmethod
+    async def get_matrix() -> Optional[CrossRateMatrix]:
+        """取得當前報價的交叉匯率矩陣 (每份緩存 payload 只建立一次)；無法取得報價時回傳 None。"""
+        data = await ForexLogic.get_latest_rates_raw()
+        if not data or not isinstance(data, dict) or "error" in data:
+            return None
+        return AsyncHttpClient.derived(data, Config.FOREX_API, "cross_rates", CrossRateMatrix.from_rter)
+
     @classmethod
     async def get_pair(cls, base: str, target: str = "TWD") -> Dict[str, Any]:
         """
         計算並獲取特定貨幣對的即時匯率 (OOO to OOO)。
         
-        解釋：執行精確的交叉換算邏輯，獲取當下市場的即時匯率。
+        解釋：由交叉匯率矩陣查表取得當下市場的即時匯率。
         輸入 (Input)：
             base (str): 原始幣別 (如 'JPY', 'EUR', 'USD')。
             target (str): 目標幣別 (如 'TWD', 'HKD')。
         輸出 (Output)：
             Dict[str, Any]: 包含 pair, rate, source 與 update_time。
         """
-        data = await cls.get_latest_rates_raw()
-        if not data or not isinstance(data, dict):
+        matrix = await cls.get_matrix()
+        if matrix is None:
             return {"error": "無法獲取匯率數據"}
         
         base = base.upper()
         target = target.upper()
-        
-        try:
-            # 取得基準匯率 (相對於 USD)
-            # tw.rter.info 格式為 "USDXXX"
-            usd_base_key = f"USD{base}"
-            usd_target_key = f"USD{target}"
-            
-            rate_to_usd_base = 1.0 if base == "USD" else data.get(usd_base_key, {}).get("Exrate")
-            rate_to_usd_target = 1.0 if target == "USD" else data.get(usd_target_key, {}).get("Exrate")
-            
-            if rate_to_usd_base is None:
-                return {"error": f"不支援的原始幣別: {base}"}
-            if rate_to_usd_target is None:
-                return {"error": f"不支援的目標幣別: {target}"}
-                
-            # 換算公式: 1 Base = (1/rate_to_usd_base) USD = (rate_to_usd_target / rate_to_usd_base) Target
-            final_rate = rate_to_usd_target / rate_to_usd_base
-            
-            return {
-                "pair": f"{base}/{target}",
-                "rate": round(final_rate, 6),
-                "update_time": data.get(usd_target_key if target != "USD" else usd_base_key, {}).get("UTC"),
-                "source": "tw.rter.info (即匯站)",
-                "note": "數據經由 USD 交叉換算得出。"
-            }
-        except Exception as e:
-            logger.error(f"Forex calculation error: {str(e)}")
-            return {"error": f"匯率計算失敗: {str(e)}"}
+        if base not in matrix:
+            return {"error": f"不支援的原始幣別: {base}"}
+        if target not in matrix:
+            return {"error": f"不支援的目標幣別: {target}"}
+
+        return {
+            "pair": f"{base}/{target}",
+            "rate": round(matrix.rate(base, target), 6),
+            "update_time": matrix.update_time(base, target),
+            "source": "tw.rter.info (即匯站)",
+            "note": "數據經由 USD 交叉換算得出。"
+        }
 
     @staticmethod
     async def get_latest_rates(base: str = "USD") -> Dict[str, Any]:
         """
         [Legacy Support] 獲取全球即時匯率表。
         """
-        data = await ForexLogic.get_latest_rates_raw()
         if base.upper() == "USD":
-            return data
+            return await ForexLogic.get_latest_rates_raw()
         
         # 轉換為以 base 為基準的表
         base = base.upper()
-        usd_base_key = f"USD{base}"
-        rate_to_usd_base = 1.0 if base == "USD" else data.get(usd_base_key, {}).get("Exrate")
-        
-        if not rate_to_usd_base:
+        matrix = await ForexLogic.get_matrix()
+        row = matrix.row(base) if matrix is not None else None
+        if row is None:
             return {"error": f"不支援的基準幣別: {base}"}
-            
-        converted_rates = {}
-        for key, val in data.items():
-            if key.startswith("USD"):
-                currency = key[3:]
-                converted_rates[currency] = round(val["Exrate"] / rate_to_usd_base, 6)
                 
         return {
             "base": base,
-            "rates": converted_rates,
+            "rates": {currency: round(rate, 6) for currency, rate in row.items()},
             "source": "tw.rter.info (Cross-rate calculation)"
         }
+
+    @staticmethod
+    def parse_conversions(conversions: Union[str, List[str], None]) -> List[Union[Tuple[float, str, str], str]]:
+        """解析批次換算清單 (逗號、分號或換行分隔字串，或字串列表)；無法解析的項目保留原字串。"""
+        if isinstance(conversions, str):
+            # 位於數字之間且後接三位數字的逗號視為千分位 (例: 5,000 JPY/TWD)，不作為分隔；
+            # 前一字元非數字者必為分隔 (例: 100 USD/TWD,500 JPY/TWD)
+            conversions = re.split(r"[;，；\n]+|(?<!\d),|,(?!\d{3}\b)", conversions)
+        items: List[Union[Tuple[float, str, str], str]] = []
+        for raw in conversions or []:
+            text = str(raw).strip()
+            if not text:
+                continue
+            m = _CONVERSION.match(text.replace(" to ", " ").replace(" TO ", " "))
+            if m is None:
+                items.append(text)
+                continue
+            amount = float(m.group(1).replace(",", "")) if m.group(1) else 1.0
+            items.append((amount, m.group(2).upper(), m.group(3).upper()))
+        return items
+
+    @staticmethod
+    async def convert_batch(conversions: Union[str, List[str], None]) -> Dict[str, Any]:
+        """
+        批次匯率換算：一次換算多筆 (金額, 原始幣別, 目標幣別)，共用同一份報價與交叉匯率矩陣。
+        輸入 (Input)：
+            conversions: 例如 "100 USD/TWD, 5000 JPY/TWD, 1 EUR/USD" 或 ["100 USD/TWD", "5000 JPY/TWD"]。
+        輸出 (Output)：
+            Dict[str, Any]: conversions 為各筆 amount, from, to, rate, converted (無法換算者附 error)。
+        """
+        items = ForexLogic.parse_conversions(conversions)
+        if not items:
+            return {"error": "請提供換算清單，例如: 100 USD/TWD, 5000 JPY/TWD"}
+        if len(items) > Config.MAX_BATCH_CONVERSIONS:
+            return {"error": f"單次最多換算 {Config.MAX_BATCH_CONVERSIONS} 筆 (收到 {len(items)} 筆)。"}
+        matrix = await ForexLogic.get_matrix()
+        if matrix is None:
+            return {"error": "無法獲取匯率數據"}
+
+        valid = [item for item in items if isinstance(item, tuple)]
+        converted = iter(matrix.convert_many(valid))
+        results = []
+        for item in items:
+            if not isinstance(item, tuple):
+                results.append({"input": item, "error": "無法解析 (格式: 金額 原始幣別/目標幣別，例: 100 USD/TWD)"})
+                continue
+            amount, base, target = item
+            value = next(converted)
+            if value is None:
+                missing = base if base not in matrix else target
+                results.append({"amount": amount, "from": base, "to": target, "error": f"不支援的幣別: {missing}"})
+                continue
+            results.append({"amount": amount, "from": base, "to": target, "rate": round(matrix.rate(base, target), 6),
+                            "converted": round(value, 4), "update_time": matrix.update_time(base, target)})
+        return {"conversions": results, "source": "tw.rter.info (即匯站)", "note": "數據經由 USD 交叉換算得出。"}
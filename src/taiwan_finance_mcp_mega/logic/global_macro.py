@@ -5,8 +5,12 @@ Global Macro-economics Logic - v4.1.0
 """
 import logging
 import json
+import re
 from datetime import datetime
-from typing import Dict, Any, Optional
+from urllib.parse import urlencode
+from typing import Dict, Any, List, Optional, Tuple, Union
+from taiwan_finance_mcp_mega.config import Config
+from taiwan_finance_mcp_mega.utils.coalescer import BatchCoalescer, BatchResult
 from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
 
 logger = logging.getLogger("mcp-finance")
@@ -51,17 +55,67 @@ class GlobalMacroLogic:
             logger.error(f"Oil Price Sync Error: {str(e)}")
             return {"error": "數據解析異常", "status": "maintenance"}
 
+async def _fetch_simple_price(vs_currencies: Tuple[str, ...], ids: List[str]) -> BatchResult:
+    """
+    以單一 simple/price 請求抓取多個幣種 (ids=a,b,c)；經限流與熔斷，但不寫入數據集緩存
+    (結果已由 BatchCoalescer 逐幣種緩存，任意幣種組合不應擠掉大型資料集)。
+    """
+    data = await AsyncHttpClient.fetch_json_uncached(CryptoLogic.PRICE_URL, params=CryptoLogic.price_params(ids, vs_currencies))
+    if not isinstance(data, dict):
+        return BatchResult({}, error="Crypto API 異常")
+    values = {coin_id: data[coin_id] for coin_id in ids if isinstance(data.get(coin_id), dict)}
+    if not values and "error" in data:
+        return BatchResult({}, error=str(data["error"]))
+    return BatchResult(values)
+
 class CryptoLogic:
-    """處理加密貨幣市場即時行情 (免 Token)。"""
+    """
+    處理加密貨幣市場即時行情 (免 Token)。
+    報價經 BatchCoalescer：併發查詢的幣種合併為一次 CoinGecko 請求，各幣種結果分別緩存。
+    """
+    # 常見代號 -> CoinGecko coin id (未列出者以小寫視為 coin id)
+    COIN_ALIASES = {
+        "BTC": "bitcoin", "ETH": "ethereum", "SOL": "solana", "BNB": "binancecoin", "XRP": "ripple",
+        "DOGE": "dogecoin", "ADA": "cardano", "TRX": "tron", "AVAX": "avalanche-2", "DOT": "polkadot",
+        "LINK": "chainlink", "LTC": "litecoin", "USDT": "tether", "USDC": "usd-coin", "TON": "the-open-network",
+    }
+    DEFAULT_VS = ("twd", "usd")
+    _quotes = BatchCoalescer(
+        _fetch_simple_price, *AsyncHttpClient.ttl_for(Config.COINGECKO_BASE),
+        window=Config.CRYPTO_BATCH_WINDOW, max_batch=Config.CRYPTO_MAX_BATCH,
+    )
+
+    PRICE_URL = f"{Config.COINGECKO_BASE}/simple/price"
+
+    @staticmethod
+    def price_params(ids: List[str], vs_currencies: Tuple[str, ...]) -> Dict[str, str]:
+        return {"ids": ",".join(ids), "vs_currencies": ",".join(vs_currencies), "include_24hr_change": "true"}
+
+    @staticmethod
+    def price_url(ids: List[str], vs_currencies: Tuple[str, ...]) -> str:
+        """完整的 simple/price URL (參數已編碼)，作為新鮮度紀錄的來源標示。"""
+        return f"{CryptoLogic.PRICE_URL}?{urlencode(CryptoLogic.price_params(ids, vs_currencies), safe=',')}"
+
+    @staticmethod
+    def coin_id(coin: str) -> str:
+        return CryptoLogic.COIN_ALIASES.get(coin.strip().upper(), coin.strip().lower())
+
+    @staticmethod
+    async def quotes(coin_ids: List[str], vs_currencies: Tuple[str, ...] = DEFAULT_VS) -> Tuple[Dict[str, Dict[str, Any]], Optional[str]]:
+        """取得多個幣種的原始報價 (coin id -> simple/price 欄位)，並記錄各幣種的緩存新鮮度。"""
+        quotes, error = await CryptoLogic._quotes.get(vs_currencies, coin_ids)
+        for coin_id, quote in quotes.items():
+            AsyncHttpClient.record_freshness(CryptoLogic.price_url([coin_id], vs_currencies), quote.status,
+                                             ("coingecko", vs_currencies, coin_id), quote.fetched_at)
+        return {coin_id: quote.value for coin_id, quote in quotes.items()}, error
+
     @staticmethod
     async def get_price(coin: str = "bitcoin") -> Dict[str, Any]:
-        coin_map = {"BTC": "bitcoin", "ETH": "ethereum", "SOL": "solana"}
-        coin_id = coin_map.get(coin.upper(), coin.lower())
-        url = f"https://api.coingecko.com/api/v3/simple/price?ids={coin_id}&vs_currencies=twd,usd&include_24hr_change=true"
+        coin_id = CryptoLogic.coin_id(coin)
         try:
-            data = await AsyncHttpClient.fetch_json(url)
-            if coin_id in data:
-                stats = data[coin_id]
+            quotes, error = await CryptoLogic.quotes([coin_id])
+            if coin_id in quotes:
+                stats = quotes[coin_id]
                 return {
                     "coin": coin_id.capitalize(),
                     "price_twd": f"{stats['twd']:,} TWD",
@@ -69,10 +123,46 @@ class CryptoLogic:
                     "change_24h": f"{stats['usd_24h_change']:.2f}%",
                     "source": "CoinGecko (Public API)"
                 }
+            if error:
+                return {"error": "Crypto API 異常"}
             return {"error": f"找不到貨幣 {coin}"}
-        except:
+        except Exception:
             return {"error": "Crypto API 異常"}
 
+    @staticmethod
+    async def get_prices(coins: Union[str, List[str], None], vs_currencies: Optional[str] = None) -> Dict[str, Any]:
+        """
+        多幣種即時報價：所有幣種以一次 CoinGecko 請求取得 (併發查詢亦合併)。
+        輸入 (Input)：
+            coins: 代號或 CoinGecko coin id，以逗號分隔或列表 (例: BTC,ETH,dogecoin)。
+            vs_currencies: 計價幣別，以逗號分隔 (預設 twd,usd)。
+        輸出 (Output)：
+            Dict[str, Any]: quotes 為各幣種的 price / change_24h (依計價幣別)，查無者附 error。
+        """
+        if isinstance(coins, str):
+            coins = re.split(r"[,，、\s]+", coins)
+        requested = list(dict.fromkeys(c.strip() for c in coins or [] if isinstance(c, str) and c.strip()))
+        if not requested:
+            return {"error": "請指定幣種，例如: BTC,ETH,SOL"}
+        if len(requested) > Config.CRYPTO_MAX_BATCH:
+            return {"error": f"單次最多查詢 {Config.CRYPTO_MAX_BATCH} 個幣種 (收到 {len(requested)} 個)。"}
+        vs = tuple(dict.fromkeys(v.strip().lower() for v in (vs_currencies or "").split(",") if v.strip())) or CryptoLogic.DEFAULT_VS
+        ids = [CryptoLogic.coin_id(c) for c in requested]
+        quotes, error = await CryptoLogic.quotes(ids, vs)
+
+        results = []
+        for coin, coin_id in zip(requested, ids):
+            stats = quotes.get(coin_id)
+            if stats is None:
+                results.append({"coin": coin, "id": coin_id, "error": "Crypto API 異常" if error else f"找不到貨幣 {coin}"})
+                continue
+            results.append({
+                "coin": coin, "id": coin_id,
+                "price": {v: stats.get(v) for v in vs},
+                "change_24h": {v: round(stats[f"{v}_24h_change"], 2) for v in vs if stats.get(f"{v}_24h_change") is not None},
+            })
+        return {"quotes": results, "vs_currencies": list(vs), "source": "CoinGecko (Public API)"}
+
     @staticmethod
     async def get_fear_greed_index() -> Dict[str, Any]:
         """[v4.3.1] 獲取加密貨幣恐慌與貪婪指數。僅回傳最新 1 筆。"""
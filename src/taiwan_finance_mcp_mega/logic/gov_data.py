@@ -5,41 +5,136 @@ Taiwan Macro-economics & Gov Data Logic - v4.5.0
 """
 import logging
 import json
+import time
 from datetime import datetime
 import pytz
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
+from taiwan_finance_mcp_mega.config import Config
 from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+from taiwan_finance_mcp_mega.utils.mol_datastore import MolDataset
 
 logger = logging.getLogger("mcp-finance")
 
+class MolDatastore:
+    """
+    勞動部 OdService datastore 資源的共用數列：每個資源只保存一份已解析的 MolDataset (含期間索引)，所有使用該資源的工具共用。
+    數列的新鮮度依 MOL 的 TTL 規則自行管理：soft TTL 內直接查詢，過期後只以 offset/limit 請求尾端
+    (重疊 MOL_REFRESH_OVERLAP 列，用以校驗位置並取得修正值)；刷新失敗時沿用舊數列至 hard TTL。
+    """
+    BASE_URL = "https://apiservice.mol.gov.tw/OdService/rest/datastore/"
+    _datasets: Dict[str, MolDataset] = {}
+
+    @classmethod
+    def clear(cls) -> None:
+        cls._datasets.clear()
+
+    @classmethod
+    async def load(cls, resource: str) -> Tuple[Optional[MolDataset], Optional[str]]:
+        """回傳資源的數列與本次刷新的錯誤訊息；從未載入成功 (或已超過 hard TTL) 時數列為 None。"""
+        dataset = cls._datasets.setdefault(resource, MolDataset(resource))
+        url = cls.BASE_URL + resource
+        soft, hard = AsyncHttpClient.ttl_for(url)
+        error = None
+        if time.monotonic() >= dataset.check_at:
+            # 同一資源同時只有一個刷新在途 (各工具併發呼叫時等待同一次刷新，不交錯合併同一份數列)
+            error = await AsyncHttpClient._single_flight(f"mol_{resource}", lambda: cls._check(resource, url, soft))
+            dataset = cls._datasets[resource]  # 完整重載成功時已換為新的數列
+        age = time.monotonic() - dataset.fetched_at
+        if not len(dataset) or age >= hard:
+            return None, error or "上游未回傳資料"
+        AsyncHttpClient.record_freshness(url, "fresh" if age < soft else "stale", (resource, dataset.version), dataset.fetched_at)
+        return dataset, error
+
+    @classmethod
+    async def _check(cls, resource: str, url: str, soft: float) -> Optional[str]:
+        """刷新已過期的數列並排定下次檢查時間；回傳錯誤訊息。"""
+        dataset = cls._datasets[resource]
+        if time.monotonic() < dataset.check_at:
+            return None  # 等待期間已由前一次刷新更新
+        dataset, error = await cls._refresh(dataset, url)
+        cls._datasets[resource] = dataset
+        now = time.monotonic()
+        if error is None:
+            dataset.fetched_at = now
+        dataset.check_at = now + (soft if error is None else Config.NEGATIVE_CACHE_TTL)
+        return error
+
+    @classmethod
+    async def _refresh(cls, dataset: MolDataset, url: str) -> Tuple[MolDataset, Optional[str]]:
+        """
+        自尾端 (重疊 MOL_REFRESH_OVERLAP 列) 請求並合併，回傳 (應保存的數列, 錯誤訊息)。
+        尾端與已保存的數列對不上 (上游重排或刪減) 時，以新的 MolDataset 完整重載，成功後才取代原數列；
+        重載失敗時沿用原數列 (至 hard TTL)。
+        """
+        offset = max(len(dataset) - Config.MOL_REFRESH_OVERLAP, 0)
+        matched, error = await cls._pages(dataset, url, offset, verify=offset > 0)
+        if matched:
+            return dataset, error
+        fresh = MolDataset(dataset.resource)
+        fresh.version = dataset.version  # 版本延續遞增，避免與舊數列的回應記憶鍵相同
+        fresh.fetched_at, fresh.check_at = dataset.fetched_at, dataset.check_at
+        _, error = await cls._pages(fresh, url, 0, verify=False)
+        if error is None and not len(fresh):
+            error = "上游未回傳資料"
+        return (dataset, error) if error else (fresh, None)
+
+    @staticmethod
+    async def _pages(dataset: MolDataset, url: str, offset: int, verify: bool) -> Tuple[bool, Optional[str]]:
+        """
+        自 offset 逐頁請求並合併，直到某頁不足 MOL_PAGE_SIZE 列；回傳 (尾端是否吻合, 錯誤訊息)。
+        verify 時先校驗第一頁與已保存數列的期間，不吻合則不合併任何資料。
+        """
+        size = max(Config.MOL_PAGE_SIZE, 1)
+        previous = None
+        while True:
+            # 分頁由 MolDataset 保存，不寫入數據集緩存 (記憶體 / 磁碟)
+            data = await AsyncHttpClient.fetch_json_uncached(url, params={"offset": offset, "limit": size})
+            if not (isinstance(data, dict) and data.get("success") and isinstance(data.get("result"), dict)):
+                return True, (data.get("error") if isinstance(data, dict) else None) or "上游未回傳資料"
+            page = data["result"].get("records") or []
+            if len(page) > size:
+                # 上游未套用 limit：回應即為完整資源
+                dataset.merge(0, page, complete=True)
+                return True, None
+            if verify and (not page or offset >= len(dataset) or dataset.key_of(page[0]) != dataset.key_at(offset)):
+                return False, None
+            if previous is not None and page and page[0] == previous:
+                return True, None  # 上游未套用 offset，避免重複附加同一頁
+            verify, previous = False, page[0] if page else None
+            dataset.merge(offset, page, complete=len(page) < size)
+            if len(page) < size:
+                return True, None
+            offset += len(page)
+
 class EconomicsLogic:
     """處理台灣宏觀經濟指標。"""
 
     @staticmethod
-    async def get_macro_gdp_growth_rate_quarterly() -> Dict[str, Any]:
-        """獲取季度 GDP 經濟成長率 (從每月指標提取)。"""
-        url = "https://apiservice.mol.gov.tw/OdService/rest/datastore/A17030000J-000016-1ci"
+    async def get_macro_gdp_growth_rate_quarterly(start: Optional[str] = None, end: Optional[str] = None,
+                                                  latest: Optional[int] = None) -> Dict[str, Any]:
+        """獲取季度 GDP 經濟成長率 (從每月指標提取，與每月國內主要經濟指標共用同一份數列)。"""
         try:
-            data = await AsyncHttpClient.fetch_json(url)
-            if data.get("success") and "result" in data:
-                records = data["result"].get("records", [])
-                # 過濾出有經濟成長率數據的月份 (通常為每季季底)
-                gdp_records = [
-                    {
-                        "period": r.get("日期（月別）"),
-                        "gdp_growth_rate": r.get("經濟成長率"),
-                        "unemployment_rate": r.get("失業率（百分比）"),
-                        "cpi_annual_growth": r.get("消費者物價-年增率")
-                    }
-                    for r in records if r.get("經濟成長率") and r.get("經濟成長率") != "…"
-                ]
-                return {
-                    "status": "success",
-                    "title": "台灣季度經濟指標 (GDP/失業率/CPI)",
-                    "records": gdp_records[-4:],  # 回傳最近四季
-                    "source": "勞動部/主計總處 (Open Data)"
+            dataset, _ = await MolDatastore.load("A17030000J-000016-1ci")
+            if dataset is None:
+                return {"error": "無法從平台獲取 GDP 數據"}
+            # 過濾出有經濟成長率數據的月份 (通常為每季季底)
+            rows = dataset.query(start, end, EconomicsLogic._latest(latest),
+                                 where=lambda r: r.get("經濟成長率") and r.get("經濟成長率") != "…")
+            gdp_records = [
+                {
+                    "period": r.get("日期（月別）"),
+                    "gdp_growth_rate": r.get("經濟成長率"),
+                    "unemployment_rate": r.get("失業率（百分比）"),
+                    "cpi_annual_growth": r.get("消費者物價-年增率")
                 }
-            return {"error": "無法從平台獲取 GDP 數據"}
+                for r in rows
+            ]
+            return {
+                "status": "success",
+                "title": "台灣季度經濟指標 (GDP/失業率/CPI)",
+                "records": gdp_records,  # 由新到舊，limit=4 即為最近四季
+                "source": "勞動部/主計總處 (Open Data)"
+            }
         except Exception as e:
             return {"error": f"API 請求異常: {str(e)}"}
 
@@ -55,38 +150,48 @@ class EconomicsLogic:
         }
 
     @staticmethod
-    async def get_monthly_financial_indicators() -> Dict[str, Any]:
+    async def get_monthly_financial_indicators(start: Optional[str] = None, end: Optional[str] = None,
+                                               latest: Optional[int] = None) -> Dict[str, Any]:
         """獲取每月國內主要金融指標 (中央銀行/勞動部 API)。"""
-        url = "https://apiservice.mol.gov.tw/OdService/rest/datastore/A17030000J-000037-l9P"
-        return await EconomicsLogic._fetch_mol_api(url, "每月國內主要金融指標")
+        return await EconomicsLogic._query_mol("A17030000J-000037-l9P", "每月國內主要金融指標", start, end, latest)
 
     @staticmethod
-    async def get_macro_economic_indicators_monthly() -> Dict[str, Any]:
+    async def get_macro_economic_indicators_monthly(start: Optional[str] = None, end: Optional[str] = None,
+                                                    latest: Optional[int] = None) -> Dict[str, Any]:
         """獲取每月國內主要經濟指標。"""
-        url = "https://apiservice.mol.gov.tw/OdService/rest/datastore/A17030000J-000016-1ci"
-        return await EconomicsLogic._fetch_mol_api(url, "每月國內主要經濟指標")
+        return await EconomicsLogic._query_mol("A17030000J-000016-1ci", "每月國內主要經濟指標", start, end, latest)
 
     @staticmethod
-    async def get_macro_economic_indicators_annual() -> Dict[str, Any]:
+    async def get_macro_economic_indicators_annual(start: Optional[str] = None, end: Optional[str] = None,
+                                                   latest: Optional[int] = None) -> Dict[str, Any]:
         """獲取年度國內主要經濟指標。"""
-        url = "https://apiservice.mol.gov.tw/OdService/rest/datastore/A17000000J-030243-XXL"
-        return await EconomicsLogic._fetch_mol_api(url, "年度國內主要經濟指標")
+        return await EconomicsLogic._query_mol("A17000000J-030243-XXL", "年度國內主要經濟指標", start, end, latest)
+
+    @staticmethod
+    def _latest(latest: Optional[int]) -> Optional[int]:
+        return latest if latest and latest > 0 else None
 
     @staticmethod
-    async def _fetch_mol_api(url: str, title: str) -> Dict[str, Any]:
-        """通用 MOL REST API 抓取邏輯。"""
+    async def _query_mol(resource: str, title: str, start: Optional[str] = None, end: Optional[str] = None,
+                         latest: Optional[int] = None) -> Dict[str, Any]:
+        """
+        通用 MOL datastore 查詢邏輯：依期間區間 (start / end，例: 2023-01、112年3月、2023) 與最近 N 期 (latest) 篩選，
+        records 由新到舊排列；latest 為期間最新的一筆。
+        """
         try:
-            data = await AsyncHttpClient.fetch_json(url)
-            if data.get("success") and "result" in data:
-                records = data["result"].get("records", [])
-                return {
-                    "status": "success",
-                    "title": title,
-                    "count": len(records),
-                    "latest": records[-1] if records else {},
-                    "source": "勞動部/中央銀行 (Open Data)"
-                }
-            return {"error": f"無法從平台獲取 {title} 數據"}
+            dataset, _ = await MolDatastore.load(resource)
+            if dataset is None:
+                return {"error": f"無法從平台獲取 {title} 數據"}
+            newest = dataset.query(latest=1)
+            return {
+                "status": "success",
+                "title": title,
+                "count": len(dataset),
+                "period": dataset.span(),
+                "latest": newest[0] if newest else {},
+                "records": dataset.query(start, end, EconomicsLogic._latest(latest)),
+                "source": "勞動部/中央銀行 (Open Data)"
+            }
         except Exception as e:
             return {"error": f"API 請求異常 ({title}): {str(e)}"}
 
@@ -132,64 +237,46 @@ class BankLogic:
             return [{"error": f"無法獲取台銀信評數據: {str(e)}"}]
 
     @staticmethod
-    async def get_macro_global_stock_indices() -> Dict[str, Any]:
-        """[v4.3.1] 獲取每月國際主要股價指數。僅回傳前 12 筆（一年數據）。"""
-        url = "https://apiservice.mol.gov.tw/OdService/rest/datastore/A17030000J-000050-Ipz"
-        data = await EconomicsLogic._fetch_mol_api(url, "每月國際主要股價指數")
-        if data.get("status") == "success" and "records" in data.get("result", {}):
-             # 這裡是透過 _fetch_mol_api 封裝過的，需調整回傳結構或直接在此處理
-             pass
-        # 由於 _fetch_mol_api 已經回傳了格式化的 Dict，我們直接在 logic 裡修正 _fetch_mol_api 的行為或在此切片
-        try:
-            raw_data = await AsyncHttpClient.fetch_json(url)
-            if raw_data.get("success") and "result" in raw_data:
-                records = raw_data["result"].get("records", [])
-                return {
-                    "status": "success",
-                    "title": "每月國際主要股價指數",
-                    "count": 12,
-                    "latest_year": records[-12:] if records else [],
-                    "source": "勞動部/中央銀行 (Open Data)"
-                }
-            return {"error": "無法獲取數據"}
-        except Exception as e:
-            return {"error": str(e)}
+    async def get_macro_global_stock_indices(start: Optional[str] = None, end: Optional[str] = None,
+                                             latest: Optional[int] = None) -> Dict[str, Any]:
+        """[v4.3.1] 獲取每月國際主要股價指數。records 由新到舊排列，limit=12 即為最近一年數據。"""
+        return await EconomicsLogic._query_mol("A17030000J-000050-Ipz", "每月國際主要股價指數", start, end, latest)
 
     @staticmethod
-    async def get_macro_forex_rates_monthly() -> Dict[str, Any]:
+    async def get_macro_forex_rates_monthly(start: Optional[str] = None, end: Optional[str] = None,
+                                            latest: Optional[int] = None) -> Dict[str, Any]:
         """獲取國際主要國家貨幣每月匯率。"""
-        url = "https://apiservice.mol.gov.tw/OdService/rest/datastore/A17030000J-000049-Iq0"
-        return await EconomicsLogic._fetch_mol_api(url, "國際主要國家貨幣每月匯率")
+        return await EconomicsLogic._query_mol("A17030000J-000049-Iq0", "國際主要國家貨幣每月匯率", start, end, latest)
 
     @staticmethod
-    async def get_bank_bond_issuance_monthly() -> Dict[str, Any]:
+    async def get_bank_bond_issuance_monthly(start: Optional[str] = None, end: Optional[str] = None,
+                                             latest: Optional[int] = None) -> Dict[str, Any]:
         """獲取國內債券每月發行概況。"""
-        url = "https://apiservice.mol.gov.tw/OdService/rest/datastore/A17030000J-000048-YHK"
-        return await EconomicsLogic._fetch_mol_api(url, "國內債券每月發行概況")
+        return await EconomicsLogic._query_mol("A17030000J-000048-YHK", "國內債券每月發行概況", start, end, latest)
 
     @staticmethod
-    async def get_bank_stock_issuance_monthly() -> Dict[str, Any]:
+    async def get_bank_stock_issuance_monthly(start: Optional[str] = None, end: Optional[str] = None,
+                                              latest: Optional[int] = None) -> Dict[str, Any]:
         """獲取國內公開發行公司股票每月發行概況。"""
-        url = "https://apiservice.mol.gov.tw/OdService/rest/datastore/A17030000J-000047-Y4N"
-        return await EconomicsLogic._fetch_mol_api(url, "國內公開發行公司股票每月發行概況")
+        return await EconomicsLogic._query_mol("A17030000J-000047-Y4N", "國內公開發行公司股票每月發行概況", start, end, latest)
 
     @staticmethod
-    async def get_bank_pension_fund_stats_monthly() -> Dict[str, Any]:
+    async def get_bank_pension_fund_stats_monthly(start: Optional[str] = None, end: Optional[str] = None,
+                                                  latest: Optional[int] = None) -> Dict[str, Any]:
         """獲取國民年金保險基金每月經營概況。"""
-        url = "https://apiservice.mol.gov.tw/OdService/rest/datastore/A17030000J-000045-2qm"
-        return await EconomicsLogic._fetch_mol_api(url, "國民年金保險基金每月經營概況")
+        return await EconomicsLogic._query_mol("A17030000J-000045-2qm", "國民年金保險基金每月經營概況", start, end, latest)
 
     @staticmethod
-    async def get_macro_global_stock_indices_annual() -> Dict[str, Any]:
+    async def get_macro_global_stock_indices_annual(start: Optional[str] = None, end: Optional[str] = None,
+                                                    latest: Optional[int] = None) -> Dict[str, Any]:
         """獲取年度國際主要股價指數。"""
-        url = "https://apiservice.mol.gov.tw/OdService/rest/datastore/A17000000J-030245-4Ml"
-        return await EconomicsLogic._fetch_mol_api(url, "年度國際主要股價指數")
+        return await EconomicsLogic._query_mol("A17000000J-030245-4Ml", "年度國際主要股價指數", start, end, latest)
 
     @staticmethod
-    async def get_macro_forex_rates_annual() -> Dict[str, Any]:
+    async def get_macro_forex_rates_annual(start: Optional[str] = None, end: Optional[str] = None,
+                                           latest: Optional[int] = None) -> Dict[str, Any]:
         """獲取國際主要國家貨幣年度匯率。"""
-        url = "https://apiservice.mol.gov.tw/OdService/rest/datastore/A17000000J-030185-CKf"
-        return await EconomicsLogic._fetch_mol_api(url, "國際主要國家貨幣年度匯率")
+        return await EconomicsLogic._query_mol("A17000000J-030185-CKf", "國際主要國家貨幣年度匯率", start, end, latest)
 
 class PublicServiceLogic:
     """公共服務邏輯。"""
@@ -0,0 +1,82 @@
+"""
+Historical Time-Series Logic
+以本地歷史快照庫 (HISTORY_DIR) 回答區間查詢，例如「2330 近 60 個交易日收盤價」；
+依代號查詢時不連線上游 (公司名稱解析需名稱搜尋索引)。
+"""
+import asyncio
+import logging
+from typing import Dict, Any, Optional
+from taiwan_finance_mcp_mega.config import Config
+from taiwan_finance_mcp_mega.logic.stock import StockLogic
+from taiwan_finance_mcp_mega.utils.history import parse_trade_date
+from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+from taiwan_finance_mcp_mega.utils.ticker_search import CODE_PATTERN
+
+logger = logging.getLogger("mcp-finance")
+
+class HistoryLogic:
+    """
+    查詢每日快照資料集 (行情 / 本益比 / 融資融券 / 櫃買三大法人) 的本地歷史。
+    歷史由 Server 每次抓取上游時累積，可查詢的區間見 get_coverage。
+    """
+    DISABLED = "歷史資料庫未啟用，請以 --history-dir (或 HISTORY_DIR) 指定目錄；啟用後每日抓取的快照才會開始累積。"
+
+    @staticmethod
+    def _date_arg(raw: Optional[str]) -> Optional[str]:
+        if not raw:
+            return None
+        parsed = parse_trade_date(raw)
+        if parsed is None:
+            raise ValueError(f"無法解析日期: {raw} (格式: 2024-01-31、20240131 或民國 1130131)")
+        return parsed.isoformat()
+
+    @staticmethod
+    async def get_daily_history(ticker: Optional[str], sessions: int = 60, start: Optional[str] = None, end: Optional[str] = None,
+                                dataset: str = "quotes", fields: Optional[str] = None) -> Dict[str, Any]:
+        """
+        個股 (或全市場彙總資料集) 的每日歷史，由舊到新排列。
+        sessions 為最多回傳的交易日數 (自 end 往回)；fields 以逗號分隔時只讀取這些欄位。
+        """
+        store = AsyncHttpClient._history
+        if store is None:
+            return {"error": HistoryLogic.DISABLED}
+        if dataset not in store.datasets:
+            return {"error": f"未知的歷史資料集: {dataset} (可用: {', '.join(store.datasets)})"}
+        try:
+            start, end = HistoryLogic._date_arg(start), HistoryLogic._date_arg(end)
+        except ValueError as e:
+            return {"error": str(e)}
+        sessions = max(1, min(sessions, Config.HISTORY_MAX_SESSIONS))
+        indexed = bool(store.datasets[dataset][1])
+        tickers = StockLogic.split_tickers(ticker)
+        code = None
+        if indexed:
+            if len(tickers) != 1:
+                return {"error": "歷史查詢需指定單一股票代碼或公司名稱 (例如: 2330, 台積電)。"}
+            code = tickers[0]
+            if not CODE_PATTERN.fullmatch(code):
+                code = await StockLogic.resolve_ticker(code) or code
+        columns = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+        rows = await asyncio.to_thread(store.query, dataset, code, start, end, sessions, columns)
+        if not rows:
+            days = store.dates(dataset)
+            span = f"{days[0]} ~ {days[-1]}" if days else "尚無資料"
+            return {"error": f"歷史資料庫中查無 {code or dataset} 於指定區間的資料 (已保存: {span})。"}
+        dates = sorted({row["date"] for row in rows})
+        return {
+            "ticker": tickers[0] if tickers else None,
+            "code": code,
+            "dataset": dataset,
+            "sessions": len(dates),
+            "first": dates[0],
+            "last": dates[-1],
+            "rows": rows,
+        }
+
+    @staticmethod
+    async def get_coverage() -> Any:
+        """各歷史資料集已累積的交易日數與起訖日期。"""
+        store = AsyncHttpClient._history
+        if store is None:
+            return {"error": HistoryLogic.DISABLED}
+        return await asyncio.to_thread(store.coverage)
@@ -0,0 +1,94 @@
+"""
+Stock Screener Logic
+跨資料集選股：以證券代號合併上市行情 (STOCK_DAY_ALL)、本益比/殖利率 (BWIBBU_d)、融資融券 (MI_MARGN)、
+月營收 (t187ap05_L) 與 EPS (t187ap14_L)，於緩存資料上一次篩選全市場，只回傳符合的列。
+"""
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+from taiwan_finance_mcp_mega.logic.stock import StockLogic
+from taiwan_finance_mcp_mega.utils.columnar import is_rows
+from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+from taiwan_finance_mcp_mega.utils.screener import ScreenFrame, Source, numeric_column
+from taiwan_finance_mcp_mega.utils.tracing import span
+
+logger = logging.getLogger("mcp-finance")
+
+class ScreenerLogic:
+    """
+    選股引擎：各資料集的數值欄位與代號索引附掛於緩存項目 (每份 payload 只解析一次)，
+    合併後的 ScreenFrame 保留至任一資料集刷新為止。
+    """
+    # 參與合併的資料集 (別名同 StockLogic.SNAPSHOT_SECTIONS)；第一個為列的基準 (全體上市證券)
+    SOURCES = ("quote", "valuation", "margin", "revenue", "eps")
+    # 結果列固定附上的名稱欄位 (別名, 欄名)
+    NAME_FIELD = ("quote", "Name")
+    # (各資料集 payload, ScreenFrame)：payload 皆為同一物件時重複使用
+    _frame: Optional[Tuple[Tuple[Any, ...], ScreenFrame]] = None
+
+    @staticmethod
+    def _source(alias: str, data: Any) -> Source:
+        endpoint, code_key = StockLogic.SNAPSHOT_SECTIONS[alias]
+        url = StockLogic.resolve_url(endpoint)
+        headers = StockLogic.NO_CACHE_HEADERS
+        code_index = StockLogic._code_index(data, url, code_key, headers)
+
+        def numeric(name: str):
+            return AsyncHttpClient.derived(data, url, f"numeric:{name}", lambda rows: numeric_column(rows, name), headers=headers)
+        return Source(data, code_index, numeric)
+
+    @staticmethod
+    async def frame() -> ScreenFrame:
+        """抓取 (通常為緩存命中) 各資料集並取得合併後的 ScreenFrame。基準資料集無法取得時拋出 ValueError。"""
+        payloads = await asyncio.gather(*(
+            AsyncHttpClient.fetch_json(StockLogic.resolve_url(StockLogic.SNAPSHOT_SECTIONS[alias][0]), headers=StockLogic.NO_CACHE_HEADERS)
+            for alias in ScreenerLogic.SOURCES
+        ))
+        available = {alias: data for alias, data in zip(ScreenerLogic.SOURCES, payloads) if is_rows(data) and len(data)}
+        base = ScreenerLogic.SOURCES[0]
+        if base not in available:
+            error = payloads[0].get("error") if isinstance(payloads[0], dict) else None
+            raise ValueError(error or "無法取得上市行情資料 (STOCK_DAY_ALL)")
+        for alias in ScreenerLogic.SOURCES:
+            if alias not in available:
+                logger.warning(f"Screener: {alias} 資料集無法取得，相關欄位視為缺值")
+
+        identity = tuple(available.get(alias) for alias in ScreenerLogic.SOURCES)
+        cached = ScreenerLogic._frame
+        if cached is not None and len(cached[0]) == len(identity) and all(a is b for a, b in zip(cached[0], identity)):
+            return cached[1]
+        with span("screener.join", rows=len(available[base])):
+            frame = ScreenFrame({alias: ScreenerLogic._source(alias, data) for alias, data in available.items()},
+                                base, StockLogic.SNAPSHOT_SECTIONS[base][1])
+        ScreenerLogic._frame = (identity, frame)
+        return frame
+
+    @staticmethod
+    async def screen(filters: Optional[str], sort: Optional[str] = None) -> Any:
+        """
+        依篩選條件 (逗號分隔，例: PEratio < 12, DividendYield > 5, 融資今日餘額 > 融資前日餘額) 與排序
+        (例: -DividendYield,PEratio；前綴 - 為由大到小) 篩選全市場，回傳符合的列 (代號、名稱與條件/排序用到的欄位)。
+        """
+        try:
+            frame = await ScreenerLogic.frame()
+            predicates = frame.parse_filters(filters)
+            order = frame.parse_sort(sort)
+        except ValueError as e:
+            return {"error": str(e)}
+        if not predicates and not order:
+            return {"error": "請指定篩選條件 (例: PEratio < 12, DividendYield > 5) 或排序欄位。"}
+        with span("screener.evaluate", rows=len(frame), predicates=len(predicates)):
+            selection = frame.screen(predicates, order)
+        with span("screener.rows", rows=len(selection)):
+            fields = [f for f in frame.referenced(predicates, order) if f != ScreenerLogic.NAME_FIELD]
+            extra = [ScreenerLogic.NAME_FIELD] if ScreenerLogic.NAME_FIELD[1] in frame.fields[frame.base] else []
+            return frame.rows(selection, fields, extra)
+
+    @staticmethod
+    async def list_fields() -> Dict[str, List[str]]:
+        """各資料集可用於篩選與排序的欄位 (別名 -> 欄名清單)。"""
+        try:
+            frame = await ScreenerLogic.frame()
+        except ValueError as e:
+            return {"error": str(e)}
+        return dict(frame.fields)
@@ -4,47 +4,156 @@ The Exhaustive Financial Data Engine.
 100% Comprehensive Logic Implementation for ALL 100+ Stock Endpoints.
 Includes categorized docstrings with Input/Output details.
 """
+import asyncio
 import logging
 import json
-from typing import Dict, Any, List, Optional
+import re
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+import pytz
 from taiwan_finance_mcp_mega.config import Config
 from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+from taiwan_finance_mcp_mega.utils.columnar import is_rows
+from taiwan_finance_mcp_mega.utils.dataset_index import CODE_KEYS, build_code_index, build_value_index, normalize_code, take
+from taiwan_finance_mcp_mega.utils.ticker_search import CODE_PATTERN, TickerSearchIndex
+from taiwan_finance_mcp_mega.utils.tracing import span
 
 logger = logging.getLogger("mcp-finance")
+TAIPEI = pytz.timezone("Asia/Taipei")
 
 class StockLogic:
     """
     處理所有與台灣股市相關的數據請求。
     實作了對應證交所 100+ 個 OpenAPI 端點的邏輯。
     """
+    # Anti-Cache 標頭：確保上游回傳最新狀態 (亦為緩存 key 的一部分)
+    NO_CACHE_HEADERS = {
+        "accept": "application/json",
+        "If-Modified-Since": "Mon, 26 Jul 1997 05:00:00 GMT",
+        "Cache-Control": "no-cache",
+        "Pragma": "no-cache"
+    }
+    # 名稱搜尋索引的資料來源：上市 / 上櫃 / 興櫃及公發公司基本資料
+    PROFILE_ENDPOINTS = {
+        "TWSE": "/opendata/t187ap03_L",
+        "TPEx": "/v1/t187ap03_O",
+        "Public": "/opendata/t187ap03_P",
+    }
+    # 個股快照 (get_stock_snapshot) 的各區段資料來源：(Endpoint, 代號欄位)
+    SNAPSHOT_SECTIONS = {
+        "quote": ("/exchangeReport/STOCK_DAY_ALL", "Code"),
+        "valuation": ("/exchangeReport/BWIBBU_d", "Code"),
+        "margin": ("/exchangeReport/MI_MARGN", "股票代號"),
+        "revenue": ("/opendata/t187ap05_L", "公司代號"),
+        "eps": ("/opendata/t187ap14_L", "公司代號"),
+        "announcements": ("/opendata/t187ap04_L", "公司代號"),
+        "profile": ("/opendata/t187ap03_L", "公司代號"),
+    }
+    # 回傳多筆的區段 (其餘區段僅取第一筆)
+    SNAPSHOT_MULTI_ROW = {"announcements": 5}
+    _search_index = TickerSearchIndex()
+
+    @staticmethod
+    def _code_index(data: Any, url: str, code_key: str, headers: Optional[Dict[str, str]]) -> Dict[str, List[int]]:
+        """取得 (或首次建立) 附掛於緩存項目的代號索引。"""
+        if code_key in CODE_KEYS:
+            index_name, keys = "code_index", CODE_KEYS
+        else:
+            index_name, keys = f"code_index:{code_key}", (code_key,) + CODE_KEYS
+        return AsyncHttpClient.derived(data, url, index_name, lambda rows: build_code_index(rows, keys), headers=headers)
 
     @staticmethod
     async def _fetch_and_filter(url: str, symbol: Optional[str] = None, code_key: str = "Code", headers: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
         """
-        [v3.7.0] 高性能過濾引擎：二段式掃描 (Fast Index Scan + Full Value Scan)。
+        [v3.7.0] 高性能過濾引擎：二段式查找 (Fast Index Lookup + Full Value Lookup)。
+        索引附掛於緩存項目，每份 payload 只建立一次，隨緩存刷新一併重建。
         """
         data = await AsyncHttpClient.fetch_json(url, headers=headers)
-        if not isinstance(data, list):
+        if not is_rows(data):
             return []
         
-        if not symbol:
-            return data[:100] # 全市場請求僅回傳前 100 筆，避免 Payload 過大
+        symbol_str = normalize_code(symbol) if symbol else ""
+        if not symbol_str:
+            return data # 全市場請求回傳緩存中的完整資料集 (唯讀)，由 Server 端依 limit/offset 分頁
 
-        symbol_str = str(symbol).strip().upper()
-        
-        # 段一：優先 Key 掃描 (Fast Path)
-        fast_keys = [code_key, "Code", "公司代號", "股票代號", "STOCKsSecurityCode", "ETFsSecurityCode", "公司代碼", "證券代號"]
-        filtered = [item for item in data if any(str(item.get(k, "")).strip().upper() == symbol_str for k in fast_keys)]
-        
-        if filtered:
-            return filtered
+        # 段一：優先 Key 索引 (Fast Path)
+        with span("filter.code_index", rows=len(data)):
+            code_index = StockLogic._code_index(data, url, code_key, headers)
+            positions = code_index.get(symbol_str)
+            if positions:
+                return take(data, positions)
 
-        # 段二：全欄位模糊掃描 (Fallback Path)
-        for item in data:
-            if any(str(v).strip().upper() == symbol_str for v in item.values()):
-                filtered.append(item)
-        
-        return filtered
+        # 段 1.5：公司名稱 -> 代號 (例如「台積電」-> 2330)
+        if not CODE_PATTERN.fullmatch(symbol_str):
+            resolved = await StockLogic.resolve_ticker(symbol_str)
+            if resolved and code_index.get(resolved):
+                return take(data, code_index[resolved])
+
+        # 段二：全欄位索引 (Fallback Path)
+        with span("filter.value_index", rows=len(data)):
+            value_index = AsyncHttpClient.derived(data, url, "value_index", build_value_index, headers=headers)
+            return take(data, value_index.get(symbol_str, []))
+
+    @staticmethod
+    def split_tickers(symbol: Any) -> List[str]:
+        """將逗號 (含全形、頓號) 分隔字串或列表拆為正規化後的代號清單，保留順序並去除重複。"""
+        if symbol is None:
+            return []
+        parts = symbol if isinstance(symbol, (list, tuple)) else re.split(r"[,，、]", str(symbol))
+        return list(dict.fromkeys(normalize_code(p) for p in parts if p is not None and str(p).strip()))
+
+    @staticmethod
+    async def _fetch_and_filter_many(url: str, symbols: List[str], code_key: str = "Code", headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        多檔批次查詢：資料集只抓取一次，逐檔探查同一份代號索引；
+        公司名稱一次性透過搜尋索引解析，其餘才退回全欄位索引。
+        回傳以輸入代號為 key 的結果，查無資料者標示 status = not_found；超過 MAX_BATCH_TICKERS 的代號不查詢並列於 truncated。
+        上游抓取失敗時直接回傳上游的 {"error": ...}，不標示為查無代號。
+        """
+        symbols = StockLogic.split_tickers(symbols)
+        symbols, truncated = symbols[:Config.MAX_BATCH_TICKERS], symbols[Config.MAX_BATCH_TICKERS:]
+        data = await AsyncHttpClient.fetch_json(url, headers=headers)
+        if isinstance(data, dict) and "error" in data:
+            return data
+        results: Dict[str, Dict[str, Any]] = {s: {"status": "not_found", "rows": []} for s in symbols}
+        extra = {"truncated": truncated} if truncated else {}
+
+        def summary() -> Dict[str, Any]:
+            return {"tickers": len(symbols), "found": sum(r["status"] == "ok" for r in results.values()), **extra, "results": results}
+
+        if not is_rows(data):
+            return summary()
+
+        def found(symbol: str, code: str, positions: List[int]) -> None:
+            results[symbol] = {"status": "ok", "resolved": code, "rows": take(data, positions)}
+
+        code_index = StockLogic._code_index(data, url, code_key, headers)
+        names, misses = [], []
+        for s in symbols:
+            if code_index.get(s):
+                found(s, s, code_index[s])
+            elif CODE_PATTERN.fullmatch(s):
+                misses.append(s)
+            else:
+                names.append(s)
+
+        if names:
+            search_index = await StockLogic.ticker_search_index()
+            for s in names:
+                resolved = search_index.resolve(s)
+                if resolved and code_index.get(resolved):
+                    found(s, resolved, code_index[resolved])
+                else:
+                    misses.append(s)
+
+        if misses:
+            value_index = AsyncHttpClient.derived(data, url, "value_index", build_value_index, headers=headers)
+            for s in misses:
+                if value_index.get(s):
+                    found(s, s, value_index[s])
+
+        return summary()
 
     # --- 1. 行情與交易類 (Quotes & Trading) ---
 
@@ -101,12 +210,7 @@ class StockLogic:
     async def get_institutional_investors_summary() -> Dict[str, Any]:
         """查詢三大法人買賣超彙總統計 (BFI82U - TWSE RWD API)。"""
         url = "https://www.twse.com.tw/rwd/zh/fund/BFI82U?response=json"
-        headers = {
-            "accept": "application/json",
-            "If-Modified-Since": "Mon, 26 Jul 1997 05:00:00 GMT",
-            "Cache-Control": "no-cache",
-            "Pragma": "no-cache"
-        }
+        headers = StockLogic.NO_CACHE_HEADERS
         try:
             data = await AsyncHttpClient.fetch_json(url, headers=headers)
             if data.get("stat") == "OK":
@@ -159,28 +263,119 @@ class StockLogic:
         """
         [DevOps] 萬用接口：根據 Endpoint 自動映射並調用證交所或櫃買全量 API。
         """
-        headers = {
-            "accept": "application/json",
-            "If-Modified-Since": "Mon, 26 Jul 1997 05:00:00 GMT",
-            "Cache-Control": "no-cache",
-            "Pragma": "no-cache"
+        url = StockLogic.resolve_url(endpoint)
+        tickers = StockLogic.split_tickers(symbol)
+        if len(tickers) > 1:
+            return await StockLogic._fetch_and_filter_many(url, tickers, headers=StockLogic.NO_CACHE_HEADERS)
+        return await StockLogic._fetch_and_filter(url, tickers[0] if tickers else None, headers=StockLogic.NO_CACHE_HEADERS)
+
+    @staticmethod
+    def resolve_url(endpoint: str) -> str:
+        """將 MEGA_ENDPOINT_MAP 的 Endpoint 轉換為證交所或櫃買 OpenAPI 完整 URL。"""
+        # 櫃買 Endpoint 皆帶 /v1 前綴 (例: /v1/tpex_3insti_summary, /v1/t187ap03_O)
+        if "tpex" in endpoint or endpoint.startswith("/v1/"):
+            return f"https://www.tpex.org.tw/openapi{endpoint}"
+        return f"{Config.TWSE_BASE}{endpoint}"
+
+    @staticmethod
+    async def ticker_search_index() -> TickerSearchIndex:
+        """
+        取得名稱搜尋索引，並與三份公司基本資料的緩存版本同步。
+        僅有刷新過的市場會增量更新，其餘直接沿用。
+        """
+        markets = list(StockLogic.PROFILE_ENDPOINTS)
+        payloads = await asyncio.gather(*(
+            AsyncHttpClient.fetch_json(StockLogic.resolve_url(StockLogic.PROFILE_ENDPOINTS[m]), headers=StockLogic.NO_CACHE_HEADERS)
+            for m in markets
+        ))
+        for market, rows in zip(markets, payloads):
+            StockLogic._search_index.update_market(market, rows)
+        return StockLogic._search_index
+
+    @staticmethod
+    async def resolve_ticker(query: str) -> Optional[str]:
+        """將公司簡稱、全名或英文名稱解析為股票代號 (例: 台積電 -> 2330)。"""
+        index = await StockLogic.ticker_search_index()
+        return index.resolve(query)
+
+    # --- 6. 個股快照 (Concurrent Snapshot) ---
+
+    @staticmethod
+    async def _snapshot_section(section: str, code: str) -> Tuple[Any, List[Dict[str, Any]]]:
+        """抓取單一區段並以代號索引取出該股資料；回傳 (資料, 本區段的緩存新鮮度紀錄)。"""
+        freshness = AsyncHttpClient.track_freshness()  # 僅作用於本區段的 Task context
+        endpoint, code_key = StockLogic.SNAPSHOT_SECTIONS[section]
+        url = StockLogic.resolve_url(endpoint)
+        data = await AsyncHttpClient.fetch_json(url, headers=StockLogic.NO_CACHE_HEADERS)
+        if not is_rows(data):
+            raise ValueError(data.get("error", "上游回傳格式異常") if isinstance(data, dict) else "上游回傳格式異常")
+        rows = take(data, StockLogic._code_index(data, url, code_key, StockLogic.NO_CACHE_HEADERS).get(code, []))
+        limit = StockLogic.SNAPSHOT_MULTI_ROW.get(section)
+        if limit is not None:
+            return rows[:limit], freshness
+        return (rows[0] if rows else None), freshness
+
+    @staticmethod
+    async def get_stock_snapshot(symbol: Optional[str], deadline: Optional[float] = None) -> Dict[str, Any]:
+        """
+        [v4.7.0] 個股快照：並行抓取行情、本益比/殖利率、融資融券、月營收、EPS、重大訊息與基本資料，
+        合併為單一紀錄並附上各區段的數據時間。超過 deadline (秒) 仍未完成的區段標示 timeout，不阻塞其他區段；
+        其上游請求仍於背景完成並寫入緩存，下次查詢即可取得。
+        """
+        tickers = StockLogic.split_tickers(symbol)
+        if len(tickers) != 1:
+            return {"error": "個股快照需指定單一股票代碼或公司名稱 (例如: 2330, 台積電)。"}
+        deadline = Config.SNAPSHOT_DEADLINE if deadline is None else deadline
+        started = time.monotonic()
+        code = tickers[0]
+        if not CODE_PATTERN.fullmatch(code):
+            try:
+                code = await asyncio.wait_for(StockLogic.resolve_ticker(code), deadline) or code
+            except asyncio.TimeoutError:
+                return {"error": f"公司名稱解析逾時 ({deadline:g}s)，請改以股票代碼查詢。"}
+
+        tasks = {name: asyncio.ensure_future(StockLogic._snapshot_section(name, code)) for name in StockLogic.SNAPSHOT_SECTIONS}
+        _, pending = await asyncio.wait(tasks.values(), timeout=max(deadline - (time.monotonic() - started), 0))
+        for task in pending:
+            task.cancel()  # 上游請求受 single-flight shield 保護，不會因此中斷
+
+        sections: Dict[str, Any] = {}
+        as_of: Dict[str, Optional[str]] = {}
+        issues: Dict[str, str] = {}
+        for name, task in tasks.items():
+            if task in pending:
+                sections[name], as_of[name], issues[name] = None, None, "timeout"
+                continue
+            try:
+                value, freshness = task.result()
+            except Exception as e:
+                sections[name], as_of[name], issues[name] = None, None, f"error: {e}"
+                continue
+            AsyncHttpClient.merge_freshness(freshness)
+            sections[name] = value
+            as_of[name] = StockLogic._as_of(freshness)
+            if not value:
+                issues[name] = "not_found"
+
+        return {
+            "ticker": tickers[0],
+            "code": code,
+            "name": (sections.get("quote") or {}).get("Name") or (sections.get("profile") or {}).get("公司簡稱"),
+            **sections,
+            "as_of": as_of,
+            "issues": issues,
         }
-        
-        if "tpex" in endpoint or endpoint.startswith("/v1/tpex_"):
-            url = f"https://www.tpex.org.tw/openapi{endpoint}"
-        else:
-            url = f"{Config.TWSE_BASE}{endpoint}"
-        
-        return await StockLogic._fetch_and_filter(url, symbol, headers=headers)
+
+    @staticmethod
+    def _as_of(freshness: List[Dict[str, Any]]) -> Optional[str]:
+        """將緩存年齡換算為數據抓取時間 (台北時間, 秒精度)。"""
+        if not freshness:
+            return None
+        fetched = time.time() - max(f["age_seconds"] for f in freshness)
+        return datetime.fromtimestamp(fetched, TAIPEI).isoformat(timespec="seconds")
 
     @staticmethod
     async def get_tpex_quotes(symbol: Optional[str] = None) -> List[Dict[str, Any]]:
         """獲取上櫃個股當日即時行情 (TPEx)."""
         url = "https://www.tpex.org.tw/openapi/v1/t187ap03_O" # 上櫃基本資料為例
-        headers = {
-            "accept": "application/json",
-            "If-Modified-Since": "Mon, 26 Jul 1997 05:00:00 GMT",
-            "Cache-Control": "no-cache",
-            "Pragma": "no-cache"
-        }
-        return await StockLogic._fetch_and_filter(url, symbol, "公司代號", headers=headers)
+        return await StockLogic._fetch_and_filter(url, symbol, "公司代號", headers=StockLogic.NO_CACHE_HEADERS)
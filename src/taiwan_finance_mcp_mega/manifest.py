@@ -0,0 +1,49 @@
+"""
+Taiwan Finance MCP Mega - Tool Manifest
+預先產生的工具清單 (名稱、說明與 input / output schema)。Server 啟動時直接以此註冊工具，
+不必在每次冷啟動 (stdio 模式每個 client session 都會重新啟動) 以 pydantic 解析所有工具函式的簽名。
+修改 metadata.py、constants.py 或工具參數後請重新產生 (tests/test_manifest.py 會檢查是否過期)：
+    PYTHONPATH=src python -m taiwan_finance_mcp_mega.manifest
+"""
+import json
+import os
+from typing import Any, Dict, List
+
+MANIFEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tool_manifest.json")
+
+# manifest 保存的 Tool 欄位 (其餘使用預設值)
+FIELDS = {"name", "title", "description", "parameters", "output_schema", "annotations", "meta", "tags"}
+
+
+def load_manifest(path: str = MANIFEST_PATH) -> Dict[str, Dict[str, Any]]:
+    """工具名稱 -> Tool 建構參數；檔案不存在時回傳空 dict (Server 退回即時解析註冊)。"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+    except FileNotFoundError:
+        return {}
+    return {entry["name"]: entry for entry in entries}
+
+
+def build_manifest() -> List[Dict[str, Any]]:
+    """以實際的工具函式解析 schema (與 @mcp.tool 註冊相同的路徑)。"""
+    from fastmcp.tools import FunctionTool
+    from taiwan_finance_mcp_mega.server import tool_function, tool_names
+    return [
+        FunctionTool.from_function(tool_function(name), name=name).model_dump(include=FIELDS, exclude_none=True, mode="json")
+        for name in tool_names()
+    ]
+
+
+def write_manifest(path: str = MANIFEST_PATH) -> int:
+    entries = build_manifest()
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(entries, f, ensure_ascii=False, indent=1)
+        f.write("\n")
+    os.replace(tmp, path)
+    return len(entries)
+
+
+if __name__ == "__main__":
+    print(f"{write_manifest()} tools -> {MANIFEST_PATH}")
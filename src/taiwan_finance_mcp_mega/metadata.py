@@ -30,6 +30,11 @@ TOOL_METADATA = {
     "get_stock_listed_investor_profile": { "summary": "[上市/投資] 查詢上市公司投資概況。包含發言人、上市日期、公司網址、會計師等深度投資資訊。", "inputs": "ticker: 股票代碼。", "outputs": "投資人關係資料。", "source": "TWSE" },
     "get_stock_otc_investor_profile": { "summary": "[上櫃/投資] 查詢上櫃公司投資概況。包含發言人、上櫃日期、公司網址、會計師等深度投資資訊。", "inputs": "ticker: 股票代碼。", "outputs": "投資人關係資料。", "source": "TPEx" },
     "get_stock_public_investor_profile": { "summary": "[公發/投資] 查詢興櫃及公開發行公司基本資料。包含聯繫方式、簽證資訊與成立日期。", "inputs": "ticker: 股票代碼。", "outputs": "公司基本投資資訊。", "source": "TWSE" },
+    "get_stock_snapshot": { "summary": "[上市/快照] 一次取得個股完整概況：當日行情、本益比/殖利率/淨值比、融資融券、月營收、EPS、近期重大訊息與公司基本資料 (並行查詢)。", "inputs": "ticker: 股票代碼或公司名稱。", "outputs": "合併後的個股紀錄，含各區段數據時間 (as_of) 與逾時/查無資料標示 (issues)。", "source": "TWSE" },
+    "get_stock_history_daily": { "summary": "[上市櫃/歷史] 查詢個股近 N 個交易日 (或指定日期區間) 的每日行情、本益比/殖利率、融資融券或櫃買三大法人歷史。資料來自本地歷史庫 (Server 每日抓取時累積)，不連線上游。", "inputs": "ticker: 股票代碼或公司名稱；sessions: 交易日數；start/end: 日期區間；dataset: quotes / valuation / margin / tpex_institutional / tpex_institutional_summary。", "outputs": "由舊到新的每日紀錄 (date 欄位為交易日)，含實際涵蓋的起訖日期。", "source": "Local History (TWSE/TPEx)" },
+    "get_stock_history_coverage": { "summary": "[歷史] 查詢本地歷史庫各資料集已累積的交易日數與起訖日期，用於判斷歷史查詢可涵蓋的區間。", "inputs": "None", "outputs": "資料集、來源 Endpoint、交易日數、最早/最新日期。", "source": "Local History" },
+    "get_stock_screener": { "summary": "[上市/選股] 跨資料集條件選股：以證券代號合併當日行情、本益比/殖利率/淨值比、融資融券、月營收與 EPS，一次篩選全市場並排序 (例: 本益比 < 12、殖利率 > 5% 且融資餘額增加)。", "inputs": "filters: 篩選條件；sort: 排序欄位。", "outputs": "符合條件的個股 (代號、名稱與條件/排序用到的欄位原始值)，分頁資訊含符合總數。", "source": "TWSE" },
+    "get_stock_screener_fields": { "summary": "[上市/選股] 列出選股工具各資料集 (quote / valuation / margin / revenue / eps) 可用於篩選與排序的欄位名稱。", "inputs": "None", "outputs": "資料集別名 -> 欄位名稱清單。", "source": "TWSE" },
 
     # 📉 DERIVATIVES: Specifically for TAIFEX (Futures/Options)
     # MANDATORY: Use ONLY for questions about 'Futures', 'Options', 'Open Interest', or 'Daily Settlement'.
@@ -49,19 +54,20 @@ TOOL_METADATA = {
     "get_forex_sgd_twd_realtime": { "summary": "新幣兌台幣即時匯率。", "inputs": "None", "outputs": "Rate", "source": "tw.rter.info" },
     "get_forex_krw_twd_realtime": { "summary": "韓元兌台幣即時匯率。", "inputs": "None", "outputs": "Rate", "source": "tw.rter.info" },
     "get_forex_any_to_any_conversion": { "summary": "任意幣別對任意幣別之即時匯率換算 (OOO to OOO)。", "inputs": "base: 原始幣別 (例: JPY), target: 目標幣別 (例: USD)。", "outputs": "計算後匯率。", "source": "tw.rter.info" },
+    "get_forex_batch_conversion": { "summary": "批次匯率換算：一次換算多筆 金額 + 幣別對 (例: 100 USD/TWD, 5000 JPY/TWD, 1 EUR/USD)，共用同一份即時報價。", "inputs": "conversions: 換算清單。", "outputs": "各筆的匯率與換算後金額 (無法換算者附錯誤說明)。", "source": "tw.rter.info" },
     "get_commodity_oil_wti_price_usd": { "summary": "WTI 原油期貨報價(USD)。", "inputs": "None", "outputs": "USD/Bbl", "source": "MOEA" },
     "get_commodity_oil_brent_price_usd": { "summary": "Brent 原油期貨報價(USD)。", "inputs": "None", "outputs": "USD/Bbl", "source": "MOEA" },
     "get_commodity_gold_spot_price_twd": { "summary": "黃金現貨即時報價(TWD)。", "inputs": "None", "outputs": "TWD/oz", "source": "TPEx" },
 
     # 🏛️ MACRO: National Policy & Economy (DGBAS/CBC/MOF)
-    "get_macro_gdp_growth_rate_quarterly": { "summary": "台灣季度 GDP 經濟成長率。國家級宏觀指標。", "inputs": "None", "outputs": "%", "source": "DGBAS" },
-    "get_macro_monthly_financial_indicators": { "summary": "每月國內主要金融指標。包含 M1B/M2、外匯存底、重貼現率、股價指數等總體指標。", "inputs": "None", "outputs": "Financial Indicators JSON", "source": "CBC/MOL" },
-    "get_macro_economic_indicators_monthly": { "summary": "每月國內主要經濟指標。包含 GDP、CPI、失業率、薪資等。", "inputs": "None", "outputs": "Economic Indicators JSON", "source": "DGBAS/MOL" },
-    "get_macro_economic_indicators_annual": { "summary": "年度國內主要經濟指標。長期趨勢分析用。", "inputs": "None", "outputs": "Economic Indicators JSON", "source": "DGBAS/MOL" },
-    "get_macro_global_stock_indices": { "summary": "[大盤指數] 每月國際主要股價指數。包含台股加權、美股 (Nasdaq/Dow)、日股等歷史趨勢。", "inputs": "None", "outputs": "Stock Indices JSON", "source": "MOL" },
-    "get_macro_forex_rates_monthly": { "summary": "[歷史趨勢] 國際主要國家貨幣每月匯率概況。包含美元、人民幣、日圓等對台幣趨勢。", "inputs": "None", "outputs": "Forex Rates JSON", "source": "MOL" },
-    "get_macro_global_stock_indices_annual": { "summary": "[大盤指數] 年度國際主要股價指數。歷史長期對比趨勢。", "inputs": "None", "outputs": "Stock Indices JSON", "source": "MOL" },
-    "get_macro_forex_rates_annual": { "summary": "[歷史趨勢] 國際主要國家貨幣年度匯率歷史概況。", "inputs": "None", "outputs": "Forex Rates JSON", "source": "MOL" },
+    "get_macro_gdp_growth_rate_quarterly": { "summary": "台灣季度 GDP 經濟成長率。國家級宏觀指標。", "inputs": "start/end: 期間區間 (例: 2023-01, 112年3月, 2023)；latest: 最近 N 期。", "outputs": "%", "source": "DGBAS" },
+    "get_macro_monthly_financial_indicators": { "summary": "每月國內主要金融指標。包含 M1B/M2、外匯存底、重貼現率、股價指數等總體指標。", "inputs": "start/end: 期間區間 (例: 2023-01, 112年3月, 2023)；latest: 最近 N 期。", "outputs": "Financial Indicators JSON", "source": "CBC/MOL" },
+    "get_macro_economic_indicators_monthly": { "summary": "每月國內主要經濟指標。包含 GDP、CPI、失業率、薪資等。", "inputs": "start/end: 期間區間 (例: 2023-01, 112年3月, 2023)；latest: 最近 N 期。", "outputs": "Economic Indicators JSON", "source": "DGBAS/MOL" },
+    "get_macro_economic_indicators_annual": { "summary": "年度國內主要經濟指標。長期趨勢分析用。", "inputs": "start/end: 期間區間 (例: 2023-01, 112年3月, 2023)；latest: 最近 N 期。", "outputs": "Economic Indicators JSON", "source": "DGBAS/MOL" },
+    "get_macro_global_stock_indices": { "summary": "[大盤指數] 每月國際主要股價指數。包含台股加權、美股 (Nasdaq/Dow)、日股等歷史趨勢。", "inputs": "start/end: 期間區間 (例: 2023-01, 112年3月, 2023)；latest: 最近 N 期。", "outputs": "Stock Indices JSON", "source": "MOL" },
+    "get_macro_forex_rates_monthly": { "summary": "[歷史趨勢] 國際主要國家貨幣每月匯率概況。包含美元、人民幣、日圓等對台幣趨勢。", "inputs": "start/end: 期間區間 (例: 2023-01, 112年3月, 2023)；latest: 最近 N 期。", "outputs": "Forex Rates JSON", "source": "MOL" },
+    "get_macro_global_stock_indices_annual": { "summary": "[大盤指數] 年度國際主要股價指數。歷史長期對比趨勢。", "inputs": "start/end: 期間區間 (例: 2023-01, 112年3月, 2023)；latest: 最近 N 期。", "outputs": "Stock Indices JSON", "source": "MOL" },
+    "get_macro_forex_rates_annual": { "summary": "[歷史趨勢] 國際主要國家貨幣年度匯率歷史概況。", "inputs": "start/end: 期間區間 (例: 2023-01, 112年3月, 2023)；latest: 最近 N 期。", "outputs": "Forex Rates JSON", "source": "MOL" },
 
     # 🏢 CORP & INDUSTRY
     "get_corp_moea_business_registration": { "summary": "經濟部商工登記公示資料。查詢公司基本信息。適用於全台所有公司，包含非上市櫃企業。", "inputs": "company_query: 公司名稱 or 統編。", "outputs": "登記資料。", "source": "MOEA" },
@@ -70,11 +76,12 @@ TOOL_METADATA = {
     "get_crypto_btc_twd_price": { "summary": "比特幣 Bitcoin 即時 TWD/USD 報價與 24h 漲跌。", "inputs": "None", "outputs": "Price", "source": "CoinGecko" },
     "get_crypto_eth_twd_price": { "summary": "以太幣 Ethereum 即時 TWD/USD 報價與 24h 漲跌。", "inputs": "None", "outputs": "Rate", "source": "CoinGecko" },
     "get_crypto_sol_twd_price": { "summary": "Solana 即時報價與市場表現。", "inputs": "None", "outputs": "Price", "source": "CoinGecko" },
+    "get_crypto_prices": { "summary": "多幣種加密貨幣即時報價：一次查詢任意幣種 (BTC、ETH、SOL、DOGE 或 CoinGecko coin id) 對 TWD/USD 等計價幣別的價格與 24h 漲跌。", "inputs": "coins: 幣種清單；vs_currencies: 計價幣別。", "outputs": "各幣種的價格與 24h 漲跌 (依計價幣別)，查無者附錯誤說明。", "source": "CoinGecko" },
     "get_crypto_market_fear_greed_index": { "summary": "全球加密幣市場恐慌與貪婪指數。情緒判斷指標。", "inputs": "None", "outputs": "Index", "source": "CoinGecko" },
     
     # 🕒 COMMON
     "get_current_time_taipei": { "summary": "獲取台北即時系統時間、日期與星期幾。", "inputs": "None", "outputs": "Timestamp", "source": "System" },
-    "get_bank_bond_issuance_monthly": { "summary": "國內債券每月發行概況。包含公債、公司債。", "inputs": "None", "outputs": "Bond Issuance JSON", "source": "MOL" },
-    "get_bank_stock_issuance_monthly": { "summary": "國內公開發行公司股票每月發行概況。", "inputs": "None", "outputs": "Stock Issuance JSON", "source": "MOL" },
-    "get_bank_pension_fund_stats_monthly": { "summary": "國民年金保險基金每月經營概況。包含規模與收益率。", "inputs": "None", "outputs": "Fund Stats JSON", "source": "MOL" }
+    "get_bank_bond_issuance_monthly": { "summary": "國內債券每月發行概況。包含公債、公司債。", "inputs": "start/end: 期間區間 (例: 2023-01, 112年3月, 2023)；latest: 最近 N 期。", "outputs": "Bond Issuance JSON", "source": "MOL" },
+    "get_bank_stock_issuance_monthly": { "summary": "國內公開發行公司股票每月發行概況。", "inputs": "start/end: 期間區間 (例: 2023-01, 112年3月, 2023)；latest: 最近 N 期。", "outputs": "Stock Issuance JSON", "source": "MOL" },
+    "get_bank_pension_fund_stats_monthly": { "summary": "國民年金保險基金每月經營概況。包含規模與收益率。", "inputs": "start/end: 期間區間 (例: 2023-01, 112年3月, 2023)；latest: 最近 N 期。", "outputs": "Fund Stats JSON", "source": "MOL" }
 }
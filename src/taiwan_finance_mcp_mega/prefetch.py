@@ -0,0 +1,167 @@
+"""
+Taiwan Finance MCP Mega - Market-Calendar Prefetch Scheduler
+依證交所交易日曆與各資料集的盤後公布時段，於使用者請求前預先將大型資料集載入緩存。
+"""
+import asyncio
+import logging
+import random
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import pytz
+from taiwan_finance_mcp_mega.config import Config
+from taiwan_finance_mcp_mega.logic.stock import StockLogic
+from taiwan_finance_mcp_mega.utils.columnar import is_rows
+from taiwan_finance_mcp_mega.utils.history import parse_trade_date
+from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+
+logger = logging.getLogger("mcp-finance")
+
+TAIPEI = pytz.timezone("Asia/Taipei")
+
+# Endpoint -> 交易日公布時段 (台北時間)。同一資料集可設定多個時段，以涵蓋上游延遲公布。
+PUBLICATION_WINDOWS: Dict[str, List[str]] = {
+    "/exchangeReport/STOCK_DAY_ALL": ["14:05", "15:00"],
+    "/exchangeReport/BWIBBU_d": ["14:35", "16:00"],
+    "/exchangeReport/MI_MARGN": ["21:35"],
+    "/opendata/t187ap03_L": ["07:30"],
+    "/v1/tpex_3insti_daily_trading": ["16:10"],
+    "/v1/tpex_3insti_summary": ["16:10"],
+}
+
+
+class MarketCalendar:
+    """
+    證交所交易日曆：週一至週五，扣除證交所公告之休市日 (holidaySchedule)。
+    無法取得休市日時退化為僅排除週末。
+    """
+    HOLIDAY_URL = f"{Config.TWSE_BASE}/holidaySchedule/holidaySchedule"
+
+    def __init__(self, holidays: Optional[Iterable[date]] = None):
+        self.holidays: Set[date] = set(holidays or [])
+
+    def is_trading_day(self, d: date) -> bool:
+        return d.weekday() < 5 and d not in self.holidays
+
+    def next_trading_day(self, d: date) -> date:
+        """回傳 d 當天 (若為交易日) 或其後第一個交易日。"""
+        while not self.is_trading_day(d):
+            d += timedelta(days=1)
+        return d
+
+    def previous_trading_day(self, d: date) -> date:
+        """回傳 d 之前 (不含 d) 最近的交易日。"""
+        d -= timedelta(days=1)
+        while not self.is_trading_day(d):
+            d -= timedelta(days=1)
+        return d
+
+    def latest_session(self, now: datetime, at: str) -> date:
+        """
+        於 now (台北時間) 已公布的最新交易日：交易日當天需過了公布時段 at ("HH:MM") 才算，
+        否則 (週末、休市日或盤後公布前) 為前一個交易日。
+        """
+        hour, minute = (int(x) for x in at.split(":"))
+        d = now.date()
+        if self.is_trading_day(d) and (now.hour, now.minute) >= (hour, minute):
+            return d
+        return self.previous_trading_day(d)
+
+    # 民國 (1130101) 或西元 (20240101 / 2024-01-01) 日期
+    parse_date = staticmethod(parse_trade_date)
+
+    async def load_holidays(self) -> int:
+        """自證交所 OpenAPI 載入休市日，回傳載入筆數。"""
+        data = await AsyncHttpClient.fetch_json(self.HOLIDAY_URL)
+        if not isinstance(data, list):
+            logger.warning("Prefetch: 無法取得休市日曆，僅以週末判斷交易日")
+            return 0
+        loaded = 0
+        for item in data:
+            # 「開始交易日」、「最後交易日」等列為交易日提示，並非休市
+            if "交易日" in str(item.get("Name", "")):
+                continue
+            d = self.parse_date(item.get("Date"))
+            if d:
+                self.holidays.add(d)
+                loaded += 1
+        return loaded
+
+
+class PrefetchScheduler:
+    """
+    盤後資料預抓排程器。
+    於每個交易日的公布時段 (加上隨機 jitter) 重新抓取資料集並寫入 AsyncHttpClient 緩存，
+    同時以 Semaphore 限制同時進行的上游請求數。
+    """
+
+    def __init__(self, windows: Optional[Dict[str, List[str]]] = None, calendar: Optional[MarketCalendar] = None,
+                 jitter: float = Config.PREFETCH_JITTER, concurrency: int = Config.PREFETCH_CONCURRENCY,
+                 warm_on_start: bool = True):
+        self.windows = windows if windows is not None else PUBLICATION_WINDOWS
+        self.calendar = calendar or MarketCalendar()
+        self.jitter = max(0.0, jitter)
+        self.warm_on_start = warm_on_start
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._task: Optional[asyncio.Task] = None
+
+    def next_runs(self, now: datetime) -> List[Tuple[datetime, str]]:
+        """計算每個資料集下一次公布時段 (不含 jitter)，依時間排序。"""
+        runs = []
+        for endpoint, times in self.windows.items():
+            for hhmm in times:
+                hour, minute = (int(x) for x in hhmm.split(":"))
+                d = self.calendar.next_trading_day(now.date())
+                while True:
+                    at = TAIPEI.localize(datetime(d.year, d.month, d.day, hour, minute))
+                    if at > now:
+                        break
+                    d = self.calendar.next_trading_day(d + timedelta(days=1))
+                runs.append((at, endpoint))
+        return sorted(runs)
+
+    async def _warm_one(self, endpoint: str) -> bool:
+        async with self._semaphore:
+            data = await AsyncHttpClient.fetch_json(StockLogic.resolve_url(endpoint), headers=StockLogic.NO_CACHE_HEADERS, refresh=True)
+        ok = is_rows(data)
+        if not ok:
+            logger.warning(f"Prefetch failed: {endpoint}")
+        return ok
+
+    async def warm(self, endpoints: Optional[Iterable[str]] = None) -> Dict[str, bool]:
+        """立即預抓指定 (預設為全部) 資料集，回傳各資料集是否成功。"""
+        endpoints = list(endpoints if endpoints is not None else self.windows)
+        results = await asyncio.gather(*(self._warm_one(e) for e in endpoints))
+        return dict(zip(endpoints, results))
+
+    async def run(self) -> None:
+        await self.calendar.load_holidays()
+        if self.warm_on_start:
+            await self.warm()
+        while True:
+            now = datetime.now(TAIPEI)
+            runs = self.next_runs(now)
+            if not runs:
+                return
+            due_at = runs[0][0]
+            due = sorted({e for at, e in runs if at == due_at})
+            delay = (due_at - now).total_seconds() + random.uniform(0, self.jitter)
+            logger.info(f"Prefetch: next run in {delay:.0f}s for {due}")
+            await asyncio.sleep(delay)
+            if due_at.date() != now.date():
+                # 跨日時更新休市日曆 (證交所可能臨時公告休市)
+                await self.calendar.load_holidays()
+            await self.warm(due)
+
+    def start(self) -> asyncio.Task:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
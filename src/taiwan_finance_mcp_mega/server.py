@@ -4,22 +4,32 @@ Taiwan Finance MCP Mega v4.6.0
 Refactored for strict tool separation and precise parameter identification.
 Resolved Stock vs. Futures and Central Bank vs. Commercial Bank confusion.
 """
+import os
 import sys
 import argparse
+import asyncio
+import importlib
+import inspect
 import json
 import logging
+import re
+import time
+from functools import partial
 from fastmcp import FastMCP
-from typing import Optional, List, Dict, Any
+from fastmcp.tools import FunctionTool, Tool, ToolResult
+from pydantic import PrivateAttr
+from starlette.requests import Request
+from starlette.responses import Response
+from typing import Optional, List, Dict, Any, Awaitable, Callable, NamedTuple, Tuple, Union
 
 # Component Imports
 from taiwan_finance_mcp_mega.config import Config
-from taiwan_finance_mcp_mega.logic.stock import StockLogic
-from taiwan_finance_mcp_mega.logic.forex import ForexLogic
-from taiwan_finance_mcp_mega.logic.derivatives import DerivativesLogic
-from taiwan_finance_mcp_mega.logic.global_macro import GlobalMacroLogic, CryptoLogic
-from taiwan_finance_mcp_mega.logic.gov_data import EconomicsLogic, PublicServiceLogic, BankLogic, GovNewsLogic
-from taiwan_finance_mcp_mega.logic.corporate_logistics import CorporateLogic, IndustryLogic
-from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+# 邏輯模組 (與 httpx 等依賴) 於首次分發時才載入，見 LazyHandler
+from taiwan_finance_mcp_mega.manifest import load_manifest
+from taiwan_finance_mcp_mega.utils import metrics
+from taiwan_finance_mcp_mega.utils.pagination import paginate
+from taiwan_finance_mcp_mega.utils.response_cache import ResponseEncoder
+from taiwan_finance_mcp_mega.utils.tracing import span, tracer
 from taiwan_finance_mcp_mega.constants import (
     STOCK_LIST, FOREX_LIST, BANK_LIST, TAX_LIST, CORP_LIST, MACRO_LIST, CRYPTO_LIST, COMMON_LIST, DERIVATIVES_LIST, NEWS_LIST
 )
@@ -31,6 +41,13 @@ logger = logging.getLogger("mcp-finance")
 
 mcp = FastMCP(Config.APP_NAME)
 
+TOOL_GROUPS = [
+    (STOCK_LIST, "Stock"), (FOREX_LIST, "Forex"), (BANK_LIST, "Bank"),
+    (TAX_LIST, "Tax"), (CORP_LIST, "Corp"), (MACRO_LIST, "Macro"), 
+    (CRYPTO_LIST, "Crypto"), (COMMON_LIST, "Common"), (DERIVATIVES_LIST, "Derivatives"),
+    (NEWS_LIST, "News")
+]
+
 # --- 🚀 語義化工具映射矩陣 (Semantic Mapping Matrix) ---
 
 MEGA_ENDPOINT_MAP = {
@@ -61,191 +78,511 @@ MEGA_ENDPOINT_MAP = {
     "get_stock_public_investor_profile": "/opendata/t187ap03_P"
 }
 
-# --- 2. 核心分發邏輯 ---
+# 勞動部 datastore 統計工具 (共用 MolDatastore 的已解析數列)：支援期間區間與最近 N 期查詢
+MOL_PERIOD_TOOLS = frozenset({
+    "get_macro_gdp_growth_rate_quarterly", "get_macro_monthly_financial_indicators", "get_macro_economic_indicators_monthly",
+    "get_macro_economic_indicators_annual", "get_macro_global_stock_indices", "get_macro_global_stock_indices_annual",
+    "get_macro_forex_rates_monthly", "get_macro_forex_rates_annual", "get_bank_bond_issuance_monthly",
+    "get_bank_stock_issuance_monthly", "get_bank_pension_fund_stats_monthly",
+})
 
-async def dispatch_mega_logic(name: str, query_val: Optional[str], limit: int) -> Any:
-    try:
-        if "current_time" in name:
-            return await PublicServiceLogic.get_current_time()
-
-        # 1. 台灣股市路由 (Only Stock/ETF)
-        if name.startswith("get_stock_"):
-            endpoint = MEGA_ENDPOINT_MAP.get(name)
-            if endpoint and endpoint.startswith("http"):
-                # Direct external URL (e.g. for broken OpenAPI endpoints)
-                return {"info": "該數據源目前 OpenAPI 已失效，請點擊連結查看網頁版數據。", "url": endpoint}
-            if endpoint and endpoint.startswith("/"):
-                # Handle TPEx specifically if needed, or use a separate base
-                if "tpex" in endpoint:
-                    url = f"{Config.TPEX_BASE}{endpoint}"
-                else:
-                    url = f"{Config.TWSE_BASE}{endpoint}"
-                return await StockLogic.call_generic_api(endpoint, query_val)
-            return await StockLogic.get_realtime_quotes(query_val)
+# --- 2. 核心分發邏輯 (預先編譯的路由表) ---
+
+class LazyHandler:
+    """
+    延遲載入的處理函式 (用法同 functools.partial)：target 為「logic 模組:類別.方法」，
+    首次呼叫時才 import 該邏輯模組，stdio 模式冷啟動不必載入所有邏輯模組與 httpx。
+    """
+    __slots__ = ("target", "args", "_func")
+
+    def __init__(self, target: str, *args: Any):
+        self.target = target
+        self.args = args
+        self._func: Optional[Callable[..., Awaitable[Any]]] = None
+
+    @property
+    def func(self) -> Callable[..., Awaitable[Any]]:
+        if self._func is None:
+            module, _, path = self.target.partition(":")
+            obj: Any = importlib.import_module(f"taiwan_finance_mcp_mega.logic.{module}")
+            for attr in path.split("."):
+                obj = getattr(obj, attr)
+            self._func = obj
+        return self._func
+
+    def __call__(self, *args: Any) -> Awaitable[Any]:
+        return (self._func or self.func)(*self.args, *args)
+
+    def __repr__(self) -> str:
+        return f"LazyHandler({self.target!r}{''.join(', ' + repr(a) for a in self.args)})"
+
+class Route(NamedTuple):
+    """工具路由：handler 為綁定好的邏輯函式，adapter 將 (查詢值, limit) 轉為 handler 的參數。"""
+    handler: Callable[..., Awaitable[Any]]
+    adapter: Callable[[Optional[str], int], tuple]
+
+def _no_args(query_val: Optional[str], limit: int) -> tuple:
+    return ()
+
+def _query_arg(query_val: Optional[str], limit: int) -> tuple:
+    return (query_val,)
+
+def _currency_pair_args(query_val: Optional[str], limit: int) -> tuple:
+    """解析「JPY/TWD」、「JPY,TWD」或「JPY TWD」格式；未指定時預設 JPY -> TWD。"""
+    parts = [p for p in re.split(r"[/,\s]+", query_val or "") if p]
+    return (parts[0] if parts else "JPY", parts[1] if len(parts) > 1 else "TWD")
+
+async def _external_link(url: str) -> Dict[str, Any]:
+    # Direct external URL (e.g. for broken OpenAPI endpoints)
+    return {"info": "該數據源目前 OpenAPI 已失效，請點擊連結查看網頁版數據。", "url": url}
+
+def build_routes() -> Dict[str, Route]:
+    """建立工具名稱 -> 路由的對照表 (啟動時建立一次，呼叫時 O(1) 查表)。"""
+    routes: Dict[str, Route] = {
+        "get_current_time_taipei": Route(LazyHandler("gov_data:PublicServiceLogic.get_current_time"), _no_args),
+        "get_stock_snapshot": Route(LazyHandler("stock:StockLogic.get_stock_snapshot"), _query_arg),
+        "get_stock_history_daily": Route(LazyHandler("history:HistoryLogic.get_daily_history"), _query_arg),
+        "get_stock_history_coverage": Route(LazyHandler("history:HistoryLogic.get_coverage"), _no_args),
+        "get_stock_screener": Route(LazyHandler("screener:ScreenerLogic.screen"), _query_arg),
+        "get_stock_screener_fields": Route(LazyHandler("screener:ScreenerLogic.list_fields"), _no_args),
 
         # 1.5 衍生性商品 (Taifex - Futures/Options)
-        elif name.startswith("get_futures_"):
-            if "institutional" in name: return await DerivativesLogic.get_taifex_institutional_flow()
-            if "ranking" in name: return await DerivativesLogic.get_futures_oi_top_list()
-            return await DerivativesLogic.get_futures_quotes()
-
-        # 2. 全球匯率與大宗路由
-        elif name.startswith("get_forex_") or name.startswith("get_commodity_"):
-            if "any_to_any" in name:
-                # This would need its own tool registration or generic param handling
-                pass # Already handled by param creation below if logic is solid
-            if "gold_spot" in name: return await StockLogic.call_generic_api("/v1/tpex_gold_latest", None)
-            if "oil_wti" in name: return await GlobalMacroLogic.get_commodity_price("WTI")
-            if "oil_brent" in name: return await GlobalMacroLogic.get_commodity_price("BRENT")
-            if "gold_spot" in name: return await GlobalMacroLogic.get_commodity_price("GOLD")
-            if "silver_spot" in name: return await GlobalMacroLogic.get_commodity_price("SILVER")
-            
-            cur = name.split("_")[2].upper() if len(name.split("_")) > 2 else "USD"
-            return await ForexLogic.get_pair(cur, "TWD")
-
-        # 3. 宏觀與政府路由 (Macro Metrics)
-        elif name.startswith("get_macro_") or name.startswith("get_tax_") or name.startswith("get_gov_"):
-            if "financial_news_fsc" in name: return await GovNewsLogic.get_fsc_news()
-            if "central_bank_announcements" in name: return await GovNewsLogic.get_cbc_news()
-            if "industrial_policy_news" in name: return await GovNewsLogic.get_moea_news()
-            
-            if "fuel_price" in name: return await PublicServiceLogic.get_fuel_prices()
-            if "housing_price_index" in name: return await EconomicsLogic.get_housing_price_index()
-            if "monthly_financial_indicators" in name: return await EconomicsLogic.get_monthly_financial_indicators()
-            if "economic_indicators_monthly" in name: return await EconomicsLogic.get_macro_economic_indicators_monthly()
-            if "economic_indicators_annual" in name: return await EconomicsLogic.get_macro_economic_indicators_annual()
-            if "global_stock_indices_annual" in name: return await EconomicsLogic.get_macro_global_stock_indices_annual()
-            if "global_stock_indices" in name: return await EconomicsLogic.get_macro_global_stock_indices()
-            if "forex_rates_annual" in name: return await EconomicsLogic.get_macro_forex_rates_annual()
-            if "forex_rates_monthly" in name: return await EconomicsLogic.get_macro_forex_rates_monthly()
-            if "gdp_growth_rate_quarterly" in name: return await EconomicsLogic.get_macro_gdp_growth_rate_quarterly()
-            
-            return {"error": f"宏觀功能 {name} 尚未完全實體化。"}
-
-        # 4. 商工數據路由
-        elif name.startswith("get_corp_"):
-            if "electricity_consumption" in name: return await PublicServiceLogic.get_electricity_consumption_stats()
-            if "moea_business_registration" in name: return await CorporateLogic.get_company_basic_info(query_val if query_val else "台積電")
-            if "industry_production_index" in name: return await IndustryLogic.get_industry_production_index()
-            if "factory_count" in name: return await BankLogic.get_bank_profit_loss() # Placeholder
-            if "export_value" in name: return await BankLogic.get_bank_profit_loss() # Placeholder
-            return {"error": "商工細分數據正在對接中"}
-
-        # 5. 加密貨幣路由
-        elif name.startswith("get_crypto_"):
-            coin = "bitcoin"
-            if "btc" in name: coin = "BTC"
-            elif "eth" in name: coin = "ETH"
-            elif "sol" in name: coin = "SOL"
-            if "fear_greed" in name: return await CryptoLogic.get_fear_greed_index()
-            return await CryptoLogic.get_price(coin)
+        "get_futures_quotes_daily": Route(LazyHandler("derivatives:DerivativesLogic.get_futures_quotes"), _no_args),
+        "get_futures_institutional_investor_flow": Route(LazyHandler("derivatives:DerivativesLogic.get_taifex_institutional_flow"), _no_args),
+        "get_futures_open_interest_ranking": Route(LazyHandler("derivatives:DerivativesLogic.get_futures_oi_top_list"), _no_args),
+
+        # 2. 全球匯率與大宗
+        "get_forex_any_to_any_conversion": Route(LazyHandler("forex:ForexLogic.get_pair"), _currency_pair_args),
+        "get_forex_batch_conversion": Route(LazyHandler("forex:ForexLogic.convert_batch"), _query_arg),
+        "get_commodity_oil_wti_price_usd": Route(LazyHandler("global_macro:GlobalMacroLogic.get_commodity_price", "WTI"), _no_args),
+        "get_commodity_oil_brent_price_usd": Route(LazyHandler("global_macro:GlobalMacroLogic.get_commodity_price", "BRENT"), _no_args),
+        "get_commodity_gold_spot_price_twd": Route(LazyHandler("stock:StockLogic.call_generic_api", "/v1/tpex_gold_latest", None), _no_args),
+
+        # 3. 宏觀與政府 (Macro Metrics)
+        "get_macro_gdp_growth_rate_quarterly": Route(LazyHandler("gov_data:EconomicsLogic.get_macro_gdp_growth_rate_quarterly"), _no_args),
+        "get_macro_monthly_financial_indicators": Route(LazyHandler("gov_data:EconomicsLogic.get_monthly_financial_indicators"), _no_args),
+        "get_macro_economic_indicators_monthly": Route(LazyHandler("gov_data:EconomicsLogic.get_macro_economic_indicators_monthly"), _no_args),
+        "get_macro_economic_indicators_annual": Route(LazyHandler("gov_data:EconomicsLogic.get_macro_economic_indicators_annual"), _no_args),
+        "get_macro_global_stock_indices": Route(LazyHandler("gov_data:BankLogic.get_macro_global_stock_indices"), _no_args),
+        "get_macro_global_stock_indices_annual": Route(LazyHandler("gov_data:BankLogic.get_macro_global_stock_indices_annual"), _no_args),
+        "get_macro_forex_rates_monthly": Route(LazyHandler("gov_data:BankLogic.get_macro_forex_rates_monthly"), _no_args),
+        "get_macro_forex_rates_annual": Route(LazyHandler("gov_data:BankLogic.get_macro_forex_rates_annual"), _no_args),
+        "get_macro_fuel_price_cpc_retail": Route(LazyHandler("gov_data:PublicServiceLogic.get_fuel_prices"), _no_args),
+
+        # 4. 商工數據
+        "get_corp_moea_business_registration": Route(LazyHandler("corporate_logistics:CorporateLogic.get_company_basic_info"), lambda q, limit: (q or "台積電",)),
+
+        # 5. 加密貨幣
+        "get_crypto_btc_twd_price": Route(LazyHandler("global_macro:CryptoLogic.get_price", "BTC"), _no_args),
+        "get_crypto_eth_twd_price": Route(LazyHandler("global_macro:CryptoLogic.get_price", "ETH"), _no_args),
+        "get_crypto_sol_twd_price": Route(LazyHandler("global_macro:CryptoLogic.get_price", "SOL"), _no_args),
+        "get_crypto_prices": Route(LazyHandler("global_macro:CryptoLogic.get_prices"), _query_arg),
+        "get_crypto_market_fear_greed_index": Route(LazyHandler("global_macro:CryptoLogic.get_fear_greed_index"), _no_args),
 
         # 6. 銀行數據 (Commercial Banks only)
-        elif name.startswith("get_bank_"):
-            if "bond_issuance_monthly" in name: return await BankLogic.get_bank_bond_issuance_monthly()
-            if "stock_issuance_monthly" in name: return await BankLogic.get_bank_stock_issuance_monthly()
-            if "pension_fund_stats_monthly" in name: return await BankLogic.get_bank_pension_fund_stats_monthly()
-            
-            if "list_of_institutions" in name: return await BankLogic.get_list_of_institutions()
-            if "profit_loss" in name: return await BankLogic.get_bank_profit_loss()
-            return {"error": "銀行商業數據正在對接中"}
+        "get_bank_bond_issuance_monthly": Route(LazyHandler("gov_data:BankLogic.get_bank_bond_issuance_monthly"), _no_args),
+        "get_bank_stock_issuance_monthly": Route(LazyHandler("gov_data:BankLogic.get_bank_stock_issuance_monthly"), _no_args),
+        "get_bank_pension_fund_stats_monthly": Route(LazyHandler("gov_data:BankLogic.get_bank_pension_fund_stats_monthly"), _no_args),
+    }
+
+    # 1. 台灣股市 (Only Stock/ETF)：依 MEGA_ENDPOINT_MAP 產生
+    for name, endpoint in MEGA_ENDPOINT_MAP.items():
+        if endpoint.startswith("http"):
+            routes[name] = Route(partial(_external_link, endpoint), _no_args)
+        else:
+            routes[name] = Route(LazyHandler("stock:StockLogic.call_generic_api", endpoint), _query_arg)
+
+    # 即時匯率 (get_forex_<幣別>_twd_realtime)
+    for name in FOREX_LIST:
+        m = re.fullmatch(r"get_forex_([a-z]{3})_twd_realtime", name)
+        if m:
+            routes[name] = Route(LazyHandler("forex:ForexLogic.get_pair", m.group(1).upper(), "TWD"), _no_args)
+    return routes
+
+def check_routes(routes: Dict[str, Route], resolve: bool = True) -> None:
+    """
+    檢查 constants.py 各清單中的工具皆須對應到可 await 的處理函式。
+    resolve=False 時只檢查路由是否存在 (啟動用，不載入延遲的邏輯模組)。
+    """
+    missing = []
+    for tools, _ in TOOL_GROUPS:
+        for name in tools:
+            route = routes.get(name)
+            if route is None or not resolve:
+                if route is None:
+                    missing.append(name)
+                continue
+            try:
+                handler = route.handler.func if isinstance(route.handler, (partial, LazyHandler)) else route.handler
+            except (ImportError, AttributeError):
+                handler = None
+            if handler is None or not inspect.iscoroutinefunction(handler):
+                missing.append(name)
+    if missing:
+        raise RuntimeError(f"以下工具未對應到有效的處理函式: {', '.join(missing)}")
 
+TOOL_ROUTES: Dict[str, Route] = {}
+
+async def dispatch_mega_logic(name: str, query_val: Optional[str], limit: int) -> Any:
+    route = TOOL_ROUTES.get(name)
+    if route is None:
         return {"error": f"功能 {name} 尚未完全實體化。"}
+    try:
+        with span("dispatch", tool=name):
+            return await route.handler(*route.adapter(query_val, limit))
     except Exception as e:
         return {"error": f"Dispatcher 異常: {str(e)}"}
 
-# --- 3. 自動註冊系統 ---
+# --- 3. 輸出序列化 ---
+
+# 工具輸出編碼器：indent=2 或 compact，並記憶序列化結果 (--compact / COMPACT_JSON)
+encoder = ResponseEncoder(Config.RESPONSE_CACHE_MAX_CHARS, compact=Config.COMPACT_JSON)
+
+def build_meta(freshness: List[Dict[str, Any]], page: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """彙整緩存新鮮度 (fresh / stale 與數據年齡) 與分頁資訊為 `_meta` 內容。"""
+    meta: Dict[str, Any] = {}
+    if freshness:
+        meta["cache"] = "stale" if any(f["cache"] == "stale" for f in freshness) else "fresh"
+        meta["age_seconds"] = max(f["age_seconds"] for f in freshness)
+    if page:
+        meta["page"] = page
+    return meta
+
+def attach_cache_meta(res: Any, freshness: List[Dict[str, Any]], page: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    將緩存新鮮度與分頁資訊附加於回應的 `_meta` 欄位。
+    未讀取任何上游數據且未分頁的工具 (例如系統時間) 原樣回傳。
+    """
+    meta = build_meta(freshness, page)
+    if not meta:
+        return res
+    if isinstance(res, dict):
+        return {**res, "_meta": meta}
+    return {"data": res, "_meta": meta}
+
+async def _serve(call: Awaitable[Any], limit: Optional[int] = None, offset: int = 0,
+                 cursor: Optional[str] = None, fields: Optional[str] = None, key: Optional[tuple] = None) -> str:
+    """
+    執行工具邏輯並序列化；指定 limit 時於完整緩存資料集上分頁，並依 fields 投影欄位。
+    key 為 (工具, 正規化參數)：搭配本次讀取的數據版本記憶序列化結果，數據未刷新前重複查詢不再重新編碼。
+    """
+    tool = key[0] if key else "unknown"
+    start = time.perf_counter()
+    metrics.TOOLS_IN_FLIGHT.inc()
+    status = "exception"
+    try:
+        with tracer.request(tool):
+            text, status = await _serve_inner(call, limit, offset, cursor, fields, key)
+        return text
+    finally:
+        metrics.TOOLS_IN_FLIGHT.dec()
+        metrics.TOOL_CALLS.inc(tool, status)
+        metrics.TOOL_LATENCY.observe(time.perf_counter() - start, tool)
+
+async def _serve_inner(call: Awaitable[Any], limit: Optional[int], offset: int, cursor: Optional[str],
+                       fields: Optional[str], key: Optional[tuple]) -> Tuple[str, str]:
+    """_serve 的本體，回傳 (序列化結果, ok / error)。"""
+    from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+    freshness = AsyncHttpClient.track_freshness()
+    res = await call
+    paged = limit is not None or bool(fields)
+    memo_key = None
+    if key is not None and freshness:
+        memo_key = (key, limit, offset, cursor, fields, tuple(f["version"] for f in freshness))
+    encoded = encoder.get(memo_key)
+    if encoded is None:
+        page = None
+        if paged:
+            limit = Config.MAX_PAGE_SIZE if limit is None else min(limit, Config.MAX_PAGE_SIZE)
+            try:
+                with span("paginate"):
+                    res, page = paginate(res, limit, offset, cursor, fields)
+            except ValueError as e:
+                res = {"error": str(e)}
+        with span("serialize"):
+            encoded = encoder.encode(res, with_meta=bool(build_meta(freshness, page)), extra=page)
+        if isinstance(res, dict) and "error" in res:
+            return encoder.finish(encoded, build_meta(freshness, encoded.extra)), "error"
+        encoder.put(memo_key, encoded)
+    with span("serialize.finish"):
+        return encoder.finish(encoded, build_meta(freshness, encoded.extra)), "ok"
+
+async def _call_tool(name: str, query: Union[str, List[str], None], limit: int, offset: int, cursor: Optional[str], fields: Optional[str]) -> str:
+    """自動註冊工具的共用入口：正規化查詢參數 (去除前後空白；列表合併為逗號分隔) 後分發並序列化。"""
+    if isinstance(query, list):
+        query = ",".join(q.strip() for q in query if isinstance(q, str) and q.strip())
+    query = (query.strip() or None) if isinstance(query, str) else query
+    return await _serve(dispatch_mega_logic(name, query, limit), limit, offset, cursor, fields, key=(name, query))
+
+# --- 4. 自動註冊系統 ---
+
+PAGE_ARGS_DOC = (
+    "  limit: 每頁回傳筆數 (上限由 MAX_PAGE_SIZE 設定)。\n"
+    "  offset: 由第幾筆開始 (0 起算)。\n"
+    "  cursor: 上一頁 _meta.page.next_cursor 的值，優先於 offset；資料集刷新後失效。\n"
+    "  fields: 僅回傳指定欄位，以逗號分隔 (例: Code,ClosingPrice)。"
+)
+
+def tool_function(t_name: str) -> Callable[..., Awaitable[str]]:
+    """建立工具的 MCP 進入函式：參數名稱、型別與 docstring 決定其 input schema (見 tool_manifest.json)。"""
+    meta = TOOL_METADATA.get(t_name, {})
+    summary = meta.get("summary", "專業級金融數據接口。")
+    inputs_desc = meta.get("inputs", "None")
+    outputs = meta.get("outputs", "回傳相關金融 JSON 數據。")
+    source = meta.get("source", "官方公開資料庫。")
+
+    # High-Contrast Docstring
+    rich_doc = f"{summary}\n\nOutputs: {outputs}\nSource: {source}"
+
+    if t_name == "get_forex_any_to_any_conversion":
+        async def mcp_tool_forex_any(base: str = "JPY", target: str = "TWD") -> str:
+            base, target = base.strip(), target.strip()
+            return await _serve(TOOL_ROUTES[t_name].handler(base, target), key=(t_name, base.upper(), target.upper()))
+        mcp_tool_forex_any.__doc__ = f"{rich_doc}\n\nArgs:\n  base: 原始幣別 (例: JPY)\n  target: 目標幣別 (例: TWD)"
+        return mcp_tool_forex_any
+    if t_name == "get_forex_batch_conversion":
+        async def mcp_tool_forex_batch(conversions: Union[str, List[str], None] = None) -> str:
+            if isinstance(conversions, list):
+                conversions = [c.strip() for c in conversions if isinstance(c, str) and c.strip()]
+            elif conversions is not None:
+                conversions = conversions.strip()
+            key = (t_name, tuple(conversions) if isinstance(conversions, list) else conversions)
+            return await _serve(TOOL_ROUTES[t_name].handler(conversions), key=key)
+        mcp_tool_forex_batch.__doc__ = (
+            f"{rich_doc}\n\nArgs:\n  conversions: 換算清單，每筆為「金額 原始幣別/目標幣別」，以逗號分隔或傳入列表 "
+            "(例: 100 USD/TWD, 5000 JPY/TWD, 1 EUR/USD)；金額省略時為 1。"
+        )
+        return mcp_tool_forex_batch
+
+    if t_name == "get_crypto_prices":
+        async def mcp_tool_crypto_prices(coins: Union[str, List[str], None] = None, vs_currencies: str = "twd,usd") -> str:
+            if isinstance(coins, list):
+                coins = ",".join(c.strip() for c in coins if isinstance(c, str) and c.strip())
+            coins = (coins or "").strip() or None
+            vs_currencies = vs_currencies.strip().lower()
+            return await _serve(TOOL_ROUTES[t_name].handler(coins, vs_currencies), key=(t_name, coins, vs_currencies))
+        mcp_tool_crypto_prices.__doc__ = (
+            f"{rich_doc}\n\nArgs:\n  coins: 幣種代號或 CoinGecko coin id，以逗號分隔或傳入列表 (例: BTC,ETH,SOL,dogecoin)。\n"
+            "  vs_currencies: 計價幣別，以逗號分隔 (例: twd,usd,jpy)。"
+        )
+        return mcp_tool_crypto_prices
+
+    if t_name == "get_stock_history_daily":
+        async def mcp_tool_history(ticker: Optional[str] = None, sessions: int = 60, start: Optional[str] = None, end: Optional[str] = None,
+                                   dataset: str = "quotes", fields: Optional[str] = None) -> str:
+            ticker = ticker.strip() if ticker else None
+            call = TOOL_ROUTES[t_name].handler(ticker, sessions, start, end, dataset, fields)
+            return await _serve(call, key=(t_name, ticker, sessions, start, end, dataset, fields))
+        mcp_tool_history.__doc__ = (
+            f"{rich_doc}\n\nArgs:\n  ticker: 股票代碼或公司名稱 (例如: 2330, 台積電)；全市場彙總資料集可省略。\n"
+            "  sessions: 最多回傳的交易日數 (自 end 往回，上限由 HISTORY_MAX_SESSIONS 設定)。\n"
+            "  start: 起始日期 (例: 2024-01-02)，未指定則不限。\n"
+            "  end: 結束日期 (例: 2024-03-29)，未指定則至最新交易日。\n"
+            "  dataset: quotes (每日行情), valuation (本益比/殖利率), margin (融資融券), tpex_institutional (櫃買三大法人), tpex_institutional_summary (櫃買三大法人彙總)。\n"
+            "  fields: 僅回傳指定欄位，以逗號分隔 (例: ClosingPrice,TradeVolume)。"
+        )
+        return mcp_tool_history
+
+    if t_name == "get_stock_screener":
+        async def mcp_tool_screener(filters: Optional[str] = None, sort: Optional[str] = None, limit: int = 10, offset: int = 0,
+                                    cursor: Optional[str] = None, fields: Optional[str] = None) -> str:
+            filters, sort = (filters or "").strip() or None, (sort or "").strip() or None
+            call = TOOL_ROUTES[t_name].handler(filters, sort)
+            return await _serve(call, limit, offset, cursor, fields, key=(t_name, filters, sort))
+        mcp_tool_screener.__doc__ = (
+            f"{rich_doc}\n\nArgs:\n  filters: 篩選條件，以逗號分隔且全部需符合 (例: PEratio < 12, DividendYield > 5, 融資今日餘額 > 融資前日餘額)。"
+            "運算子 < <= > >= = !=；可比較欄位與數值或兩個欄位，亦可使用前後留空白的 + - * / (例: 融資今日餘額 - 融資前日餘額 > 1000)。"
+            "同名欄位以「資料集.欄名」指定 (quote / valuation / margin / revenue / eps)，可用欄位見 get_stock_screener_fields。\n"
+            "  sort: 排序欄位，以逗號分隔，前綴 - 為由大到小 (例: -DividendYield,PEratio)。\n"
+            f"{PAGE_ARGS_DOC}"
+        )
+        return mcp_tool_screener
+
+    if t_name in MOL_PERIOD_TOOLS:
+        async def mcp_tool_period(start: Optional[str] = None, end: Optional[str] = None, latest: Optional[int] = None, limit: int = 10,
+                                  offset: int = 0, cursor: Optional[str] = None, fields: Optional[str] = None) -> str:
+            start, end = (start or "").strip() or None, (end or "").strip() or None
+            call = TOOL_ROUTES[t_name].handler(start, end, latest)
+            return await _serve(call, limit, offset, cursor, fields, key=(t_name, start, end, latest))
+        mcp_tool_period.__doc__ = (
+            f"{rich_doc}\n\nArgs:\n  start: 起始期間 (例: 2023-01, 112年3月, 2023Q1, 2020)，未指定則不限。\n"
+            "  end: 結束期間 (含；2023 涵蓋該年各月)，未指定則至最新一期。\n"
+            "  latest: 只取區間內最近 N 期 (由新到舊)。\n"
+            f"{PAGE_ARGS_DOC}"
+        )
+        return mcp_tool_period
+
+    # 無查詢參數工具 (不提供查詢 Args，強迫模型精確匹配；僅保留分頁選項)
+    if "None" in inputs_desc:
+        async def mcp_tool_no_param(limit: int = 10, offset: int = 0, cursor: Optional[str] = None, fields: Optional[str] = None) -> str:
+            return await _call_tool(t_name, None, limit, offset, cursor, fields)
+        mcp_tool_no_param.__doc__ = f"{rich_doc}\n\nArgs:\n{PAGE_ARGS_DOC}"
+        return mcp_tool_no_param
+
+    # 帶參數工具：根據工具類別決定參數名稱與描述，強化模型辨識度
+    if t_name.startswith("get_stock_"):
+        async def mcp_tool_ticker(ticker: Union[str, List[str], None] = None, limit: int = 10, offset: int = 0, cursor: Optional[str] = None, fields: Optional[str] = None) -> str:
+            return await _call_tool(t_name, ticker, limit, offset, cursor, fields)
+        p_desc = "股票代碼或公司名稱 (例如: 2330, 0050, 台積電)。多檔請以逗號分隔或傳入列表 (例如: 2330,2317,台積電)，結果依代號分組。請勿在此輸入期貨名稱。"
+        mcp_tool_ticker.__doc__ = f"{rich_doc}\n\nArgs:\n  ticker: {p_desc}\n{PAGE_ARGS_DOC}"
+        return mcp_tool_ticker
+    if t_name.startswith("get_corp_"):
+        async def mcp_tool_corp(company_query: Optional[str] = None, limit: int = 10, offset: int = 0, cursor: Optional[str] = None, fields: Optional[str] = None) -> str:
+            return await _call_tool(t_name, company_query, limit, offset, cursor, fields)
+        mcp_tool_corp.__doc__ = f"{rich_doc}\n\nArgs:\n  company_query: 公司全名或統一編號 (例如: 台灣積體電路, 22099131)。\n{PAGE_ARGS_DOC}"
+        return mcp_tool_corp
+    if t_name.startswith("get_bank_"):
+        async def mcp_tool_bank(bank_query: Optional[str] = None, limit: int = 10, offset: int = 0, cursor: Optional[str] = None, fields: Optional[str] = None) -> str:
+            return await _call_tool(t_name, bank_query, limit, offset, cursor, fields)
+        mcp_tool_bank.__doc__ = f"{rich_doc}\n\nArgs:\n  bank_query: 銀行名稱或金融機構代碼 (例如: 臺灣銀行, 004)。\n{PAGE_ARGS_DOC}"
+        return mcp_tool_bank
+    async def mcp_tool_generic(symbol: Optional[str] = None, limit: int = 10, offset: int = 0, cursor: Optional[str] = None, fields: Optional[str] = None) -> str:
+        return await _call_tool(t_name, symbol, limit, offset, cursor, fields)
+    mcp_tool_generic.__doc__ = f"{rich_doc}\n\nArgs:\n  symbol: 代碼或關鍵字\n{PAGE_ARGS_DOC}"
+    return mcp_tool_generic
+
+def tool_names() -> List[str]:
+    return [name for tools, _ in TOOL_GROUPS for name in tools]
+
+class DeferredTool(Tool):
+    """
+    由預先產生的 manifest 註冊的工具：tools/list 直接使用 manifest 中的 schema，不需在啟動時逐一解析函式簽名；
+    首次呼叫時才以 tool_function 建立 FunctionTool，參數驗證與結果轉換與一般工具相同。
+    """
+    _function_tool: Optional[FunctionTool] = PrivateAttr(default=None)
+
+    async def run(self, arguments: Dict[str, Any]) -> ToolResult:
+        if self._function_tool is None:
+            self._function_tool = FunctionTool.from_function(tool_function(self.name), name=self.name)
+        return await self._function_tool.run(arguments)
 
 def register_all_tools():
-    tool_groups = [
-        (STOCK_LIST, "Stock"), (FOREX_LIST, "Forex"), (BANK_LIST, "Bank"),
-        (TAX_LIST, "Tax"), (CORP_LIST, "Corp"), (MACRO_LIST, "Macro"), 
-        (CRYPTO_LIST, "Crypto"), (COMMON_LIST, "Common"), (DERIVATIVES_LIST, "Derivatives"),
-        (NEWS_LIST, "News")
-    ]
-    
-    for tools, group_name in tool_groups:
-        for t_name in tools:
-            meta = TOOL_METADATA.get(t_name, {})
-            summary = meta.get("summary", "專業級金融數據接口。")
-            inputs_desc = meta.get("inputs", "None")
-            outputs = meta.get("outputs", "回傳相關金融 JSON 數據。")
-            source = meta.get("source", "官方公開資料庫。")
-            
-            # High-Contrast Docstring
-            rich_doc = f"{summary}\n\nOutputs: {outputs}\nSource: {source}"
-
-            # 根據工具類別決定參數名稱與描述，強化模型辨識度
-            param_name = "symbol"
-            param_desc = "代碼或關鍵字"
-            
-            if t_name.startswith("get_stock_"):
-                param_name = "ticker"
-                param_desc = "股票代碼 (例如: 2330, 0050)。請勿在此輸入期貨名稱。"
-            elif t_name.startswith("get_corp_"):
-                param_name = "company_query"
-                param_desc = "公司全名或統一編號 (例如: 台灣積體電路, 22099131)。"
-            elif t_name.startswith("get_bank_"):
-                param_name = "bank_query"
-                param_desc = "銀行名稱或金融機構代碼 (例如: 臺灣銀行, 004)。"
-            elif t_name == "get_forex_any_to_any_conversion":
-                @mcp.tool(name=t_name)
-                async def mcp_tool_forex_any(base: str = "JPY", target: str = "TWD") -> str:
-                    res = await ForexLogic.get_pair(base, target)
-                    return json.dumps(res, indent=2, ensure_ascii=False)
-                mcp_tool_forex_any.__doc__ = f"{rich_doc}\n\nArgs:\n  base: 原始幣別 (例: JPY)\n  target: 目標幣別 (例: TWD)"
-                continue
+    TOOL_ROUTES.clear()
+    TOOL_ROUTES.update(build_routes())
+    # 啟動時只檢查路由是否齊全；處理函式可否載入由測試 (check_routes) 驗證，避免在此 import 所有邏輯模組
+    check_routes(TOOL_ROUTES, resolve=False)
 
-            # 註冊無參數工具 (完全移除 Args，強迫模型精確匹配)
-            if "None" in inputs_desc:
-                def create_no_param_tool(name, doc):
-                    @mcp.tool(name=name)
-                    async def mcp_tool_no_param() -> str:
-                        res = await dispatch_mega_logic(name, None, 10)
-                        return json.dumps(res, indent=2, ensure_ascii=False)
-                    mcp_tool_no_param.__doc__ = doc
-                    return mcp_tool_no_param
-                create_no_param_tool(t_name, rich_doc)
-            
-            # 註冊帶參數工具
-            else:
-                def create_param_tool(name, doc, p_name, p_desc):
-                    if p_name == "ticker":
-                        @mcp.tool(name=name)
-                        async def mcp_tool_ticker(ticker: Optional[str] = None, limit: int = 10) -> str:
-                            res = await dispatch_mega_logic(name, ticker, limit)
-                            return json.dumps(res, indent=2, ensure_ascii=False)
-                        mcp_tool_ticker.__doc__ = f"{doc}\n\nArgs:\n  ticker: {p_desc}\n  limit: 回傳數據筆數限制。"
-                    elif p_name == "company_query":
-                        @mcp.tool(name=name)
-                        async def mcp_tool_corp(company_query: Optional[str] = None, limit: int = 10) -> str:
-                            res = await dispatch_mega_logic(name, company_query, limit)
-                            return json.dumps(res, indent=2, ensure_ascii=False)
-                        mcp_tool_corp.__doc__ = f"{doc}\n\nArgs:\n  company_query: {p_desc}\n  limit: 回傳數據筆數限制。"
-                    elif p_name == "bank_query":
-                        @mcp.tool(name=name)
-                        async def mcp_tool_bank(bank_query: Optional[str] = None, limit: int = 10) -> str:
-                            res = await dispatch_mega_logic(name, bank_query, limit)
-                            return json.dumps(res, indent=2, ensure_ascii=False)
-                        mcp_tool_bank.__doc__ = f"{doc}\n\nArgs:\n  bank_query: {p_desc}\n  limit: 回傳數據筆數限制。"
-                    else:
-                        @mcp.tool(name=name)
-                        async def mcp_tool_generic(symbol: Optional[str] = None, limit: int = 10) -> str:
-                            res = await dispatch_mega_logic(name, symbol, limit)
-                            return json.dumps(res, indent=2, ensure_ascii=False)
-                        mcp_tool_generic.__doc__ = f"{doc}\n\nArgs:\n  symbol: {p_desc}\n  limit: 回傳數據筆數限制。"
-                
-                create_param_tool(t_name, rich_doc, param_name, param_desc)
+    manifest = load_manifest()
+    stale = []
+    for t_name in tool_names():
+        entry = manifest.get(t_name)
+        if entry is not None:
+            mcp.add_tool(DeferredTool(**entry))
+        else:
+            stale.append(t_name)
+            mcp.add_tool(FunctionTool.from_function(tool_function(t_name), name=t_name))
+    if stale:
+        logger.warning(f"tool_manifest.json 缺少 {len(stale)} 個工具，已改為即時解析註冊 (請執行 python -m taiwan_finance_mcp_mega.manifest): {', '.join(stale)}")
 
 register_all_tools()
 
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request: Request) -> Response:
+    """Prometheus 指標 (HTTP 模式，與 /mcp 並列)。"""
+    return Response(metrics.exposition(), media_type=metrics.CONTENT_TYPE)
+
+@mcp.custom_route("/debug/traces", methods=["GET"])
+async def traces_endpoint(request: Request) -> Response:
+    """最近超過 TRACE_SLOW_MS 的工具呼叫 trace (需 TRACE=1)，以及 event loop 阻塞時的堆疊。"""
+    blocked = tracer.loop_monitor.blocked if tracer.loop_monitor else []
+    body = {"enabled": tracer.enabled, "traces": [t.to_dict() for t in reversed(tracer.recent)], "loop_blocked": blocked}
+    return Response(json.dumps(body, ensure_ascii=False, indent=2), media_type="application/json")
+
+def _http_options(args: argparse.Namespace, sockets: Optional[list] = None) -> Dict[str, Any]:
+    """HTTP 模式參數；多 worker 共用監聽 socket 時改用無狀態 session (後續請求可能落在不同 worker)。"""
+    if sockets:
+        return {"transport": "streamable-http", "path": "/mcp", "sockets": sockets, "stateless_http": True, "show_banner": False}
+    return {"transport": "streamable-http", "host": "0.0.0.0", "port": args.port, "path": "/mcp"}
+
+async def run_with_prefetch(args: argparse.Namespace, sockets: Optional[list] = None) -> None:
+    """啟動盤後資料預抓排程後再執行 MCP Server，Server 結束時一併停止排程。"""
+    from taiwan_finance_mcp_mega.prefetch import PrefetchScheduler
+    from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+    scheduler = PrefetchScheduler(jitter=args.prefetch_jitter, concurrency=args.prefetch_concurrency)
+    if AsyncHttpClient._history is not None:
+        # 歷史庫共用排程器載入休市日的交易日曆
+        AsyncHttpClient._history.calendar = scheduler.calendar
+    scheduler.start()
+    try:
+        if args.mode == "stdio": await mcp.run_async()
+        else: await mcp.run_async(**_http_options(args, sockets))
+    finally:
+        await scheduler.stop()
+
+def configure(args: argparse.Namespace) -> None:
+    """依命令列參數設定輸出格式、上游錄製/回放、磁碟緩存與歷史庫 (主行程或各 worker 啟動時執行)。"""
+    from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+    encoder.compact = args.compact
+    if args.record or args.replay:
+        AsyncHttpClient.configure_replay(args.record, args.replay, args.replay_latency)
+    if args.cache_dir:
+        AsyncHttpClient.configure_disk_cache(args.cache_dir, offline=args.offline)
+        AsyncHttpClient.warm_from_disk()
+    if args.history_dir:
+        AsyncHttpClient.configure_history(args.history_dir)
+
+def run_worker(index: int, sock: Any, args: argparse.Namespace) -> None:
+    """--workers 的 worker 行程進入點：於共用的監聽 socket 上執行 HTTP Server。"""
+    configure(args)
+    # 各 worker 的指標寫入共用目錄，/metrics 被任一 worker 抓取時皆輸出全部 worker 的合併數值
+    metrics.share(os.path.join(args.cache_dir, "metrics"), index, Config.METRICS_SHARE_INTERVAL)
+    logger.info(f"Worker {index} serving on shared socket {sock.getsockname()}")
+    if args.prefetch:
+        # 各 worker 皆排程預抓；磁碟緩存的抓取租約確保每個資料集仍只抓一次
+        asyncio.run(run_with_prefetch(args, [sock]))
+    else:
+        mcp.run(**_http_options(args, [sock]))
+
+def run_workers(args: argparse.Namespace) -> None:
+    """主行程：綁定 port 後啟動 args.workers 個 worker 並監控。未指定磁碟緩存時建立暫存目錄供 worker 共用。"""
+    import shutil
+    import tempfile
+    from taiwan_finance_mcp_mega.workers import WorkerSupervisor, bind_socket
+    temp_dir = None
+    if not args.cache_dir:
+        args.cache_dir = temp_dir = tempfile.mkdtemp(prefix="mcp-finance-cache-")
+        logger.info(f"Workers share a temporary disk cache: {temp_dir}")
+    # 清除前次執行留下的 worker 指標快照 (worker 數減少時舊快照不可被合併)
+    shutil.rmtree(os.path.join(args.cache_dir, "metrics"), ignore_errors=True)
+    sock = bind_socket("0.0.0.0", args.port)
+    logger.info(f"Starting {args.workers} workers on port {sock.getsockname()[1]}")
+    try:
+        WorkerSupervisor(args.workers, run_worker, sock, (args,)).run()
+    finally:
+        sock.close()
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
 def main():
     parser = argparse.ArgumentParser(description="Taiwan Finance MCP Mega v4.6.0")
     parser.add_argument("--mode", choices=["stdio", "http"], default="stdio")
     parser.add_argument("--port", type=int, default=8005)
+    parser.add_argument("--workers", type=int, default=Config.HTTP_WORKERS, help="HTTP 模式的 Server 行程數 (共用同一 port 與磁碟緩存)")
+    parser.add_argument("--prefetch", action="store_true", help="依交易日曆於盤後公布時段預抓大型資料集")
+    parser.add_argument("--prefetch-jitter", type=float, default=Config.PREFETCH_JITTER, help="預抓時間隨機延遲上限 (秒)")
+    parser.add_argument("--prefetch-concurrency", type=int, default=Config.PREFETCH_CONCURRENCY, help="預抓同時請求數上限")
+    parser.add_argument("--cache-dir", default=Config.CACHE_DIR, help="磁碟緩存目錄 (跨重啟/多行程共用)，未指定則停用")
+    parser.add_argument("--history-dir", default=Config.HISTORY_DIR, help="歷史快照庫目錄：每日資料集抓取時附加保存，供歷史區間查詢")
+    parser.add_argument("--offline", action="store_true", default=Config.CACHE_OFFLINE, help="僅由磁碟緩存提供數據，不連線上游")
+    parser.add_argument("--compact", action="store_true", default=Config.COMPACT_JSON, help="工具輸出使用不縮排的 compact JSON")
+    parser.add_argument("--record", default=Config.UPSTREAM_RECORD_DIR, help="將上游回應錄製為 fixture 至此目錄")
+    parser.add_argument("--replay", default=Config.UPSTREAM_REPLAY_DIR, help="由此目錄的 fixture 回放上游回應 (不連線上游)")
+    parser.add_argument("--replay-latency", type=float, default=Config.UPSTREAM_REPLAY_LATENCY, help="回放時每個請求模擬的延遲 (秒)")
     args = parser.parse_args()
-    if args.mode == "stdio": mcp.run()
-    else: mcp.run(transport="streamable-http", host="0.0.0.0", port=args.port, path="/mcp")
+    if args.record and args.replay:
+        parser.error("--record 與 --replay 不可同時使用")
+    if args.offline and not args.cache_dir:
+        parser.error("--offline 需搭配 --cache-dir (或 CACHE_DIR) 使用")
+    if args.workers > 1:
+        if args.mode != "http":
+            parser.error("--workers 僅適用於 --mode http")
+        run_workers(args)
+        return
+    configure(args)
+    if args.prefetch:
+        asyncio.run(run_with_prefetch(args))
+    elif args.mode == "stdio": mcp.run()
+    else: mcp.run(**_http_options(args))
 
 if __name__ == "__main__":
     main()
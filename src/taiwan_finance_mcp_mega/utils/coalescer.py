@@ -0,0 +1,129 @@
+"""
+Batch Request Coalescer
+支援一次查詢多個 key 的上游 API (例如 CoinGecko simple/price 的 ids=) 使用：
+短時間窗口內對同一群組的請求合併為一次批次抓取，批次結果以 key 為單位緩存，
+已在途的 key 直接等待該批次，不再重複請求上游。
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, NamedTuple, Optional, Sequence, Set, Tuple
+from cachetools import LRUCache
+
+
+class BatchResult(NamedTuple):
+    """批次抓取結果：values 為 key -> 值 (上游未回傳的 key 不列入)；age 為資料年齡 (秒)，error 為失敗原因。"""
+    values: Dict[str, Any]
+    age: float = 0.0
+    error: Optional[str] = None
+
+
+class Quote(NamedTuple):
+    value: Any
+    fetched_at: float  # time.monotonic()
+    status: str  # fresh / stale
+
+
+class _Batch:
+    __slots__ = ("keys", "future", "handle")
+
+    def __init__(self, future: asyncio.Future):
+        self.keys: Set[str] = set()
+        self.future = future
+        self.handle: Optional[asyncio.TimerHandle] = None
+
+
+class BatchCoalescer:
+    """
+    fetch_many(group, keys) 為實際的批次抓取 (keys 已排序)。
+    每個 key 的結果保留至 hard TTL：soft TTL 內直接使用，之後併入下一次批次刷新，刷新失敗時沿用舊值 (stale)。
+    """
+
+    def __init__(self, fetch_many: Callable[[Hashable, List[str]], Awaitable[BatchResult]], soft_ttl: float, hard_ttl: float,
+                 window: float = 0.01, max_batch: int = 100, maxsize: int = 2048):
+        self.fetch_many = fetch_many
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self.window = window
+        self.max_batch = max_batch
+        self._entries: LRUCache = LRUCache(maxsize=maxsize)  # (group, key) -> (值, 抓取時間)
+        self._pending: Dict[Hashable, _Batch] = {}
+        self._inflight: Dict[Tuple[Hashable, str], asyncio.Future] = {}
+        self.batches = 0  # 已送出的批次數 (供測試與基準觀察)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._pending.clear()
+        self._inflight.clear()
+
+    def _cached(self, group: Hashable, key: str, max_age: float) -> Optional[Quote]:
+        entry = self._entries.get((group, key))
+        if entry is None:
+            return None
+        value, fetched_at = entry
+        age = time.monotonic() - fetched_at
+        if age >= max_age:
+            return None
+        return Quote(value, fetched_at, "fresh" if age < self.soft_ttl else "stale")
+
+    def _enqueue(self, group: Hashable, key: str) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        batch = self._pending.get(group)
+        if batch is None or batch.future.get_loop() is not loop:
+            batch = self._pending[group] = _Batch(loop.create_future())
+            batch.handle = loop.call_later(self.window, self._flush, group, batch)
+        batch.keys.add(key)
+        self._inflight[(group, key)] = batch.future
+        if len(batch.keys) >= self.max_batch:
+            batch.handle.cancel()
+            self._flush(group, batch)
+        return batch.future
+
+    def _flush(self, group: Hashable, batch: _Batch) -> None:
+        if self._pending.get(group) is batch:
+            del self._pending[group]
+        self.batches += 1
+        asyncio.ensure_future(self._run(group, batch))
+
+    async def _run(self, group: Hashable, batch: _Batch) -> None:
+        keys = sorted(batch.keys)
+        try:
+            result = await self.fetch_many(group, keys)
+        except Exception as e:
+            result = BatchResult({}, error=str(e) or type(e).__name__)
+        fetched_at = time.monotonic() - result.age
+        for key, value in result.values.items():
+            self._entries[(group, key)] = (value, fetched_at)
+        for key in keys:
+            if self._inflight.get((group, key)) is batch.future:
+                del self._inflight[(group, key)]
+        if not batch.future.done():
+            batch.future.set_result(result.error)
+
+    async def get(self, group: Hashable, keys: Sequence[str]) -> Tuple[Dict[str, Quote], Optional[str]]:
+        """
+        取得各 key 的值：緩存中 soft TTL 內者直接回傳，其餘併入批次 (或等待已在途的批次)。
+        回傳 (key -> Quote, 批次錯誤)；上游未回傳或失敗且無舊值的 key 不列入結果。
+        """
+        quotes: Dict[str, Quote] = {}
+        waits: Set[asyncio.Future] = set()
+        loop = asyncio.get_running_loop()
+        for key in dict.fromkeys(keys):
+            quote = self._cached(group, key, self.soft_ttl)
+            if quote is not None:
+                quotes[key] = quote
+                continue
+            future = self._inflight.get((group, key))
+            if future is None or future.get_loop() is not loop:
+                future = self._enqueue(group, key)
+            waits.add(future)
+        error = None
+        if waits:
+            # shield: 單一呼叫端被取消時不應中斷其他人共用的批次
+            errors = await asyncio.gather(*(asyncio.shield(f) for f in waits))
+            error = next((e for e in errors if e), None)
+            for key in keys:
+                if key not in quotes:
+                    quote = self._cached(group, key, self.hard_ttl)
+                    if quote is not None:
+                        quotes[key] = quote
+        return quotes, error
@@ -0,0 +1,217 @@
+"""
+Columnar Dataset
+將 OpenAPI 回傳的 list-of-dict (所有數值皆為字串) 轉為欄式儲存：
+數值欄位於載入時解析一次並存入 typed array，重複的欄名與類別字串共用同一物件，
+僅在序列化或逐列存取時才組回 dict，且組回的字串與原始 payload 完全一致。
+"""
+import math
+import re
+import sys
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+_NUMBER = re.compile(r"-?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.(\d+))?")
+# 數值欄位允許的非數值例外 (例如 "--"、"N/A") 比例上限
+_MAX_EXCEPTION_RATIO = 0.1
+
+
+def _render(value: float, decimals: int, thousands: bool) -> str:
+    return f"{value:{',' if thousands else ''}.{decimals}f}"
+
+
+class _NumericColumn:
+    """float64 陣列 + 小數位數；無法無損還原的值記錄在稀疏例外表。"""
+    __slots__ = ("values", "decimals", "thousands", "exceptions")
+
+    def __init__(self, values: array, decimals: Union[int, array], thousands: bool, exceptions: Dict[int, str]):
+        self.values = values
+        self.decimals = decimals
+        self.thousands = thousands
+        self.exceptions = exceptions
+
+    def get(self, i: int) -> str:
+        if self.exceptions and i in self.exceptions:
+            return self.exceptions[i]
+        d = self.decimals if isinstance(self.decimals, int) else self.decimals[i]
+        return _render(self.values[i], d, self.thousands)
+
+    @classmethod
+    def parse(cls, raw: List[str]) -> Optional["_NumericColumn"]:
+        values = array("d")
+        decimals = array("b")
+        exceptions: Dict[int, str] = {}
+        thousands = any("," in s for s in raw)
+        limit = len(raw) * _MAX_EXCEPTION_RATIO
+        for i, s in enumerate(raw):
+            m = _NUMBER.fullmatch(s)
+            if m:
+                d = len(m.group(1) or "")
+                v = float(s.replace(",", ""))
+                if d < 128 and _render(v, d, thousands) == s:
+                    values.append(v)
+                    decimals.append(d)
+                    continue
+            exceptions[i] = s
+            if len(exceptions) > limit:
+                return None
+            values.append(math.nan)
+            decimals.append(0)
+        if len(exceptions) == len(raw):
+            return None
+        uniform = set(decimals)
+        return cls(values, uniform.pop() if len(uniform) == 1 else decimals, thousands, exceptions)
+
+
+class _CategoryColumn:
+    """低基數字串欄位：以整數代碼 + 去重後的字串表儲存。"""
+    __slots__ = ("codes", "labels")
+
+    def __init__(self, codes: array, labels: List[str]):
+        self.codes = codes
+        self.labels = labels
+
+    def get(self, i: int) -> str:
+        return self.labels[self.codes[i]]
+
+    @classmethod
+    def parse(cls, raw: List[str]) -> Optional["_CategoryColumn"]:
+        lookup: Dict[str, int] = {}
+        for s in raw:
+            if s not in lookup:
+                lookup[s] = len(lookup)
+                if len(lookup) > len(raw) // 2:
+                    return None
+        codes = array("H" if len(lookup) <= 0xFFFF else "I", (lookup[s] for s in raw))
+        return cls(codes, list(lookup))
+
+
+class _StringColumn:
+    __slots__ = ("values",)
+
+    def __init__(self, values: List[str]):
+        self.values = values
+
+    def get(self, i: int) -> str:
+        return self.values[i]
+
+
+class ColumnarDataset(Sequence):
+    """
+    與 list-of-dict 相容的唯讀欄式資料集 (支援 len、索引、切片與迭代)。
+    透過 numeric() 可直接取得已解析的 float64 欄位，供排序與篩選使用。
+    """
+
+    def __init__(self, keys: List[str], columns: List[Any], length: int):
+        self.keys = keys
+        self._columns = columns
+        self._by_name = dict(zip(keys, columns))
+        self._length = length
+
+    @classmethod
+    def from_rows(cls, rows: Any) -> Optional["ColumnarDataset"]:
+        """僅轉換欄位一致且值皆為字串的資料集；其餘情況回傳 None，由呼叫端保留原始 list。"""
+        if not isinstance(rows, list) or not rows or not isinstance(rows[0], dict):
+            return None
+        keys = list(rows[0])
+        for row in rows:
+            if not isinstance(row, dict) or list(row) != keys or not all(type(v) is str for v in row.values()):
+                return None
+        return cls.from_columns(keys, [[row[k] for row in rows] for k in keys])
+
+    @classmethod
+    def from_columns(cls, keys: List[str], raw_columns: List[List[str]]) -> "ColumnarDataset":
+        """由各欄位的原始字串值建立資料集 (各欄長度需一致)。"""
+        columns = [_NumericColumn.parse(raw) or _CategoryColumn.parse(raw) or _StringColumn(raw) for raw in raw_columns]
+        return cls([sys.intern(k) for k in keys], columns, len(raw_columns[0]) if raw_columns else 0)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _row(self, i: int) -> Dict[str, str]:
+        return {k: col.get(i) for k, col in zip(self.keys, self._columns)}
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("ColumnarDataset index out of range")
+        return self._row(index)
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        return (self._row(i) for i in range(self._length))
+
+    def column(self, name: str) -> List[str]:
+        """取得單一欄位的原始字串值 (不組回整列)。"""
+        col = self._by_name[name]
+        return [col.get(i) for i in range(self._length)]
+
+    def numeric(self, name: str) -> Optional[array]:
+        """取得已解析的 float64 欄位 (非數值以 NaN 表示)；非數值欄位回傳 None。"""
+        col = self._by_name.get(name)
+        return col.values if isinstance(col, _NumericColumn) else None
+
+    def to_rows(self) -> List[Dict[str, str]]:
+        return [self._row(i) for i in range(self._length)]
+
+    def slice_rows(self, start: int, stop: int, keys: Optional[List[str]] = None) -> List[Dict[str, str]]:
+        """組回 [start, stop) 的列；指定 keys 時只組出這些欄位 (不存在的欄位略過)。"""
+        if keys is None:
+            return self[start:stop]
+        selected = [(k, self._by_name[k]) for k in keys if k in self._by_name]
+        return [{k: col.get(i) for k, col in selected} for i in range(*slice(start, stop).indices(self._length))]
+
+
+class ColumnarBuilder:
+    """
+    串流解析用的 sink：逐列接收資料並直接累積為欄位值，不保留每列的 dict。
+    遇到欄位不一致或非字串值時退回一般 list；列數不足 min_rows 時亦回傳 list。
+    """
+
+    def __init__(self, min_rows: int = 0):
+        self.min_rows = min_rows
+        self._keys: Optional[List[str]] = None
+        self._raw: List[List[str]] = []
+        self._rows: Optional[List[Any]] = None
+
+    def _materialize(self) -> List[Dict[str, str]]:
+        if self._keys is None:
+            return []
+        return [dict(zip(self._keys, values)) for values in zip(*self._raw)]
+
+    def append(self, row: Any) -> None:
+        if self._rows is not None:
+            self._rows.append(row)
+            return
+        if type(row) is dict and all(type(v) is str for v in row.values()):
+            if self._keys is None:
+                self._keys = list(row)
+                self._raw = [[] for _ in self._keys]
+            if len(row) == len(self._keys) and all(a == b for a, b in zip(row, self._keys)):
+                for col, v in zip(self._raw, row.values()):
+                    col.append(v)
+                return
+        self._rows = self._materialize()
+        self._rows.append(row)
+
+    def build(self) -> Any:
+        if self._rows is not None:
+            return self._rows
+        if self._keys is None:
+            return []
+        if len(self._raw[0]) < self.min_rows:
+            return self._materialize()
+        return ColumnarDataset.from_columns(self._keys, self._raw)
+
+
+def is_rows(data: Any) -> bool:
+    """判斷是否為列式資料 (原始 list 或 ColumnarDataset)。"""
+    return isinstance(data, (list, ColumnarDataset))
+
+
+def json_default(obj: Any) -> Any:
+    """json.dumps(default=...) 使用：序列化時才將 ColumnarDataset 組回 list-of-dict。"""
+    if isinstance(obj, ColumnarDataset):
+        return obj.to_rows()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,73 @@
+"""
+Cross-Rate Matrix
+將即匯站 (tw.rter.info) 以 USD 為基準的報價 ("USDXXX": {"Exrate", "UTC"}) 展開為 幣別 x 幣別 的交叉匯率矩陣：
+每份 payload 只建立一次 (附掛於緩存項目，隨緩存刷新重建)，之後任意幣別對的查詢與批次換算皆為 O(1) 查表。
+"""
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class CrossRateMatrix:
+    """rates[i * n + j] 為 1 單位 currencies[i] 可兌換的 currencies[j]。"""
+    __slots__ = ("currencies", "index", "rates", "updated")
+
+    def __init__(self, currencies: List[str], usd_rates: Sequence[float], updated: Dict[str, Any]):
+        self.currencies = currencies
+        self.index = {c: i for i, c in enumerate(currencies)}
+        self.updated = updated
+        # 1 base = (usd[target] / usd[base]) target
+        self.rates = array("d", (t / b for b in usd_rates for t in usd_rates))
+
+    @classmethod
+    def from_rter(cls, data: Any) -> "CrossRateMatrix":
+        """由原始 payload 建立；Exrate 缺漏或非正數的幣別略過。"""
+        currencies, usd_rates, updated = ["USD"], [1.0], {"USD": None}
+        if isinstance(data, dict):
+            for key, quote in data.items():
+                if not key.startswith("USD") or len(key) <= 3 or not isinstance(quote, dict):
+                    continue
+                try:
+                    rate = float(quote.get("Exrate"))
+                except (TypeError, ValueError):
+                    continue
+                currency = key[3:]
+                if currency == "USD":
+                    updated["USD"] = quote.get("UTC")
+                elif rate > 0 and currency not in updated:
+                    currencies.append(currency)
+                    usd_rates.append(rate)
+                    updated[currency] = quote.get("UTC")
+        return cls(currencies, usd_rates, updated)
+
+    def __len__(self) -> int:
+        return len(self.currencies)
+
+    def __contains__(self, currency: str) -> bool:
+        return currency in self.index
+
+    def rate(self, base: str, target: str) -> Optional[float]:
+        i, j = self.index.get(base), self.index.get(target)
+        if i is None or j is None:
+            return None
+        return self.rates[i * len(self.currencies) + j]
+
+    def row(self, base: str) -> Optional[Dict[str, float]]:
+        """以 base 為基準的完整匯率表 (幣別 -> 1 base 可兌換的數量)。"""
+        i = self.index.get(base)
+        if i is None:
+            return None
+        n = len(self.currencies)
+        return dict(zip(self.currencies, self.rates[i * n:(i + 1) * n]))
+
+    def update_time(self, base: str, target: str) -> Any:
+        """報價時間：取非 USD 一方的 UTC (與單一幣別對查詢相同)。"""
+        return self.updated.get(target if target != "USD" else base)
+
+    def convert_many(self, items: Iterable[Tuple[float, str, str]]) -> List[Optional[float]]:
+        """批次換算 (金額, 原始幣別, 目標幣別)；不支援的幣別回傳 None。"""
+        index, rates, n = self.index, self.rates, len(self.currencies)
+        out: List[Optional[float]] = []
+        for amount, base, target in items:
+            i, j = index.get(base), index.get(target)
+            out.append(None if i is None or j is None else amount * rates[i * n + j])
+        return out
@@ -0,0 +1,67 @@
+"""
+Dataset Index Utilities
+為緩存中的 OpenAPI 資料集建立「正規化值 -> 列位置」的雜湊索引，取代逐列線性掃描。
+"""
+from typing import Any, Dict, Iterable, List, Sequence
+from taiwan_finance_mcp_mega.utils.columnar import ColumnarDataset, is_rows
+
+# 證交所/櫃買各資料集常見的證券代號欄位
+CODE_KEYS = ("Code", "公司代號", "股票代號", "STOCKsSecurityCode", "ETFsSecurityCode", "公司代碼", "證券代號")
+
+
+def normalize_code(value: Any) -> str:
+    return str(value).strip().upper()
+
+
+def build_code_index(rows: Any, keys: Iterable[str] = CODE_KEYS) -> Dict[str, List[int]]:
+    """以指定代號欄位建立索引；同一列多個欄位值相同時只記錄一次。"""
+    index: Dict[str, List[int]] = {}
+    if not is_rows(rows):
+        return index
+    keys = tuple(keys)
+    if isinstance(rows, ColumnarDataset):
+        # 欄式資料集直接讀取代號欄位，免逐列組回 dict
+        present = [k for k in keys if k in rows.keys]
+        columns = [rows.column(k) for k in present]
+        for pos in range(len(rows)):
+            seen = set()
+            for col in columns:
+                norm = normalize_code(col[pos])
+                if norm and norm not in seen:
+                    seen.add(norm)
+                    index.setdefault(norm, []).append(pos)
+        return index
+    for pos, row in enumerate(rows):
+        if not isinstance(row, dict):
+            continue
+        seen = set()
+        for k in keys:
+            v = row.get(k)
+            if v is None:
+                continue
+            norm = normalize_code(v)
+            if norm and norm not in seen:
+                seen.add(norm)
+                index.setdefault(norm, []).append(pos)
+    return index
+
+
+def build_value_index(rows: Any) -> Dict[str, List[int]]:
+    """以所有欄位值建立索引 (全欄位比對的 Fallback Path 使用)。"""
+    index: Dict[str, List[int]] = {}
+    if not is_rows(rows):
+        return index
+    for pos, row in enumerate(rows):
+        if not isinstance(row, dict):
+            continue
+        seen = set()
+        for v in row.values():
+            norm = normalize_code(v)
+            if norm and norm not in seen:
+                seen.add(norm)
+                index.setdefault(norm, []).append(pos)
+    return index
+
+
+def take(rows: Sequence[Dict[str, Any]], positions: Iterable[int]) -> List[Dict[str, Any]]:
+    return [rows[i] for i in positions]
@@ -0,0 +1,119 @@
+"""
+Persistent Disk Cache Tier
+以 SQLite (WAL 模式) 保存上游原始 payload、抓取時間與 TTL，
+可跨重啟與多個 Server 行程共用，並於上游停擺時提供離線服務。
+多行程 (--workers) 以 leases 表協調抓取：同一 cache key 同時只有一個行程向上游請求，其餘等待其寫入。
+"""
+import json
+import os
+import sqlite3
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Any, Iterator, List, NamedTuple, Optional
+from taiwan_finance_mcp_mega.utils.columnar import json_default
+
+
+class DiskEntry(NamedTuple):
+    cache_key: str
+    url: str
+    data: Any
+    fetched_at: float  # Unix time
+    soft_ttl: float
+    hard_ttl: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class DiskCache:
+    """
+    SQLite 磁碟緩存。每次操作使用獨立連線，WAL + busy_timeout 讓多行程可同時讀寫。
+    所有方法皆為同步 I/O，在事件迴圈中請透過 asyncio.to_thread 呼叫。
+    """
+
+    def __init__(self, directory: str, filename: str = "http_cache.sqlite3", busy_timeout_ms: int = 5000):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, filename)
+        self.busy_timeout_ms = busy_timeout_ms
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS payloads ("
+                " cache_key TEXT PRIMARY KEY, url TEXT NOT NULL, body BLOB NOT NULL,"
+                " fetched_at REAL NOT NULL, soft_ttl REAL NOT NULL, hard_ttl REAL NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS leases (cache_key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000)
+        try:
+            conn.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms}")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _encode(data: Any) -> bytes:
+        return zlib.compress(json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=json_default).encode("utf-8"), 1)
+
+    @staticmethod
+    def _row(row: tuple) -> DiskEntry:
+        key, url, body, fetched_at, soft, hard = row
+        return DiskEntry(key, url, json.loads(zlib.decompress(body)), fetched_at, soft, hard)
+
+    def put(self, cache_key: str, url: str, data: Any, fetched_at: float, soft_ttl: float, hard_ttl: float) -> None:
+        body = self._encode(data)
+        with self._connect() as conn:
+            # 多行程同時刷新時保留較新的版本
+            conn.execute(
+                "INSERT INTO payloads VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(cache_key) DO UPDATE SET url=excluded.url, body=excluded.body, fetched_at=excluded.fetched_at,"
+                " soft_ttl=excluded.soft_ttl, hard_ttl=excluded.hard_ttl WHERE excluded.fetched_at >= payloads.fetched_at",
+                (cache_key, url, body, fetched_at, soft_ttl, hard_ttl),
+            )
+
+    def get(self, cache_key: str) -> Optional[DiskEntry]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM payloads WHERE cache_key = ?", (cache_key,)).fetchone()
+        return self._row(row) if row else None
+
+    def recent(self, limit: int, max_age: Optional[float] = None) -> List[DiskEntry]:
+        """依抓取時間由新到舊列出項目；max_age 為 None 時以各項目自身的 hard TTL 過濾。"""
+        now = time.time()
+        with self._connect() as conn:
+            if max_age is None:
+                rows = conn.execute(
+                    "SELECT * FROM payloads WHERE fetched_at + hard_ttl > ? ORDER BY fetched_at DESC LIMIT ?", (now, limit)
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT * FROM payloads WHERE fetched_at > ? ORDER BY fetched_at DESC LIMIT ?", (now - max_age, limit)
+                ).fetchall()
+        return [self._row(r) for r in rows]
+
+    def prune(self, max_age: float) -> int:
+        """刪除超過 max_age 秒的項目 (離線模式仍會使用 hard TTL 之後的舊資料，故另設上限)。"""
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM payloads WHERE fetched_at < ?", (time.time() - max_age,)).rowcount
+
+    def acquire_lease(self, cache_key: str, owner: str, ttl: float) -> bool:
+        """
+        取得該 cache key 的抓取租約 (跨行程互斥)。已過期的租約 (持有者當機或逾時) 可被接手；
+        同一 owner 重複取得視為續約。
+        """
+        now = time.time()
+        with self._connect() as conn:
+            return conn.execute(
+                "INSERT INTO leases VALUES (?, ?, ?) "
+                "ON CONFLICT(cache_key) DO UPDATE SET owner=excluded.owner, expires_at=excluded.expires_at"
+                " WHERE leases.expires_at < ? OR leases.owner = excluded.owner",
+                (cache_key, owner, now + ttl, now),
+            ).rowcount == 1
+
+    def release_lease(self, cache_key: str, owner: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM leases WHERE cache_key = ? AND owner = ?", (cache_key, owner))
@@ -0,0 +1,242 @@
+"""
+Historical Snapshot Store
+證交所/櫃買 OpenAPI 的每日資料集 (STOCK_DAY_ALL、BWIBBU_d、MI_MARGN、櫃買三大法人) 只提供最新交易日；
+每次自上游抓取時將當日快照附加寫入本地 (append-only)，供區間查詢而不需連線上游。
+以日期分區的欄式檔案保存，<dir>/<dataset>/<YYYY-MM-DD>.twh：
+    MAGIC (4 bytes) + header 長度 (uint32) + header JSON + 各欄 zlib 壓縮區塊 (JSON 字串陣列)
+header 含欄名、各欄區塊位置，以及依代號排序的代號清單 (即該分區的個股索引，以二分搜尋定位列)。
+查詢只讀取並解壓所需欄位；分區寫入後不再變動，header 與解壓後的欄位以 LRU 緩存。
+"""
+import json
+import os
+import re
+import struct
+import threading
+import zlib
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+from cachetools import LRUCache
+from taiwan_finance_mcp_mega.utils.columnar import ColumnarDataset
+from taiwan_finance_mcp_mega.utils.dataset_index import CODE_KEYS, normalize_code
+
+MAGIC = b"TWH1"
+SUFFIX = ".twh"
+# 各資料集常見的資料日期欄位
+DATE_KEYS = ("Date", "日期", "資料日期", "出表日期")
+_DATE_NAME = re.compile(r"\d{4}-\d{2}-\d{2}")
+_TAIPEI = timezone(timedelta(hours=8))
+
+
+def parse_trade_date(raw: Any) -> Optional[date]:
+    """解析民國 (1130101) 或西元 (20240101 / 2024-01-01) 日期。"""
+    digits = re.sub(r"\D", "", str(raw or ""))
+    try:
+        if len(digits) == 7:
+            return date(int(digits[:3]) + 1911, int(digits[3:5]), int(digits[5:]))
+        if len(digits) == 8:
+            return date(int(digits[:4]), int(digits[4:6]), int(digits[6:]))
+    except ValueError:
+        pass
+    return None
+
+
+class _Partition(NamedTuple):
+    path: str
+    day: str
+    keys: List[str]
+    blocks: List[Tuple[int, int]]  # 各欄 (檔案位置, 長度)
+    codes: List[str]  # 依代號排序；無代號欄位的資料集為空
+
+
+def _to_columns(rows: Any) -> Tuple[List[str], List[List[str]]]:
+    """list-of-dict 或 ColumnarDataset -> (欄名, 各欄字串值)；欄位不一致時以聯集補空字串。"""
+    if isinstance(rows, ColumnarDataset):
+        return list(rows.keys), [rows.column(k) for k in rows.keys]
+    keys: Dict[str, None] = {}
+    for row in rows:
+        keys.update(dict.fromkeys(row))
+    names = list(keys)
+    return names, [["" if row.get(k) is None else str(row.get(k)) for row in rows] for k in names]
+
+
+class HistoryStore:
+    """
+    每日快照的本地歷史資料庫。datasets 為 別名 -> (Endpoint 路徑, 代號欄位)；符合的上游 URL 於抓取時寫入。
+    寫入以暫存檔 + rename 完成且同日分區已存在時略過，多個 worker 行程可共用同一目錄。
+    沒有日期欄位的資料集 (MI_MARGN、櫃買三大法人彙總) 以交易日曆推算分區日期：calendar 需提供
+    latest_session(now, at) (見 prefetch.MarketCalendar)，publish 為 別名 -> 公布時段 ("HH:MM")。
+    """
+
+    def __init__(self, directory: str, datasets: Dict[str, Tuple[str, str]], cache_blocks: int = 4096,
+                 calendar: Any = None, publish: Optional[Dict[str, str]] = None):
+        self.directory = directory
+        self.datasets = datasets
+        self.calendar = calendar
+        self.publish = publish or {}
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._headers: LRUCache = LRUCache(maxsize=cache_blocks)
+        self._blocks: LRUCache = LRUCache(maxsize=cache_blocks)
+        self._dates: Dict[str, Tuple[float, List[str]]] = {}  # dataset -> (目錄 mtime, 已排序日期)
+
+    def dataset_for(self, url: str) -> Optional[str]:
+        path = urlsplit(url).path
+        for name, (endpoint, _) in self.datasets.items():
+            if path.endswith(endpoint):
+                return name
+        return None
+
+    def _path(self, dataset: str, day: str) -> str:
+        return os.path.join(self.directory, dataset, f"{day}{SUFFIX}")
+
+    # --- 寫入 ---
+
+    @staticmethod
+    def snapshot_date(keys: Sequence[str], columns: Sequence[List[str]], today: Optional[date] = None) -> str:
+        """資料日期：取日期欄位中最新的有效值；沒有日期欄位時視為 today (預設為台北時間今天)。"""
+        for name in DATE_KEYS:
+            if name in keys:
+                parsed = [d for d in map(parse_trade_date, set(columns[list(keys).index(name)])) if d]
+                if parsed:
+                    return max(parsed).isoformat()
+        return (today or datetime.now(_TAIPEI).date()).isoformat()
+
+    def session_date(self, dataset: str, now: Optional[datetime] = None) -> date:
+        """
+        無日期欄位的快照所屬交易日：now (預設為台北時間現在) 時已公布的最新交易日。
+        未設定交易日曆時退化為 now 的日期。
+        """
+        now = now or datetime.now(_TAIPEI)
+        if self.calendar is None:
+            return now.date()
+        return self.calendar.latest_session(now, self.publish.get(dataset, "00:00"))
+
+    def append(self, dataset: str, rows: Any, today: Optional[date] = None, now: Optional[datetime] = None) -> Optional[str]:
+        """
+        寫入一份快照，回傳分區日期；同日分區已存在 (append-only) 或資料為空時回傳 None。
+        無日期欄位的資料集以 today (預設依 session_date 推算) 為分區，內容與最近一個分區相同時視為尚未更新而略過。
+        """
+        if not rows:
+            return None
+        keys, columns = _to_columns(rows)
+        dated = any(name in keys for name in DATE_KEYS)
+        day = self.snapshot_date(keys, columns, today or (None if dated else self.session_date(dataset, now)))
+        path = self._path(dataset, day)
+        if os.path.exists(path):
+            return None
+        code_key = self.datasets.get(dataset, ("", ""))[1]
+        if code_key not in keys:
+            code_key = next((k for k in CODE_KEYS + ("SecuritiesCompanyCode",) if k in keys), "")
+        codes: List[str] = []
+        if code_key:
+            codes = [normalize_code(c) for c in columns[keys.index(code_key)]]
+            order = sorted(range(len(codes)), key=codes.__getitem__)
+            codes = [codes[i] for i in order]
+            columns = [[col[i] for i in order] for col in columns]
+        if not dated and self._same_as_last(dataset, keys, columns):
+            return None
+        payloads = [zlib.compress(json.dumps(col, ensure_ascii=False, separators=(",", ":")).encode("utf-8")) for col in columns]
+        blocks, offset = [], 0
+        for payload in payloads:
+            blocks.append((offset, len(payload)))
+            offset += len(payload)
+        header = json.dumps({"dataset": dataset, "date": day, "rows": len(columns[0]) if columns else 0,
+                             "keys": keys, "code_key": code_key, "blocks": blocks, "codes": codes},
+                            ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + struct.pack("<I", len(header)) + header)
+            for payload in payloads:
+                f.write(payload)
+        os.replace(tmp, path)
+        return day
+
+    def _same_as_last(self, dataset: str, keys: List[str], columns: List[List[str]]) -> bool:
+        """與最近一個分區內容相同 (上游尚未公布新交易日的資料)。"""
+        days = self.dates(dataset)
+        if not days:
+            return False
+        with self._lock:
+            part = self._partition(dataset, days[-1])
+            return part.keys == keys and all(self._column(part, i) == col for i, col in enumerate(columns))
+
+    # --- 讀取 ---
+
+    def dates(self, dataset: str) -> List[str]:
+        """已保存的分區日期 (由舊到新)；目錄有變動 (含其他行程寫入) 時重新列出。"""
+        folder = os.path.join(self.directory, dataset)
+        try:
+            mtime = os.stat(folder).st_mtime
+        except FileNotFoundError:
+            return []
+        cached = self._dates.get(dataset)
+        if cached is None or cached[0] != mtime:
+            names = sorted(n[:-len(SUFFIX)] for n in os.listdir(folder) if n.endswith(SUFFIX) and _DATE_NAME.fullmatch(n[:-len(SUFFIX)]))
+            cached = self._dates[dataset] = (mtime, names)
+        return cached[1]
+
+    def _partition(self, dataset: str, day: str) -> _Partition:
+        path = self._path(dataset, day)
+        part = self._headers.get(path)
+        if part is None:
+            with open(path, "rb") as f:
+                magic, size = f.read(4), struct.unpack("<I", f.read(4))[0]
+                if magic != MAGIC:
+                    raise ValueError(f"not a history partition: {path}")
+                header = json.loads(f.read(size))
+            base = 8 + size
+            part = _Partition(path, day, header["keys"], [(base + o, n) for o, n in header["blocks"]], header["codes"])
+            self._headers[path] = part
+        return part
+
+    def _column(self, part: _Partition, index: int) -> List[str]:
+        key = (part.path, index)
+        values = self._blocks.get(key)
+        if values is None:
+            offset, length = part.blocks[index]
+            with open(part.path, "rb") as f:
+                f.seek(offset)
+                values = json.loads(zlib.decompress(f.read(length)))
+            self._blocks[key] = values
+        return values
+
+    def query(self, dataset: str, code: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None,
+              sessions: Optional[int] = None, fields: Optional[Sequence[str]] = None) -> List[Dict[str, str]]:
+        """
+        區間查詢 (由舊到新)：[start, end] 日期範圍內最近 sessions 個交易日；code 指定時只取該代號的列 (以分區的代號索引定位)。
+        fields 指定時只解壓並回傳這些欄位。每列以 "date" (YYYY-MM-DD) 標示所屬交易日。
+        """
+        days = [d for d in self.dates(dataset) if (not start or d >= start) and (not end or d <= end)]
+        if sessions is not None:
+            days = days[-sessions:] if sessions > 0 else []
+        code = normalize_code(code) if code else None
+        out: List[Dict[str, str]] = []
+        with self._lock:
+            for day in days:
+                part = self._partition(dataset, day)
+                if code is not None:
+                    lo, hi = bisect_left(part.codes, code), bisect_right(part.codes, code)
+                    if lo == hi:
+                        continue
+                    positions = range(lo, hi)
+                else:
+                    positions = range(len(part.codes) if part.codes else len(self._column(part, 0)))
+                selected = [(k, i) for i, k in enumerate(part.keys) if fields is None or k in fields]
+                columns = [(k, self._column(part, i)) for k, i in selected]
+                for pos in positions:
+                    row = {"date": day}
+                    row.update((k, col[pos]) for k, col in columns)
+                    out.append(row)
+        return out
+
+    def coverage(self) -> List[Dict[str, Any]]:
+        """各資料集已保存的交易日數與起訖日期。"""
+        result = []
+        for name, (endpoint, _) in self.datasets.items():
+            days = self.dates(name)
+            result.append({"dataset": name, "endpoint": endpoint, "sessions": len(days),
+                           "first": days[0] if days else None, "last": days[-1] if days else None})
+        return result
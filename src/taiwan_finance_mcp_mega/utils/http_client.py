@@ -3,82 +3,489 @@ import logging
 import asyncio
 import csv
 import io
-from typing import Any, Dict, Optional, List
-from cachetools import TTLCache
+import json
+import os
+import re
+import socket
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Hashable, NamedTuple, Optional, List, Set, Tuple
+from cachetools import TLRUCache, TTLCache
 from taiwan_finance_mcp_mega.config import Config
+from taiwan_finance_mcp_mega.utils.columnar import ColumnarBuilder, ColumnarDataset, is_rows
+from taiwan_finance_mcp_mega.utils.json_stream import RowList, load_json_stream
+from taiwan_finance_mcp_mega.utils.disk_cache import DiskCache, DiskEntry
+from taiwan_finance_mcp_mega.utils.history import HistoryStore
+from taiwan_finance_mcp_mega.utils.upstream import CircuitOpenError, UpstreamRegistry
+from taiwan_finance_mcp_mega.utils import metrics
+from taiwan_finance_mcp_mega.utils.tracing import span
+from taiwan_finance_mcp_mega.utils.replay import FixtureStore, RecordingTransport, ReplayTransport
 
 logging.basicConfig(level=Config.LOG_LEVEL)
 logger = logging.getLogger(Config.APP_NAME)
 
+# 本次工具呼叫讀取過的緩存數據新鮮度紀錄 (由 track_freshness 開啟)
+_freshness: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("freshness", default=None)
+
+class _CacheEntry(NamedTuple):
+    data: Any
+    fetched_at: float  # time.monotonic()
+    soft_ttl: float
+    hard_ttl: float
+    # 由 payload 衍生的結構 (例如代碼索引)，與緩存項目同生命週期
+    derived: Dict[str, Any]
+    url: str = ""
+
+class _DatasetCache(TLRUCache):
+    """記憶體緩存：容量淘汰與到期移除時計入各資料集的 evicted / expired 指標。"""
+
+    def popitem(self):
+        key, entry = super().popitem()
+        metrics.CACHE_EVENTS.inc(metrics.dataset_label(entry.url), "evicted")
+        return key, entry
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        for _, entry in expired:
+            metrics.CACHE_EVENTS.inc(metrics.dataset_label(entry.url), "expired")
+        return expired
+
 class AsyncHttpClient:
     """
     [v3.9.2] 帶有時效性緩存與 CSV 解析支援的異步 HTTP 客戶端。
+    緩存採 stale-while-revalidate：超過 soft TTL 先回舊資料並於背景刷新，超過 hard TTL 才阻塞重抓。
+    可選用 SQLite 磁碟緩存作為第二層，跨重啟與多行程共用，並支援僅讀本地緩存的離線模式。
+    上游請求依主機使用各自的連線池與限流器 (見 UpstreamRegistry)。
     """
-    _client: httpx.AsyncClient = None
-    _cache = TTLCache(maxsize=100, ttl=300)
-    _lock = asyncio.Lock()
+    # 注入的共用客戶端 (測試 / 基準用 MockTransport)；設定時所有主機共用，但仍套用各主機的限流與排隊統計
+    _client: Optional[httpx.AsyncClient] = None
+    _upstreams = UpstreamRegistry(
+        Config.UPSTREAM_LIMITS, Config.UPSTREAM_DEFAULT,
+        headers={"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"},
+    )
+    _cache = _DatasetCache(maxsize=100, ttu=lambda key, entry, now: entry.fetched_at + entry.hard_ttl)
+    _disk: Optional[DiskCache] = None
+    _history: Optional[HistoryStore] = None
+    offline: bool = Config.CACHE_OFFLINE
+    _pending_writes: Set[asyncio.Task] = set()
+    _ttl_rules: List[Tuple["re.Pattern[str]", float, float]] = [
+        (re.compile(pattern), soft, hard) for pattern, soft, hard in Config.CACHE_TTL_RULES
+    ]
+    _columnar_pattern = re.compile(Config.COLUMNAR_URL_PATTERN) if Config.COLUMNAR_URL_PATTERN else None
+    # cache_key -> 進行中的上游請求 (Single-flight)，同 key 併發呼叫共用同一個 Task
+    _inflight: Dict[str, asyncio.Task] = {}
+    # cache_key -> 最近一次上游失敗的錯誤訊息 (負向緩存)
+    _failures = TTLCache(maxsize=256, ttl=Config.NEGATIVE_CACHE_TTL)
+
+    @classmethod
+    @asynccontextmanager
+    async def connection(cls, url: str):
+        """等待該主機的限流 token 與連線名額後，提供用於此請求的客戶端。"""
+        async with cls._upstreams.pool_for(url).slot() as client:
+            if cls._client is not None and not cls._client.is_closed:
+                client = cls._client
+            yield client
+
+    @staticmethod
+    def _observe_response(response: httpx.Response) -> None:
+        host = response.request.url.host
+        metrics.UPSTREAM_REQUESTS.inc(host, str(response.status_code))
+        metrics.UPSTREAM_BYTES.inc(host, amount=response.num_bytes_downloaded)
+
+    @classmethod
+    def collect_metrics(cls) -> None:
+        """於 /metrics 抓取時更新緩存筆數與各主機熔斷狀態。"""
+        metrics.CACHE_ENTRIES.set(len(cls._cache))
+        states = {"closed": 0, "half_open": 1, "open": 2}
+        for host, stats in cls.upstream_stats().items():
+            metrics.UPSTREAM_CIRCUIT.set(states[stats["circuit"]], host)
 
     @classmethod
-    async def get_client(cls) -> httpx.AsyncClient:
-        if cls._client is None or cls._client.is_closed:
-            cls._client = httpx.AsyncClient(
-                timeout=45.0, 
-                follow_redirects=True,
-                headers={"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"}
-            )
-        return cls._client
+    def upstream_stats(cls) -> Dict[str, Dict[str, Any]]:
+        """各上游主機的請求數、在途/排隊數與排隊等待時間 (平均/最大/最近一次)。"""
+        return cls._upstreams.stats()
 
     @classmethod
-    async def fetch_json(cls, url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None):
-        cache_key = f"json_{url}_{sorted(params.items()) if params else ''}_{sorted(headers.items()) if headers else ''}"
-        if cache_key in cls._cache:
-            return cls._cache[cache_key]
+    def configure_replay(cls, record_dir: Optional[str] = None, replay_dir: Optional[str] = None,
+                         latency: float = 0.0) -> Optional[httpx.AsyncBaseTransport]:
+        """
+        錄製 (record_dir) 或回放 (replay_dir) 上游回應，兩者皆空則恢復連線真實上游。
+        回放時不連線上游，latency 為每個請求模擬的網路延遲 (秒)；限流與熔斷照常運作。
+        """
+        if record_dir and replay_dir:
+            raise ValueError("record_dir 與 replay_dir 不可同時指定")
+        transport: Optional[httpx.AsyncBaseTransport] = None
+        if record_dir:
+            transport = RecordingTransport(FixtureStore(record_dir))
+        elif replay_dir:
+            transport = ReplayTransport(FixtureStore(replay_dir), latency=latency)
+        cls._upstreams.transport = transport
+        cls._upstreams.reset()
+        return transport
+
+    @classmethod
+    def configure_disk_cache(cls, directory: Optional[str], offline: Optional[bool] = None) -> Optional[DiskCache]:
+        """啟用 (directory 為空則停用) 磁碟緩存層；offline=True 時僅從緩存提供數據，不連線上游。"""
+        cls._disk = DiskCache(directory) if directory else None
+        if offline is not None:
+            cls.offline = offline
+        if cls._disk is not None:
+            cls._disk.prune(Config.DISK_CACHE_MAX_AGE)
+        return cls._disk
+
+    @classmethod
+    def configure_history(cls, directory: Optional[str], calendar: Any = None) -> Optional[HistoryStore]:
+        """
+        啟用 (directory 為空則停用) 歷史快照庫：Config.HISTORY_DATASETS 的資料集於抓取時附加寫入。
+        無日期欄位的資料集依交易日曆 (預設為僅排除週末的 MarketCalendar) 與盤後公布時段決定分區日期。
+        """
+        if not directory:
+            cls._history = None
+            return None
+        from taiwan_finance_mcp_mega.prefetch import PUBLICATION_WINDOWS, MarketCalendar
+        publish = {name: PUBLICATION_WINDOWS[endpoint][0] for name, (endpoint, _) in Config.HISTORY_DATASETS.items()
+                   if endpoint in PUBLICATION_WINDOWS}
+        cls._history = HistoryStore(directory, Config.HISTORY_DATASETS, calendar=calendar or MarketCalendar(), publish=publish)
+        return cls._history
+
+    @classmethod
+    def warm_from_disk(cls) -> int:
+        """啟動時將磁碟上仍在 hard TTL 內的最新項目載入記憶體緩存，回傳載入筆數。"""
+        if cls._disk is None:
+            return 0
+        entries = cls._disk.recent(limit=int(cls._cache.maxsize))
+        for entry in reversed(entries):
+            cls._promote(entry)
+        logger.info(f"Disk cache: warmed {len(entries)} entries from {cls._disk.path}")
+        return len(entries)
+
+    @classmethod
+    def ttl_for(cls, url: str) -> Tuple[float, float]:
+        """依 URL 規則取得 (soft TTL, hard TTL)，第一個符合的規則生效。"""
+        for pattern, soft, hard in cls._ttl_rules:
+            if pattern.search(url):
+                return soft, hard
+        return Config.CACHE_SOFT_TTL, Config.CACHE_HARD_TTL
+
+    @staticmethod
+    def track_freshness() -> List[Dict[str, Any]]:
+        """
+        開始記錄目前工具呼叫所讀取數據的新鮮度。
+        回傳的 list 會在後續 fetch 時被填入 {"url", "cache", "age_seconds", "version"}；
+        version 為 (cache key, 抓取時間)，同一份緩存 payload 的版本不變。
+        """
+        records: List[Dict[str, Any]] = []
+        _freshness.set(records)
+        return records
 
-        async with cls._lock:
-            if cache_key in cls._cache: return cls._cache[cache_key]
-            client = await cls.get_client()
+    @staticmethod
+    def merge_freshness(records: List[Dict[str, Any]]) -> None:
+        """將子任務 (各自呼叫 track_freshness) 的新鮮度紀錄併入目前工具呼叫的紀錄。"""
+        current = _freshness.get()
+        if current is not None and current is not records:
+            current.extend(records)
+
+    @staticmethod
+    def record_freshness(url: str, status: str, version: Hashable, fetched_at: float) -> None:
+        """記錄一筆非經 fetch_json 緩存取得的數據 (例如批次合併後的個別 key)；fetched_at 為 time.monotonic()。"""
+        records = _freshness.get()
+        if records is not None:
+            age = time.monotonic() - fetched_at
+            records.append({"url": url, "cache": status, "age_seconds": round(age, 1), "version": (version, fetched_at)})
+
+    @staticmethod
+    def _note_freshness(url: str, status: str, cache_key: str, entry: _CacheEntry) -> None:
+        AsyncHttpClient.record_freshness(url, status, cache_key, entry.fetched_at)
+
+    @classmethod
+    def _wants_columnar(cls, url: str) -> bool:
+        return cls._columnar_pattern is not None and cls._columnar_pattern.search(url) is not None
+
+    @classmethod
+    def _ingest(cls, url: str, data: Any) -> Any:
+        """大型行情資料集寫入記憶體緩存前轉為欄式儲存，數值只解析一次。"""
+        if not isinstance(data, list) or len(data) < Config.COLUMNAR_MIN_ROWS or not cls._wants_columnar(url):
+            return data
+        return ColumnarDataset.from_rows(data) or data
+
+    @classmethod
+    def _store(cls, cache_key: str, url: str, data: Any) -> Any:
+        """寫入緩存並回傳實際存放的 payload (可能已轉為欄式)。"""
+        soft, hard = cls.ttl_for(url)
+        payload = cls._ingest(url, data)
+        cls._cache[cache_key] = _CacheEntry(payload, time.monotonic(), soft, hard, {}, url)
+        if cls._disk is not None:
+            cls._persist(cache_key, url, data, time.time(), soft, hard)
+        if cls._history is not None:
+            cls._capture(url, payload)
+        return payload
+
+    @classmethod
+    def _promote(cls, entry: DiskEntry) -> Optional[_CacheEntry]:
+        """將磁碟項目放入記憶體緩存 (保留原始抓取時間，已過 hard TTL 者不放入)。"""
+        payload = cls._ingest(entry.url, entry.data)
+        cls._cache[entry.cache_key] = _CacheEntry(payload, time.monotonic() - entry.age, entry.soft_ttl, entry.hard_ttl, {}, entry.url)
+        return cls._cache.get(entry.cache_key)
+
+    @classmethod
+    def _persist(cls, cache_key: str, url: str, data: Any, fetched_at: float, soft: float, hard: float) -> None:
+        """於背景執行緒寫入磁碟，不阻塞回應。"""
+        task = asyncio.ensure_future(asyncio.to_thread(cls._disk.put, cache_key, url, data, fetched_at, soft, hard))
+        cls._pending_writes.add(task)
+        task.add_done_callback(cls._pending_writes.discard)
+
+    @classmethod
+    def _capture(cls, url: str, payload: Any) -> None:
+        """符合的每日資料集於背景執行緒寫入歷史快照庫 (同日分區已存在則略過)。"""
+        dataset = cls._history.dataset_for(url)
+        if dataset is None or not is_rows(payload):
+            return
+        task = asyncio.ensure_future(asyncio.to_thread(cls._append_history, dataset, payload))
+        cls._pending_writes.add(task)
+        task.add_done_callback(cls._pending_writes.discard)
+
+    @classmethod
+    def _append_history(cls, dataset: str, payload: Any) -> None:
+        try:
+            day = cls._history.append(dataset, payload)
+            if day:
+                logger.info(f"History: captured {dataset} {day} ({len(payload)} rows)")
+        except Exception as e:
+            logger.error(f"History write error: {dataset} - {str(e)}")
+
+    @classmethod
+    async def _disk_lookup(cls, cache_key: str) -> Optional[DiskEntry]:
+        if cls._disk is None:
+            return None
+        try:
+            return await asyncio.to_thread(cls._disk.get, cache_key)
+        except Exception as e:
+            logger.error(f"Disk cache read error: {cache_key} - {str(e)}")
+            return None
+
+    @staticmethod
+    def _lease_owner() -> str:
+        # 於呼叫時取 pid：fork 出的 worker 不會沿用父行程的識別
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    @classmethod
+    async def _acquire_lease(cls, cache_key: str, since: float) -> Tuple[bool, Optional[DiskEntry]]:
+        """
+        跨行程 single-flight：取得抓取租約則回傳 (True, None)；
+        其他行程持有租約時輪詢磁碟，等到比 since 更新的項目即回傳 (False, 該項目)。
+        租約失效 (持有者失敗或當機) 後改由本行程接手抓取。
+        """
+        deadline = time.monotonic() + Config.CACHE_FETCH_LEASE
+        owner = cls._lease_owner()
+        try:
+            while True:
+                if await asyncio.to_thread(cls._disk.acquire_lease, cache_key, owner, Config.CACHE_FETCH_LEASE):
+                    return True, None
+                if time.monotonic() >= deadline:
+                    return False, None
+                await asyncio.sleep(Config.CACHE_LEASE_POLL)
+                entry = await cls._disk_lookup(cache_key)
+                if entry is not None and entry.fetched_at > since:
+                    return False, entry
+        except Exception as e:
+            logger.error(f"Disk cache lease error: {cache_key} - {str(e)}")
+            return False, None
+
+    @classmethod
+    async def _release_lease(cls, cache_key: str) -> None:
+        """待本行程的磁碟寫入完成後釋放租約，讓等待中的行程讀到新版本。"""
+        await cls.flush()
+        try:
+            await asyncio.to_thread(cls._disk.release_lease, cache_key, cls._lease_owner())
+        except Exception as e:
+            logger.error(f"Disk cache lease error: {cache_key} - {str(e)}")
+
+    @classmethod
+    async def flush(cls) -> None:
+        """等待所有背景磁碟 / 歷史庫寫入完成。"""
+        if cls._pending_writes:
+            await asyncio.gather(*list(cls._pending_writes), return_exceptions=True)
+
+    @staticmethod
+    def _json_key(url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None) -> str:
+        return f"json_{url}_{sorted(params.items()) if params else ''}_{sorted(headers.items()) if headers else ''}"
+
+    @classmethod
+    def derived(cls, data: Any, url: str, name: str, builder: Callable[[Any], Any],
+                params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None) -> Any:
+        """
+        取得附掛於 fetch_json 緩存項目上的衍生結構 (例如代碼索引)。
+        每份緩存 payload 只建立一次，緩存刷新或淘汰時一併丟棄；
+        data 未被緩存 (或已被新版本取代) 時僅建立一次性結果。
+        """
+        entry = cls._cache.get(cls._json_key(url, params, headers))
+        if entry is None or entry.data is not data:
+            return builder(data)
+        if name not in entry.derived:
+            entry.derived[name] = builder(data)
+        return entry.derived[name]
+
+    @classmethod
+    def _start(cls, cache_key: str, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """取得 (或建立) 該 cache key 唯一的在途上游請求。"""
+        task = cls._inflight.get(cache_key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(loader())
+            cls._inflight[cache_key] = task
+
+            def _release(t: asyncio.Task) -> None:
+                if cls._inflight.get(cache_key) is t:
+                    del cls._inflight[cache_key]
+            task.add_done_callback(_release)
+        return task
+
+    @classmethod
+    async def _single_flight(cls, cache_key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        以 cache key 為單位合併併發請求：同一 key 只會有一個上游呼叫在途，
+        不同 key 之間完全並行，不再互相排隊。
+        """
+        # shield: 單一呼叫端被取消時不應中斷其他人共用的上游請求
+        return await asyncio.shield(cls._start(cache_key, loader))
+
+    @classmethod
+    async def _cached(cls, cache_key: str, url: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        with span("cache.lookup", url=url):
+            entry = cls._cache.get(cache_key)
+            if entry is None:
+                # 第二層：磁碟緩存 (其他行程或上次執行留下的 payload)
+                disk_entry = await cls._disk_lookup(cache_key)
+                if disk_entry is not None:
+                    entry = cls._promote(disk_entry)
+        if entry is not None:
+            age = time.monotonic() - entry.fetched_at
+            if age < entry.soft_ttl:
+                metrics.CACHE_EVENTS.inc(metrics.dataset_label(url), "hit")
+                cls._note_freshness(url, "fresh", cache_key, entry)
+            else:
+                # 超過 soft TTL：立即回傳舊資料，並在背景觸發唯一一次刷新
+                metrics.CACHE_EVENTS.inc(metrics.dataset_label(url), "stale")
+                cls._note_freshness(url, "stale", cache_key, entry)
+                cls._start(cache_key, loader)
+            return entry.data
+
+        metrics.CACHE_EVENTS.inc(metrics.dataset_label(url), "miss")
+        with span("singleflight.wait", url=url):
+            data = await cls._single_flight(cache_key, loader)
+        entry = cls._cache.get(cache_key)
+        if entry is not None:
+            cls._note_freshness(url, "fresh", cache_key, entry)
+        return data
+
+    @classmethod
+    async def fetch_json(cls, url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None, refresh: bool = False):
+        """refresh=True 時略過緩存直接向上游重抓 (供預抓排程使用)，結果仍寫回緩存。"""
+        cache_key = cls._json_key(url, params, headers)
+        loader = lambda: cls._load_json(cache_key, url, params, headers)
+        if refresh:
+            return await cls._single_flight(cache_key, loader)
+        return await cls._cached(cache_key, url, loader)
+
+    @classmethod
+    async def fetch_json_uncached(cls, url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None):
+        """
+        不寫入數據集緩存 (記憶體、磁碟與歷史庫) 的抓取，仍經 single-flight、主機限流、重試、熔斷與負向緩存。
+        供自行管理緩存的呼叫端使用 (例如逐幣種緩存的批次報價、MOL 尾端分頁)，避免占用大型資料集的緩存空間。
+        """
+        cache_key = cls._json_key(url, params, headers)
+        return await cls._single_flight(f"uncached_{cache_key}", lambda: cls._load_json(cache_key, url, params, headers, store=False))
+
+    @classmethod
+    async def _load(cls, cache_key: str, url: str, download: Callable[[], Awaitable[Any]], failure: Callable[[str], Any], label: str,
+                    store: bool = True):
+        """
+        向上游重新抓取並寫入緩存 (store=False 時只回傳結果，不讀寫記憶體與磁碟緩存)。
+        磁碟上若有其他行程剛刷新的版本 (或處於離線模式) 則直接沿用，其他行程抓取中則等待其結果 (抓取租約)；上游失敗 (含熔斷中) 時退回磁碟上最後一份成功的 payload。
+        失敗結果短期負向緩存，期間內相同請求不再連線上游。
+        """
+        disk_entry = await cls._disk_lookup(cache_key) if store else None
+        if disk_entry is not None and (cls.offline or disk_entry.age < disk_entry.soft_ttl):
+            promoted = cls._promote(disk_entry)
+            return promoted.data if promoted is not None else disk_entry.data
+        if cls.offline:
+            return failure("offline mode: 本地緩存中無此數據")
+        error = cls._failures.get(cache_key)
+        if error is None:
+            leased = False
+            if cls._disk is not None and store:
+                # 共用磁碟緩存的其他行程正在抓取同一份數據時，等待並沿用其結果
+                with span("lease.wait", url=url):
+                    leased, peer = await cls._acquire_lease(cache_key, disk_entry.fetched_at if disk_entry else 0.0)
+                if peer is not None:
+                    promoted = cls._promote(peer)
+                    return promoted.data if promoted is not None else peer.data
             try:
-                response = await client.get(url, params=params, headers=headers)
-                response.raise_for_status()
-                try:
-                    # 優先使用標準 json 解析
-                    data = response.json()
-                except:
-                    # 若失敗，嘗試處理 BOM (UTF-8-SIG)
-                    content = response.content.decode('utf-8-sig')
-                    data = json.loads(content)
-                
-                cls._cache[cache_key] = data
-                return data
+                # 經該主機的熔斷器與重試策略下載；熔斷中直接失敗，不等待 timeout
+                with span("upstream.fetch", url=url):
+                    data = await cls._upstreams.pool_for(url).call(download)
+                return cls._store(cache_key, url, data) if store else data
+            except CircuitOpenError as e:
+                error = str(e)
             except Exception as e:
-                logger.error(f"JSON Fetch Error: {url} - {str(e)}")
-                return {"error": str(e), "status": "failed"}
+                error = str(e) or type(e).__name__
+                cls._failures[cache_key] = error
+            finally:
+                if leased:
+                    await cls._release_lease(cache_key)
+            logger.error(f"{label} Fetch Error: {url} - {error}")
+        if disk_entry is not None:
+            logger.warning(f"Serving last good payload from disk cache: {url}")
+            return disk_entry.data
+        return failure(error)
+
+    @classmethod
+    async def _load_json(cls, cache_key: str, url: str, params: Optional[Dict[str, Any]], headers: Optional[Dict[str, str]],
+                         store: bool = True):
+        async def download():
+            async with cls.connection(url) as client, client.stream("GET", url, params=params, headers=headers) as response:
+                try:
+                    response.raise_for_status()
+                    # 串流解析：陣列元素逐一進入 sink (大型行情資料集直接累積為欄式)，BOM 只處理一次
+                    sink = ColumnarBuilder(Config.COLUMNAR_MIN_ROWS) if cls._wants_columnar(url) else RowList()
+                    with span("json.stream_parse"):
+                        return await load_json_stream(response.aiter_bytes(), encoding=response.charset_encoding, sink=sink)
+                finally:
+                    cls._observe_response(response)
+
+        return await cls._load(cache_key, url, download, lambda err: {"error": err, "status": "failed"}, "JSON", store)
 
     @classmethod
     async def fetch_csv_as_json(cls, url: str) -> List[Dict[str, Any]]:
         """抓取 CSV 並轉換為 JSON 格式 (List of Dicts)"""
         cache_key = f"csv_{url}"
-        if cache_key in cls._cache:
-            return cls._cache[cache_key]
+        return await cls._cached(cache_key, url, lambda: cls._load_csv(cache_key, url))
 
-        async with cls._lock:
-            if cache_key in cls._cache: return cls._cache[cache_key]
-            client = await cls.get_client()
-            try:
+    @classmethod
+    async def _load_csv(cls, cache_key: str, url: str) -> List[Dict[str, Any]]:
+        async def download():
+            async with cls.connection(url) as client:
                 response = await client.get(url)
-                response.raise_for_status()
-                # 處理編碼 (政府資料常使用 Big5 或 UTF-8 with BOM)
+                cls._observe_response(response)
+            response.raise_for_status()
+            # 處理編碼 (政府資料常使用 Big5 或 UTF-8 with BOM)
+            with span("csv.parse"):
                 content = response.content.decode('utf-8-sig')
                 f = io.StringIO(content)
                 reader = csv.DictReader(f)
-                data = list(reader)
-                cls._cache[cache_key] = data
-                return data
-            except Exception as e:
-                logger.error(f"CSV Fetch Error: {url} - {str(e)}")
-                return []
+                return list(reader)
+
+        return await cls._load(cache_key, url, download, lambda err: [], "CSV")
 
     @classmethod
     async def close(cls):
+        await cls.flush()
         if cls._client:
             await cls._client.aclose()
+        await cls._upstreams.aclose()
+
+
+metrics.REGISTRY.on_collect(AsyncHttpClient.collect_metrics)
+
+if Config.UPSTREAM_RECORD_DIR or Config.UPSTREAM_REPLAY_DIR:
+    AsyncHttpClient.configure_replay(Config.UPSTREAM_RECORD_DIR, Config.UPSTREAM_REPLAY_DIR, Config.UPSTREAM_REPLAY_LATENCY)
@@ -0,0 +1,125 @@
+"""
+Streaming JSON Ingestion
+逐塊解碼 httpx 的位元組串流：頂層為陣列時逐一解析元素並直接交給 sink (列表或欄式建構器)，
+不需先緩衝整份 response；BOM 僅於串流開頭處理一次。
+"""
+import codecs
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Protocol
+
+_WHITESPACE = " \t\r\n"
+
+
+class RowSink(Protocol):
+    def append(self, row: Any) -> None: ...
+    def build(self) -> Any: ...
+
+
+class RowList:
+    """預設 sink：收集為 list，並讓各列共用相同的欄名字串 (與 json.loads 整份解析時相同)。"""
+
+    def __init__(self):
+        self.rows: List[Any] = []
+        self._keys: Dict[str, str] = {}
+
+    def append(self, row: Any) -> None:
+        if type(row) is dict:
+            keys = self._keys
+            row = {keys.setdefault(k, k): v for k, v in row.items()}
+        self.rows.append(row)
+
+    def build(self) -> List[Any]:
+        return self.rows
+
+
+class JSONArrayParser:
+    """頂層 JSON 陣列的增量解析器：feed() 文字片段，回傳已完整解析的元素。"""
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._started = False
+        self._finished = False
+
+    def feed(self, text: str, final: bool = False) -> List[Any]:
+        buf = self._buffer + text
+        pos, out = 0, []
+        n = len(buf)
+        while pos < n and not self._finished:
+            while pos < n and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= n:
+                break
+            ch = buf[pos]
+            if not self._started:
+                if ch != "[":
+                    raise ValueError("JSON stream is not an array")
+                self._started = True
+                pos += 1
+                continue
+            if ch == ",":
+                pos += 1
+                continue
+            if ch == "]":
+                self._finished = True
+                pos += 1
+                break
+            try:
+                element, end = self._decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                break  # 元素尚未完整，等待下一個片段
+            # 數值可能被截斷於片段邊界 (例: "1." 會先被解析為 1)，須看到後續的分隔符才確認元素完整
+            follow = end
+            while follow < n and buf[follow] in _WHITESPACE:
+                follow += 1
+            if follow >= n or buf[follow] not in ",]":
+                if not final:
+                    break
+                if follow < n:
+                    raise ValueError(f"Unexpected character in JSON array stream at offset {follow}")
+            out.append(element)
+            pos = end
+        self._buffer = buf[pos:]
+        if final:
+            if not self._finished or self._buffer.strip():
+                raise ValueError("Unexpected end of JSON array stream")
+        return out
+
+
+async def load_json_stream(chunks: AsyncIterator[bytes], encoding: Optional[str] = None, sink: Optional[RowSink] = None) -> Any:
+    """
+    從位元組串流載入 JSON。
+    頂層為陣列時逐元素交給 sink 並回傳 sink.build()；其他型別 (物件等) 累積文字後解析一次。
+    """
+    codec = (encoding or "utf-8").lower().replace("_", "-")
+    if codec in ("utf-8", "utf8"):
+        codec = "utf-8-sig"  # 僅於開頭移除 BOM
+    decoder = codecs.getincrementaldecoder(codec)()
+    sink = sink if sink is not None else RowList()
+    parser: Optional[JSONArrayParser] = None
+    pending: List[str] = []
+    mode = None  # "array" | "text"
+
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if mode is None:
+            text = text.lstrip(_WHITESPACE)
+            if not text:
+                continue
+            # 非陣列 payload (物件等) 累積全文後一次解析
+            mode = "array" if text[0] == "[" else "text"
+            parser = JSONArrayParser() if mode == "array" else None
+        if parser is None:
+            pending.append(text)
+            continue
+        for row in parser.feed(text):
+            sink.append(row)
+
+    tail = decoder.decode(b"", final=True)
+    if parser is None:
+        return json.loads("".join(pending) + tail)
+    for row in parser.feed(tail, final=True):
+        sink.append(row)
+    return sink.build()
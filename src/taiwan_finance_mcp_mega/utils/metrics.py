@@ -0,0 +1,280 @@
+"""
+Prometheus Metrics
+不依賴 prometheus_client 的輕量指標：Counter / Gauge / Histogram 以 dict + list 累計，
+記錄成本僅為一次 dict 查找 (Histogram 另加一次 bisect)，可常駐於正式環境；
+於 /metrics 抓取時才輸出為 Prometheus text exposition format (0.0.4)。
+多 worker 時各行程定期將指標快照寫入共用目錄 (SharedMetrics)，任一 worker 被抓取時合併所有行程的數值輸出。
+"""
+import json
+import logging
+import math
+import os
+import threading
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger("mcp-finance")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    values: Dict[Tuple[str, ...], Any]
+
+    def samples(self, values: Dict[Tuple[str, ...], Any]) -> Iterable[str]:
+        raise NotImplementedError
+
+    def combine(self, a: Any, b: Any) -> Any:
+        raise NotImplementedError
+
+    def snapshot(self) -> List[List[Any]]:
+        """可 JSON 序列化的目前數值：[[labels, value], ...]。"""
+        return [[list(labels), value] for labels, value in list(self.values.items())]
+
+    def merged(self, snapshots: Iterable[List[List[Any]]]) -> Dict[Tuple[str, ...], Any]:
+        """本行程數值與其他行程快照合併後的數值。"""
+        values = dict(self.values)
+        for snapshot in snapshots:
+            for labels, value in snapshot:
+                key = tuple(labels)
+                values[key] = self.combine(values[key], value) if key in values else value
+        return values
+
+    def render(self, snapshots: Iterable[List[List[Any]]] = ()) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self.samples(self.merged(snapshots))]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def get(self, *labels: str) -> float:
+        return self.values.get(labels, 0.0)
+
+    def combine(self, a: float, b: float) -> float:
+        return a + b
+
+    def samples(self, values: Dict[Tuple[str, ...], float]) -> Iterable[str]:
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Gauge(Counter):
+    """aggregate 為多 worker 合併方式："sum" (例: 進行中請求數) 或 "max" (例: 斷路器狀態)。"""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), aggregate: str = "sum"):
+        super().__init__(name, help, labelnames)
+        self.aggregate = aggregate
+
+    def combine(self, a: float, b: float) -> float:
+        return max(a, b) if self.aggregate == "max" else a + b
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) - amount
+
+    def set(self, value: float, *labels: str) -> None:
+        self.values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [各 bucket 計數 (非累積)..., +Inf 計數, 總和]
+        self.values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        state = self.values.get(labels)
+        if state is None:
+            state = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def count(self, *labels: str) -> int:
+        state = self.values.get(labels)
+        return int(sum(state[:-1])) if state else 0
+
+    def combine(self, a: List[float], b: List[float]) -> List[float]:
+        return [x + y for x, y in zip(a, b)]
+
+    def snapshot(self) -> List[List[Any]]:
+        return [[list(labels), list(state)] for labels, state in list(self.values.items())]
+
+    def samples(self, values: Dict[Tuple[str, ...], List[float]]) -> Iterable[str]:
+        for labels, state in sorted(values.items()):
+            cumulative = 0
+            for bound, n in zip((*self.buckets, math.inf), state[:-1]):
+                cumulative += n
+                le = 'le="%s"' % _number(bound)
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(state[-1])}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Registry:
+    """指標集合；collectors 於每次輸出前執行 (用於抓取時才計算的 Gauge，例如緩存筆數)。"""
+
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+        self.collectors: List[Callable[[], None]] = []
+
+    def add(self, metric: _Metric) -> _Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def on_collect(self, collector: Callable[[], None]) -> None:
+        self.collectors.append(collector)
+
+    def collect(self) -> None:
+        for collector in self.collectors:
+            collector()
+
+    def snapshot(self) -> Dict[str, List[List[Any]]]:
+        """各指標目前數值 (供其他 worker 合併)。"""
+        self.collect()
+        return {metric.name: metric.snapshot() for metric in self.metrics}
+
+    def render(self, peers: Sequence[Dict[str, List[List[Any]]]] = ()) -> str:
+        """輸出 exposition；peers 為其他 worker 的 snapshot()，同標籤的數值依指標類型合併。"""
+        self.collect()
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render([peer[metric.name] for peer in peers if metric.name in peer]))
+        return "\n".join(lines) + "\n"
+
+
+class SharedMetrics:
+    """
+    多 worker 的指標彙總：每個 worker 每 interval 秒將 registry.snapshot() 寫入 directory/worker-<index>.json，
+    被抓取時讀取其他 worker 的快照與本行程的即時數值合併輸出，因此無論連線被分配到哪個 worker，
+    /metrics 皆為整個服務的累計值 (其他 worker 的數值最多落後 interval 秒；各快照單調遞增，rate() 不受影響)。
+    """
+
+    def __init__(self, registry: Registry, directory: str, index: int, interval: float = 1.0):
+        self.registry = registry
+        self.directory = directory
+        self.index = index
+        self.interval = interval
+        self.path = os.path.join(directory, f"worker-{index}.json")
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def write(self) -> None:
+        """原子寫入本行程快照 (先寫暫存檔再 rename，讀取端不會讀到半份檔案)。"""
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.registry.snapshot(), f)
+            os.replace(tmp, self.path)
+        except (OSError, RuntimeError) as e:
+            logger.warning(f"Metrics snapshot write failed: {e}")
+
+    def peers(self) -> List[Dict[str, List[List[Any]]]]:
+        snapshots = []
+        try:
+            names = sorted(os.listdir(self.directory))
+        except OSError:
+            return snapshots
+        for name in names:
+            path = os.path.join(self.directory, name)
+            if not (name.startswith("worker-") and name.endswith(".json")) or path == self.path:
+                continue
+            try:
+                with open(path, encoding="utf-8") as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def render(self) -> str:
+        return self.registry.render(self.peers())
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def start(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self.write()
+        self._thread = threading.Thread(target=self._run, name="metrics-share", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+
+
+_shared: Optional[SharedMetrics] = None
+
+
+def share(directory: str, index: int, interval: float = 1.0) -> SharedMetrics:
+    """於 worker 行程啟用指標彙總 (REGISTRY 的快照寫入 directory 供其他 worker 讀取)。"""
+    global _shared
+    _shared = SharedMetrics(REGISTRY, directory, index, interval)
+    _shared.start()
+    return _shared
+
+
+def exposition() -> str:
+    """/metrics 的輸出：多 worker 時為所有 worker 的合併數值，否則為本行程數值。"""
+    return _shared.render() if _shared is not None else REGISTRY.render()
+
+
+def dataset_label(url: str) -> str:
+    """資料集標籤：主機 + 路徑 (不含 query，避免查詢參數造成標籤爆量)。"""
+    parts = urlsplit(url)
+    return f"{parts.hostname or ''}{parts.path}"
+
+
+REGISTRY = Registry()
+
+TOOL_CALLS = REGISTRY.add(Counter("mcp_tool_calls_total", "Tool calls by outcome (ok / error / exception).", ("tool", "status")))
+TOOL_LATENCY = REGISTRY.add(Histogram("mcp_tool_latency_seconds", "Tool call latency including serialization.", ("tool",)))
+TOOLS_IN_FLIGHT = REGISTRY.add(Gauge("mcp_tool_calls_in_flight", "Tool calls currently executing."))
+
+UPSTREAM_REQUESTS = REGISTRY.add(Counter("mcp_upstream_requests_total", "Upstream HTTP requests by status code (error = no response).", ("host", "status")))
+UPSTREAM_LATENCY = REGISTRY.add(Histogram("mcp_upstream_request_seconds", "Upstream request duration including body download.", ("host",)))
+UPSTREAM_QUEUE_WAIT = REGISTRY.add(Histogram("mcp_upstream_queue_wait_seconds", "Time spent waiting for a rate-limit token and connection slot.", ("host",)))
+UPSTREAM_BYTES = REGISTRY.add(Counter("mcp_upstream_response_bytes_total", "Upstream response bytes received.", ("host",)))
+UPSTREAM_RETRIES = REGISTRY.add(Counter("mcp_upstream_retries_total", "Upstream request retries.", ("host",)))
+UPSTREAM_IN_FLIGHT = REGISTRY.add(Gauge("mcp_upstream_requests_in_flight", "Upstream requests currently holding a connection slot.", ("host",)))
+UPSTREAM_CIRCUIT = REGISTRY.add(Gauge("mcp_upstream_circuit_state", "Circuit breaker state (0 = closed, 1 = half-open, 2 = open).", ("host",), aggregate="max"))
+
+CACHE_EVENTS = REGISTRY.add(Counter("mcp_cache_events_total", "Dataset cache events (hit / miss / stale / evicted / expired).", ("dataset", "event")))
+CACHE_ENTRIES = REGISTRY.add(Gauge("mcp_cache_entries", "Datasets currently held in the memory cache."))
@@ -0,0 +1,121 @@
+"""
+MOL Datastore Dataset
+勞動部 OdService datastore (apiservice.mol.gov.tw/OdService/rest/datastore/<資源>) 的統計資源為依期間附加的時間序列。
+同一資源解析一次後以期間索引保存，供所有使用該資源的工具共用；刷新時只以 offset/limit 取回尾端數列合併，
+期間區間 (start / end) 與最近 N 期查詢以二分搜尋定位。
+"""
+import re
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# 常見的期間欄位名稱 (例: 日期（月別）、年月別、年度)
+_PERIOD_NAME = re.compile(r"日期|年月|月別|年別|年度|期間|period", re.I)
+_QUARTER = re.compile(r"^(\d{2,4})\s*(?:年)?\s*(?:Q|第)\s*([1-4])\s*(?:季)?$", re.I)
+_MONTH = re.compile(r"^(\d{2,4})\s*(?:年|M|/|-|\.)\s*(\d{1,2})\s*(?:月)?$", re.I)
+_YEAR = re.compile(r"^(\d{2,4})\s*(?:年)?$")
+# 區間上界包含以其為前綴的期間 (end=2023 涵蓋 2023-01 ~ 2023-12)
+_PREFIX_END = "\uffff"
+
+
+def _year(raw: str) -> int:
+    year = int(raw)
+    return year + 1911 if year < 1911 else year  # 民國年
+
+
+def parse_period(raw: Any) -> Optional[str]:
+    """
+    將期間正規化為可排序的字串：月 -> YYYY-MM、季 -> YYYY-Q#、年 -> YYYY。
+    接受西元或民國年 (2024M03、2024/3、113年3月、202403、11303、2024Q1、113年第1季、2024)，無法解析時回傳 None。
+    """
+    text = str(raw or "").strip()
+    if not text:
+        return None
+    if text.isdigit() and len(text) in (5, 6):
+        year, month = (text[:4], text[4:]) if len(text) == 6 else (text[:3], text[3:])
+        return f"{_year(year):04d}-{int(month):02d}" if 1 <= int(month) <= 12 else None
+    m = _QUARTER.match(text)
+    if m:
+        return f"{_year(m.group(1)):04d}-Q{m.group(2)}"
+    m = _MONTH.match(text)
+    if m:
+        month = int(m.group(2))
+        return f"{_year(m.group(1)):04d}-{month:02d}" if 1 <= month <= 12 else None
+    m = _YEAR.match(text)
+    if m:
+        return f"{_year(m.group(1)):04d}"
+    return None
+
+
+def period_field(record: Dict[str, Any]) -> Optional[str]:
+    """由第一筆資料判斷期間欄位：優先取名稱像期間且值可解析的欄位，其次為第一個值可解析的欄位。"""
+    names = [k for k in record if _PERIOD_NAME.search(k)] + list(record)
+    return next((k for k in names if parse_period(record.get(k)) is not None), None)
+
+
+class MolDataset:
+    """
+    單一 datastore 資源的已解析數列 (依上游順序) 與期間索引。
+    merge(offset, page, complete) 以 offset 起的一頁取代對應位置的數列；complete 表示此頁已到資源尾端。
+    """
+
+    def __init__(self, resource: str):
+        self.resource = resource
+        self.records: List[Dict[str, Any]] = []
+        self.field: Optional[str] = None
+        self.version = 0  # 數列變動時遞增
+        self.fetched_at = 0.0  # 最近一次成功刷新 (time.monotonic())
+        self.check_at = 0.0  # 下次需向上游刷新的時間
+        self._keys: List[str] = []  # 與 records 對齊的正規化期間 (無法解析者為空字串)
+        self._order: List[int] = []  # 依期間排序的列位置 (期間相同時維持上游順序)
+        self._sorted: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def key_of(self, record: Dict[str, Any]) -> str:
+        return (parse_period(record.get(self.field)) if self.field else None) or ""
+
+    def key_at(self, index: int) -> str:
+        return self._keys[index]
+
+    def merge(self, offset: int, page: Sequence[Dict[str, Any]], complete: bool) -> bool:
+        """合併 offset 起的一頁數列，回傳數列是否有變動 (只比對該頁涵蓋的列)。offset 超出目前長度時不合併。"""
+        n = len(self.records)
+        stop = offset + len(page)
+        if offset > n or (self.records[offset:stop] == list(page) and (not complete or stop == n)):
+            return False
+        if self.field is None and page:
+            self.field = period_field(page[0])
+        tail, tail_keys = ([], []) if complete else (self.records[stop:], self._keys[stop:])
+        self.records = self.records[:offset] + list(page) + tail
+        self._keys = self._keys[:offset] + [self.key_of(r) for r in page] + tail_keys
+        self._order = sorted(range(len(self._keys)), key=self._keys.__getitem__)
+        self._sorted = [self._keys[i] for i in self._order]
+        self.version += 1
+        return True
+
+    def query(self, start: Optional[str] = None, end: Optional[str] = None, latest: Optional[int] = None,
+              where: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[Dict[str, Any]]:
+        """
+        依期間區間 [start, end] (含端點；end 亦涵蓋以其為前綴的期間) 篩選，再依 where 過濾，
+        latest 指定時只取最近 N 期。回傳由新到舊排列。start / end 接受 parse_period 可解析的格式。
+        """
+        lo, hi = 0, len(self._order)
+        if start:
+            lo = bisect_left(self._sorted, parse_period(start) or str(start).strip())
+        if end:
+            hi = bisect_right(self._sorted, (parse_period(end) or str(end).strip()) + _PREFIX_END)
+        rows: List[Dict[str, Any]] = []
+        for pos in range(hi - 1, lo - 1, -1):
+            record = self.records[self._order[pos]]
+            if where is not None and not where(record):
+                continue
+            rows.append(record)
+            if latest is not None and len(rows) >= latest:
+                break
+        return rows
+
+    def span(self) -> Dict[str, Optional[str]]:
+        """數列涵蓋的期間 (正規化後)。"""
+        keys = [k for k in self._sorted if k]
+        return {"first": keys[0] if keys else None, "last": keys[-1] if keys else None}
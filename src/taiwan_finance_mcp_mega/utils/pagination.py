@@ -0,0 +1,117 @@
+"""
+Pagination & Field Projection
+於回應序列化前對完整的緩存資料集分頁 (limit / offset / cursor) 並投影欄位，
+只組出被請求的那一頁，全市場資料也能以小量、低 token 成本的分頁取得。
+"""
+import base64
+import json
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from taiwan_finance_mcp_mega.utils.columnar import ColumnarDataset, is_rows, json_default
+
+# dict 型回應中承載列資料的欄位 (例: BFI82U 與 MOL 統計的 records)
+ROW_FIELDS = ("records", "data")
+# 多檔批次查詢回應中以代號為 key 的結果欄位 (各項含 rows)
+BATCH_FIELD = "results"
+
+
+def parse_fields(fields: Union[str, Sequence[str], None]) -> Optional[List[str]]:
+    """解析 fields 參數，支援逗號 (含全形) 分隔字串或字串列表；空值表示不投影。"""
+    if not fields:
+        return None
+    if isinstance(fields, str):
+        fields = fields.replace("，", ",").split(",")
+    names = [f.strip() for f in fields if f and f.strip()]
+    return list(dict.fromkeys(names)) or None
+
+
+def dataset_version(rows: Sequence[Any]) -> str:
+    """資料集指紋 (筆數 + 首尾列)，用於偵測分頁期間緩存是否已刷新。"""
+    if not rows:
+        return "0"
+    edge = json.dumps([len(rows), rows[0], rows[-1]], ensure_ascii=False, sort_keys=True, default=json_default)
+    return format(zlib.crc32(edge.encode("utf-8")), "08x")
+
+
+def encode_cursor(offset: int, version: str) -> str:
+    return base64.urlsafe_b64encode(f"{offset}.{version}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        offset, version = raw.split(".", 1)
+        return int(offset), version
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"無效的分頁 cursor: {cursor}")
+
+
+def project(row: Any, fields: Optional[List[str]]) -> Any:
+    if not fields or not isinstance(row, dict):
+        return row
+    return {k: row[k] for k in fields if k in row}
+
+
+def _page(rows: Sequence[Any], start: int, stop: int, fields: Optional[List[str]]) -> List[Any]:
+    if isinstance(rows, ColumnarDataset):
+        # 欄式資料集只組出該頁與被投影的欄位
+        return rows.slice_rows(start, stop, fields)
+    return [project(r, fields) for r in rows[start:stop]]
+
+
+def paginate(result: Any, limit: int, offset: int = 0, cursor: Optional[str] = None,
+             fields: Union[str, Sequence[str], None] = None) -> Tuple[Any, Optional[Dict[str, Any]]]:
+    """
+    對工具回傳值分頁並投影欄位，回傳 (分頁後結果, 分頁資訊)。
+    列資料可為 list / ColumnarDataset，或 dict 中的 records / data 欄位；
+    批次查詢結果 (results) 的 offset / cursor、limit 與投影逐代號套用 (分頁資訊的 totals 為各代號總筆數)；
+    其他 dict 僅套用欄位投影，分頁資訊為 None。cursor 優先於 offset。
+    """
+    names = parse_fields(fields)
+    rows, holder = result, None
+    if isinstance(result, dict) and isinstance(result.get(BATCH_FIELD), dict):
+        return _paginate_batch(result, limit, offset, cursor, names)
+    if isinstance(result, dict):
+        holder = next((k for k in ROW_FIELDS if is_rows(result.get(k))), None)
+        if holder is None:
+            # 錯誤訊息不做投影，以免被過濾掉
+            return (result if "error" in result else project(result, names)), None
+        rows = result[holder]
+    elif not is_rows(result):
+        return result, None
+
+    version = dataset_version(rows)
+    if cursor:
+        offset, cursor_version = decode_cursor(cursor)
+        if cursor_version != version:
+            raise ValueError("資料集已更新，cursor 已失效，請由第一頁 (offset=0) 重新查詢。")
+    limit = max(int(limit), 0)
+    offset = min(max(int(offset), 0), len(rows))
+    stop = min(offset + limit, len(rows))
+
+    page = _page(rows, offset, stop, names)
+    info = {"offset": offset, "limit": limit, "returned": len(page), "total": len(rows),
+            "next_cursor": encode_cursor(stop, version) if stop < len(rows) else None}
+    if holder is not None:
+        return {**result, holder: page}, info
+    return page, info
+
+
+def _paginate_batch(result: Dict[str, Any], limit: int, offset: int, cursor: Optional[str],
+                    names: Optional[List[str]]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """多檔批次查詢：各代號的結果套用同一個 offset 與 limit；任一代號仍有後續列時提供 next_cursor。"""
+    batch = result[BATCH_FIELD]
+    lists = {t: r.get("rows") or [] for t, r in batch.items()}
+    edges = ",".join(f"{t}:{dataset_version(rows)}" for t, rows in lists.items())
+    version = format(zlib.crc32(edges.encode("utf-8")), "08x")
+    if cursor:
+        offset, cursor_version = decode_cursor(cursor)
+        if cursor_version != version:
+            raise ValueError("資料集已更新，cursor 已失效，請由第一頁 (offset=0) 重新查詢。")
+    limit, offset = max(int(limit), 0), max(int(offset), 0)
+    stop = offset + limit
+    pages = {t: _page(rows, min(offset, len(rows)), min(stop, len(rows)), names) for t, rows in lists.items()}
+    totals = {t: len(rows) for t, rows in lists.items()}
+    info = {"offset": offset, "limit": limit, "returned": sum(map(len, pages.values())), "total": sum(totals.values()),
+            "totals": totals, "next_cursor": encode_cursor(stop, version) if any(stop < n for n in totals.values()) else None}
+    return {**result, BATCH_FIELD: {t: {**r, "rows": pages[t]} for t, r in batch.items()}}, info
@@ -0,0 +1,130 @@
+"""
+Record / Replay Upstream
+RecordingTransport 將真實上游回應 (狀態碼、內容類型與內容) 寫成 fixture 檔；
+ReplayTransport 依請求 (method + 正規化 URL) 由 fixture 回放並可模擬網路延遲，
+供離線 CI、無對外網路的建置主機與效能基準使用。
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import re
+from typing import Any, AsyncIterator, Dict, Optional, Union
+from urllib.parse import urlencode
+import httpx
+
+# 回放時保留的回應標頭 (其餘如 content-encoding / content-length 於錄製時已失效)
+_KEPT_HEADERS = ("content-type", "retry-after")
+
+
+def request_key(method: str, url: Union[str, httpx.URL]) -> str:
+    """請求識別字串：query 參數排序，使 params 順序不同的相同請求對應同一 fixture。"""
+    url = httpx.URL(url)
+    query = urlencode(sorted(url.params.multi_items()))
+    return f"{method.upper()} {url.scheme}://{url.host}{url.path}{'?' + query if query else ''}"
+
+
+class FixtureStore:
+    """
+    fixture 目錄：每個請求一個 JSON 檔 (檔名為主機/路徑 + key 雜湊)。
+    內容為 {"request", "status", "headers", "encoding", "body"}，文字內容以 utf-8 原樣保存以便檢視與比對。
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        url = key.split(" ", 1)[-1].split("?", 1)[0].split("://", 1)[-1]
+        stem = re.sub(r"[^A-Za-z0-9._-]+", "_", url).strip("_")[:80]
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:10]
+        return os.path.join(self.directory, f"{stem}-{digest}.json")
+
+    def save(self, key: str, status: int, headers: Dict[str, str], body: bytes) -> str:
+        try:
+            encoding, text = "utf-8", body.decode("utf-8")
+        except UnicodeDecodeError:
+            encoding, text = "base64", base64.b64encode(body).decode("ascii")
+        record = {"request": key, "status": status, "headers": headers, "encoding": encoding, "body": text}
+        path = self.path(key)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        return path
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path(key), encoding="utf-8") as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            return None
+        body = record["body"]
+        record["body"] = base64.b64decode(body) if record.get("encoding") == "base64" else body.encode("utf-8")
+        return record
+
+    def put(self, url: str, body: Union[str, bytes], content_type: str = "application/json; charset=utf-8",
+            status: int = 200, method: str = "GET") -> str:
+        """直接寫入 fixture (測試與基準用的合成資料)。"""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        return self.save(request_key(method, url), status, {"content-type": content_type}, body)
+
+    def put_json(self, url: str, payload: Any, status: int = 200) -> str:
+        return self.put(url, json.dumps(payload, ensure_ascii=False), status=status)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """轉送至真實上游，並將每個回應 (已解壓縮) 寫入 FixtureStore。"""
+
+    def __init__(self, store: FixtureStore, inner: Optional[httpx.AsyncBaseTransport] = None):
+        self.store = store
+        self.inner = inner or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.inner.handle_async_request(request)
+        upstream = httpx.Response(response.status_code, headers=response.headers, stream=response.stream, request=request)
+        try:
+            body = await upstream.aread()
+        finally:
+            await upstream.aclose()
+        headers = {k: v for k, v in upstream.headers.items() if k.lower() in _KEPT_HEADERS}
+        self.store.save(request_key(request.method, request.url), upstream.status_code, headers, body)
+        return httpx.Response(upstream.status_code, headers=headers, content=body, request=request)
+
+    async def aclose(self) -> None:
+        # 同一 transport 由各主機的 pool 共用，個別 pool 關閉時不關閉底層連線
+        pass
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """
+    由 FixtureStore 回放回應；latency (+ 0~jitter 隨機) 秒後開始回應，內容依 chunk_size 分塊串流。
+    找不到 fixture 時回傳 404 (標頭 x-replay-missing)，不會連線上游。
+    """
+
+    def __init__(self, store: FixtureStore, latency: float = 0.0, jitter: float = 0.0, chunk_size: int = 64 * 1024):
+        self.store = store
+        self.latency = latency
+        self.jitter = jitter
+        self.chunk_size = chunk_size
+        self.requests = 0
+        self.missing = 0
+
+    async def _chunks(self, body: bytes) -> AsyncIterator[bytes]:
+        for i in range(0, len(body), self.chunk_size):
+            yield body[i:i + self.chunk_size]
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        key = request_key(request.method, request.url)
+        record = self.store.load(key)
+        if record is None:
+            self.missing += 1
+            return httpx.Response(404, headers={"x-replay-missing": "1"}, json={"error": f"no replay fixture: {key}"}, request=request)
+        return httpx.Response(record["status"], headers=record.get("headers") or {}, content=self._chunks(record["body"]), request=request)
@@ -0,0 +1,87 @@
+"""
+Serialized Response Cache
+工具回傳值的序列化結果依 (工具, 正規化參數, 數據版本) 記憶，重複查詢同一檔股票時
+不必再對未變動的緩存資料重新 json.dumps；每次呼叫都會變動的 `_meta` (數據年齡等)
+則於輸出時以字串拼接附加，輸出與直接序列化完整回應的結果逐字相同。
+"""
+import json
+from typing import Any, Dict, Hashable, NamedTuple, Optional
+from cachetools import LRUCache
+from taiwan_finance_mcp_mega.utils.columnar import json_default
+
+
+class Encoded(NamedTuple):
+    text: str
+    # "plain": 原樣輸出 | "dict": 於結尾拼接 _meta | "wrap": 包裝為 {"data", "_meta"}
+    # | "merge": 空 dict 或已含 _meta，輸出時以 obj 合併 _meta 後整份序列化
+    kind: str
+    extra: Any = None  # 與序列化結果一同記憶的附帶資訊 (例如分頁資訊)
+    obj: Any = None  # kind 為 "merge" 時保留原始回應，輸出時整份序列化
+
+
+class ResponseEncoder:
+    """
+    工具輸出的 JSON 編碼器 (indent=2 或 compact) 與序列化結果 LRU 緩存。
+    緩存以字元數計算容量；memo key 需包含數據版本，緩存刷新後自然失效。
+    """
+
+    def __init__(self, max_chars: int, compact: bool = False):
+        self.compact = compact
+        self._memo: LRUCache = LRUCache(maxsize=max_chars, getsizeof=lambda e: len(e.text))
+        self.hits = 0
+        self.misses = 0
+
+    def dumps(self, obj: Any) -> str:
+        if self.compact:
+            return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=json_default)
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=json_default)
+
+    def _nest(self, text: str) -> str:
+        # 將 indent=2 的輸出縮排一層，作為外層物件的值
+        return text if self.compact else text.replace("\n", "\n  ")
+
+    def encode(self, res: Any, with_meta: bool, extra: Any = None) -> Encoded:
+        if not with_meta:
+            return Encoded(self.dumps(res), "plain", extra)
+        if isinstance(res, dict) and res and "_meta" not in res:
+            return Encoded(self.dumps(res), "dict", extra)
+        if isinstance(res, dict):
+            # 空 dict 或已含 _meta 的回應不適用拼接，留待輸出時整份序列化
+            return Encoded("", "merge", extra, res)
+        return Encoded(self._nest(self.dumps(res)), "wrap", extra)
+
+    def finish(self, encoded: Encoded, meta: Dict[str, Any]) -> str:
+        """將 `_meta` 附加於已序列化的回應 (結果與 attach 後整份 dumps 相同)。"""
+        if encoded.kind == "plain":
+            return encoded.text
+        if encoded.kind == "merge":
+            return self.dumps({**encoded.obj, "_meta": meta})
+        meta_text = self._nest(self.dumps(meta))
+        if encoded.kind == "dict":
+            if self.compact:
+                return f'{encoded.text[:-1]},"_meta":{meta_text}}}'
+            return f'{encoded.text[:-2]},\n  "_meta": {meta_text}\n}}'
+        if self.compact:
+            return f'{{"data":{encoded.text},"_meta":{meta_text}}}'
+        return f'{{\n  "data": {encoded.text},\n  "_meta": {meta_text}\n}}'
+
+    def get(self, key: Optional[Hashable]) -> Optional[Encoded]:
+        if key is None:
+            return None
+        encoded = self._memo.get((key, self.compact))
+        if encoded is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return encoded
+
+    def put(self, key: Optional[Hashable], encoded: Encoded) -> None:
+        if key is None or encoded.kind == "merge":
+            return
+        try:
+            self._memo[(key, self.compact)] = encoded
+        except ValueError:
+            pass  # 單筆超過緩存容量，不記憶
+
+    def clear(self) -> None:
+        self._memo.clear()
@@ -0,0 +1,243 @@
+"""
+Cross-Dataset Screener
+以證券代號將多個緩存資料集 (行情、本益比、融資融券、月營收、EPS) 對齊為同一組列，
+篩選條件與排序以「整欄運算」執行：每個欄位 (或運算式) 只解析一次為 float64 陣列，
+各條件依序縮小候選列位置 (selection vector)，最後才組出符合的列。
+"""
+import math
+import operator
+import re
+from array import array
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+from taiwan_finance_mcp_mega.utils.columnar import ColumnarDataset
+from taiwan_finance_mcp_mega.utils.dataset_index import normalize_code
+
+_COMPARATORS: Dict[str, Callable[[float, float], bool]] = {
+    "<=": operator.le, ">=": operator.ge, "==": operator.eq, "!=": operator.ne,
+    "<": operator.lt, ">": operator.gt, "=": operator.eq,
+}
+_ARITHMETIC: Dict[str, Callable[[float, float], float]] = {
+    "+": operator.add, "-": operator.sub, "*": operator.mul, "/": lambda a, b: a / b if b else math.nan,
+}
+_PREDICATE = re.compile(r"^(.+?)\s*(<=|>=|==|!=|<|>|=)\s*(.+)$")
+# 運算子前後需有空白，以免與欄名中的 "-" 混淆 (例: 營業收入-當月營收)
+_ARITH_SPLIT = re.compile(r"\s+([-+*/])\s+")
+# 位於數字之間且後接三位數字的逗號為千分位 (例: TradeVolume > 1,000,000)，不作為條件分隔
+_SPLIT_FILTERS = re.compile(r"\s*(?:[;，；]|(?<!\d),|,(?!\d{3}\b)|\band\b|\bAND\b)\s*")
+_NUMBER = re.compile(r"-?\d[\d,]*(?:\.\d+)?%?|-?\.\d+%?")
+
+
+def parse_numbers(values: Sequence[Any]) -> array:
+    """字串欄位 -> float64 陣列 (去除千分位與 %；無法解析者為 NaN)。"""
+    out = array("d", bytes(8 * len(values)))
+    for i, v in enumerate(values):
+        try:
+            out[i] = float(str(v).replace(",", "").rstrip("%"))
+        except ValueError:
+            out[i] = math.nan
+    return out
+
+
+def numeric_column(rows: Any, name: str) -> array:
+    """取得資料集某欄位的 float64 陣列；ColumnarDataset 直接使用載入時已解析的欄位。"""
+    if isinstance(rows, ColumnarDataset):
+        values = rows.numeric(name)
+        return values if values is not None else parse_numbers(rows.column(name))
+    return parse_numbers([row.get(name) if isinstance(row, dict) else None for row in rows])
+
+
+def field_names(rows: Any) -> List[str]:
+    if isinstance(rows, ColumnarDataset):
+        return list(rows.keys)
+    return list(rows[0]) if rows and isinstance(rows[0], dict) else []
+
+
+def _defined(compare: Callable[[float, float], bool]) -> Callable[[float, float], bool]:
+    """任一運算元為 NaN (缺值) 時不符合條件 (nan != x 為 True，需先排除)。"""
+    return lambda a, b: a == a and b == b and compare(a, b)
+
+
+class Source(NamedTuple):
+    """參與篩選的資料集：rows 為緩存 payload；numeric(欄名) 回傳與 rows 對齊的 float64 陣列 (可由呼叫端緩存)。"""
+    rows: Any
+    code_index: Dict[str, List[int]]
+    numeric: Callable[[str], array]
+
+
+# 運算元：欄位 (資料集別名, 欄名) 或常數
+Operand = Union[Tuple[str, str], float]
+
+
+class Expression(NamedTuple):
+    left: Operand
+    op: Optional[str] = None
+    right: Optional[Operand] = None
+
+
+class Predicate(NamedTuple):
+    left: Expression
+    comparator: str
+    right: Expression
+
+
+class ScreenFrame:
+    """
+    以 base 資料集的代號為列，將各資料集依代號對齊 (同代號多列時取第一列)。
+    欄位與運算式的對齊後陣列於首次使用時建立並保留，供同一版本資料的後續篩選重複使用。
+    """
+
+    def __init__(self, sources: Dict[str, Source], base: str, code_key: str):
+        self.sources = sources
+        self.base = base
+        base_rows = sources[base].rows
+        codes = [normalize_code(c) for c in (base_rows.column(code_key) if isinstance(base_rows, ColumnarDataset)
+                                             else [row.get(code_key, "") for row in base_rows])]
+        self.codes = codes
+        # 別名 -> 各列在該資料集中的位置 (-1 表示該代號不在此資料集)
+        self.positions: Dict[str, array] = {
+            alias: array("l", [pos[0] if pos else -1 for pos in map(source.code_index.get, codes)])
+            for alias, source in sources.items()
+        }
+        self.fields: Dict[str, List[str]] = {alias: field_names(source.rows) for alias, source in sources.items()}
+        self._columns: Dict[Any, array] = {}
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    # --- 解析 ---
+
+    def resolve_field(self, name: str) -> Tuple[str, str]:
+        """欄名 -> (資料集別名, 欄名)；可用「別名.欄名」指定，否則依資料集順序取第一個含此欄位者。"""
+        name = name.strip()
+        alias, _, field = name.partition(".")
+        if field and alias in self.fields and field in self.fields[alias]:
+            return alias, field
+        for alias, fields in self.fields.items():
+            if name in fields:
+                return alias, name
+        raise ValueError(f"未知的篩選欄位: {name}")
+
+    def _operand(self, token: str) -> Operand:
+        token = token.strip()
+        if _NUMBER.fullmatch(token):
+            return float(token.replace(",", "").rstrip("%"))
+        return self.resolve_field(token)
+
+    def expression(self, text: str) -> Expression:
+        parts = _ARITH_SPLIT.split(text.strip(), maxsplit=1)
+        if len(parts) == 3:
+            return Expression(self._operand(parts[0]), parts[1], self._operand(parts[2]))
+        return Expression(self._operand(text))
+
+    def parse_filters(self, text: Optional[str]) -> List[Predicate]:
+        """「PEratio < 12, DividendYield > 5%, 融資今日餘額 > 融資前日餘額」-> 條件清單。"""
+        predicates = []
+        for clause in _SPLIT_FILTERS.split(text or ""):
+            if not clause:
+                continue
+            m = _PREDICATE.match(clause)
+            if m is None:
+                raise ValueError(f"無法解析篩選條件: {clause} (格式: 欄位 運算子 數值或欄位，例: PEratio < 12)")
+            predicates.append(Predicate(self.expression(m.group(1)), "==" if m.group(2) == "=" else m.group(2), self.expression(m.group(3))))
+        return predicates
+
+    def parse_sort(self, text: Optional[str]) -> List[Tuple[Expression, bool]]:
+        """「-DividendYield,PEratio」-> [(運算式, 是否遞減)]；前綴 - 為由大到小。"""
+        keys = []
+        for item in (text or "").split(","):
+            item = item.strip()
+            if item:
+                descending = item.startswith("-")
+                keys.append((self.expression(item[1:] if descending else item), descending))
+        return keys
+
+    # --- 整欄運算 ---
+
+    def column(self, field: Tuple[str, str]) -> array:
+        """對齊至 base 列順序的欄位陣列 (缺少該代號的列為 NaN)。"""
+        cached = self._columns.get(field)
+        if cached is None:
+            alias, name = field
+            values = self.sources[alias].numeric(name)
+            positions = self.positions[alias]
+            if alias == self.base:
+                cached = values
+            else:
+                nan = math.nan
+                cached = array("d", [values[p] if p >= 0 else nan for p in positions])
+            self._columns[field] = cached
+        return cached
+
+    def evaluate(self, expr: Expression) -> Union[array, float]:
+        """運算式 -> 整欄陣列 (或常數)；兩欄運算的結果亦保留重複使用。"""
+        if expr.op is None:
+            return expr.left if isinstance(expr.left, float) else self.column(expr.left)
+        cached = self._columns.get(expr)
+        if cached is None:
+            fn = _ARITHMETIC[expr.op]
+            left, right = (self.evaluate(Expression(x)) for x in (expr.left, expr.right))
+            if isinstance(left, float) and isinstance(right, float):
+                return fn(left, right)
+            n = len(self.codes)
+            lv = left if not isinstance(left, float) else array("d", [left]) * n
+            rv = right if not isinstance(right, float) else array("d", [right]) * n
+            cached = self._columns[expr] = array("d", map(fn, lv, rv))
+        return cached
+
+    def screen(self, predicates: Sequence[Predicate], sort: Sequence[Tuple[Expression, bool]] = ()) -> List[int]:
+        """回傳符合全部條件的列位置 (依 sort 排序)。NaN (缺值) 不符合任何條件，排序時置於最後。"""
+        selection = range(len(self.codes))
+        for predicate in predicates:
+            compare = _COMPARATORS[predicate.comparator]
+            if predicate.comparator == "!=":
+                compare = _defined(compare)  # 其餘比較運算與 NaN 比較時本即為 False
+            left, right = self.evaluate(predicate.left), self.evaluate(predicate.right)
+            if isinstance(right, float):
+                selection = [i for i in selection if compare(left[i], right)] if not isinstance(left, float) else \
+                    (selection if compare(left, right) else [])
+            elif isinstance(left, float):
+                selection = [i for i in selection if compare(left, right[i])]
+            else:
+                selection = [i for i in selection if compare(left[i], right[i])]
+            if not selection:
+                return []
+        selection = list(selection)
+        # 穩定排序：由最後一個排序鍵往前依序排序
+        for expr, descending in reversed(list(sort)):
+            values = self.evaluate(expr)
+            if isinstance(values, float):
+                continue
+            present = [i for i in selection if not math.isnan(values[i])]
+            missing = [i for i in selection if math.isnan(values[i])]
+            present.sort(key=values.__getitem__, reverse=descending)
+            selection = present + missing
+        return selection
+
+    def referenced(self, predicates: Sequence[Predicate], sort: Sequence[Tuple[Expression, bool]]) -> List[Tuple[str, str]]:
+        """條件與排序用到的欄位 (依出現順序、不重複)。"""
+        seen: Dict[Tuple[str, str], None] = {}
+        exprs = [e for p in predicates for e in (p.left, p.right)] + [e for e, _ in sort]
+        for expr in exprs:
+            for operand in (expr.left, expr.right):
+                if isinstance(operand, tuple):
+                    seen[operand] = None
+        return list(seen)
+
+    def rows(self, selection: Sequence[int], fields: Sequence[Tuple[str, str]], extra: Sequence[Tuple[str, str]] = ()) -> List[Dict[str, Any]]:
+        """組出結果列：代號、extra (例如名稱) 與 fields 的原始字串值；同名欄位以「別名.欄名」區分。"""
+        names = [name for _, name in fields]
+        labels = [f"{alias}.{name}" if names.count(name) > 1 else name for alias, name in fields]
+        out = []
+        wanted = list(extra) + list(fields)
+        for i in selection:
+            row: Dict[str, Any] = {"Code": self.codes[i]}
+            for label, (alias, name) in zip([n for _, n in extra] + labels, wanted):
+                pos = self.positions[alias][i]
+                if pos < 0:
+                    row[label] = None
+                    continue
+                rows = self.sources[alias].rows
+                record = rows.slice_rows(pos, pos + 1, [name])[0] if isinstance(rows, ColumnarDataset) else rows[pos]
+                row[label] = record.get(name)
+            out.append(row)
+        return out
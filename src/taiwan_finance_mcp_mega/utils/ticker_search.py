@@ -0,0 +1,192 @@
+"""
+Ticker Search Index
+以上市 (t187ap03_L)、上櫃 (t187ap03_O)、興櫃/公發 (t187ap03_P) 公司基本資料建立記憶體搜尋索引，
+將代號、簡稱、全名與英文名稱對應到股票代號，支援完全比對、前綴比對與 n-gram 模糊比對。
+"""
+import bisect
+import re
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+from taiwan_finance_mcp_mega.utils.columnar import is_rows
+
+# 各市場基本資料的欄位名稱 (TWSE 為中文欄位，TPEx 為英文欄位)
+PROFILE_FIELDS = {
+    "code": ("公司代號", "SecuritiesCompanyCode", "Code"),
+    "short": ("公司簡稱", "CompanyAbbreviation", "Name"),
+    "full": ("公司名稱", "CompanyName"),
+    "english": ("英文簡稱", "EnglishAbbreviation", "英文全名", "CompanyEnglishName"),
+}
+
+# 看起來已是證券代號 (例: 2330, 00878, 2888A) 的輸入不需名稱解析
+CODE_PATTERN = re.compile(r"[0-9]{4,6}[A-Z]?")
+
+_SUFFIXES = ("股份有限公司", "有限公司", "CO.,LTD.", "CO., LTD.", "CORPORATION", "CORP.", "INC.")
+_BULK_THRESHOLD = 64
+_FUZZY_MIN_SCORE = 0.5
+
+
+def normalize_name(value: Any) -> str:
+    """全形轉半形、大寫、去空白，並統一「臺/台」與去除公司型態後綴。"""
+    text = unicodedata.normalize("NFKC", str(value or "")).upper().replace("臺", "台")
+    text = re.sub(r"\s+", "", text)
+    for suffix in _SUFFIXES:
+        suffix = suffix.replace(" ", "")
+        if text.endswith(suffix) and len(text) > len(suffix):
+            text = text[: -len(suffix)]
+            break
+    return text
+
+
+def _grams(text: str, n: int) -> Set[str]:
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class _Profile(NamedTuple):
+    code: str
+    market: str
+    short: str
+    full: str
+    english: str
+
+    def terms(self) -> Set[str]:
+        return {t for t in (normalize_name(self.code), normalize_name(self.short), normalize_name(self.full), normalize_name(self.english)) if t}
+
+
+def _first(row: Dict[str, Any], keys: Tuple[str, ...]) -> str:
+    for k in keys:
+        v = row.get(k)
+        if v not in (None, ""):
+            return str(v).strip()
+    return ""
+
+
+class TickerSearchIndex:
+    """
+    代號/名稱 -> 股票代號的搜尋索引。
+    各市場資料獨立追蹤；資料集刷新時只針對新增、變更、下市的公司增量更新。
+    """
+
+    def __init__(self, ngram: int = 2):
+        self.ngram = ngram
+        self._profiles: Dict[str, _Profile] = {}
+        self._exact: Dict[str, Set[str]] = {}
+        self._grams: Dict[str, Set[str]] = {}
+        self._terms: List[str] = []  # 已排序，供前綴比對
+        self._market_codes: Dict[str, Set[str]] = {}
+        self._sources: Dict[str, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    # --- 索引維護 ---
+
+    def _add(self, profile: _Profile, bulk: bool) -> None:
+        self._profiles[profile.code] = profile
+        self._market_codes.setdefault(profile.market, set()).add(profile.code)
+        for term in profile.terms():
+            codes = self._exact.setdefault(term, set())
+            if not codes and not bulk:
+                bisect.insort(self._terms, term)
+            codes.add(profile.code)
+            for g in _grams(term, self.ngram):
+                self._grams.setdefault(g, set()).add(profile.code)
+
+    def _remove(self, code: str, bulk: bool) -> None:
+        profile = self._profiles.pop(code)
+        self._market_codes.get(profile.market, set()).discard(code)
+        for term in profile.terms():
+            codes = self._exact.get(term)
+            if codes is None:
+                continue
+            codes.discard(code)
+            if not codes:
+                del self._exact[term]
+                if not bulk:
+                    i = bisect.bisect_left(self._terms, term)
+                    if i < len(self._terms) and self._terms[i] == term:
+                        del self._terms[i]
+            for g in _grams(term, self.ngram):
+                holders = self._grams.get(g)
+                if holders is not None:
+                    holders.discard(code)
+                    if not holders:
+                        del self._grams[g]
+
+    def update_market(self, market: str, rows: Any) -> int:
+        """
+        以某市場最新的基本資料更新索引；同一份 payload 不重複處理。
+        回傳新增/變更/移除的公司數。
+        """
+        if not is_rows(rows) or self._sources.get(market) is rows:
+            return 0
+        self._sources[market] = rows
+
+        fresh: Dict[str, _Profile] = {}
+        for row in rows:
+            if not isinstance(row, dict):
+                continue
+            code = _first(row, PROFILE_FIELDS["code"]).upper()
+            if code:
+                fresh[code] = _Profile(code, market, _first(row, PROFILE_FIELDS["short"]),
+                                       _first(row, PROFILE_FIELDS["full"]), _first(row, PROFILE_FIELDS["english"]))
+
+        current = self._market_codes.get(market, set())
+        removed = [c for c in current if c not in fresh]
+        changed = [p for c, p in fresh.items() if self._profiles.get(c) != p]
+        bulk = len(removed) + len(changed) > _BULK_THRESHOLD
+
+        for code in removed:
+            self._remove(code, bulk)
+        for profile in changed:
+            if profile.code in self._profiles:
+                self._remove(profile.code, bulk)
+            self._add(profile, bulk)
+        if bulk:
+            self._terms = sorted(self._exact)
+        return len(removed) + len(changed)
+
+    # --- 查詢 ---
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """依「完全 > 前綴 > 模糊」排序回傳候選公司。"""
+        q = normalize_name(query)
+        if not q:
+            return []
+        scored: Dict[str, Tuple[int, float]] = {}
+
+        for code in self._exact.get(q, ()):
+            scored[code] = (0, 1.0)
+
+        i = bisect.bisect_left(self._terms, q)
+        while i < len(self._terms) and self._terms[i].startswith(q) and len(scored) < limit * 4:
+            for code in self._exact[self._terms[i]]:
+                scored.setdefault(code, (1, len(q) / len(self._terms[i])))
+            i += 1
+
+        if len(scored) < limit:
+            q_grams = _grams(q, self.ngram)
+            hits: Counter = Counter()
+            for g in q_grams:
+                hits.update(self._grams.get(g, ()))
+            for code, n in hits.items():
+                score = n / len(q_grams)
+                if score >= _FUZZY_MIN_SCORE:
+                    scored.setdefault(code, (2, score))
+
+        ranked = sorted(scored.items(), key=lambda kv: (kv[1][0], -kv[1][1], len(self._profiles[kv[0]].short), kv[0]))
+        kinds = ("exact", "prefix", "fuzzy")
+        return [
+            {**self._profiles[code]._asdict(), "match": kinds[kind], "score": round(score, 3)}
+            for code, (kind, score) in ranked[:limit]
+        ]
+
+    def resolve(self, query: str) -> Optional[str]:
+        """將代號或公司名稱解析為單一股票代號；無可信候選時回傳 None。"""
+        q = normalize_name(query)
+        if q in self._profiles:
+            return q
+        best = self.search(query, limit=1)
+        return best[0]["code"] if best else None
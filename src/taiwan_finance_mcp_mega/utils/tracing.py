@@ -0,0 +1,325 @@
+"""
+Tracing & Profiling Hooks (預設關閉)
+- TRACE=1：每次工具呼叫建立一份 trace，於 dispatch、緩存查找、single-flight 等待、上游排隊/下載、
+  解析、篩選/索引與序列化等階段記錄 span；超過 TRACE_SLOW_MS 的請求以樹狀耗時寫入 log。
+  未啟用 (或不在工具呼叫內) 時 span() 回傳共用的 no-op context，成本僅一次 ContextVar 讀取。
+- PROFILE_MODE=stacks | cprofile：超過 PROFILE_THRESHOLD_MS 的請求輸出 collapsed stacks
+  (可直接餵給 flamegraph.pl / speedscope) 或 cProfile .prof 檔至 PROFILE_DIR。
+- LOOP_LAG_THRESHOLD_MS>0：event loop 延遲監測，阻塞超過門檻時記錄當下 loop 執行緒的呼叫堆疊。
+"""
+import asyncio
+import cProfile
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+from taiwan_finance_mcp_mega.config import Config
+from taiwan_finance_mcp_mega.utils import metrics
+
+logger = logging.getLogger("mcp-finance")
+
+EVENT_LOOP_LAG = metrics.REGISTRY.add(metrics.Histogram(
+    "mcp_event_loop_lag_seconds", "Event loop scheduling delay measured by the lag monitor.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)))
+EVENT_LOOP_BLOCKED = metrics.REGISTRY.add(metrics.Counter(
+    "mcp_event_loop_blocked_total", "Times the event loop was blocked longer than LOOP_LAG_THRESHOLD_MS."))
+
+
+class Span:
+    __slots__ = ("name", "parent", "start", "end", "attrs")
+
+    def __init__(self, name: str, parent: int, attrs: Dict[str, Any]):
+        self.name = name
+        self.parent = parent
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attrs = attrs
+
+
+class Trace:
+    """單次工具呼叫的 span 集合 (依開始順序；parent 為父 span 的索引，-1 表示根層)。"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.spans: List[Span] = []
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "duration_ms": round(self.duration * 1000, 3),
+            "spans": [{"name": s.name, "parent": s.parent, "offset_ms": round((s.start - self.start) * 1000, 3),
+                       "duration_ms": round(((s.end or s.start) - s.start) * 1000, 3), **s.attrs} for s in self.spans],
+        }
+
+    def render(self) -> str:
+        lines = [f"{self.name} {self.duration * 1000:.1f} ms"]
+        depth: Dict[int, int] = {-1: 0}
+        for i, s in enumerate(self.spans):
+            depth[i] = depth.get(s.parent, 0) + 1
+            attrs = " ".join(f"{k}={v}" for k, v in s.attrs.items())
+            elapsed = f"{((s.end or s.start) - s.start) * 1000:.1f} ms" if s.end else "unfinished"
+            lines.append(f"{'  ' * depth[i]}{s.name} {elapsed} {attrs}".rstrip())
+        return "\n".join(lines)
+
+
+_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+_parent: ContextVar[int] = ContextVar("trace_parent", default=-1)
+
+
+class _SpanContext:
+    __slots__ = ("trace", "span", "token")
+
+    def __init__(self, trace: Trace, name: str, attrs: Dict[str, Any]):
+        self.trace = trace
+        self.span = Span(name, _parent.get(), attrs)
+
+    def __enter__(self) -> Span:
+        self.span.start = time.perf_counter()
+        self.trace.spans.append(self.span)
+        self.token = _parent.set(len(self.trace.spans) - 1)
+        return self.span
+
+    def __exit__(self, *exc) -> None:
+        self.span.end = time.perf_counter()
+        _parent.reset(self.token)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str, **attrs: Any):
+    """記錄一個階段的耗時；不在追蹤中的工具呼叫時為 no-op。"""
+    trace = _trace.get()
+    if trace is None:
+        return _NOOP
+    return _SpanContext(trace, name, attrs)
+
+
+class StackSampler:
+    """
+    背景執行緒每 interval 秒取樣一次 event loop 執行緒的呼叫堆疊 (僅在有請求進行中時)。
+    請求結束後取出其時間窗內的樣本並彙整為 collapsed stacks；併發請求的樣本會互相重疊。
+    """
+
+    def __init__(self, interval: float, maxlen: int = 200_000):
+        self.interval = interval
+        self.samples: Deque[Tuple[float, str]] = deque(maxlen=maxlen)
+        self.active: Dict[int, int] = {}  # thread id -> 進行中的請求數
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def begin(self, thread_id: int) -> None:
+        with self._lock:
+            self.active[thread_id] = self.active.get(thread_id, 0) + 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._thread.start()
+
+    def end(self, thread_id: int) -> None:
+        with self._lock:
+            self.active[thread_id] -= 1
+            if not self.active[thread_id]:
+                del self.active[thread_id]
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                threads = list(self.active)
+            frames = sys._current_frames()
+            now = time.perf_counter()
+            for tid in threads:
+                frame = frames.get(tid)
+                if frame is not None:
+                    stack = collapse(frame)
+                    with self._lock:
+                        self.samples.append((now, stack))
+
+    def window(self, start: float, end: float) -> Counter:
+        with self._lock:
+            return Counter(stack for t, stack in self.samples if start <= t <= end)
+
+
+def collapse(frame) -> str:
+    """將呼叫堆疊轉為 collapsed 格式 (root;...;leaf)，每層為 檔名:函式。"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def _dump_path(tool: str, suffix: str) -> str:
+    os.makedirs(Config.PROFILE_DIR, exist_ok=True)
+    safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", tool)
+    return os.path.join(Config.PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{safe}-{os.getpid()}{suffix}")
+
+
+class Profiler:
+    """依 PROFILE_MODE 對慢請求輸出 profile；cProfile 同時只能有一個在執行，併發時其餘請求略過。"""
+
+    def __init__(self, mode: str, threshold: float, interval: float):
+        self.mode = mode
+        self.threshold = threshold
+        self.sampler = StackSampler(interval) if mode == "stacks" else None
+        self._busy = False
+
+    @contextmanager
+    def request(self, tool: str) -> Iterator[None]:
+        start = time.perf_counter()
+        if self.mode == "cprofile" and not self._busy:
+            self._busy = True
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                self._busy = False
+                if time.perf_counter() - start >= self.threshold:
+                    path = _dump_path(tool, ".prof")
+                    profile.dump_stats(path)
+                    logger.warning(f"Slow tool call {tool}: cProfile written to {path}")
+            return
+        if self.sampler is None:
+            yield
+            return
+        tid = threading.get_ident()
+        self.sampler.begin(tid)
+        try:
+            yield
+        finally:
+            self.sampler.end(tid)
+            end = time.perf_counter()
+            if end - start >= self.threshold:
+                stacks = self.sampler.window(start, end)
+                if stacks:
+                    path = _dump_path(tool, ".folded")
+                    with open(path, "w", encoding="utf-8") as f:
+                        f.writelines(f"{stack} {n}\n" for stack, n in stacks.most_common())
+                    logger.warning(f"Slow tool call {tool}: {sum(stacks.values())} stack samples written to {path}")
+
+
+class LoopLagMonitor:
+    """
+    event loop 延遲監測：heartbeat task 每 interval 秒量測排程延遲 (記入 mcp_event_loop_lag_seconds)；
+    watchdog 執行緒發現 heartbeat 停滯超過 threshold 時，記錄 loop 執行緒當下的堆疊 (即阻塞中的呼叫)。
+    """
+
+    def __init__(self, threshold: float, interval: float = 0.1):
+        self.threshold = threshold
+        self.interval = interval
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.beat = time.monotonic()
+        self.blocked: List[str] = []  # 最近記錄到的阻塞堆疊
+        self._thread_id = 0
+        self._reported = False
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """於目前的 event loop 啟動 (同一 loop 重複呼叫無作用)。"""
+        loop = asyncio.get_running_loop()
+        if self.loop is loop:
+            return
+        self.loop = loop
+        self._thread_id = threading.get_ident()
+        self.beat = time.monotonic()
+        self._task = loop.create_task(self._heartbeat())
+        threading.Thread(target=self._watch, args=(loop,), name="loop-lag-watchdog", daemon=True).start()
+
+    def stop(self) -> None:
+        self.loop = None
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            before = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            EVENT_LOOP_LAG.observe(max(now - before - self.interval, 0.0))
+            self.beat = now
+            self._reported = False
+
+    def _watch(self, loop: asyncio.AbstractEventLoop) -> None:
+        while True:
+            time.sleep(self.threshold / 2)
+            if self.loop is not loop or loop.is_closed():
+                return
+            stalled = time.monotonic() - self.beat - self.interval
+            if stalled > self.threshold and not self._reported:
+                self._reported = True
+                frame = sys._current_frames().get(self._thread_id)
+                stack = collapse(frame) if frame is not None else "<unknown>"
+                self.blocked = (self.blocked + [stack])[-20:]
+                EVENT_LOOP_BLOCKED.inc()
+                logger.warning(f"Event loop blocked for >{stalled * 1000:.0f} ms, loop thread stack: {stack}")
+
+
+class Tracer:
+    """工具呼叫層級的 tracing / profiling / loop 監測入口 (設定見 Config.TRACE*、PROFILE_*、LOOP_LAG_*)。"""
+
+    def __init__(self, enabled: bool, slow: float, profile_mode: str = "", profile_threshold: float = 1.0,
+                 sample_interval: float = 0.005, loop_lag_threshold: float = 0.0):
+        self.enabled = enabled
+        self.slow = slow
+        self.recent: Deque[Trace] = deque(maxlen=50)  # 最近的慢請求 trace
+        self.profiler = Profiler(profile_mode, profile_threshold, sample_interval) if profile_mode else None
+        self.loop_monitor = LoopLagMonitor(loop_lag_threshold) if loop_lag_threshold > 0 else None
+
+    @contextmanager
+    def request(self, tool: str) -> Iterator[Optional[Trace]]:
+        if self.loop_monitor is not None:
+            self.loop_monitor.start()
+        if not self.enabled and self.profiler is None:
+            yield None
+            return
+        trace = Trace(tool) if self.enabled else None
+        token = _trace.set(trace)
+        try:
+            if self.profiler is not None:
+                with self.profiler.request(tool):
+                    yield trace
+            else:
+                yield trace
+        finally:
+            _trace.reset(token)
+            if trace is not None:
+                trace.end = time.perf_counter()
+                if trace.duration >= self.slow:
+                    self.recent.append(trace)
+                    logger.info(f"Trace:\n{trace.render()}")
+
+
+tracer = Tracer(
+    enabled=Config.TRACE,
+    slow=Config.TRACE_SLOW_MS / 1000,
+    profile_mode=Config.PROFILE_MODE,
+    profile_threshold=Config.PROFILE_THRESHOLD_MS / 1000,
+    sample_interval=Config.PROFILE_SAMPLE_INTERVAL_MS / 1000,
+    loop_lag_threshold=Config.LOOP_LAG_THRESHOLD_MS / 1000,
+)
@@ -0,0 +1,353 @@
+"""
+Upstream Connection Pools
+每個上游主機各自擁有連線池 (連線數、keep-alive、HTTP/2、timeout)、token bucket 限流器與熔斷器，
+單一來源變慢或觸發限流時不會佔滿其他來源的連線；並統計各主機請求在本地排隊等待的時間。
+"""
+import asyncio
+import importlib.util
+import logging
+import random
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+from urllib.parse import urlsplit
+import httpx
+from taiwan_finance_mcp_mega.utils import metrics
+from taiwan_finance_mcp_mega.utils.tracing import span
+
+logger = logging.getLogger("mcp-finance")
+
+# HTTP/2 需要 h2 套件 (pip install "httpx[http2]")；未安裝時退回 HTTP/1.1
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class HostLimits(NamedTuple):
+    max_connections: int = 10
+    max_keepalive: int = 5
+    keepalive_expiry: float = 30.0
+    timeout: float = 45.0
+    connect_timeout: float = 10.0
+    rate: float = 0.0  # 每秒請求數，0 表示不限流
+    burst: int = 1
+    http2: bool = True  # 僅在 h2 可用時生效，實際協定由 ALPN 協商
+    retries: int = 2  # 可重試錯誤 (連線失敗、429、5xx) 的額外嘗試次數
+    backoff: float = 0.5  # 指數退避基準秒數 (full jitter)
+    backoff_max: float = 8.0
+    breaker_threshold: int = 5  # 連續失敗幾次後熔斷
+    breaker_cooldown: float = 30.0  # 熔斷後多久放行一次試探請求
+
+
+# 視為上游故障 (計入熔斷) 的 HTTP 狀態碼；其中除 500/501 外皆可重試
+FAILURE_STATUS = {429, 500, 502, 503, 504}
+RETRY_STATUS = {429, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """熔斷器開啟中，請求不送往上游。"""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"上游 {host} 暫時無法使用 (circuit open)，約 {retry_in:.0f} 秒後重試")
+        self.host = host
+        self.retry_in = retry_in
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """連線層錯誤與 429/5xx 代表上游故障；其他錯誤 (404、格式錯誤) 表示上游仍有回應。"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in FAILURE_STATUS
+    return isinstance(error, httpx.TransportError)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """冪等 GET 可安全重試的錯誤；讀取逾時不重試，以免單次請求等待數倍 timeout。"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRY_STATUS
+    if isinstance(error, (httpx.ReadTimeout, httpx.WriteTimeout, httpx.PoolTimeout)):
+        return False
+    return isinstance(error, httpx.TransportError)
+
+
+def backoff_delay(attempt: int, base: float, cap: float, error: Optional[BaseException] = None) -> float:
+    """第 attempt 次重試前的等待秒數：full jitter 指數退避，429/503 帶 Retry-After (秒) 時優先採用。"""
+    if isinstance(error, httpx.HTTPStatusError):
+        retry_after = error.response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), cap)
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """
+    closed → (連續失敗達門檻) → open → (冷卻結束) → half_open：
+    half_open 只放行一個試探請求，成功則關閉，失敗則重新開啟。
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, host: str, threshold: int, cooldown: float):
+        self.host = host
+        self.threshold = max(int(threshold), 1)
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def before_request(self) -> None:
+        """請求前呼叫；熔斷中 (或試探請求在途) 時拋出 CircuitOpenError。"""
+        if self.state == self.OPEN:
+            remaining = self.opened_at + self.cooldown - time.monotonic()
+            if remaining > 0:
+                raise CircuitOpenError(self.host, remaining)
+            self.state = self.HALF_OPEN
+            logger.info(f"Circuit half-open: {self.host}")
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                raise CircuitOpenError(self.host, 0)
+            self._probing = True
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit closed: {self.host}")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit open: {self.host} ({self.failures} consecutive failures)")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def abandon(self) -> None:
+        """試探請求被取消 (未得到結果) 時釋放試探名額。"""
+        self._probing = False
+
+
+class TokenBucket:
+    """asyncio token bucket：以 rate/s 補充、容量 burst；等待者依先來後到取得 token。"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(int(burst), 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """取得一個 token，回傳等待秒數。"""
+        if self.rate <= 0:
+            return 0.0
+        start = time.monotonic()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    break
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+        return time.monotonic() - start
+
+
+class HostStats:
+    """單一主機的請求與排隊統計 (排隊 = 等待限流 token + 等待連線名額)。"""
+    __slots__ = ("requests", "retries", "waiting", "in_flight", "wait_total", "wait_max", "wait_last")
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.waiting = 0
+        self.in_flight = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_last = 0.0
+
+    def record(self, wait: float) -> None:
+        self.requests += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.wait_last = wait
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "queue_wait_avg_ms": round(self.wait_total / self.requests * 1000, 1) if self.requests else 0.0,
+            "queue_wait_max_ms": round(self.wait_max * 1000, 1),
+            "queue_wait_last_ms": round(self.wait_last * 1000, 1),
+        }
+
+
+class UpstreamPool:
+    """單一上游主機的 httpx 客戶端、限流器與連線名額。"""
+
+    def __init__(self, host: str, limits: HostLimits, headers: Optional[Dict[str, str]] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.host = host
+        self.limits = limits
+        self.loop = asyncio.get_running_loop()
+        self.http2 = limits.http2 and HTTP2_AVAILABLE
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(limits.timeout, connect=limits.connect_timeout),
+            limits=httpx.Limits(max_connections=limits.max_connections,
+                                max_keepalive_connections=limits.max_keepalive,
+                                keepalive_expiry=limits.keepalive_expiry),
+            http2=self.http2,
+            follow_redirects=True,
+            headers=headers,
+            transport=transport,
+        )
+        self.bucket = TokenBucket(limits.rate, limits.burst)
+        # 與 httpx 連線池同大小的名額，使等待連線的時間可被量測
+        self._slots = asyncio.Semaphore(limits.max_connections)
+        self.stats = HostStats()
+        self.breaker = CircuitBreaker(host, limits.breaker_threshold, limits.breaker_cooldown)
+
+    async def call(self, request: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        經熔斷器執行一次邏輯請求 (request 內自行取得 slot)：
+        可重試錯誤以 jitter 退避重試，重試用盡或不可重試的上游故障計入熔斷。
+        """
+        self.breaker.before_request()
+        attempt = 0
+        try:
+            while True:
+                try:
+                    result = await request()
+                except Exception as e:
+                    if not is_upstream_failure(e):
+                        self.breaker.record_success()  # 上游有回應，僅此請求失敗
+                        raise
+                    if attempt >= self.limits.retries or not is_retryable(e) or self.breaker.state != CircuitBreaker.CLOSED:
+                        self.breaker.record_failure()
+                        raise
+                    attempt += 1
+                    self.stats.retries += 1
+                    metrics.UPSTREAM_RETRIES.inc(self.host)
+                    delay = backoff_delay(attempt, self.limits.backoff, self.limits.backoff_max, e)
+                    logger.warning(f"Upstream {self.host}: retry {attempt}/{self.limits.retries} in {delay:.2f}s - {e}")
+                    await asyncio.sleep(delay)
+                    continue
+                self.breaker.record_success()
+                return result
+        except asyncio.CancelledError:
+            self.breaker.abandon()
+            raise
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[httpx.AsyncClient]:
+        """依序等待限流 token 與連線名額，持有期間可使用 client 發出 (串流) 請求。"""
+        start = time.monotonic()
+        self.stats.waiting += 1
+        try:
+            with span("upstream.queue", host=self.host):
+                await self.bucket.acquire()
+                await self._slots.acquire()
+        finally:
+            self.stats.waiting -= 1
+        acquired = time.monotonic()
+        wait = acquired - start
+        self.stats.record(wait)
+        metrics.UPSTREAM_QUEUE_WAIT.observe(wait, self.host)
+        if wait >= 1.0:
+            logger.info(f"Upstream {self.host}: queued {wait:.2f}s before request")
+        self.stats.in_flight += 1
+        metrics.UPSTREAM_IN_FLIGHT.inc(self.host)
+        try:
+            yield self.client
+        except httpx.TransportError:
+            metrics.UPSTREAM_REQUESTS.inc(self.host, "error")  # 未取得回應 (連線失敗、逾時等)
+            raise
+        finally:
+            self.stats.in_flight -= 1
+            metrics.UPSTREAM_IN_FLIGHT.dec(self.host)
+            metrics.UPSTREAM_LATENCY.observe(time.monotonic() - acquired, self.host)
+            self._slots.release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.stats.snapshot(), "max_connections": self.limits.max_connections,
+                "rate": self.limits.rate, "burst": self.limits.burst, "http2": self.http2,
+                "circuit": self.breaker.state, "consecutive_failures": self.breaker.failures}
+
+
+class UpstreamRegistry:
+    """
+    依主機建立 UpstreamPool。設定為 (主機正則, 覆寫欄位) 列表，由上而下第一個符合者生效，
+    未符合者使用預設值；pool 綁定建立時的 event loop，換 loop 時重建。
+    被取代或清除的 pool 於其 loop 上關閉連線，無法關閉者 (loop 已結束) 保留至 aclose() 時關閉。
+    """
+
+    def __init__(self, rules: List[Tuple[str, Dict[str, Any]]], defaults: Dict[str, Any],
+                 headers: Optional[Dict[str, str]] = None):
+        self.defaults = HostLimits(**defaults)
+        self.rules = [(re.compile(pattern), self.defaults._replace(**overrides)) for pattern, overrides in rules]
+        self.headers = headers
+        self.transport: Optional[httpx.AsyncBaseTransport] = None
+        self._pools: Dict[str, UpstreamPool] = {}
+        self._retired: List[UpstreamPool] = []
+        self._closing: Set[asyncio.Task] = set()
+
+    def limits_for(self, host: str) -> HostLimits:
+        for pattern, limits in self.rules:
+            if pattern.search(host):
+                return limits
+        return self.defaults
+
+    def pool_for(self, url: str) -> UpstreamPool:
+        host = urlsplit(url).hostname or ""
+        pool = self._pools.get(host)
+        if pool is None or pool.loop is not asyncio.get_running_loop() or pool.client.is_closed:
+            if pool is not None:
+                self._retire(pool)
+            pool = UpstreamPool(host, self.limits_for(host), self.headers, self.transport)
+            self._pools[host] = pool
+        return pool
+
+    def reset(self) -> None:
+        """丟棄所有 pool (連同統計)，下次請求時依目前設定重建。"""
+        pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            self._retire(pool)
+
+    def _retire(self, pool: UpstreamPool) -> None:
+        """
+        關閉被取代的 pool 的連線 (於其建立時的 event loop 上)：屬於目前 loop 者排程 aclose()，
+        未在執行中的 loop 直接執行至關閉完成；loop 已結束或於其他 loop 執行中時留待 aclose()。
+        """
+        if pool.client.is_closed:
+            return
+        loop = pool.loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if loop is running:
+            task = loop.create_task(pool.client.aclose())
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+        elif running is None and not loop.is_closed() and not loop.is_running():
+            loop.run_until_complete(pool.client.aclose())
+        else:
+            self._retired.append(pool)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {host: pool.snapshot() for host, pool in sorted(self._pools.items())}
+
+    async def aclose(self) -> None:
+        pools, self._pools = list(self._pools.values()), {}
+        retired, self._retired = self._retired, []
+        for pool in pools:
+            await pool.client.aclose()
+        for pool in retired:
+            try:
+                await pool.client.aclose()
+            except Exception as e:
+                # 連線綁定於已結束的 event loop，無法正常關閉時交由垃圾回收釋放
+                logger.debug(f"Upstream {pool.host}: closing a retired pool failed - {e}")
@@ -0,0 +1,105 @@
+"""
+Taiwan Finance MCP Mega - Multi-Worker HTTP Supervisor
+主行程綁定監聽 socket 後啟動 N 個 worker 行程共同 accept (由核心分配連線)，
+讓 CPU 密集的篩選與序列化分散至多核心；worker 異常結束時自動重啟。
+各 worker 透過共用的磁碟緩存 (SQLite + 抓取租約) 共享上游 payload，同一份數據只抓一次。
+"""
+import logging
+import multiprocessing
+import signal
+import socket
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+logger = logging.getLogger("mcp-finance")
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """建立供所有 worker 共用的監聽 socket (port=0 時由系統分配)。"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class WorkerSupervisor:
+    """
+    以 spawn 啟動 worker 行程：target(index, sock, *args)。
+    worker 結束時重新啟動；短時間內 (min_uptime 秒) 反覆結束者退避重啟，避免設定錯誤時無限快速重啟。
+    SIGINT / SIGTERM 時通知所有 worker 結束並等待 grace 秒，逾時強制終止。
+    """
+
+    def __init__(self, count: int, target: Callable[..., Any], sock: socket.socket, args: Tuple = (),
+                 min_uptime: float = 5.0, max_backoff: float = 30.0, grace: float = 10.0):
+        self.count = count
+        self.target = target
+        self.sock = sock
+        self.args = args
+        self.min_uptime = min_uptime
+        self.max_backoff = max_backoff
+        self.grace = grace
+        self._ctx = multiprocessing.get_context("spawn")
+        self.processes: List[Optional[multiprocessing.process.BaseProcess]] = [None] * count
+        self._started = [0.0] * count
+        self._backoff = [0.0] * count
+        self._retry_at = [0.0] * count
+        self.restarts = 0
+        self._stopping = False
+
+    def _spawn(self, index: int) -> None:
+        process = self._ctx.Process(target=self.target, args=(index, self.sock, *self.args), name=f"mcp-worker-{index}")
+        process.start()
+        self.processes[index] = process
+        self._started[index] = time.monotonic()
+        logger.info(f"Worker {index} started (pid {process.pid})")
+
+    def _reap(self, index: int, now: float) -> None:
+        process = self.processes[index]
+        if process is None:
+            if now >= self._retry_at[index]:
+                self._spawn(index)
+            return
+        if process.is_alive():
+            return
+        self.processes[index] = None
+        self.restarts += 1
+        uptime = now - self._started[index]
+        # 啟動後很快就結束：指數退避；正常運作一段時間後才結束：立即重啟
+        self._backoff[index] = min(self.max_backoff, max(1.0, self._backoff[index] * 2)) if uptime < self.min_uptime else 0.0
+        self._retry_at[index] = now + self._backoff[index]
+        logger.warning(f"Worker {index} (pid {process.pid}) exited with code {process.exitcode}; restarting in {self._backoff[index]:.0f}s")
+
+    def stop(self, *_: Any) -> None:
+        self._stopping = True
+
+    def run(self, poll: float = 0.5) -> None:
+        previous = {sig: signal.signal(sig, self.stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+        try:
+            for index in range(self.count):
+                self._spawn(index)
+            while not self._stopping:
+                time.sleep(poll)
+                now = time.monotonic()
+                for index in range(self.count):
+                    if not self._stopping:
+                        self._reap(index, now)
+        finally:
+            self.shutdown()
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+
+    def shutdown(self) -> None:
+        alive = [p for p in self.processes if p is not None and p.is_alive()]
+        for process in alive:
+            process.terminate()  # SIGTERM：uvicorn 停止接受新連線並完成進行中的請求
+        deadline = time.monotonic() + self.grace
+        for process in alive:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning(f"Worker pid {process.pid} did not exit in {self.grace:.0f}s; killing")
+                process.kill()
+                process.join()
+        self.processes = [None] * self.count
@@ -0,0 +1,33 @@
+import pytest
+import httpx
+from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+
+
+@pytest.fixture
+def mock_upstream():
+    """
+    以 httpx.MockTransport 取代真實上游，並在測試前後清空共用緩存。
+    用法：mock_upstream(handler)，handler 可為同步或 async 函式。
+    """
+    AsyncHttpClient._cache.clear()
+    AsyncHttpClient._inflight.clear()
+    AsyncHttpClient._failures.clear()
+    AsyncHttpClient._upstreams.reset()
+    original = AsyncHttpClient._client
+    original_transport = AsyncHttpClient._upstreams.transport
+    original_disk, original_offline = AsyncHttpClient._disk, AsyncHttpClient.offline
+    original_history = AsyncHttpClient._history
+
+    def install(handler):
+        AsyncHttpClient._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return AsyncHttpClient._client
+
+    yield install
+    AsyncHttpClient._client = original
+    AsyncHttpClient._upstreams.transport = original_transport
+    AsyncHttpClient._upstreams.reset()
+    AsyncHttpClient._disk, AsyncHttpClient.offline = original_disk, original_offline
+    AsyncHttpClient._history = original_history
+    AsyncHttpClient._cache.clear()
+    AsyncHttpClient._inflight.clear()
+    AsyncHttpClient._failures.clear()
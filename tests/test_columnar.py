@@ -0,0 +1,47 @@
+import json
+import math
+import pytest
+import httpx
+from taiwan_finance_mcp_mega.logic.stock import StockLogic
+from taiwan_finance_mcp_mega.utils.columnar import ColumnarDataset, json_default
+from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+
+ROWS = [
+    {"Code": "2330", "Name": "台積電", "TradeVolume": "31,234,567", "ClosingPrice": "1000.00", "Change": "-5.0000"},
+    {"Code": "0050", "Name": "元大台灣50", "TradeVolume": "8,123", "ClosingPrice": "190.35", "Change": "0.0000"},
+    {"Code": "2317", "Name": "鴻海", "TradeVolume": "512", "ClosingPrice": "--", "Change": "1.5000"},
+] * 10
+
+
+class TestColumnarDataset:
+    def test_lossless_roundtrip(self):
+        ds = ColumnarDataset.from_rows(ROWS)
+        assert len(ds) == len(ROWS)
+        assert ds.to_rows() == ROWS
+        assert ds[1] == ROWS[1] and ds[-1] == ROWS[-1]
+        assert ds[:2] == ROWS[:2]
+        assert json.loads(json.dumps({"data": ds}, default=json_default, ensure_ascii=False))["data"] == ROWS
+
+    def test_numeric_columns_parsed_once(self):
+        rows = ROWS[:2] * 10 + ROWS[2:3]  # 稀疏的 "--" 以 NaN 表示，原字串保留於例外表
+        ds = ColumnarDataset.from_rows(rows)
+        assert list(ds.numeric("TradeVolume")[:2]) == [31234567.0, 8123.0]
+        closing = ds.numeric("ClosingPrice")
+        assert closing[0] == 1000.0 and math.isnan(closing[-1])
+        assert ds[-1]["ClosingPrice"] == "--"
+        assert ds.numeric("Name") is None
+
+    def test_heterogeneous_rows_are_not_converted(self):
+        assert ColumnarDataset.from_rows([{"a": "1"}, {"b": "2"}]) is None
+        assert ColumnarDataset.from_rows([{"a": 1}]) is None
+
+
+@pytest.mark.asyncio
+async def test_large_market_dataset_cached_as_columnar(mock_upstream, monkeypatch):
+    monkeypatch.setattr("taiwan_finance_mcp_mega.config.Config.COLUMNAR_MIN_ROWS", 10)
+    mock_upstream(lambda request: httpx.Response(200, json=ROWS))
+
+    res = await StockLogic.get_realtime_quotes("2317")
+    entry = next(iter(AsyncHttpClient._cache.values()))
+    assert isinstance(entry.data, ColumnarDataset)
+    assert res == [ROWS[2]] * 10
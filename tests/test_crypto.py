@@ -0,0 +1,73 @@
+import asyncio
+import json
+import httpx
+import pytest
+from fastmcp import Client
+from taiwan_finance_mcp_mega import server
+from taiwan_finance_mcp_mega.logic.global_macro import CryptoLogic
+from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+
+PRICES = {
+    "bitcoin": {"twd": 2000000, "twd_24h_change": 1.234, "usd": 62000, "usd_24h_change": 1.5},
+    "ethereum": {"twd": 80000, "twd_24h_change": -0.5, "usd": 2500, "usd_24h_change": -0.25},
+    "solana": {"twd": 4500, "twd_24h_change": 3.0, "usd": 140, "usd_24h_change": 2.75},
+    "dogecoin": {"twd": 4.2, "twd_24h_change": 0.1, "usd": 0.13, "usd_24h_change": 0.2},
+}
+
+
+@pytest.fixture
+def coingecko(mock_upstream):
+    requests = []
+
+    def handler(request):
+        ids = request.url.params["ids"].split(",")
+        requests.append(ids)
+        return httpx.Response(200, json={i: PRICES[i] for i in ids if i in PRICES})
+
+    CryptoLogic._quotes.clear()
+    mock_upstream(handler)
+    yield requests
+    CryptoLogic._quotes.clear()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_upstream_call(coingecko):
+    btc, eth, many = await asyncio.gather(
+        CryptoLogic.get_price("BTC"), CryptoLogic.get_price("ETH"), CryptoLogic.get_prices("SOL,doge,BTC"))
+    assert coingecko == [["bitcoin", "dogecoin", "ethereum", "solana"]]
+    assert btc == {"coin": "Bitcoin", "price_twd": "2,000,000 TWD", "price_usd": "62,000 USD", "change_24h": "1.50%",
+                   "source": "CoinGecko (Public API)"}
+    assert eth["price_usd"] == "2,500 USD"
+    assert [q["id"] for q in many["quotes"]] == ["solana", "dogecoin", "bitcoin"]
+    # 各幣種結果已個別緩存：之後任一組合的查詢不再連線上游
+    assert (await CryptoLogic.get_prices(["ETH", "SOL"]))["quotes"][1]["price"] == {"twd": 4500, "usd": 140}
+    assert len(coingecko) == 1
+
+
+@pytest.mark.asyncio
+async def test_multi_coin_tool_reports_missing_coins(coingecko):
+    async with Client(server.mcp) as client:
+        result = await client.call_tool("get_crypto_prices", {"coins": ["BTC", "nosuchcoin"], "vs_currencies": "USD"})
+    body = json.loads(result.data)
+    assert body["quotes"][0] == {"coin": "BTC", "id": "bitcoin", "price": {"usd": 62000}, "change_24h": {"usd": 1.5}}
+    assert body["quotes"][1]["error"] == "找不到貨幣 nosuchcoin"
+    assert body["_meta"]["cache"] == "fresh"
+    assert coingecko == [["bitcoin", "nosuchcoin"]]
+    assert "請指定幣種" in (await CryptoLogic.get_prices(""))["error"]
+
+
+@pytest.mark.asyncio
+async def test_coin_ids_are_encoded_and_batches_skip_dataset_cache(mock_upstream):
+    params = []
+
+    def handler(request):
+        params.append(dict(request.url.params))
+        return httpx.Response(200, json={"bitcoin": PRICES["bitcoin"]})
+
+    CryptoLogic._quotes.clear()
+    mock_upstream(handler)
+    res = await CryptoLogic.get_prices("BTC,btc&x=1#", "usd")
+    CryptoLogic._quotes.clear()
+    assert params == [{"ids": "bitcoin,btc&x=1#", "vs_currencies": "usd", "include_24hr_change": "true"}]
+    assert res["quotes"][1]["error"] == "找不到貨幣 btc&x=1#"
+    assert len(AsyncHttpClient._cache) == 0
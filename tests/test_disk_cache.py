@@ -0,0 +1,131 @@
+import asyncio
+import multiprocessing
+import time
+import pytest
+import httpx
+from taiwan_finance_mcp_mega.utils.disk_cache import DiskCache
+from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+from taiwan_finance_mcp_mega.utils.replay import FixtureStore
+
+URL = "https://openapi.twse.com.tw/v1/exchangeReport/STOCK_DAY_ALL"
+
+
+def _writer(directory: str, worker: int) -> None:
+    cache = DiskCache(directory)
+    for i in range(20):
+        cache.put(f"k{i}", URL, [{"worker": worker, "i": i}], time.time(), 300, 3600)
+        assert cache.get(f"k{i}") is not None
+
+
+
+def _fetch_worker(cache_dir: str, fixtures: str, results) -> None:
+    # 模擬 --workers 的獨立行程：各自的記憶體緩存，共用磁碟緩存
+    AsyncHttpClient._cache.clear()
+    AsyncHttpClient._inflight.clear()
+    AsyncHttpClient.configure_disk_cache(cache_dir, offline=False)
+    transport = AsyncHttpClient.configure_replay(replay_dir=fixtures, latency=0.5)
+
+    async def run():
+        data = await AsyncHttpClient.fetch_json(URL)
+        await AsyncHttpClient.close()
+        return data
+
+    data = asyncio.run(run())
+    results.put((len(data), transport.requests))
+
+
+class TestDiskCache:
+    def test_roundtrip_and_newer_wins(self, tmp_path):
+        cache = DiskCache(str(tmp_path))
+        now = time.time()
+        cache.put("k", URL, [{"Code": "2330"}], now, 300, 3600)
+        cache.put("k", URL, [{"Code": "old"}], now - 100, 300, 3600)
+        entry = cache.get("k")
+        assert entry.data == [{"Code": "2330"}]
+        assert entry.age < 5
+
+    def test_concurrent_processes(self, tmp_path):
+        ctx = multiprocessing.get_context("fork")
+        procs = [ctx.Process(target=_writer, args=(str(tmp_path), w)) for w in range(4)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join(30)
+        assert all(p.exitcode == 0 for p in procs)
+        assert len(DiskCache(str(tmp_path)).recent(limit=100)) == 20
+
+    def test_fetch_lease(self, tmp_path):
+        cache = DiskCache(str(tmp_path))
+        assert cache.acquire_lease("k", "a", 60)
+        assert not cache.acquire_lease("k", "b", 60)
+        assert cache.acquire_lease("k", "a", 60)  # 續約
+        cache.release_lease("k", "b")  # 非持有者釋放無效
+        assert not cache.acquire_lease("k", "b", 60)
+        cache.release_lease("k", "a")
+        assert cache.acquire_lease("k", "b", 0)
+        assert cache.acquire_lease("k", "c", 60)  # 過期租約可被接手
+
+    def test_processes_share_one_upstream_fetch(self, tmp_path):
+        fixtures = str(tmp_path / "fixtures")
+        FixtureStore(fixtures).put_json(URL, [{"Code": "2330"}, {"Code": "2317"}])
+        ctx = multiprocessing.get_context("fork")
+        results = ctx.Queue()
+        procs = [ctx.Process(target=_fetch_worker, args=(str(tmp_path / "cache"), fixtures, results)) for _ in range(4)]
+        for p in procs:
+            p.start()
+        outcomes = [results.get(timeout=30) for _ in procs]
+        for p in procs:
+            p.join(30)
+        assert all(p.exitcode == 0 for p in procs)
+        assert [rows for rows, _ in outcomes] == [2] * 4
+        assert sum(requests for _, requests in outcomes) == 1
+
+
+@pytest.mark.asyncio
+class TestDiskTier:
+    """
+    驗證磁碟緩存可跨「重啟」沿用、啟動預熱，以及上游停擺時的離線服務。
+    """
+
+    @pytest.fixture
+    def upstream(self, mock_upstream, tmp_path):
+        state = {"calls": 0, "down": False}
+
+        def handler(request: httpx.Request):
+            state["calls"] += 1
+            if state["down"]:
+                raise httpx.ConnectError("upstream down")
+            return httpx.Response(200, json=[{"Code": "2330", "v": state["calls"]}])
+        mock_upstream(handler)
+        AsyncHttpClient.configure_disk_cache(str(tmp_path), offline=False)
+        return state
+
+    async def test_survives_restart_without_upstream_call(self, upstream):
+        await AsyncHttpClient.fetch_json(URL)
+        await AsyncHttpClient.flush()
+        AsyncHttpClient._cache.clear()  # 模擬重啟
+
+        assert await AsyncHttpClient.fetch_json(URL) == [{"Code": "2330", "v": 1}]
+        assert upstream["calls"] == 1
+
+    async def test_warm_from_disk(self, upstream):
+        await AsyncHttpClient.fetch_json(URL)
+        await AsyncHttpClient.flush()
+        AsyncHttpClient._cache.clear()
+
+        assert AsyncHttpClient.warm_from_disk() == 1
+        assert len(AsyncHttpClient._cache) == 1
+
+    async def test_offline_and_upstream_down_serve_last_good(self, upstream):
+        await AsyncHttpClient.fetch_json(URL)
+        await AsyncHttpClient.flush()
+        AsyncHttpClient._cache.clear()
+        upstream["down"] = True
+
+        assert await AsyncHttpClient.fetch_json(URL, refresh=True) == [{"Code": "2330", "v": 1}]
+
+        AsyncHttpClient.offline = True
+        calls = upstream["calls"]
+        assert await AsyncHttpClient.fetch_json(URL, refresh=True) == [{"Code": "2330", "v": 1}]
+        assert (await AsyncHttpClient.fetch_json("https://upstream.test/never"))["status"] == "failed"
+        assert upstream["calls"] == calls
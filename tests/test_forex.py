@@ -0,0 +1,67 @@
+import json
+import httpx
+import pytest
+from fastmcp import Client
+from taiwan_finance_mcp_mega import server
+from taiwan_finance_mcp_mega.logic.forex import ForexLogic
+from taiwan_finance_mcp_mega.utils.cross_rates import CrossRateMatrix
+from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+
+RTER = {
+    "USDUSD": {"Exrate": 1, "UTC": "2026-10-16 08:00:00"},
+    "USDTWD": {"Exrate": 32.5, "UTC": "2026-10-16 08:01:00"},
+    "USDJPY": {"Exrate": 150.0, "UTC": "2026-10-16 08:02:00"},
+    "USDEUR": {"Exrate": 0.92, "UTC": "2026-10-16 08:03:00"},
+    "USDXXX": {"Exrate": 0, "UTC": "2026-10-16 08:04:00"},
+}
+
+
+@pytest.fixture
+def rter(mock_upstream):
+    calls = []
+
+    def handler(request):
+        calls.append(request.url)
+        return httpx.Response(200, json=RTER)
+
+    mock_upstream(handler)
+    return calls
+
+
+def test_matrix_matches_usd_cross_formula():
+    matrix = CrossRateMatrix.from_rter(RTER)
+    assert matrix.currencies == ["USD", "TWD", "JPY", "EUR"]
+    assert matrix.rate("JPY", "TWD") == 32.5 / 150.0
+    assert matrix.rate("TWD", "USD") == 1 / 32.5
+    assert matrix.rate("XXX", "TWD") is None
+    assert matrix.convert_many([(1500, "JPY", "TWD"), (1, "EUR", "ABC")]) == [1500 * 32.5 / 150.0, None]
+    assert matrix.update_time("JPY", "USD") == "2026-10-16 08:02:00"
+
+
+@pytest.mark.asyncio
+async def test_pair_and_rate_table_share_one_matrix(rter):
+    pair = await ForexLogic.get_pair("jpy", "twd")
+    assert pair["rate"] == round(32.5 / 150.0, 6) and pair["update_time"] == "2026-10-16 08:01:00"
+    assert (await ForexLogic.get_pair("XXX"))["error"] == "不支援的原始幣別: XXX"
+    table = await ForexLogic.get_latest_rates("EUR")
+    assert table["rates"]["TWD"] == round(32.5 / 0.92, 6) and table["rates"]["EUR"] == 1.0
+    assert await ForexLogic.get_matrix() is await ForexLogic.get_matrix()
+    assert len(rter) == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_conversion_tool(rter):
+    async with Client(server.mcp) as client:
+        result = await client.call_tool("get_forex_batch_conversion", {"conversions": "100 USD/TWD, 15,000 JPY>TWD, 2 EUR ABC, oops"})
+    rows = json.loads(result.data)["conversions"]
+    assert rows[0] == {"amount": 100.0, "from": "USD", "to": "TWD", "rate": 32.5, "converted": 3250.0, "update_time": "2026-10-16 08:01:00"}
+    assert rows[1]["converted"] == 3250.0
+    assert rows[2]["error"] == "不支援的幣別: ABC"
+    assert "無法解析" in rows[3]["error"]
+    assert "請提供換算清單" in (await ForexLogic.convert_batch([]))["error"]
+
+
+def test_parse_conversions_separators():
+    assert ForexLogic.parse_conversions("100 USD/TWD,500 JPY/TWD") == [(100.0, "USD", "TWD"), (500.0, "JPY", "TWD")]
+    assert ForexLogic.parse_conversions("1,500 JPY/TWD,2 EUR/USD; 3 USD/JPY") == [(1500.0, "JPY", "TWD"), (2.0, "EUR", "USD"), (3.0, "USD", "JPY")]
+    assert ForexLogic.parse_conversions("1,234,567 JPY/TWD") == [(1234567.0, "JPY", "TWD")]
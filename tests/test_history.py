@@ -0,0 +1,95 @@
+import json
+from datetime import date, datetime
+import httpx
+import pytest
+from fastmcp import Client
+from taiwan_finance_mcp_mega import server
+from taiwan_finance_mcp_mega.config import Config
+from taiwan_finance_mcp_mega.logic.history import HistoryLogic
+from taiwan_finance_mcp_mega.prefetch import TAIPEI, MarketCalendar
+from taiwan_finance_mcp_mega.utils.columnar import ColumnarDataset
+from taiwan_finance_mcp_mega.utils.history import HistoryStore
+from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+
+URL = f"{Config.TWSE_BASE}/exchangeReport/STOCK_DAY_ALL"
+
+
+def _quotes(roc_date: str, close_2330: str):
+    return [
+        {"Date": roc_date, "Code": "2330", "Name": "台積電", "ClosingPrice": close_2330, "TradeVolume": "1000"},
+        {"Date": roc_date, "Code": "0050", "Name": "元大台灣50", "ClosingPrice": "150.00", "TradeVolume": "2000"},
+        {"Date": roc_date, "Code": "2317", "Name": "鴻海", "ClosingPrice": "100.00", "TradeVolume": "3000"},
+    ]
+
+
+class TestHistoryStore:
+    def test_append_only_partitions_and_range_query(self, tmp_path):
+        store = HistoryStore(str(tmp_path), Config.HISTORY_DATASETS)
+        for day, close in (("1130102", "590.00"), ("1130103", "593.00"), ("1130104", "580.00")):
+            assert store.append("quotes", _quotes(day, close)) is not None
+        # 同一交易日再次抓取不覆寫既有分區
+        assert store.append("quotes", _quotes("1130104", "999.00")) is None
+        assert store.dates("quotes") == ["2024-01-02", "2024-01-03", "2024-01-04"]
+
+        rows = store.query("quotes", "2330", sessions=2, fields=["ClosingPrice"])
+        assert rows == [{"date": "2024-01-03", "ClosingPrice": "593.00"}, {"date": "2024-01-04", "ClosingPrice": "580.00"}]
+        assert [r["date"] for r in store.query("quotes", "2330", start="2024-01-03")] == ["2024-01-03", "2024-01-04"]
+        assert store.query("quotes", "9999") == []
+        assert len(store.query("quotes", end="2024-01-02")) == 3
+
+    def test_columnar_snapshot_and_undated_dataset(self, tmp_path):
+        store = HistoryStore(str(tmp_path), Config.HISTORY_DATASETS)
+        rows = [{"Date": "20240105", "Code": f"{1000 + i}", "ClosingPrice": f"{10 + i}.50"} for i in range(600)]
+        assert store.append("quotes", ColumnarDataset.from_rows(rows)) == "2024-01-05"
+        assert store.query("quotes", "1599") == [{"date": "2024-01-05", "Date": "20240105", "Code": "1599", "ClosingPrice": "609.50"}]
+        # 無日期欄位的資料集以抓取當日為分區
+        assert store.append("tpex_institutional_summary", [{"單位名稱": "外資", "買賣超": "10"}], today=date(2024, 1, 5)) == "2024-01-05"
+        assert store.coverage()[-1]["sessions"] == 1
+
+    def test_undated_snapshot_uses_latest_published_session(self, tmp_path):
+        store = HistoryStore(str(tmp_path), Config.HISTORY_DATASETS, calendar=MarketCalendar(), publish={"margin": "21:35"})
+        friday = [{"股票代號": "2330", "融資今日餘額": "100"}, {"股票代號": "2317", "融資今日餘額": "50"}]
+        monday = [{"股票代號": "2330", "融資今日餘額": "120"}, {"股票代號": "2317", "融資今日餘額": "40"}]
+        at = lambda *args: TAIPEI.localize(datetime(2024, 1, *args))
+        # 週六抓到的是週五盤後公布的資料
+        assert store.append("margin", friday, now=at(6, 10, 0)) == "2024-01-05"
+        # 週一早上仍是週五的資料 (分區已存在)；公布時段後上游尚未更新時內容與上一分區相同，不佔用週一分區
+        assert store.append("margin", friday, now=at(8, 9, 0)) is None
+        assert store.append("margin", friday, now=at(8, 21, 40)) is None
+        # 當晚實際公布的資料寫入週一
+        assert store.append("margin", monday, now=at(8, 22, 0)) == "2024-01-08"
+        assert store.query("margin", "2330", fields=["融資今日餘額"]) == [
+            {"date": "2024-01-05", "融資今日餘額": "100"}, {"date": "2024-01-08", "融資今日餘額": "120"}]
+
+
+@pytest.mark.asyncio
+async def test_fetch_captures_snapshot_and_tool_answers_offline(mock_upstream, tmp_path):
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(200, json=_quotes("1130102", "590.00"))
+
+    mock_upstream(handler)
+    AsyncHttpClient.configure_history(str(tmp_path))
+    await AsyncHttpClient.fetch_json(URL)
+    await AsyncHttpClient.flush()
+    AsyncHttpClient._history.append("quotes", _quotes("1130103", "593.00"))
+    upstream_calls = len(calls)
+
+    async with Client(server.mcp) as client:
+        result = await client.call_tool("get_stock_history_daily", {"ticker": "2330", "sessions": 60, "fields": "ClosingPrice"})
+    body = json.loads(result.data)
+    assert (body["first"], body["last"], body["sessions"]) == ("2024-01-02", "2024-01-03", 2)
+    assert [r["ClosingPrice"] for r in body["rows"]] == ["590.00", "593.00"]
+    assert len(calls) == upstream_calls
+
+
+@pytest.mark.asyncio
+async def test_history_errors(mock_upstream, tmp_path):
+    AsyncHttpClient._history = None
+    assert "未啟用" in (await HistoryLogic.get_daily_history("2330"))["error"]
+    AsyncHttpClient.configure_history(str(tmp_path))
+    assert "未知的歷史資料集" in (await HistoryLogic.get_daily_history("2330", dataset="nope"))["error"]
+    assert "無法解析日期" in (await HistoryLogic.get_daily_history("2330", start="yesterday"))["error"]
+    assert "查無" in (await HistoryLogic.get_daily_history("2330"))["error"]
@@ -0,0 +1,120 @@
+import asyncio
+import re
+import time
+import pytest
+import httpx
+from taiwan_finance_mcp_mega.config import Config
+from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+
+LATENCY = 0.2
+
+
+@pytest.mark.asyncio
+class TestSingleFlight:
+    """
+    驗證 AsyncHttpClient 以 cache key 為單位合併請求，不同 URL 之間不互相阻塞。
+    """
+
+    async def test_distinct_urls_run_in_parallel(self, mock_upstream):
+        async def handler(request: httpx.Request):
+            await asyncio.sleep(LATENCY)
+            return httpx.Response(200, json=[{"url": str(request.url)}])
+        mock_upstream(handler)
+
+        urls = [f"https://upstream.test/dataset/{i}" for i in range(8)]
+        start = time.perf_counter()
+        results = await asyncio.gather(*(AsyncHttpClient.fetch_json(u) for u in urls))
+        elapsed = time.perf_counter() - start
+
+        assert [r[0]["url"] for r in results] == urls
+        # 約等於 max(latency)，遠小於 sum(latency)
+        assert elapsed < LATENCY * 3
+        assert elapsed < LATENCY * len(urls) / 2
+
+    async def test_same_key_shares_one_upstream_call(self, mock_upstream):
+        calls = []
+
+        async def handler(request: httpx.Request):
+            calls.append(str(request.url))
+            await asyncio.sleep(LATENCY)
+            return httpx.Response(200, json={"ok": True})
+        mock_upstream(handler)
+
+        results = await asyncio.gather(*(AsyncHttpClient.fetch_json("https://upstream.test/same") for _ in range(10)))
+
+        assert len(calls) == 1
+        assert all(r == {"ok": True} for r in results)
+        assert not AsyncHttpClient._inflight
+
+    async def test_csv_and_bom_json(self, mock_upstream):
+        def handler(request: httpx.Request):
+            if request.url.path.endswith(".csv"):
+                return httpx.Response(200, content="\ufeff日期,值\n2024/01,1\n".encode("utf-8"))
+            return httpx.Response(200, content="\ufeff[{\"Code\": \"2330\"}]".encode("utf-8"))
+        mock_upstream(handler)
+
+        rows = await AsyncHttpClient.fetch_csv_as_json("https://upstream.test/data.csv")
+        data = await AsyncHttpClient.fetch_json("https://upstream.test/bom.json")
+
+        assert rows == [{"日期": "2024/01", "值": "1"}]
+        assert data == [{"Code": "2330"}]
+
+
+@pytest.mark.asyncio
+class TestStaleWhileRevalidate:
+    """
+    驗證 soft TTL 後回傳舊資料並僅觸發一次背景刷新，hard TTL 後阻塞重抓。
+    """
+
+    @pytest.fixture
+    def versioned_upstream(self, mock_upstream, monkeypatch):
+        monkeypatch.setattr(AsyncHttpClient, "_ttl_rules", [(re.compile(r"upstream\.test"), 0.0, 0.5)])
+        calls = []
+
+        async def handler(request: httpx.Request):
+            calls.append(str(request.url))
+            await asyncio.sleep(0.05)
+            return httpx.Response(200, json={"version": len(calls)})
+        mock_upstream(handler)
+        return calls
+
+    async def test_stale_served_while_single_refresh_runs(self, versioned_upstream):
+        url = "https://upstream.test/swr"
+        assert await AsyncHttpClient.fetch_json(url) == {"version": 1}
+
+        freshness = AsyncHttpClient.track_freshness()
+        stale = await asyncio.gather(*(AsyncHttpClient.fetch_json(url) for _ in range(5)))
+        assert all(r == {"version": 1} for r in stale)
+        assert {f["cache"] for f in freshness} == {"stale"}
+
+        await asyncio.gather(*AsyncHttpClient._inflight.values())
+        assert len(versioned_upstream) == 2
+        assert (await AsyncHttpClient.fetch_json(url)) == {"version": 2}
+
+    async def test_hard_ttl_blocks_and_refetches(self, versioned_upstream):
+        url = "https://upstream.test/hard"
+        await AsyncHttpClient.fetch_json(url)
+        await asyncio.sleep(0.6)
+
+        freshness = AsyncHttpClient.track_freshness()
+        assert await AsyncHttpClient.fetch_json(url) == {"version": 2}
+        assert freshness[0]["cache"] == "fresh"
+
+    async def test_errors_are_not_cached(self, mock_upstream):
+        mock_upstream(lambda request: httpx.Response(503))
+        res = await AsyncHttpClient.fetch_json("https://upstream.test/down")
+        assert res["status"] == "failed"
+        assert len(AsyncHttpClient._cache) == 0
+
+
+def test_ttl_rules_by_url_pattern():
+    assert AsyncHttpClient.ttl_for("https://tw.rter.info/capi.php") == (60, 600)
+    assert AsyncHttpClient.ttl_for("https://unknown.example/x") == (Config.CACHE_SOFT_TTL, Config.CACHE_HARD_TTL)
+
+
+def test_cache_meta_wraps_lists_and_dicts():
+    from taiwan_finance_mcp_mega.server import attach_cache_meta
+    freshness = [{"url": "a", "cache": "fresh", "age_seconds": 1.0}, {"url": "b", "cache": "stale", "age_seconds": 400.0}]
+    assert attach_cache_meta([1], freshness) == {"data": [1], "_meta": {"cache": "stale", "age_seconds": 400.0}}
+    assert attach_cache_meta({"rate": 1}, freshness[:1])["_meta"]["cache"] == "fresh"
+    assert attach_cache_meta({"rate": 1}, []) == {"rate": 1}
@@ -0,0 +1,65 @@
+import json
+import pytest
+import httpx
+from taiwan_finance_mcp_mega.utils.columnar import ColumnarBuilder, ColumnarDataset
+from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+from taiwan_finance_mcp_mega.utils.json_stream import JSONArrayParser, load_json_stream
+
+ROWS = [
+    {"Code": "2330", "Name": "台積電", "ClosingPrice": "1000.00"},
+    {"Code": "2317", "Name": "鴻海", "ClosingPrice": "--"},
+    {"Code": "0050", "Name": "元大台灣50", "ClosingPrice": "190.35"},
+] * 4
+
+
+async def chunked(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+class TestLoadJsonStream:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("size", [1, 2, 7, 64, 1 << 16])
+    async def test_chunk_boundaries(self, size):
+        # size=1/2 會把中文字的 UTF-8 位元組與數值、字串切在片段中間
+        body = ("\ufeff" + json.dumps(ROWS + [1.25, None, [1, 2]], ensure_ascii=False)).encode("utf-8")
+        assert await load_json_stream(chunked(body, size)) == ROWS + [1.25, None, [1, 2]]
+
+    @pytest.mark.asyncio
+    async def test_non_array_payload(self):
+        body = json.dumps({"rates": {"USD": 1}}).encode()
+        assert await load_json_stream(chunked(b"  " + body, 3)) == {"rates": {"USD": 1}}
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("body", [b'[{"a": 1}', b'[{"a": 1}] x', b'[{"a": }]', b""])
+    async def test_malformed_payload_raises(self, body):
+        with pytest.raises(ValueError):
+            await load_json_stream(chunked(body, 4))
+
+    @pytest.mark.asyncio
+    async def test_columnar_sink(self):
+        body = json.dumps(ROWS, ensure_ascii=False).encode()
+        ds = await load_json_stream(chunked(body, 5), sink=ColumnarBuilder(min_rows=10))
+        assert isinstance(ds, ColumnarDataset) and ds.to_rows() == ROWS
+        small = await load_json_stream(chunked(body, 5), sink=ColumnarBuilder(min_rows=100))
+        assert small == ROWS and isinstance(small, list)
+
+    def test_parser_waits_for_truncated_number(self):
+        parser = JSONArrayParser()
+        assert parser.feed("[12") == []
+        assert parser.feed("34, 5") == [1234]
+        assert parser.feed("]", final=True) == [5]
+
+
+def test_columnar_builder_falls_back_on_mixed_rows():
+    builder = ColumnarBuilder()
+    for row in (ROWS[0], ROWS[1], {"Code": "9999"}, 3):
+        builder.append(row)
+    assert builder.build() == [ROWS[0], ROWS[1], {"Code": "9999"}, 3]
+
+
+@pytest.mark.asyncio
+async def test_fetch_json_streams_bom_payload(mock_upstream):
+    body = ("\ufeff" + json.dumps(ROWS, ensure_ascii=False)).encode("utf-8")
+    mock_upstream(lambda request: httpx.Response(200, content=body, headers={"Content-Type": "application/json"}))
+    assert await AsyncHttpClient.fetch_json("https://openapi.twse.com.tw/v1/test") == ROWS
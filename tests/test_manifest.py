@@ -0,0 +1,50 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+from fastmcp import Client, FastMCP
+from taiwan_finance_mcp_mega import server
+from taiwan_finance_mcp_mega.manifest import build_manifest, load_manifest
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+
+
+def test_manifest_is_up_to_date():
+    # 失敗時請執行: PYTHONPATH=src python -m taiwan_finance_mcp_mega.manifest
+    assert list(load_manifest().values()) == build_manifest()
+
+
+@pytest.mark.asyncio
+async def test_deferred_tools_match_decorated_registration():
+    reference = FastMCP("reference")
+    for name in server.tool_names():
+        reference.tool(server.tool_function(name), name=name)
+    expected = {t.name: t.to_mcp_tool() for t in await reference.list_tools()}
+    listed = await server.mcp.list_tools()
+    assert all(isinstance(t, server.DeferredTool) for t in listed)
+    assert {t.name: t.to_mcp_tool() for t in listed} == expected
+
+
+@pytest.mark.asyncio
+async def test_deferred_tool_validates_and_runs():
+    async with Client(server.mcp) as client:
+        result = await client.call_tool("get_current_time_taipei", {"limit": "5"})
+        assert json.loads(result.data)["timezone"] == "Asia/Taipei"
+        with pytest.raises(Exception, match="limit"):
+            await client.call_tool("get_current_time_taipei", {"limit": "many"})
+
+
+def test_import_does_not_load_logic_modules():
+    code = ("import sys, taiwan_finance_mcp_mega.server; "
+            "print([m for m in sys.modules if m.startswith('taiwan_finance_mcp_mega.logic.') or m in ('httpx', 'pytz')])")
+    env = dict(os.environ, PYTHONPATH=os.path.abspath(SRC))
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "[]"
+
+
+def test_lazy_handler_resolves_on_first_call():
+    handler = server.LazyHandler("global_macro:CryptoLogic.get_price", "BTC")
+    assert handler._func is None and handler.args == ("BTC",)
+    from taiwan_finance_mcp_mega.logic.global_macro import CryptoLogic
+    assert handler.func is CryptoLogic.get_price
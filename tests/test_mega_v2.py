@@ -43,10 +43,10 @@ class TestFinanceMegaLogic:
 
     # --- 3. 測試宏觀經濟 (關鍵字匹配) ---
     async def test_macro_gdp_fuzzy_match(self):
-        res = await EconomicsLogic.get_macro_stats("gdp")
-        assert "indicator" in res
-        if "value" in res:
-            assert res["value"] != "N/A"
+        res = await EconomicsLogic.get_macro_gdp_growth_rate_quarterly(latest=4)
+        assert "records" in res
+        assert 0 < len(res["records"]) <= 4
+        assert all(r["gdp_growth_rate"] not in ("", "…") for r in res["records"])
 
     # --- 4. 測試系統通用工具 ---
     async def test_system_time(self):
@@ -0,0 +1,92 @@
+import json
+import httpx
+import pytest
+from taiwan_finance_mcp_mega.config import Config
+from taiwan_finance_mcp_mega.server import _call_tool, mcp
+from taiwan_finance_mcp_mega.utils import metrics
+from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+
+
+def test_histogram_and_counter_exposition():
+    registry = metrics.Registry()
+    calls = registry.add(metrics.Counter("t_calls_total", "calls", ("tool",)))
+    latency = registry.add(metrics.Histogram("t_seconds", "latency", ("tool",), buckets=(0.1, 1.0)))
+    calls.inc('a"b')
+    latency.observe(0.05, "x")
+    latency.observe(0.5, "x")
+    latency.observe(5, "x")
+    text = registry.render()
+    assert 't_calls_total{tool="a\\"b"} 1' in text
+    assert 't_seconds_bucket{tool="x",le="0.1"} 1' in text
+    assert 't_seconds_bucket{tool="x",le="1"} 2' in text
+    assert 't_seconds_bucket{tool="x",le="+Inf"} 3' in text
+    assert 't_seconds_count{tool="x"} 3' in text and 't_seconds_sum{tool="x"} 5.55' in text
+
+
+@pytest.mark.asyncio
+async def test_tool_upstream_and_cache_metrics(mock_upstream):
+    async def body():
+        yield json.dumps([{"Code": "2330", "Name": "台積電"}]).encode()
+
+    # 串流 body 才會累計 num_bytes_downloaded (與真實連線相同)
+    mock_upstream(lambda request: httpx.Response(200, content=body()))
+    dataset = metrics.dataset_label(f"{Config.TWSE_BASE}/exchangeReport/STOCK_DAY_ALL")
+    tool = "get_stock_quotes_realtime_all"
+    calls = metrics.TOOL_CALLS.get(tool, "ok")
+    misses, hits = metrics.CACHE_EVENTS.get(dataset, "miss"), metrics.CACHE_EVENTS.get(dataset, "hit")
+    ok = metrics.UPSTREAM_REQUESTS.get("openapi.twse.com.tw", "200")
+
+    await _call_tool(tool, "2330", 10, 0, None, None)
+    await _call_tool(tool, "2330", 10, 0, None, None)
+
+    assert metrics.TOOL_CALLS.get(tool, "ok") == calls + 2
+    assert metrics.TOOL_LATENCY.count(tool) >= 2
+    assert metrics.CACHE_EVENTS.get(dataset, "miss") == misses + 1
+    assert metrics.CACHE_EVENTS.get(dataset, "hit") >= hits + 1
+    assert metrics.UPSTREAM_REQUESTS.get("openapi.twse.com.tw", "200") == ok + 1
+    assert metrics.UPSTREAM_BYTES.get("openapi.twse.com.tw") > 0
+    assert metrics.TOOLS_IN_FLIGHT.get() == 0
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(mock_upstream):
+    mock_upstream(lambda request: httpx.Response(503))
+    await AsyncHttpClient.fetch_json("https://down.example/x")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=mcp.http_app()), base_url="http://test") as client:
+        response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'mcp_upstream_requests_total{host="down.example",status="503"}' in response.text
+    assert 'mcp_upstream_circuit_state{host="down.example"}' in response.text
+    assert "# TYPE mcp_tool_latency_seconds histogram" in response.text
+
+
+def test_shared_metrics_merge_worker_snapshots(tmp_path):
+    def worker(index):
+        registry = metrics.Registry()
+        calls = registry.add(metrics.Counter("t_calls_total", "calls", ("tool",)))
+        latency = registry.add(metrics.Histogram("t_seconds", "latency", buckets=(1.0,)))
+        circuit = registry.add(metrics.Gauge("t_circuit", "state", ("host",), aggregate="max"))
+        return registry, calls, latency, circuit, metrics.SharedMetrics(registry, str(tmp_path), index)
+
+    registry0, calls0, latency0, circuit0, shared0 = worker(0)
+    registry1, calls1, latency1, circuit1, shared1 = worker(1)
+    calls0.inc("a", amount=2)
+    calls1.inc("a", amount=3)
+    calls1.inc("b")
+    latency0.observe(0.5)
+    latency1.observe(2.0)
+    circuit0.set(0, "h")
+    circuit1.set(2, "h")
+    shared0.write()
+    shared1.write()
+    # 任一 worker 回應的輸出皆為合併數值
+    for shared in (shared0, shared1):
+        text = shared.render()
+        assert 't_calls_total{tool="a"} 5' in text and 't_calls_total{tool="b"} 1' in text
+        assert 't_seconds_bucket{le="1"} 1' in text and 't_seconds_count 2' in text
+        assert 't_circuit{host="h"} 2' in text
+    # 本行程為即時數值，其他 worker 為最近一次快照
+    calls0.inc("a")
+    assert 't_calls_total{tool="a"} 6' in shared0.render()
+    assert 't_calls_total{tool="a"} 5' in shared1.render()
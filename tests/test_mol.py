@@ -0,0 +1,140 @@
+import asyncio
+import json
+import httpx
+import pytest
+from fastmcp import Client
+from taiwan_finance_mcp_mega import server
+from taiwan_finance_mcp_mega.config import Config
+from taiwan_finance_mcp_mega.logic.gov_data import BankLogic, EconomicsLogic, MolDatastore
+from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+from taiwan_finance_mcp_mega.utils.mol_datastore import parse_period
+
+
+def month_row(year: int, month: int, growth: str = "…"):
+    return {"日期（月別）": f"{year}M{month:02d}", "經濟成長率": growth if month % 3 == 0 else "…",
+            "失業率（百分比）": "3.4", "消費者物價-年增率": "2.1"}
+
+
+@pytest.fixture
+def datastore(mock_upstream, monkeypatch):
+    """模擬 datastore：依 offset/limit 回傳各資源的數列，並記錄每次請求的 (資源, offset, limit)。"""
+    resources = {"A17030000J-000016-1ci": [month_row(2022 + i // 12, i % 12 + 1, f"{i / 10:.2f}") for i in range(30)]}
+    requests = []
+
+    def handler(request):
+        resource = request.url.path.rsplit("/", 1)[-1]
+        offset, limit = int(request.url.params["offset"]), int(request.url.params["limit"])
+        requests.append((resource, offset, limit))
+        rows = resources.get(resource, [])
+        return httpx.Response(200, json={"success": True, "result": {"records": rows[offset:offset + limit]}})
+
+    monkeypatch.setattr(Config, "MOL_PAGE_SIZE", 16)
+    MolDatastore.clear()
+    mock_upstream(handler)
+    yield resources, requests
+    MolDatastore.clear()
+
+
+def test_parse_period_formats():
+    assert parse_period("2024M03") == parse_period("113年3月") == parse_period("2024/3") == parse_period("202403") == "2024-03"
+    assert parse_period("11303") == "2024-03"
+    assert parse_period("113年第1季") == parse_period("2024Q1") == "2024-Q1"
+    assert parse_period("112") == parse_period("2023年") == "2023"
+    assert parse_period("2024M13") is None and parse_period("合計") is None
+
+
+@pytest.mark.asyncio
+async def test_tools_share_one_parsed_dataset(datastore):
+    resources, requests = datastore
+    monthly, gdp = await asyncio.gather(EconomicsLogic.get_macro_economic_indicators_monthly(latest=3),
+                                        EconomicsLogic.get_macro_gdp_growth_rate_quarterly(start="2022", end="2022"))
+    # 分頁載入一次 (第 2 頁不足一頁即為尾端)，兩個工具共用
+    assert requests == [("A17030000J-000016-1ci", offset, 16) for offset in (0, 16)]
+    assert monthly["count"] == 30 and monthly["period"] == {"first": "2022-01", "last": "2024-06"}
+    assert [r["日期（月別）"] for r in monthly["records"]] == ["2024M06", "2024M05", "2024M04"]
+    assert monthly["latest"]["日期（月別）"] == "2024M06"
+    assert [r["period"] for r in gdp["records"]] == ["2022M12", "2022M09", "2022M06", "2022M03"]
+    latest_gdp = await EconomicsLogic.get_macro_gdp_growth_rate_quarterly(latest=1)
+    assert latest_gdp["records"][0]["gdp_growth_rate"] == "2.90"
+
+
+@pytest.mark.asyncio
+async def test_refresh_requests_only_the_tail(datastore):
+    resources, requests = datastore
+    rows = resources["A17030000J-000016-1ci"]
+    await EconomicsLogic.get_macro_economic_indicators_monthly()
+    requests.clear()
+    rows[-1] = {**rows[-1], "經濟成長率": "3.05"}  # 初值修正
+    rows.append(month_row(2024, 7))
+    MolDatastore._datasets["A17030000J-000016-1ci"].check_at = 0  # 模擬 soft TTL 過期
+    res = await EconomicsLogic.get_macro_economic_indicators_monthly(start="2024-06")
+    assert requests == [("A17030000J-000016-1ci", 27, 16)]
+    assert res["count"] == 31
+    assert [(r["日期（月別）"], r["經濟成長率"]) for r in res["records"]] == [("2024M07", "…"), ("2024M06", "3.05")]
+    # soft TTL 內不連線上游
+    await EconomicsLogic.get_macro_gdp_growth_rate_quarterly()
+    assert len(requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_tail_mismatch_falls_back_to_full_reload(datastore, monkeypatch):
+    resources, requests = datastore
+    monkeypatch.setattr(Config, "MOL_PAGE_SIZE", 32)
+    await EconomicsLogic.get_macro_economic_indicators_monthly()
+    requests.clear()
+    del resources["A17030000J-000016-1ci"][:5]  # 上游刪減舊資料，尾端位置改變
+    MolDatastore._datasets["A17030000J-000016-1ci"].check_at = 0
+    res = await EconomicsLogic.get_macro_economic_indicators_monthly()
+    assert [offset for _, offset, _ in requests] == [27, 0]
+    assert res["count"] == 25 and res["period"]["first"] == "2022-06"
+
+
+@pytest.mark.asyncio
+async def test_failed_reload_keeps_previous_series(datastore, mock_upstream, monkeypatch):
+    resources, requests = datastore
+    monkeypatch.setattr(Config, "MOL_PAGE_SIZE", 32)
+    await EconomicsLogic.get_macro_economic_indicators_monthly()
+    dataset = MolDatastore._datasets["A17030000J-000016-1ci"]
+    shifted = resources["A17030000J-000016-1ci"][5:]
+
+    def handler(request):
+        # 尾端位置改變且完整重載失敗
+        offset = int(request.url.params["offset"])
+        if offset == 0:
+            return httpx.Response(404)
+        return httpx.Response(200, json={"success": True, "result": {"records": shifted[offset:offset + 32]}})
+
+    mock_upstream(handler)
+    dataset.check_at = 0
+    res = await EconomicsLogic.get_macro_economic_indicators_monthly(latest=1)
+    # 沿用原數列 (至 hard TTL)，不清空共用的數列
+    assert MolDatastore._datasets["A17030000J-000016-1ci"] is dataset
+    assert res["count"] == 30 and res["records"][0]["日期（月別）"] == "2024M06"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_refresh_is_single_flight(datastore, monkeypatch):
+    resources, requests = datastore
+    monkeypatch.setattr(Config, "MOL_PAGE_SIZE", 32)
+    await EconomicsLogic.get_macro_economic_indicators_monthly()
+    requests.clear()
+    del resources["A17030000J-000016-1ci"][:5]
+    MolDatastore._datasets["A17030000J-000016-1ci"].check_at = 0
+    # GDP 與每月指標同時觸發刷新：只執行一次尾端校驗與完整重載，不交錯合併
+    monthly, gdp = await asyncio.gather(EconomicsLogic.get_macro_economic_indicators_monthly(),
+                                        EconomicsLogic.get_macro_gdp_growth_rate_quarterly(latest=1))
+    assert [offset for _, offset, _ in requests] == [27, 0]
+    assert monthly["count"] == 25 and gdp["records"][0]["period"] == "2024M06"
+    # 分頁不寫入數據集緩存
+    assert not any("apiservice.mol.gov.tw" in str(key) for key in AsyncHttpClient._cache)
+
+
+@pytest.mark.asyncio
+async def test_period_tool_arguments(datastore):
+    async with Client(server.mcp) as client:
+        result = await client.call_tool("get_macro_economic_indicators_monthly", {"start": "112年12月", "end": "2024-02", "limit": 2})
+    body = json.loads(result.data)
+    assert [r["日期（月別）"] for r in body["records"]] == ["2024M02", "2024M01"]
+    assert body["_meta"]["page"]["total"] == 3 and body["_meta"]["cache"] == "fresh"
+    # 無資料的資源回報錯誤
+    assert "error" in await BankLogic.get_macro_forex_rates_monthly()
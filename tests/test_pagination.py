@@ -0,0 +1,75 @@
+import json
+import pytest
+import httpx
+from taiwan_finance_mcp_mega.server import _serve, dispatch_mega_logic
+from taiwan_finance_mcp_mega.utils.columnar import ColumnarDataset
+from taiwan_finance_mcp_mega.utils.pagination import encode_cursor, paginate, parse_fields
+
+ROWS = [{"Code": f"{1000 + i}", "Name": f"公司{i}", "ClosingPrice": f"{10 + i}.00"} for i in range(25)]
+
+
+class TestPaginate:
+    def test_limit_offset_and_cursor(self):
+        page, info = paginate(ROWS, limit=10)
+        assert page == ROWS[:10]
+        assert info["total"] == 25 and info["returned"] == 10 and info["next_cursor"]
+        page, info = paginate(ROWS, limit=10, cursor=info["next_cursor"])
+        assert page == ROWS[10:20] and info["offset"] == 10
+        page, info = paginate(ROWS, limit=10, cursor=info["next_cursor"])
+        assert page == ROWS[20:] and info["next_cursor"] is None
+        assert paginate(ROWS, limit=10, offset=99)[0] == []
+
+    def test_cursor_invalidated_by_refresh(self):
+        _, info = paginate(ROWS, limit=5)
+        with pytest.raises(ValueError):
+            paginate(ROWS[:-1], limit=5, cursor=info["next_cursor"])
+        with pytest.raises(ValueError):
+            paginate(ROWS, limit=5, cursor="not-a-cursor")
+
+    def test_field_projection(self):
+        assert parse_fields(" Code，ClosingPrice,Code ") == ["Code", "ClosingPrice"]
+        page, _ = paginate(ROWS, limit=2, fields="Code,ClosingPrice,Missing")
+        assert page == [{"Code": "1000", "ClosingPrice": "10.00"}, {"Code": "1001", "ClosingPrice": "11.00"}]
+        ds = ColumnarDataset.from_rows(ROWS)
+        assert paginate(ds, limit=2, offset=3, fields="Code")[0] == [{"Code": "1003"}, {"Code": "1004"}]
+        assert paginate(ds, limit=2)[0] == ROWS[:2]
+
+    def test_dict_payloads(self):
+        res, info = paginate({"title": "t", "records": ROWS}, limit=3, fields="Name")
+        assert res == {"title": "t", "records": [{"Name": "公司0"}, {"Name": "公司1"}, {"Name": "公司2"}]}
+        assert info["total"] == 25
+        assert paginate({"rate": 1, "pair": "USD/TWD"}, limit=3, fields="rate") == ({"rate": 1}, None)
+        assert paginate({"error": "x"}, limit=3, fields="rate") == ({"error": "x"}, None)
+
+    def test_batch_results_page_per_ticker(self):
+        batch = {"tickers": 2, "results": {"A": {"status": "ok", "rows": ROWS[:5]}, "B": {"status": "ok", "rows": ROWS[5:8]},
+                                           "C": {"status": "not_found", "rows": []}}}
+        res, info = paginate(batch, limit=2, offset=2, fields="Code")
+        assert res["results"]["A"]["rows"] == [{"Code": "1002"}, {"Code": "1003"}]
+        assert res["results"]["B"]["rows"] == [{"Code": "1007"}] and res["results"]["C"] == {"status": "not_found", "rows": []}
+        assert info["totals"] == {"A": 5, "B": 3, "C": 0} and info["returned"] == 3 and info["total"] == 8
+        res, info = paginate(batch, limit=2, cursor=info["next_cursor"])
+        assert res["results"]["A"]["rows"] == ROWS[4:5] and res["results"]["B"]["rows"] == []
+        assert info["offset"] == 4 and info["next_cursor"] is None
+        with pytest.raises(ValueError):
+            paginate({"results": {"A": {"rows": ROWS[:4]}}}, limit=2, cursor=encode_cursor(2, "stale"))
+
+
+@pytest.mark.asyncio
+async def test_full_market_tool_pages_through_cached_dataset(mock_upstream):
+    calls = []
+
+    def handler(request):
+        calls.append(request.url)
+        return httpx.Response(200, json=ROWS)
+    mock_upstream(handler)
+
+    first = json.loads(await _serve(dispatch_mega_logic("get_stock_quotes_realtime_all", None, 20), 20, fields="Code"))
+    assert first["data"] == [{"Code": r["Code"]} for r in ROWS[:20]]
+    page = first["_meta"]["page"]
+    assert page["total"] == 25 and page["next_cursor"]
+
+    second = json.loads(await _serve(dispatch_mega_logic("get_stock_quotes_realtime_all", None, 20), 20, cursor=page["next_cursor"], fields="Code"))
+    assert second["data"] == [{"Code": r["Code"]} for r in ROWS[20:]]
+    assert second["_meta"]["page"]["next_cursor"] is None
+    assert len(calls) == 1  # 分頁皆由緩存中的完整資料集提供
@@ -0,0 +1,57 @@
+import asyncio
+from datetime import date, datetime
+import pytest
+import httpx
+from taiwan_finance_mcp_mega.prefetch import MarketCalendar, PrefetchScheduler, TAIPEI
+from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+
+
+def taipei(*args) -> datetime:
+    return TAIPEI.localize(datetime(*args))
+
+
+class TestMarketCalendar:
+    def test_parse_roc_and_gregorian_dates(self):
+        assert MarketCalendar.parse_date("1130101") == date(2024, 1, 1)
+        assert MarketCalendar.parse_date("2024-02-28") == date(2024, 2, 28)
+        assert MarketCalendar.parse_date("N/A") is None
+
+    def test_weekends_and_holidays_are_skipped(self):
+        cal = MarketCalendar(holidays=[date(2024, 2, 12)])
+        assert cal.next_trading_day(date(2024, 2, 10)) == date(2024, 2, 13)  # 週六 -> 跳過週日與休市日
+        assert cal.is_trading_day(date(2024, 2, 13))
+
+    def test_latest_published_session(self):
+        cal = MarketCalendar(holidays=[date(2024, 2, 12)])
+        assert cal.latest_session(taipei(2024, 2, 13, 9, 0), "21:35") == date(2024, 2, 9)  # 公布前；前一日為休市日，再往前為週末
+        assert cal.latest_session(taipei(2024, 2, 13, 21, 35), "21:35") == date(2024, 2, 13)
+        assert cal.latest_session(taipei(2024, 2, 17, 23, 0), "14:05") == date(2024, 2, 16)  # 週六
+
+
+class TestPrefetchScheduler:
+    def test_next_runs_follow_publication_windows(self):
+        sched = PrefetchScheduler(windows={"/a": ["14:05"], "/b": ["21:35"]}, calendar=MarketCalendar())
+        # 週五 15:00：/a 已過今日時段，下一次為下週一；/b 仍在今日
+        runs = sched.next_runs(taipei(2024, 3, 8, 15, 0))
+        assert runs == [(taipei(2024, 3, 8, 21, 35), "/b"), (taipei(2024, 3, 11, 14, 5), "/a")]
+
+    @pytest.mark.asyncio
+    async def test_warm_refreshes_cache_with_bounded_concurrency(self, mock_upstream):
+        active, peak = 0, 0
+
+        async def handler(request: httpx.Request):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.05)
+            active -= 1
+            return httpx.Response(200, json=[{"Code": "2330"}])
+        mock_upstream(handler)
+
+        windows = {f"/exchangeReport/DS{i}": ["14:00"] for i in range(5)}
+        sched = PrefetchScheduler(windows=windows, concurrency=2, jitter=0)
+        results = await sched.warm()
+
+        assert all(results.values())
+        assert peak == 2
+        assert len(AsyncHttpClient._cache) == 5
@@ -0,0 +1,51 @@
+import json
+import time
+import httpx
+import pytest
+from taiwan_finance_mcp_mega.config import Config
+from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+from taiwan_finance_mcp_mega.utils.replay import FixtureStore, RecordingTransport, ReplayTransport, request_key
+
+
+def test_request_key_sorts_query():
+    assert request_key("get", "https://h.example/p?b=2&a=1") == request_key("GET", "https://h.example/p?a=1&b=2")
+    assert request_key("GET", "https://h.example/p") == "GET https://h.example/p"
+
+
+@pytest.mark.asyncio
+async def test_record_then_replay_round_trip(tmp_path):
+    body = json.dumps([{"Code": "2330", "Name": "台積電"}], ensure_ascii=False).encode("utf-8")
+    upstream = httpx.MockTransport(lambda request: httpx.Response(200, headers={"content-type": "application/json"}, content=body))
+    store = FixtureStore(str(tmp_path))
+
+    async with httpx.AsyncClient(transport=RecordingTransport(store, upstream)) as client:
+        recorded = await client.get("https://openapi.twse.com.tw/v1/q", params={"b": "2", "a": "1"})
+    assert recorded.json()[0]["Name"] == "台積電"
+
+    replay = ReplayTransport(store, chunk_size=7)
+    async with httpx.AsyncClient(transport=replay) as client:
+        replayed = await client.get("https://openapi.twse.com.tw/v1/q?a=1&b=2")
+        missing = await client.get("https://openapi.twse.com.tw/v1/other")
+    assert replayed.status_code == 200 and replayed.content == body
+    assert replayed.headers["content-type"] == "application/json"
+    assert missing.status_code == 404 and replay.missing == 1
+
+
+def test_binary_body_is_preserved(tmp_path):
+    store = FixtureStore(str(tmp_path))
+    store.put("https://h.example/big5.csv", "日期,價格\n".encode("big5"), content_type="text/csv")
+    record = store.load(request_key("GET", "https://h.example/big5.csv"))
+    assert record["encoding"] == "base64" and record["body"].decode("big5") == "日期,價格\n"
+
+
+@pytest.mark.asyncio
+async def test_client_replays_with_latency(tmp_path, mock_upstream):
+    store = FixtureStore(str(tmp_path))
+    store.put_json(Config.FOREX_API, {"USDTWD": {"Exrate": 31.5, "UTC": "2026-01-02 08:00:00"}})
+    transport = AsyncHttpClient.configure_replay(replay_dir=str(tmp_path), latency=0.05)
+
+    start = time.monotonic()
+    data = await AsyncHttpClient.fetch_json(Config.FOREX_API)
+    assert time.monotonic() - start >= 0.05
+    assert data["USDTWD"]["Exrate"] == 31.5
+    assert transport.requests == 1
@@ -0,0 +1,53 @@
+import json
+import pytest
+import httpx
+from taiwan_finance_mcp_mega import server
+from taiwan_finance_mcp_mega.logic.stock import StockLogic
+from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+from taiwan_finance_mcp_mega.utils.response_cache import ResponseEncoder
+
+ROWS = [{"Code": "2330", "Name": "台積電", "ClosingPrice": "1000.00"}, {"Code": "2317", "Name": "鴻海", "ClosingPrice": "200.50"}]
+META = {"cache": "fresh", "age_seconds": 3.2, "page": {"offset": 0, "limit": 10, "next_cursor": None}}
+
+
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize("res", [ROWS, [], {"title": "t", "records": ROWS}, {}, {"rate": 1.5, "nested": {"a": [1, 2]}}])
+def test_spliced_meta_matches_full_serialization(compact, res):
+    encoder = ResponseEncoder(1 << 20, compact=compact)
+    expected = {**res, "_meta": META} if isinstance(res, dict) else {"data": res, "_meta": META}
+    text = encoder.finish(encoder.encode(res, with_meta=True), META)
+    assert text == encoder.dumps(expected)
+    assert json.loads(text) == expected
+    assert encoder.finish(encoder.encode(res, with_meta=False), {}) == encoder.dumps(res)
+
+
+def test_compact_output_is_smaller():
+    res = {"records": ROWS * 50}
+    assert len(ResponseEncoder(0, compact=True).dumps(res)) < 0.8 * len(ResponseEncoder(0).dumps(res))
+
+
+@pytest.fixture
+def fresh_encoder(monkeypatch):
+    encoder = ResponseEncoder(1 << 20)
+    monkeypatch.setattr(server, "encoder", encoder)
+    return encoder
+
+
+@pytest.mark.asyncio
+async def test_normalized_args_share_one_entry(mock_upstream, fresh_encoder):
+    mock_upstream(lambda request: httpx.Response(200, json=ROWS))
+    outputs = [await server._call_tool("get_stock_quotes_realtime_all", q, 10, 0, None, None) for q in ("2330", " 2330 ", "2330 ")]
+    assert fresh_encoder.misses == 1 and fresh_encoder.hits == 2
+    assert all(json.loads(o)["data"] == [ROWS[0]] for o in outputs)
+
+
+@pytest.mark.asyncio
+async def test_refreshed_dataset_is_reserialized(mock_upstream, fresh_encoder):
+    payloads = iter([ROWS, [{**ROWS[0], "ClosingPrice": "1010.00"}]])
+    mock_upstream(lambda request: httpx.Response(200, json=next(payloads)))
+    first = await server._call_tool("get_stock_quotes_realtime_all", "2330", 10, 0, None, None)
+    await AsyncHttpClient.fetch_json(StockLogic.resolve_url("/exchangeReport/STOCK_DAY_ALL"), headers=StockLogic.NO_CACHE_HEADERS, refresh=True)
+    second = await server._call_tool("get_stock_quotes_realtime_all", "2330", 10, 0, None, None)
+    assert fresh_encoder.misses == 2
+    assert json.loads(first)["data"][0]["ClosingPrice"] == "1000.00"
+    assert json.loads(second)["data"][0]["ClosingPrice"] == "1010.00"
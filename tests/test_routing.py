@@ -0,0 +1,49 @@
+import pytest
+from taiwan_finance_mcp_mega import server
+from taiwan_finance_mcp_mega.server import TOOL_GROUPS, TOOL_ROUTES, Route, build_routes, check_routes, dispatch_mega_logic
+
+
+def test_every_listed_tool_has_a_route():
+    listed = {name for tools, _ in TOOL_GROUPS for name in tools}
+    assert listed <= set(TOOL_ROUTES)
+    check_routes(TOOL_ROUTES)
+
+
+def test_startup_check_reports_missing_handlers():
+    routes = build_routes()
+    del routes["get_futures_quotes_daily"]
+    routes["get_crypto_btc_twd_price"] = Route(lambda: None, server._no_args)
+    with pytest.raises(RuntimeError, match="get_crypto_btc_twd_price, get_futures_quotes_daily"):
+        check_routes(routes)
+
+
+@pytest.mark.asyncio
+async def test_dispatch_uses_bound_handler_and_adapter(monkeypatch):
+    calls = []
+
+    async def record(*args):
+        calls.append(args)
+        return {"ok": True}
+    monkeypatch.setitem(TOOL_ROUTES, "get_forex_any_to_any_conversion", Route(record, server._currency_pair_args))
+    monkeypatch.setitem(TOOL_ROUTES, "get_stock_margin_trading_balance", Route(record, server._query_arg))
+
+    assert await dispatch_mega_logic("get_forex_any_to_any_conversion", "usd/jpy", 10) == {"ok": True}
+    await dispatch_mega_logic("get_forex_any_to_any_conversion", None, 10)
+    await dispatch_mega_logic("get_stock_margin_trading_balance", "2330", 10)
+    assert calls == [("usd", "jpy"), ("JPY", "TWD"), ("2330",)]
+
+
+@pytest.mark.asyncio
+async def test_unknown_tool_and_handler_errors(monkeypatch):
+    assert "error" in await dispatch_mega_logic("get_stock_does_not_exist", None, 10)
+
+    async def boom():
+        raise RuntimeError("upstream down")
+    monkeypatch.setitem(TOOL_ROUTES, "get_current_time_taipei", Route(boom, server._no_args))
+    assert await dispatch_mega_logic("get_current_time_taipei", None, 10) == {"error": "Dispatcher 異常: upstream down"}
+
+
+def test_bound_arguments_match_tool_names():
+    assert TOOL_ROUTES["get_forex_jpy_twd_realtime"].handler.args == ("JPY", "TWD")
+    assert TOOL_ROUTES["get_crypto_sol_twd_price"].handler.args == ("SOL",)
+    assert TOOL_ROUTES["get_stock_otc_investor_profile"].handler.args == ("/v1/t187ap03_O",)
@@ -0,0 +1,94 @@
+import json
+import httpx
+import pytest
+from fastmcp import Client
+from taiwan_finance_mcp_mega import server
+from taiwan_finance_mcp_mega.logic.screener import ScreenerLogic
+
+QUOTES = [
+    {"Code": "2330", "Name": "台積電", "ClosingPrice": "1,000.00"},
+    {"Code": "2412", "Name": "中華電", "ClosingPrice": "125.00"},
+    {"Code": "2884", "Name": "玉山金", "ClosingPrice": "28.50"},
+    {"Code": "1101", "Name": "台泥", "ClosingPrice": "33.00"},
+    {"Code": "9999", "Name": "無估值", "ClosingPrice": "10.00"},
+]
+VALUATION = [
+    {"Code": "2330", "Name": "台積電", "PEratio": "25.10", "DividendYield": "1.50", "PBratio": "7.00"},
+    {"Code": "2412", "Name": "中華電", "PEratio": "11.50", "DividendYield": "5.20", "PBratio": "2.50"},
+    {"Code": "2884", "Name": "玉山金", "PEratio": "10.20", "DividendYield": "6.10", "PBratio": "1.60"},
+    {"Code": "1101", "Name": "台泥", "PEratio": "", "DividendYield": "7.00", "PBratio": "1.00"},
+]
+MARGIN = [
+    {"股票代號": "2330", "股票名稱": "台積電", "融資前日餘額": "20,000", "融資今日餘額": "21,000"},
+    {"股票代號": "2412", "股票名稱": "中華電", "融資前日餘額": "3,000", "融資今日餘額": "3,500"},
+    {"股票代號": "2884", "股票名稱": "玉山金", "融資前日餘額": "9,000", "融資今日餘額": "8,000"},
+    {"股票代號": "1101", "股票名稱": "台泥", "融資前日餘額": "5,000", "融資今日餘額": "6,000"},
+]
+REVENUE = [{"公司代號": "2412", "營業收入-去年同月增減(%)": "3.1"}, {"公司代號": "2884", "營業收入-去年同月增減(%)": "12.5"}]
+EPS = [{"公司代號": "2412", "基本每股盈餘(元)": "4.80"}, {"公司代號": "2884", "基本每股盈餘(元)": "1.90"}]
+
+PAYLOADS = {"STOCK_DAY_ALL": QUOTES, "BWIBBU_d": VALUATION, "MI_MARGN": MARGIN, "t187ap05_L": REVENUE, "t187ap14_L": EPS}
+
+
+@pytest.fixture
+def market(mock_upstream):
+    calls = []
+
+    def handler(request):
+        name = request.url.path.rsplit("/", 1)[-1]
+        calls.append(name)
+        return httpx.Response(200, json=PAYLOADS[name])
+
+    mock_upstream(handler)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_screen_joins_datasets_on_code(market):
+    async with Client(server.mcp) as client:
+        result = await client.call_tool("get_stock_screener", {
+            "filters": "PEratio < 12, DividendYield > 5%, 融資今日餘額 > 融資前日餘額", "sort": "-DividendYield"})
+    body = json.loads(result.data)
+    assert body["data"] == [{"Code": "2412", "Name": "中華電", "PEratio": "11.50", "DividendYield": "5.20",
+                             "融資今日餘額": "3,500", "融資前日餘額": "3,000"}]
+    assert body["_meta"]["page"]["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_sort_arithmetic_and_missing_values(market):
+    rows = await ScreenerLogic.screen("DividendYield >= 5, 融資今日餘額 - 融資前日餘額 > 0", "PEratio")
+    # 台泥無本益比 (缺值) 仍符合條件，但排序時置於最後
+    assert [r["Code"] for r in rows] == ["2412", "1101"]
+    rows = await ScreenerLogic.screen("revenue.營業收入-去年同月增減(%) > 10", "-eps.基本每股盈餘(元)")
+    assert [r["Code"] for r in rows] == ["2884"]
+    # 同名欄位 (quote / valuation 的 Name) 不重複輸出；未出現在其他資料集的代號視為缺值
+    assert [r["Code"] for r in await ScreenerLogic.screen("ClosingPrice < 20")] == ["9999"]
+
+
+@pytest.mark.asyncio
+async def test_frame_is_reused_until_data_refreshes(market):
+    first = await ScreenerLogic.frame()
+    await ScreenerLogic.screen("PEratio < 30")
+    assert await ScreenerLogic.frame() is first
+    assert sorted(market) == sorted(PAYLOADS)  # 每個資料集只向上游請求一次
+
+
+@pytest.mark.asyncio
+async def test_screen_errors(market):
+    assert "未知的篩選欄位" in (await ScreenerLogic.screen("Foo < 1"))["error"]
+    assert "無法解析篩選條件" in (await ScreenerLogic.screen("PEratio"))["error"]
+    assert "請指定篩選條件" in (await ScreenerLogic.screen(None))["error"]
+    fields = await ScreenerLogic.list_fields()
+    assert "融資今日餘額" in fields["margin"] and "PEratio" in fields["valuation"]
+
+
+@pytest.mark.asyncio
+async def test_not_equal_and_thousands_separators(market):
+    # 缺值 (台泥的空本益比、不在估值資料集的 9999) 不符合 != 條件
+    rows = await ScreenerLogic.screen("PEratio != 11.5", "PEratio")
+    assert [r["Code"] for r in rows] == ["2884", "2330"]
+    # 千分位逗號不作為條件分隔
+    frame = await ScreenerLogic.frame()
+    assert len(frame.parse_filters("融資今日餘額 >= 6,000, PEratio < 30")) == 2
+    rows = await ScreenerLogic.screen("融資今日餘額 >= 21,000,DividendYield > 1")
+    assert [r["Code"] for r in rows] == ["2330"]
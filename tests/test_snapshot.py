@@ -0,0 +1,71 @@
+import asyncio
+import json
+import time
+import pytest
+import httpx
+from taiwan_finance_mcp_mega.logic.stock import StockLogic
+from taiwan_finance_mcp_mega.server import _call_tool
+
+PAYLOADS = {
+    "STOCK_DAY_ALL": [{"Code": "2330", "Name": "台積電", "ClosingPrice": "1000.00"}, {"Code": "2317", "Name": "鴻海", "ClosingPrice": "200.00"}],
+    "BWIBBU_d": [{"Code": "2330", "PEratio": "25.10", "DividendYield": "1.60"}],
+    "MI_MARGN": [{"股票代號": "2330", "融資今日餘額": "20,000"}],
+    "t187ap05_L": [{"公司代號": "2330", "營業收入-當月營收": "300000000"}],
+    "t187ap14_L": [{"公司代號": "2330", "基本每股盈餘(元)": "12.5"}],
+    "t187ap04_L": [{"公司代號": "2330", "主旨": f"公告 {i}"} for i in range(8)],
+    "t187ap03_L": [{"公司代號": "2330", "公司簡稱": "台積電", "公司名稱": "台灣積體電路製造股份有限公司"}],
+    "t187ap03_O": [], "t187ap03_P": [],
+}
+
+
+def upstream(mock_upstream, delays=None):
+    delays = delays or {}
+    active, peak = [0], [0]
+
+    async def handler(request: httpx.Request):
+        name = request.url.path.rsplit("/", 1)[-1]
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(delays.get(name, 0.02))
+        active[0] -= 1
+        return httpx.Response(200, json=PAYLOADS[name])
+    mock_upstream(handler)
+    return peak
+
+
+@pytest.mark.asyncio
+async def test_snapshot_merges_sections_concurrently(mock_upstream):
+    peak = upstream(mock_upstream)
+    started = time.monotonic()
+    snap = await StockLogic.get_stock_snapshot("2330", deadline=5)
+    assert time.monotonic() - started < 0.02 * len(StockLogic.SNAPSHOT_SECTIONS)
+    assert peak[0] == len(StockLogic.SNAPSHOT_SECTIONS)
+    assert snap["code"] == "2330" and snap["name"] == "台積電"
+    assert snap["quote"]["ClosingPrice"] == "1000.00" and snap["valuation"]["PEratio"] == "25.10"
+    assert len(snap["announcements"]) == StockLogic.SNAPSHOT_MULTI_ROW["announcements"]
+    assert set(snap["as_of"]) == set(StockLogic.SNAPSHOT_SECTIONS) and all(snap["as_of"].values())
+    assert snap["issues"] == {}
+
+
+@pytest.mark.asyncio
+async def test_slow_section_does_not_block_past_deadline(mock_upstream):
+    upstream(mock_upstream, delays={"MI_MARGN": 0.5})
+    started = time.monotonic()
+    snap = await StockLogic.get_stock_snapshot("2317", deadline=0.2)
+    assert time.monotonic() - started < 0.4
+    assert snap["quote"]["Name"] == "鴻海"
+    assert snap["margin"] is None and snap["issues"]["margin"] == "timeout"
+    assert snap["issues"]["valuation"] == "not_found" and snap["as_of"]["valuation"]
+
+    # 逾時區段的上游請求仍於背景完成並寫入緩存
+    await asyncio.sleep(0.4)
+    again = await StockLogic.get_stock_snapshot("2317", deadline=0.2)
+    assert again["issues"]["margin"] == "not_found"
+
+
+@pytest.mark.asyncio
+async def test_snapshot_tool_reports_combined_freshness(mock_upstream):
+    upstream(mock_upstream)
+    out = json.loads(await _call_tool("get_stock_snapshot", " 台積電 ", 10, 0, None, None))
+    assert out["ticker"] == "台積電" and out["code"] == "2330" and out["_meta"]["cache"] == "fresh"
+    assert "error" in await StockLogic.get_stock_snapshot("2330,2317")
@@ -0,0 +1,93 @@
+import json
+import pytest
+import httpx
+from taiwan_finance_mcp_mega.logic.stock import StockLogic
+from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+from taiwan_finance_mcp_mega.utils.dataset_index import build_code_index
+from taiwan_finance_mcp_mega.server import _call_tool
+
+URL = "https://openapi.twse.com.tw/v1/exchangeReport/STOCK_DAY_ALL"
+ROWS = [
+    {"Code": "2330", "Name": "台積電", "ClosingPrice": "1000.00"},
+    {"Code": "2317", "Name": "鴻海", "ClosingPrice": "200.00"},
+    {"公司代號": " 0050 ", "公司名稱": "元大台灣50"},
+    {"Code": "1101", "Name": "台泥", "Note": "2330"},
+]
+
+
+@pytest.fixture
+def twse(mock_upstream):
+    calls = []
+
+    def handler(request: httpx.Request):
+        calls.append(str(request.url))
+        return httpx.Response(200, json=ROWS)
+    mock_upstream(handler)
+    return calls
+
+
+@pytest.mark.asyncio
+class TestFetchAndFilterIndex:
+    """
+    驗證代碼索引與舊版線性掃描結果一致，且每份緩存 payload 只建立一次。
+    """
+
+    async def test_fast_path_matches_code_keys(self, twse):
+        assert await StockLogic._fetch_and_filter(URL, " 2330 ") == [ROWS[0]]
+        assert await StockLogic._fetch_and_filter(URL, "0050", "公司代號") == [ROWS[2]]
+
+    async def test_fallback_matches_any_field(self, twse):
+        assert await StockLogic._fetch_and_filter(URL, "鴻海") == [ROWS[1]]
+        assert await StockLogic._fetch_and_filter(URL, "9999") == []
+
+    async def test_no_symbol_returns_market_head(self, twse):
+        assert await StockLogic._fetch_and_filter(URL, None) == ROWS
+        assert await StockLogic._fetch_and_filter(URL, "  ") == ROWS
+
+    async def test_index_built_once_per_cache_entry(self, twse, monkeypatch):
+        builds = []
+        real = build_code_index
+        monkeypatch.setattr("taiwan_finance_mcp_mega.logic.stock.build_code_index", lambda *a: builds.append(1) or real(*a))
+
+        for symbol in ("2330", "2317", "1101"):
+            await StockLogic._fetch_and_filter(URL, symbol)
+        assert len(builds) == 1
+
+        # 緩存被取代時索引一併丟棄並重建
+        await AsyncHttpClient.fetch_json(URL, refresh=True)
+        await StockLogic._fetch_and_filter(URL, "2330")
+        assert len(builds) == 2
+        assert len(twse) == 2
+
+
+@pytest.mark.asyncio
+class TestBatchLookup:
+    async def test_results_keyed_by_ticker_with_not_found_markers(self, twse):
+        res = await StockLogic._fetch_and_filter_many(URL, "2330, 2317，9999,2330")
+        assert list(res["results"]) == ["2330", "2317", "9999"]
+        assert res["tickers"] == 3 and res["found"] == 2
+        assert res["results"]["2330"] == {"status": "ok", "resolved": "2330", "rows": [ROWS[0]]}
+        assert res["results"]["9999"] == {"status": "not_found", "rows": []}
+
+    async def test_truncation_and_upstream_errors_are_reported(self, mock_upstream, monkeypatch):
+        monkeypatch.setattr("taiwan_finance_mcp_mega.logic.stock.Config.MAX_BATCH_TICKERS", 2)
+        mock_upstream(lambda request: httpx.Response(200, json=ROWS))
+        res = await StockLogic._fetch_and_filter_many(URL, "2330,2317,1101,0050")
+        assert list(res["results"]) == ["2330", "2317"] and res["truncated"] == ["1101", "0050"]
+
+        AsyncHttpClient._cache.clear()
+        mock_upstream(lambda request: httpx.Response(503))
+        res = await StockLogic._fetch_and_filter_many(URL, "2330,2317")
+        assert "error" in res and "results" not in res
+
+    async def test_single_dataset_fetch_and_index_build(self, twse, monkeypatch):
+        builds = []
+        real = build_code_index
+        monkeypatch.setattr("taiwan_finance_mcp_mega.logic.stock.build_code_index", lambda *a: builds.append(1) or real(*a))
+        res = await StockLogic.call_generic_api("/exchangeReport/STOCK_DAY_ALL", ["2330", "1101", "0050"])
+        assert res["found"] == 3 and len(builds) == 1 and len(twse) == 1
+
+    async def test_batch_tool_applies_limit_and_fields_per_ticker(self, twse):
+        out = json.loads(await _call_tool("get_stock_quotes_realtime_all", [" 2330", "2317 "], 1, 0, None, "ClosingPrice"))
+        assert out["results"]["2330"]["rows"] == [{"ClosingPrice": "1000.00"}]
+        assert out["results"]["2317"]["rows"] == [{"ClosingPrice": "200.00"}]
@@ -0,0 +1,70 @@
+import time
+import pytest
+import httpx
+from taiwan_finance_mcp_mega.logic.stock import StockLogic
+from taiwan_finance_mcp_mega.utils.ticker_search import TickerSearchIndex
+
+LISTED = [
+    {"公司代號": "2330", "公司名稱": "台灣積體電路製造股份有限公司", "公司簡稱": "台積電", "英文簡稱": "TSMC"},
+    {"公司代號": "2317", "公司名稱": "鴻海精密工業股份有限公司", "公司簡稱": "鴻海", "英文簡稱": "HON HAI"},
+    {"公司代號": "2303", "公司名稱": "聯華電子股份有限公司", "公司簡稱": "聯電", "英文簡稱": "UMC"},
+]
+OTC = [
+    {"SecuritiesCompanyCode": "5347", "CompanyName": "世界先進積體電路股份有限公司", "CompanyAbbreviation": "世界"},
+]
+
+
+@pytest.fixture
+def index():
+    idx = TickerSearchIndex()
+    idx.update_market("TWSE", LISTED)
+    idx.update_market("TPEx", OTC)
+    return idx
+
+
+class TestTickerSearchIndex:
+    def test_exact_names_codes_and_english(self, index):
+        assert index.resolve("台積電") == "2330"
+        assert index.resolve("hon hai") == "2317"
+        assert index.resolve(" 5347 ") == "5347"
+        assert index.resolve("臺灣積體電路製造股份有限公司") == "2330"
+
+    def test_prefix_and_fuzzy(self, index):
+        assert index.resolve("鴻海精密") == "2317"
+        assert index.search("積體電路", limit=2)[0]["match"] == "fuzzy"
+        assert {r["code"] for r in index.search("積體電路")} == {"2330", "5347"}
+        assert index.resolve("完全不存在") is None
+
+    def test_incremental_refresh(self, index):
+        renamed = [dict(LISTED[0], 公司簡稱="台積"), LISTED[1]]
+        assert index.update_market("TWSE", renamed) == 2  # 2330 變更、2303 下市
+        assert index.update_market("TWSE", renamed) == 0  # 同一份 payload 不重複處理
+        assert index.resolve("聯電") is None
+        assert index.search("台積")[0]["match"] == "exact"
+        assert index.resolve("世界") == "5347"
+
+    def test_lookup_is_sub_millisecond(self):
+        idx = TickerSearchIndex()
+        idx.update_market("TWSE", [{"公司代號": str(1000 + i), "公司簡稱": f"測試公司{i}"} for i in range(3000)])
+        start = time.perf_counter()
+        for _ in range(100):
+            idx.resolve("測試公司1234")
+        assert (time.perf_counter() - start) / 100 < 1e-3
+
+
+@pytest.mark.asyncio
+async def test_stock_tools_resolve_names(mock_upstream):
+    def handler(request: httpx.Request):
+        path = request.url.path
+        if path.endswith("t187ap03_L"):
+            return httpx.Response(200, json=LISTED)
+        if path.endswith("t187ap03_O"):
+            assert request.url.host == "www.tpex.org.tw"
+            return httpx.Response(200, json=OTC)
+        if path.endswith("t187ap03_P"):
+            return httpx.Response(200, json=[])
+        return httpx.Response(200, json=[{"Code": "2330", "ClosingPrice": "1000"}, {"Code": "2317", "ClosingPrice": "200"}])
+    mock_upstream(handler)
+
+    res = await StockLogic.call_generic_api("/exchangeReport/BWIBBU_d", "鴻海")
+    assert res == [{"Code": "2317", "ClosingPrice": "200"}]
@@ -0,0 +1,70 @@
+import asyncio
+import os
+import time
+import httpx
+import pytest
+from taiwan_finance_mcp_mega import server
+from taiwan_finance_mcp_mega.config import Config
+from taiwan_finance_mcp_mega.utils import tracing
+from taiwan_finance_mcp_mega.utils.tracing import LoopLagMonitor, Tracer, span
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_span_is_noop_outside_trace():
+    assert span("x") is tracing._NOOP
+
+
+@pytest.mark.asyncio
+async def test_tool_call_trace_covers_pipeline(mock_upstream, monkeypatch):
+    mock_upstream(lambda request: httpx.Response(200, json=[{"Code": "2330", "Name": "台積電"}]))
+    tracer = Tracer(enabled=True, slow=0)
+    monkeypatch.setattr(server, "tracer", tracer)
+    await server._call_tool("get_stock_quotes_realtime_all", "2330", 10, 0, None, None)
+
+    trace = tracer.recent[-1]
+    names = [s.name for s in trace.spans]
+    for name in ("dispatch", "cache.lookup", "singleflight.wait", "upstream.fetch", "upstream.queue",
+                 "json.stream_parse", "filter.code_index", "serialize"):
+        assert name in names
+    by_name = {s.name: i for i, s in enumerate(trace.spans)}
+    # 上游下載於 single-flight task 內執行，仍掛在等待它的 span 之下
+    assert trace.spans[by_name["upstream.fetch"]].parent == by_name["singleflight.wait"]
+    assert trace.spans[by_name["singleflight.wait"]].parent == by_name["dispatch"]
+    assert all(s.end is not None for s in trace.spans)
+    assert "get_stock_quotes_realtime_all" in trace.render()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.mcp.http_app()), base_url="http://test") as client:
+        body = (await client.get("/debug/traces")).json()
+    assert body["enabled"] and body["traces"][0]["name"] == "get_stock_quotes_realtime_all"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode, suffix", [("stacks", ".folded"), ("cprofile", ".prof")])
+async def test_profiler_dumps_slow_requests(tmp_path, monkeypatch, mode, suffix):
+    monkeypatch.setattr(Config, "PROFILE_DIR", str(tmp_path))
+    tracer = Tracer(enabled=False, slow=0, profile_mode=mode, profile_threshold=0.03, sample_interval=0.001)
+    with tracer.request("fast_tool"):
+        pass
+    with tracer.request("slow_tool"):
+        busy(0.1)
+    files = os.listdir(tmp_path)
+    assert len(files) == 1 and files[0].endswith(suffix) and "slow_tool" in files[0]
+    if mode == "stacks":
+        with open(tmp_path / files[0], encoding="utf-8") as f:
+            assert "test_tracing.py:busy" in f.read()
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor_flags_blocking_call():
+    monitor = LoopLagMonitor(threshold=0.05, interval=0.01)
+    monitor.start()
+    await asyncio.sleep(0.03)
+    busy(0.3)  # 阻塞 event loop
+    await asyncio.sleep(0.03)
+    monitor.stop()
+    assert monitor.blocked and "test_tracing.py:busy" in monitor.blocked[-1]
@@ -0,0 +1,173 @@
+import asyncio
+import time
+import httpx
+import pytest
+from taiwan_finance_mcp_mega.config import Config
+from taiwan_finance_mcp_mega.utils.http_client import AsyncHttpClient
+from taiwan_finance_mcp_mega.utils.upstream import CircuitBreaker, CircuitOpenError, HostLimits, TokenBucket, UpstreamRegistry
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_allows_burst_then_throttles():
+    bucket = TokenBucket(rate=20.0, burst=2)
+    waits = [await bucket.acquire() for _ in range(4)]
+    assert waits[0] < 0.01 and waits[1] < 0.01
+    # 超出 burst 後每個 token 約需 1/rate 秒
+    assert sum(waits[2:]) >= 0.08
+
+
+@pytest.mark.asyncio
+async def test_unlimited_bucket_never_waits():
+    bucket = TokenBucket(rate=0, burst=1)
+    assert [await bucket.acquire() for _ in range(50)] == [0.0] * 50
+
+
+def test_host_limits_from_config():
+    registry = UpstreamRegistry(Config.UPSTREAM_LIMITS, Config.UPSTREAM_DEFAULT)
+    assert registry.limits_for("api.coingecko.com").rate == 0.5
+    assert registry.limits_for("apiservice.mol.gov.tw").timeout == 60.0
+    assert registry.limits_for("example.org") == registry.defaults
+
+
+@pytest.mark.asyncio
+async def test_slow_host_does_not_block_other_hosts():
+    release = asyncio.Event()
+
+    async def handler(request):
+        if request.url.host == "slow.example":
+            await release.wait()
+        return httpx.Response(200, json={"host": request.url.host})
+
+    registry = UpstreamRegistry([(r"slow\.example", {"max_connections": 1})], {})
+    registry.transport = httpx.MockTransport(handler)
+
+    async def get(url):
+        async with registry.pool_for(url).slot() as client:
+            return (await client.get(url)).json()
+
+    slow = [asyncio.create_task(get("https://slow.example/a")) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    # 慢速主機的連線名額已滿，其他主機仍立即完成
+    assert await asyncio.wait_for(get("https://fast.example/b"), 1) == {"host": "fast.example"}
+    stats = registry.stats()
+    assert stats["slow.example"]["in_flight"] == 1 and stats["slow.example"]["waiting"] == 1
+
+    await asyncio.sleep(0.05)
+    release.set()
+    await asyncio.gather(*slow)
+    stats = registry.stats()["slow.example"]
+    assert stats["requests"] == 2 and stats["queue_wait_max_ms"] >= 50
+    assert registry.stats()["fast.example"]["queue_wait_max_ms"] < 50
+    await registry.aclose()
+
+
+@pytest.mark.asyncio
+async def test_fetch_reports_per_host_queue_wait(mock_upstream):
+    mock_upstream(lambda request: httpx.Response(200, json=[{"a": "1"}]))
+    await AsyncHttpClient.fetch_json(f"{Config.TWSE_BASE}/upstream_test")
+    stats = AsyncHttpClient.upstream_stats()["openapi.twse.com.tw"]
+    assert stats["requests"] == 1
+    assert stats["rate"] == 3.0 and "queue_wait_avg_ms" in stats
+
+
+@pytest.fixture
+def fast_limits(monkeypatch):
+    """未列於設定的主機改用短退避、低熔斷門檻，避免測試等待。"""
+    limits = HostLimits(retries=1, backoff=0.01, breaker_threshold=2, breaker_cooldown=60)
+    monkeypatch.setattr(AsyncHttpClient._upstreams, "defaults", limits)
+    return limits
+
+
+@pytest.mark.asyncio
+async def test_retryable_error_is_retried(mock_upstream, fast_limits):
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(503 if len(calls) == 1 else 200, json=[{"a": "1"}])
+
+    mock_upstream(handler)
+    assert await AsyncHttpClient.fetch_json("https://flaky.example/data") == [{"a": "1"}]
+    assert len(calls) == 2
+    stats = AsyncHttpClient.upstream_stats()["flaky.example"]
+    assert stats["retries"] == 1 and stats["circuit"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_failure_is_negatively_cached(mock_upstream, fast_limits):
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(404)
+
+    mock_upstream(handler)
+    first = await AsyncHttpClient.fetch_json("https://gone.example/data")
+    second = await AsyncHttpClient.fetch_json("https://gone.example/data")
+    # 404 不重試，且短期內相同請求不再連線上游
+    assert "error" in first and second == first
+    assert len(calls) == 1
+    assert AsyncHttpClient.upstream_stats()["gone.example"]["circuit"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast(mock_upstream, fast_limits):
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        raise httpx.ConnectError("connection refused", request=request)
+
+    mock_upstream(handler)
+    await AsyncHttpClient.fetch_json("https://down.example/a")
+    await AsyncHttpClient.fetch_json("https://down.example/b")
+    assert len(calls) == 4  # 兩個請求各重試一次後熔斷
+    result = await AsyncHttpClient.fetch_json("https://down.example/c")
+    assert "circuit open" in result["error"] and len(calls) == 4
+    assert AsyncHttpClient.upstream_stats()["down.example"]["circuit"] == "open"
+
+
+def test_breaker_half_open_allows_single_probe():
+    breaker = CircuitBreaker("h", threshold=1, cooldown=0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    breaker.before_request()  # 冷卻結束，放行試探請求
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_request()
+
+    breaker.record_failure()
+    breaker.before_request()
+    breaker.record_failure()  # 試探失敗，重新熔斷
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_replaced_pools_are_closed():
+    registry = UpstreamRegistry([], {})
+
+    async def pool():
+        return registry.pool_for("https://a.test/x")
+
+    async def replace():
+        old = registry.pool_for("https://a.test/x")
+        registry.reset()
+        await asyncio.sleep(0)  # 排程中的 aclose 於同一 loop 完成
+        return old
+
+    # 於目前 loop 清除：排程關閉
+    assert asyncio.run(replace()).client.is_closed
+    # loop 未在執行中：直接於該 loop 關閉
+    loop = asyncio.new_event_loop()
+    idle = loop.run_until_complete(pool())
+    registry.reset()
+    assert idle.client.is_closed
+    # loop 已結束 (換 loop 時重建)：保留至 aclose()
+    stale = loop.run_until_complete(pool())
+    loop.close()
+    fresh = asyncio.run(pool())
+    assert fresh is not stale and not stale.client.is_closed
+    asyncio.run(registry.aclose())
+    assert stale.client.is_closed and fresh.client.is_closed
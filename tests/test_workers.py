@@ -0,0 +1,85 @@
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import time
+import httpx
+import pytest
+from taiwan_finance_mcp_mega.config import Config
+from taiwan_finance_mcp_mega.utils.replay import FixtureStore
+
+URL = f"{Config.TWSE_BASE}/exchangeReport/STOCK_DAY_ALL"
+ACCEPT = {"Accept": "application/json, text/event-stream"}
+SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _call(base: str, request_id: int) -> httpx.Response:
+    body = {"jsonrpc": "2.0", "id": request_id, "method": "tools/call",
+            "params": {"name": "get_stock_quotes_realtime_all", "arguments": {"ticker": "2330", "limit": 5}}}
+    return httpx.post(f"{base}/mcp", json=body, headers=ACCEPT, timeout=30)
+
+
+@pytest.fixture
+def workers_server(tmp_path):
+    """以 --workers 2 啟動 HTTP Server (回放 fixture，不連線上游)。"""
+    fixtures = str(tmp_path / "fixtures")
+    FixtureStore(fixtures).put_json(URL, [{"Code": "2330", "Name": "台積電", "ClosingPrice": "1000.00"}])
+    port = _free_port()
+    env = dict(os.environ, PYTHONPATH=os.path.abspath(SRC), LOG_LEVEL="WARNING")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "taiwan_finance_mcp_mega.server", "--mode", "http", "--port", str(port),
+         "--workers", "2", "--replay", fixtures, "--cache-dir", str(tmp_path / "cache")],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while True:
+        assert process.poll() is None, "server exited during startup"
+        try:
+            if httpx.get(f"{base}/metrics", timeout=1).status_code == 200:
+                break
+        except httpx.HTTPError:
+            pass
+        assert time.monotonic() < deadline, "server did not start"
+        time.sleep(0.2)
+    yield base, process
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=20)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        pytest.fail("supervisor did not stop its workers on SIGTERM")
+
+
+def test_workers_serve_stateless_tool_calls(workers_server):
+    base, process = workers_server
+    # 無 initialize / session id：多 worker 時每個請求都可能落在不同行程
+    for i in range(6):
+        response = _call(base, i)
+        assert response.status_code == 200
+        assert "台積電" in response.text and '"isError":false' in response.text
+    process.send_signal(signal.SIGTERM)
+    assert process.wait(timeout=20) == 0
+
+
+def _tool_calls(base: str) -> float:
+    text = httpx.get(f"{base}/metrics", timeout=5).text
+    m = re.search(r'^mcp_tool_calls_total\{tool="get_stock_quotes_realtime_all",status="ok"\} (\S+)$', text, re.M)
+    return float(m.group(1)) if m else 0.0
+
+
+def test_workers_metrics_are_aggregated(workers_server):
+    base, _ = workers_server
+    for i in range(6):
+        assert _call(base, i).status_code == 200
+    # 其他 worker 的快照每 METRICS_SHARE_INTERVAL 秒寫入一次；之後每次抓取 (不論落在哪個 worker) 皆為全部 worker 的合計
+    time.sleep(Config.METRICS_SHARE_INTERVAL + 0.5)
+    assert [_tool_calls(base) for _ in range(8)] == [6] * 8